@@ -8,6 +8,10 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # orjson-backed jsonify (stdlib fallback) that also serializes the row DTOs
+    from services.json_encoding import init_json_encoding
+    init_json_encoding(app)
+    
     # Enable CORS for React frontend
     CORS(app, origins=["http://localhost:8080", "http://127.0.0.1:8080"], supports_credentials=True)
     
@@ -21,8 +25,17 @@ def create_app(config_class=Config):
     if upload_folder and not os.path.exists(upload_folder):
         os.makedirs(upload_folder)
     
-    # Initialize extensions with app
-    db.init_app(app)
+    # Replica binds must be in the config before the engines are created
+    from services.read_replicas import init_read_replicas
+    init_read_replicas(app)
+    
+    # Initialize extensions with app (engine options / SQLite PRAGMAs from the DB_ENGINE_PROFILE)
+    from services.database import init_database
+    init_database(app)
+    
+    # Per-request timings, SQL counts and spans; Prometheus metrics on /metrics
+    from services.instrumentation import init_instrumentation
+    init_instrumentation(app)
     
     # Register blueprints
     from routes.main import main_bp
@@ -32,11 +45,39 @@ def create_app(config_class=Config):
     app.register_blueprint(api_bp, url_prefix='/api')
     
     # Import models to register them with SQLAlchemy
-    from models import Pocketshow, Post, Comment, User, Vote
+    from models import Pocketshow, Post, Comment, User, Vote, ImageJob, MediaBlob, PromptResult, IdempotencyKey
     
-    # Create database tables
-    with app.app_context():
+    # Schema creation is an explicit step (`flask init-db`) so importing the app never touches the database
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create any missing database tables."""
+        import click
         db.create_all()
+        click.echo(f"Database tables ready ({app.config['SQLALCHEMY_DATABASE_URI']})")
+    
+    # Rendered feeds keyed by spoiler progress, invalidated when posts / comments / votes commit
+    from services.feed_cache import init_feed_cache
+    init_feed_cache(app)
+    
+    # gzip / brotli for JSON and HTML bodies above COMPRESS_MIN_BYTES
+    from services.compression import init_compression
+    init_compression(app)
+    
+    # Content-addressed storage for generated and uploaded images
+    from services.blob_store import init_blob_store
+    init_blob_store(app)
+    
+    # Thumbnails / WebP variants of stored images, rendered lazily and cached on disk
+    from services.image_derivatives import init_image_derivatives
+    init_image_derivatives(app)
+    
+    # Periodic cleanup of abandoned temp files and unreferenced blobs over the upload quota
+    from services.janitor import init_janitor
+    init_janitor(app)
+    
+    # Start the background worker pool for image generation jobs
+    from services.image_jobs import init_image_jobs
+    init_image_jobs(app)
     
     return app
 
@@ -44,4 +85,7 @@ def create_app(config_class=Config):
 app = create_app()
 
 if __name__ == '__main__':
+    # Development server convenience; deployments run `flask --app app init-db` once
+    with app.app_context():
+        db.create_all()
     app.run(debug=True)
@@ -0,0 +1,302 @@
+"""
+End-to-end API latency benchmark.
+Seeds a synthetic dataset (benchmarks.synthetic_data), runs the Flask app in-process
+with the offline fake LLM / image providers, and reports p50/p95/p99 latency, SQL statements
+and body bytes per request for the main read and write paths (including compressed,
+compact and ETag-polling feed requests). Results are written to JSON so runs
+can be compared across commits.
+
+Usage:
+    python -m benchmarks.bench_api [--preset small|medium|large] [--requests 200]
+                                   [--output results.json] [--compare baseline.json]
+    python -m benchmarks.bench_api --database-url sqlite:////tmp/big.db --preset large   # seeded once, reused
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic_data import PRESETS, dataset_sizes, seed_database
+
+PROJECT_ROOT = Path(__file__).parent.parent
+QUERIES_PATTERN = re.compile(r'desc="(\d+) queries"')
+MIN_SAMPLES = 5
+
+
+# ==================== APP SETUP ====================
+
+def load_app(database_url: str, workdir: str, llm_latency_ms: float = 0.0, seed: int = 7):
+    """Import the app against the benchmark database with storage under workdir and fake AI providers"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['LLM_PROVIDER'] = 'fake'
+    os.environ['IMAGE_PROVIDER'] = 'fake'
+    os.environ['FAKE_LLM_LATENCY_MS'] = str(llm_latency_ms)
+    os.environ.setdefault('FAKE_SEED', str(seed))
+    os.environ.setdefault('JANITOR_INTERVAL_SECONDS', '0')
+    os.environ.setdefault('SLOW_REQUEST_MS', '0')
+
+    import config
+    uploads = os.path.join(workdir, 'uploads')
+    config.Config.UPLOAD_FOLDER = uploads
+    config.Config.BLOB_FOLDER = os.path.join(uploads, 'blobs')
+    config.Config.DERIVATIVE_FOLDER = os.path.join(uploads, 'derivatives')
+
+    import app as app_module
+    return app_module.app
+
+
+def ensure_dataset(app, sizes: Dict[str, int], seed: int, reseed: bool) -> Dict:
+    """Seed the database unless it already holds a dataset"""
+    from extensions import db
+    from models import Comment, Pocketshow, Post, User, Vote
+
+    with app.app_context():
+        db.create_all()
+        if Post.query.first() is not None:
+            if not reseed:
+                counts = {name: model.query.count() for name, model in
+                          (('users', User), ('pocketshows', Pocketshow), ('posts', Post),
+                           ('comments', Comment), ('votes', Vote))}
+                counts['reused'] = True
+                return counts
+            db.drop_all()
+            db.create_all()
+        print(f"Seeding {sizes} ...")
+        return seed_database(db, sizes, random.Random(seed))
+
+
+# ==================== SCENARIOS ====================
+
+def _login(client, user_id: int):
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+
+
+def build_scenarios(sizes: Dict[str, int], rng: random.Random) -> Dict[str, Callable]:
+    """Scenario name -> fn(client) returning the response"""
+    posts, users = sizes['posts'], sizes['users']
+    first_regular = sizes['official'] + 1
+
+    def random_post() -> int:
+        return rng.randint(1, posts)
+
+    def random_user() -> int:
+        return rng.randint(first_regular, users)
+
+    def posts_feed(client):
+        return client.get('/api/posts')
+
+    def posts_feed_gzip(client):
+        return client.get('/api/posts', headers={'Accept-Encoding': 'gzip, br'})
+
+    def posts_feed_compact(client):
+        return client.get('/api/posts?compact=1', headers={'Accept-Encoding': 'gzip, br'})
+
+    poll_etag = {}
+
+    def posts_feed_poll(client):
+        # Polling client revalidating with the ETag of its last response (304 while nothing changed)
+        headers = {'Accept-Encoding': 'gzip, br'}
+        if poll_etag.get('value'):
+            headers['If-None-Match'] = poll_etag['value']
+        response = client.get('/api/posts', headers=headers)
+        poll_etag['value'] = response.headers.get('ETag') or poll_etag.get('value')
+        return response
+
+    def posts_feed_watching(client):
+        # Regular users have a 50% chance of watched_shows, which turns on the episode filter
+        _login(client, random_user())
+        return client.get('/api/posts')
+
+    def pocketshow_posts(client):
+        return client.get(f'/api/pocketshows/{rng.randint(1, sizes["pocketshows"])}/posts')
+
+    def post_page(client):
+        return client.get(f'/post/{random_post()}')
+
+    def post_json(client):
+        return client.get(f'/api/posts/{random_post()}')
+
+    def vote_post(client):
+        return client.post(f'/api/posts/{random_post()}/vote',
+                           json={'user_id': random_user(), 'is_upvote': rng.random() < 0.8})
+
+    def create_comment(client):
+        # Triggers comment generation by the official characters through the fake LLM
+        return client.post(f'/api/posts/{random_post()}/comments',
+                           json={'content': 'Benchmark comment', 'author_id': random_user()})
+
+    return {
+        'posts_feed': posts_feed,
+        'posts_feed_gzip': posts_feed_gzip,
+        'posts_feed_compact': posts_feed_compact,
+        'posts_feed_poll': posts_feed_poll,
+        'posts_feed_watching': posts_feed_watching,
+        'pocketshow_posts': pocketshow_posts,
+        'post_page': post_page,
+        'post_json': post_json,
+        'vote_post': vote_post,
+        'create_comment': create_comment,
+    }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(app, fn: Callable, requests: int, warmup: int, quiet: bool,
+                 max_seconds: Optional[float] = None) -> Dict:
+    """
+    Time `requests` calls of one scenario and collect SQL statement counts.
+
+    Args:
+        max_seconds: Stop early (after at least MIN_SAMPLES) once the scenario has run this long,
+            so a pathological endpoint doesn't hold up the whole suite
+    """
+    client = app.test_client()
+    latencies, queries, sizes, errors = [], [], [], 0
+    deadline = time.perf_counter() + max_seconds if max_seconds else None
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+        for i in range(warmup + requests):
+            start = time.perf_counter()
+            response = fn(client)
+            body = response.get_data()
+            elapsed = (time.perf_counter() - start) * 1000
+            if i < warmup:
+                continue
+            latencies.append(elapsed)
+            sizes.append(len(body))
+            if response.status_code >= 400:
+                errors += 1
+            match = QUERIES_PATTERN.search(response.headers.get('Server-Timing', ''))
+            if match:
+                queries.append(int(match.group(1)))
+            if deadline and len(latencies) >= MIN_SAMPLES and time.perf_counter() > deadline:
+                break
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+        'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        'max_queries': max(queries) if queries else None,
+        'bytes_per_response': round(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+# ==================== REPORTING ====================
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    print("=" * 96)
+    print(f"API BENCHMARK ({report['meta']['commit'] or 'no commit'}, dataset: "
+          f"{', '.join(f'{k}={v}' for k, v in report['dataset'].items())})")
+    print("=" * 96)
+    header = f"{'scenario':<22}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}{'bytes':>10}{'errors':>8}"
+    if baseline:
+        header += f"{'p50 vs base':>14}{'queries base':>14}"
+    print(header)
+    for name, result in report['results'].items():
+        line = (f"{name:<22}{result['requests']:>6}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['queries_per_request'] if result['queries_per_request'] is not None else '-':>10}"
+                f"{result.get('bytes_per_response', 0):>10}{result['errors']:>8}")
+        base = (baseline or {}).get('results', {}).get(name)
+        if base:
+            ratio = result['p50_ms'] / base['p50_ms'] if base['p50_ms'] else float('inf')
+            line += f"{ratio:>13.2f}x{base['queries_per_request'] if base['queries_per_request'] is not None else '-':>14}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    for key in PRESETS['small']:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=int, dest=key, help=f"Override the preset's {key}")
+    parser.add_argument('--database-url', help='Benchmark database (default: a temporary SQLite file); '
+                                               'an already seeded database is reused')
+    parser.add_argument('--reseed', action='store_true', help='Drop and reseed an existing database')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per scenario')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help='Time budget per scenario (fewer requests are measured if it runs out)')
+    parser.add_argument('--scenarios', help='Comma-separated subset of scenarios')
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help='Median latency of fake LLM calls')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default='bench_api_results.json')
+    parser.add_argument('--compare', help='Earlier results JSON to compare against')
+    parser.add_argument('--verbose', action='store_true', help="Show the app's log output while measuring")
+    args = parser.parse_args()
+
+    sizes = dataset_sizes(args.preset, **{key: getattr(args, key) for key in PRESETS['small']})
+
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        app = load_app(database_url, workdir, args.llm_latency_ms, args.seed)
+        counts = ensure_dataset(app, sizes, args.seed, args.reseed)
+        print(f"Dataset: {counts}")
+
+        scenarios = build_scenarios(sizes, random.Random(args.seed))
+        selected = args.scenarios.split(',') if args.scenarios else list(scenarios)
+        results = {}
+        for name in selected:
+            print(f"Running {name} ...")
+            results[name] = run_scenario(app, scenarios[name], args.requests, args.warmup,
+                                         quiet=not args.verbose, max_seconds=args.max_seconds)
+
+    report = {
+        'meta': {
+            'commit': git_revision(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'database': 'sqlite (temporary)' if not args.database_url else args.database_url.split('://')[0],
+            'seed': args.seed,
+            'llm_latency_ms': args.llm_latency_ms,
+        },
+        'dataset': {key: value for key, value in counts.items() if key != 'seconds'},
+        'sizes': sizes,
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
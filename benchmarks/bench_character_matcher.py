@@ -0,0 +1,108 @@
+"""
+Benchmark for character mention matching.
+Compares the per-character substring scan SceneExtractor used to run against the
+precompiled CharacterMatcher on a synthetic 500-character cast.
+
+Usage:
+    python -m benchmarks.bench_character_matcher [--cast 500] [--texts 200]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.character_matcher import CharacterMatcher
+
+FIRST_NAMES = [
+    "Nora", "Cherry", "Justin", "Henry", "Angela", "Anthony", "Wendy", "Lawrence",
+    "Irene", "Isabel", "Marcus", "Olivia", "Victor", "Sophia", "Edmund", "Clara",
+    "Damien", "Helena", "Oscar", "Rosalind", "Tobias", "Vivian", "Walter", "Yvonne",
+]
+WORDS = (
+    "the doctor rushes into the hotel lobby and confronts her father while the "
+    "assistant watches in stunned disbelief as tears fall and the secret is revealed"
+).split()
+
+
+def build_cast(size: int, rng: random.Random) -> Dict[str, Dict]:
+    """Build a synthetic cast of unique 'First Last' names"""
+    cast = {}
+    while len(cast) < size:
+        first = rng.choice(FIRST_NAMES)
+        last = f"{rng.choice(FIRST_NAMES)}son{len(cast)}"
+        name = f"{first} {last}"
+        cast[name] = {'name': name, 'description': ''}
+    return cast
+
+
+def build_texts(cast: Dict[str, Dict], count: int, rng: random.Random) -> List[str]:
+    """Build cliffhanger-sized texts that mention a handful of characters each"""
+    names = list(cast.keys())
+    texts = []
+    for _ in range(count):
+        words = [rng.choice(WORDS) for _ in range(120)]
+        for _ in range(4):
+            words.insert(rng.randrange(len(words)), rng.choice(names))
+        texts.append(' '.join(words))
+    return texts
+
+
+def naive_extract(characters: Dict[str, Dict], text: str) -> List[str]:
+    """The previous SceneExtractor.extract_characters_from_text implementation"""
+    found_characters = []
+    text_lower = text.lower()
+    for char_name in characters:
+        if char_name.lower() in text_lower:
+            found_characters.append(char_name)
+        else:
+            first_name = char_name.split()[0] if ' ' in char_name else char_name
+            if first_name.lower() in text_lower and len(first_name) > 3:
+                found_characters.append(char_name)
+    return found_characters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cast', type=int, default=500, help='Number of characters in the cast')
+    parser.add_argument('--texts', type=int, default=200, help='Number of texts to scan')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cast = build_cast(args.cast, rng)
+    texts = build_texts(cast, args.texts, rng)
+
+    start = time.perf_counter()
+    matcher = CharacterMatcher(cast)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts:
+        naive_extract(cast, text)
+    naive_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mention_count = 0
+    for text in texts:
+        mention_count += len(matcher.find_mentions(text))
+    matcher_seconds = time.perf_counter() - start
+
+    print("=" * 80)
+    print(f"CHARACTER MATCHER BENCHMARK ({args.cast} characters, {args.texts} texts)")
+    print("=" * 80)
+    print(f"Matcher build time:   {build_seconds * 1000:.2f} ms")
+    print(f"Naive scan:           {naive_seconds * 1000:.2f} ms "
+          f"({naive_seconds / len(texts) * 1e6:.1f} us/text)")
+    print(f"Compiled matcher:     {matcher_seconds * 1000:.2f} ms "
+          f"({matcher_seconds / len(texts) * 1e6:.1f} us/text, {mention_count} mentions)")
+    if matcher_seconds:
+        print(f"Speedup:              {naive_seconds / matcher_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark for HTTP connection reuse.
+Sends the same JSON POSTs to a local stub server the way NanoBananaClient used to
+(bare requests.post, a new connection + TLS handshake per call) and through the
+pooled keep-alive session from services.gcp_auth, sequentially and from a thread pool.
+
+Usage:
+    python -m benchmarks.bench_connection_reuse [--requests 300] [--threads 8] [--no-tls]
+"""
+
+import argparse
+import sys
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+
+from benchmarks.stub_server import StubServer
+from services.gcp_auth import create_pooled_session
+
+PAYLOAD = {"contents": [{"role": "user", "parts": [{"text": "A cinematic hospital corridor at night"}]}]}
+
+
+def run(label: str, post: Callable, url: str, count: int, threads: int, server: StubServer) -> Dict:
+    """Time `count` POSTs with `threads` workers and report handshakes paid"""
+    server.reset_counts()
+    start = time.perf_counter()
+    if threads <= 1:
+        for _ in range(count):
+            post(url, json=PAYLOAD, timeout=10, verify=False).raise_for_status()
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            for response in pool.map(lambda _: post(url, json=PAYLOAD, timeout=10, verify=False), range(count)):
+                response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    result = {
+        'label': label,
+        'elapsed_seconds': elapsed,
+        'per_request_ms': elapsed / count * 1000,
+        'connections': server.connection_count,
+    }
+    print(f"{label:<34} {elapsed:7.3f}s  {result['per_request_ms']:6.2f} ms/req  "
+          f"{result['connections']:4d} connections")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--no-tls', action='store_true', help='Benchmark plain HTTP instead of HTTPS')
+    args = parser.parse_args()
+
+    warnings.filterwarnings('ignore', message='Unverified HTTPS request')
+
+    with StubServer(tls=not args.no_tls) as server:
+        url = server.url + "/v1/models/stub:generateContent"
+        print(f"Stub server: {server.url} ({args.requests} requests)")
+        print("-" * 80)
+
+        baseline = run("requests.post (sequential)", requests.post, url, args.requests, 1, server)
+        session = create_pooled_session(pool_maxsize=args.threads)
+        pooled = run("pooled session (sequential)", session.post, url, args.requests, 1, server)
+
+        baseline_mt = run(f"requests.post ({args.threads} threads)", requests.post, url,
+                          args.requests, args.threads, server)
+        session = create_pooled_session(pool_maxsize=args.threads)
+        pooled_mt = run(f"pooled session ({args.threads} threads)", session.post, url,
+                        args.requests, args.threads, server)
+
+        print("-" * 80)
+        print(f"Speedup sequential: {baseline['elapsed_seconds'] / pooled['elapsed_seconds']:.1f}x, "
+              f"threaded: {baseline_mt['elapsed_seconds'] / pooled_mt['elapsed_seconds']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
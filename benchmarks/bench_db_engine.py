@@ -0,0 +1,219 @@
+"""
+Concurrent read/write throughput per database engine profile.
+Seeds the synthetic dataset into a fresh database for each profile, then runs reader
+threads (feed page + vote counts) against writer threads (vote toggles and comment
+inserts, each its own commit, like the vote and AI comment paths) for a fixed time.
+Reports operations per second, latency percentiles and lock errors per profile, so
+the SQLite WAL profile can be compared to the rollback-journal default ('none') and
+a Postgres URL can be checked with the same workload.
+
+Usage:
+    python -m benchmarks.bench_db_engine [--readers 8] [--writers 2] [--seconds 10]
+    python -m benchmarks.bench_db_engine --postgres-url postgresql+psycopg2://user:pw@localhost/bench
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_api import git_revision, percentile
+from benchmarks.synthetic_data import dataset_sizes, seed_database
+
+FEED_PAGE_SIZE = 20
+
+
+def create_bench_app(database_url: str, profile: str):
+    """Minimal app (models + engine profile only) bound to the benchmark database"""
+    from flask import Flask
+    from config import Config
+    from services.database import init_database
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['DB_ENGINE_PROFILE'] = profile
+    init_database(app)
+    import models  # noqa: F401  (registers the tables)
+    return app
+
+
+def prepare_database(app, sizes: Dict[str, int], seed: int) -> Dict:
+    from extensions import db
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        counts = seed_database(db, sizes, random.Random(seed))
+        settings = {}
+        if db.engine.dialect.name == 'sqlite':
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                settings[pragma] = db.session.execute(db.text(f"PRAGMA {pragma}")).scalar()
+        db.session.remove()
+    return {'counts': counts, 'settings': settings}
+
+
+# ==================== WORKLOAD ====================
+
+def read_feed(rng: random.Random, sizes: Dict[str, int]):
+    """A feed page and the vote totals for its posts"""
+    from extensions import db
+    from models import Post, Vote
+
+    offset = rng.randint(0, max(0, sizes['posts'] - FEED_PAGE_SIZE)) if rng.random() < 0.3 else 0
+    posts = Post.query.order_by(Post.created_at.desc()).offset(offset).limit(FEED_PAGE_SIZE).all()
+    post_ids = [post.id for post in posts]
+    (db.session.query(Vote.post_id, Vote.is_upvote, db.func.count(Vote.id))
+     .filter(Vote.post_id.in_(post_ids))
+     .group_by(Vote.post_id, Vote.is_upvote)
+     .all())
+
+
+def write_vote_or_comment(rng: random.Random, sizes: Dict[str, int]):
+    """Toggle a post vote (as the vote API does) or insert a comment, then commit"""
+    from extensions import db
+    from models import Comment, Vote
+
+    post_id = rng.randint(1, sizes['posts'])
+    user_id = rng.randint(sizes['official'] + 1, sizes['users'])
+    if rng.random() < 0.7:
+        vote = Vote.query.filter_by(user_id=user_id, post_id=post_id).first()
+        if vote is None:
+            db.session.add(Vote(user_id=user_id, post_id=post_id, is_upvote=True))
+        elif vote.is_upvote:
+            vote.is_upvote = False
+        else:
+            db.session.delete(vote)
+    else:
+        db.session.add(Comment(content="Benchmark comment", post_id=post_id, author_id=user_id))
+    db.session.commit()
+
+
+def _worker(app, operation, sizes: Dict[str, int], seed: int, start: threading.Event,
+            deadline: List[float], latencies: List[float], errors: Dict[str, int]):
+    from extensions import db
+    rng = random.Random(seed)
+    with app.app_context():
+        start.wait()
+        while time.perf_counter() < deadline[0]:
+            began = time.perf_counter()
+            try:
+                operation(rng, sizes)
+                latencies.append((time.perf_counter() - began) * 1000)
+            except Exception as e:
+                db.session.rollback()
+                key = type(getattr(e, 'orig', None) or e).__name__
+                errors[key] = errors.get(key, 0) + 1
+            finally:
+                # Like request teardown: the session (and its transaction) ends after every operation
+                db.session.remove()
+
+
+def run_profile(app, sizes: Dict[str, int], readers: int, writers: int, seconds: float, seed: int) -> Dict:
+    """Run readers and writers concurrently for `seconds` and summarize both sides"""
+    read_latencies: List[float] = []
+    write_latencies: List[float] = []
+    read_errors: Dict[str, int] = {}
+    write_errors: Dict[str, int] = {}
+    start = threading.Event()
+    deadline = [0.0]
+
+    threads = []
+    for i in range(readers):
+        threads.append(threading.Thread(target=_worker, args=(app, read_feed, sizes, seed + i, start, deadline,
+                                                              read_latencies, read_errors), daemon=True))
+    for i in range(writers):
+        threads.append(threading.Thread(target=_worker, args=(app, write_vote_or_comment, sizes, seed + 1000 + i,
+                                                              start, deadline, write_latencies, write_errors),
+                                        daemon=True))
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + seconds
+    start.set()
+    for thread in threads:
+        thread.join()
+
+    def summary(latencies: List[float], errors: Dict[str, int]) -> Dict:
+        latencies.sort()
+        return {
+            'ops': len(latencies),
+            'ops_per_second': round(len(latencies) / seconds, 1),
+            'p50_ms': round(percentile(latencies, 50), 3),
+            'p95_ms': round(percentile(latencies, 95), 3),
+            'p99_ms': round(percentile(latencies, 99), 3),
+            'errors': errors,
+        }
+
+    return {'reads': summary(read_latencies, read_errors), 'writes': summary(write_latencies, write_errors)}
+
+
+# ==================== REPORTING ====================
+
+def print_report(results: Dict[str, Dict], readers: int, writers: int, seconds: float):
+    print("=" * 100)
+    print(f"DB ENGINE PROFILES ({readers} readers, {writers} writers, {seconds:.0f}s each)")
+    print("=" * 100)
+    print(f"{'profile':<22}{'side':<8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  errors")
+    for name, result in results.items():
+        for side in ('reads', 'writes'):
+            row = result[side]
+            errors = ', '.join(f"{key}={count}" for key, count in row['errors'].items()) or '-'
+            print(f"{name if side == 'reads' else '':<22}{side:<8}{row['ops_per_second']:>10.1f}"
+                  f"{row['p50_ms']:>10.2f}{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}  {errors}")
+        if result.get('settings'):
+            print(f"{'':<22}{', '.join(f'{k}={v}' for k, v in result['settings'].items())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profiles', default='none,sqlite', help='SQLite profiles to compare (comma-separated)')
+    parser.add_argument('--postgres-url', help='Also run the none / postgres profiles against this database '
+                                               '(its tables are dropped and reseeded)')
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10.0, help='Measured time per profile')
+    parser.add_argument('--posts', type=int, default=2000, help='Posts in the seeded dataset (small preset)')
+    parser.add_argument('--workdir', help='Directory for the SQLite files (default: a temporary directory; '
+                                          'use a real disk to include fsync costs)')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Write the results as JSON')
+    args = parser.parse_args()
+
+    sizes = dataset_sizes('small', posts=args.posts)
+    runs = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for profile in args.profiles.split(','):
+            runs.append((f"sqlite/{profile}", f"sqlite:///{os.path.join(workdir, f'{profile}.db')}", profile))
+        if args.postgres_url:
+            runs += [("postgres/none", args.postgres_url, 'none'), ("postgres/postgres", args.postgres_url, 'postgres')]
+
+        results = {}
+        for name, database_url, profile in runs:
+            print(f"Preparing {name} ...")
+            app = create_bench_app(database_url, profile)
+            prepared = prepare_database(app, sizes, args.seed)
+            print(f"Running {name} ...")
+            results[name] = run_profile(app, sizes, args.readers, args.writers, args.seconds, args.seed)
+            results[name]['settings'] = prepared['settings']
+            with app.app_context():
+                from extensions import db
+                for engine in db.engines.values():
+                    engine.dispose()
+
+    print_report(results, args.readers, args.writers, args.seconds)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'commit': git_revision(), 'sizes': sizes, 'readers': args.readers,
+                       'writers': args.writers, 'seconds': args.seconds, 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark for SceneExtractor.find_engaging_cliffhangers over a large synthetic canon.
+Compares per-query re-extraction (the previous behaviour) with the cached feature
+table and NumPy scoring.
+
+Usage:
+    python -m benchmarks.bench_engaging_cliffhangers [--cliffhangers 10000]
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.promo_canon_parser import PromoCanonLoader
+from modules.scene_extractor import SceneExtractor
+
+PROJECT_ROOT = Path(__file__).parent.parent
+CANON_DIRECTORY = PROJECT_ROOT / "PromoCanon"
+
+
+def seed_cache(cache_dir: Path, count: int, rng: random.Random):
+    """Write a synthetic canon straight into the loader's JSON cache files"""
+    source = PromoCanonLoader(str(CANON_DIRECTORY), cache_dir=str(cache_dir / "source"))
+    templates = source.load_major_cliffhangers() + source.load_minor_cliffhangers()
+    characters = source.load_characters()
+
+    major, minor = [], []
+    for i in range(count):
+        template = dict(rng.choice(templates))
+        template['episode'] = rng.randint(1, 1000)
+        template['title'] = f"{template.get('title', 'Cliffhanger')} #{i}"
+        template['cliffhanger_text'] = f"{template.get('cliffhanger_text', '')} (variant {i})"
+        (major if template.get('severity') == 'major' else minor).append(template)
+
+    for name, data in (('major_cliffhangers', major), ('minor_cliffhangers', minor),
+                       ('characters', characters)):
+        with open(cache_dir / f"{name}.json", 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+
+def time_it(fn, repeat: int) -> float:
+    """Average wall time of fn() in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cliffhangers', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        seed_cache(cache_dir, args.cliffhangers, rng)
+
+        # Empty canon directory: the loader serves everything from the seeded cache
+        loader = PromoCanonLoader(str(cache_dir / "canon"), cache_dir=str(cache_dir))
+        extractor = SceneExtractor(loader)
+        all_cliffhangers = loader.load_major_cliffhangers() + loader.load_minor_cliffhangers()
+        character = next(iter(loader.load_characters()))
+
+        def legacy_query():
+            filtered = [c for c in all_cliffhangers if 100 <= c.get('episode', 0) <= 600]
+            filtered = [c for c in filtered
+                        if character in extractor.extract_characters_from_text(c.get('cliffhanger_text', ''))]
+            scored = []
+            for c in filtered:
+                visual = extractor.compute_visual_features(c)
+                score = (len(visual['characters']) * 2 + (3 if visual['location'] else 0)
+                         + len(visual['emotions']) * 2 + len(visual['actions'])
+                         + (5 if c.get('severity') == 'major' else 2))
+                scored.append((score, c))
+            scored.sort(key=lambda x: x[0], reverse=True)
+            return [c for _, c in scored[:20]]
+
+        start = time.perf_counter()
+        extractor.find_engaging_cliffhangers(limit=1)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        SceneExtractor(loader).find_engaging_cliffhangers(limit=1)
+        reload_ms = (time.perf_counter() - start) * 1000
+
+        legacy_ms = time_it(legacy_query, max(1, args.repeat // 10))
+        range_ms = time_it(lambda: extractor.find_engaging_cliffhangers(100, 600, limit=20), args.repeat)
+        character_ms = time_it(
+            lambda: extractor.find_engaging_cliffhangers(100, 600, character_filter=character, limit=20),
+            args.repeat
+        )
+
+    print("=" * 80)
+    print(f"ENGAGING CLIFFHANGER QUERY BENCHMARK ({args.cliffhangers} cliffhangers)")
+    print("=" * 80)
+    print(f"Feature table build (cold):      {build_ms:.1f} ms")
+    print(f"Feature table load (from cache): {reload_ms:.1f} ms")
+    print(f"Legacy range+character query:    {legacy_ms:.1f} ms")
+    print(f"Range query, top 20:             {range_ms:.2f} ms")
+    print(f"Range+character query, top 20:   {character_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
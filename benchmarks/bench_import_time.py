@@ -0,0 +1,123 @@
+"""
+Import-time budget check.
+Imports each target in a fresh interpreter with `python -X importtime`, reports the
+cumulative import time and the slowest modules, and fails (exit code 1) when a
+target goes over its budget or pulls in an AI SDK that should only load on first use
+(google.genai, vertexai, google.cloud.aiplatform, google.cloud.storage). Run it in CI
+or before merging changes to module-level imports.
+
+Usage:
+    python -m benchmarks.bench_import_time [--budget-ms 1500] [--runs 3] [--top 10]
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# Module -> import must stay under the budget and must not load these SDKs
+TARGETS = [
+    'app',
+    'services.comment_generator',
+    'services.llm_client',
+    'services.image_generator',
+    'modules.nano_banana_client',
+]
+DEFERRED_PACKAGES = ('google.genai', 'vertexai', 'google.cloud.aiplatform', 'google.cloud.storage')
+IMPORTTIME_LINE = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def _importtime(code: str, env: Dict[str, str]) -> List[Tuple[int, int, str]]:
+    """(nesting level, cumulative microseconds, module) for every import made running `code`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=PROJECT_ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{code} failed:\n{result.stderr[-2000:]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            entries.append(((len(match.group(3)) - 1) // 2, int(match.group(2)), match.group(4)))
+    return entries
+
+
+def measure(target: str, env: Dict[str, str], startup: Set[str]) -> Tuple[float, List[Tuple[str, float]], List[str]]:
+    """
+    Import one module in a fresh interpreter.
+
+    Args:
+        startup: Modules the interpreter imports on its own (not charged to the target)
+
+    Returns:
+        (total milliseconds, [(module, cumulative ms)] of the imports made directly by the target
+        and its packages, deferred SDK modules loaded)
+    """
+    total_us = 0
+    direct = []
+    children = []
+    loaded = []
+    # -X importtime lists a module after everything it imported
+    for level, cumulative_us, module in _importtime(f"import {target}", env):
+        if module.startswith(DEFERRED_PACKAGES):
+            loaded.append(module)
+        if level == 1:
+            children.append((module, cumulative_us / 1000))
+        elif level == 0:
+            if module not in startup:
+                total_us += cumulative_us
+                direct.extend(children)
+            children = []
+    direct.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, direct, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=1500.0, help='Import budget per target')
+    parser.add_argument('--runs', type=int, default=3, help='Measurements per target (the best is kept)')
+    parser.add_argument('--top', type=int, default=8, help='Slowest imports listed per target')
+    parser.add_argument('--targets', help='Comma-separated modules (default: app and the AI service modules)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(workdir, 'import.db')}")
+        env['JANITOR_INTERVAL_SECONDS'] = '0'
+        env['PYTHONDONTWRITEBYTECODE'] = '1'
+
+        startup = {module for _, _, module in _importtime('pass', env)}
+        failures = []
+        print("=" * 80)
+        print(f"IMPORT TIME (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+        print("=" * 80)
+        for target in (args.targets.split(',') if args.targets else TARGETS):
+            try:
+                runs = [measure(target, env, startup) for _ in range(args.runs)]
+            except RuntimeError as e:
+                print(f"{target}: ⚠️ {e}")
+                failures.append(target)
+                continue
+            total_ms, direct, loaded = min(runs, key=lambda run: run[0])
+            over = total_ms > args.budget_ms
+            status = "❌ over budget" if over else "✅"
+            print(f"{target:<32}{total_ms:>9.1f} ms  {status}")
+            for module, cumulative_ms in direct[:args.top]:
+                print(f"    {module:<40}{cumulative_ms:>9.1f} ms")
+            if loaded:
+                print(f"    ❌ loads SDKs that should be deferred: {', '.join(sorted(set(loaded))[:5])}")
+            if over or loaded:
+                failures.append(target)
+
+    if failures:
+        print(f"\nFailed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Feed serialization microbenchmark.
+Times building and encoding a post list the old way (ORM objects -> to_dict() ->
+Flask's stdlib provider) against row DTOs (services.dtos) encoded by the stdlib and
+orjson paths of services.json_encoding, and reports milliseconds per 1,000 posts
+for each phase (build: query + objects / dicts, encode: JSON bytes).
+
+Usage:
+    python -m benchmarks.bench_serialization [--posts 1000] [--repeat 7]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_db_engine import create_bench_app
+from benchmarks.synthetic_data import dataset_sizes, seed_database
+
+
+def _timed(fn: Callable) -> Tuple[float, object]:
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def build_variants(app) -> Dict[str, Tuple[Callable, Callable]]:
+    """Variant name -> (build(), encode(built) -> bytes)"""
+    from flask.json.provider import DefaultJSONProvider
+    from models import Post
+    from services.dtos import post_rows
+    from services.json_encoding import ENCODER_ORJSON, ENCODER_STDLIB, FastJSONProvider, _load_orjson
+
+    def feed_query():
+        return Post.query.order_by(Post.created_at.desc())
+
+    flask_default = DefaultJSONProvider(app)
+    stdlib = FastJSONProvider(app, ENCODER_STDLIB)
+    variants = {
+        'orm + to_dict + flask json': (lambda: [p.to_dict() for p in feed_query().all()],
+                                       lambda data: flask_default.response(data).get_data()),
+        'dto + stdlib json': (lambda: post_rows(feed_query()),
+                              lambda data: stdlib.response(data).get_data()),
+    }
+    if _load_orjson() is not None:
+        fast = FastJSONProvider(app, ENCODER_ORJSON)
+        variants['orm + to_dict + orjson'] = (variants['orm + to_dict + flask json'][0],
+                                              lambda data: fast.response(data).get_data())
+        variants['dto + orjson'] = (lambda: post_rows(feed_query()), lambda data: fast.response(data).get_data())
+    else:
+        print("orjson is not installed: only the stdlib variants are measured")
+    return variants
+
+
+def measure(app, build: Callable, encode: Callable, repeat: int) -> Dict[str, float]:
+    """Median build / encode milliseconds over `repeat` runs, each with a fresh session"""
+    from extensions import db
+    builds: List[float] = []
+    encodes: List[float] = []
+    size = 0
+    with app.app_context():
+        for _ in range(repeat + 1):  # The first run warms caches and is discarded
+            db.session.remove()
+            build_ms, data = _timed(build)
+            encode_ms, body = _timed(lambda: encode(data))
+            builds.append(build_ms)
+            encodes.append(encode_ms)
+            size = len(body)
+        db.session.remove()
+    builds, encodes = builds[1:], encodes[1:]
+    return {'build_ms': statistics.median(builds), 'encode_ms': statistics.median(encodes),
+            'total_ms': statistics.median(b + e for b, e in zip(builds, encodes)), 'bytes': size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000, help='Posts in the list')
+    parser.add_argument('--repeat', type=int, default=7, help='Measured runs per variant (median reported)')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        app = create_bench_app(f"sqlite:///{os.path.join(workdir, 'serialize.db')}", 'auto')
+        from extensions import db
+        with app.app_context():
+            db.create_all()
+            seed_database(db, dataset_sizes('small', posts=args.posts), random.Random(args.seed))
+
+        results = {name: measure(app, build, encode, args.repeat)
+                   for name, (build, encode) in build_variants(app).items()}
+
+    per_thousand = 1000 / args.posts
+    baseline = results['orm + to_dict + flask json']['total_ms']
+    print("=" * 90)
+    print(f"SERIALIZATION ({args.posts} posts, ms per 1,000 posts, median of {args.repeat})")
+    print("=" * 90)
+    print(f"{'variant':<30}{'build':>10}{'encode':>10}{'total':>10}{'speedup':>10}{'KB':>10}")
+    for name, result in results.items():
+        print(f"{name:<30}{result['build_ms'] * per_thousand:>10.1f}{result['encode_ms'] * per_thousand:>10.1f}"
+              f"{result['total_ms'] * per_thousand:>10.1f}{baseline / result['total_ms']:>9.1f}x"
+              f"{result['bytes'] / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark for streamGenerateContent response handling.
+Compares peak Python memory and time for the old buffered path (response.json() and
+then base64-decoding the image) against the incremental StreamedResponseParser
+decoding into a BytesIO and straight into a file.
+
+Usage:
+    python -m benchmarks.bench_stream_parsing [--image-mb 6] [--chunk-kb 64]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.stream_parser import StreamedResponseParser, iter_stream_chunks
+
+
+def build_body(image_bytes: int) -> bytes:
+    """Synthetic streamed response: a text chunk, then an image chunk with usage metadata"""
+    image = os.urandom(image_bytes)
+    chunks = [
+        {"candidates": [{"content": {"role": "model", "parts": [{"text": "Here is your image."}]}}]},
+        {"candidates": [{"content": {"role": "model", "parts": [
+            {"inlineData": {"mimeType": "image/png", "data": base64.b64encode(image).decode("ascii")}}
+        ]}}], "usageMetadata": {"promptTokenCount": 12, "totalTokenCount": 1302}},
+    ]
+    return ("[" + ",\r\n".join(json.dumps(chunk) for chunk in chunks) + "]").encode("utf-8")
+
+
+def measure(label: str, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:<28} peak {peak / 1e6:8.2f} MB   {elapsed * 1000:8.1f} ms   image {size} bytes")
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image-mb', type=float, default=6.0)
+    parser.add_argument('--chunk-kb', type=int, default=64)
+    args = parser.parse_args()
+
+    body = build_body(int(args.image_mb * 1_000_000))
+    chunk_size = args.chunk_kb * 1024
+    print(f"Response body: {len(body) / 1e6:.2f} MB, read in {args.chunk_kb} KB chunks "
+          "(the raw body itself is not counted)")
+    print("-" * 80)
+
+    def buffered():
+        # What generate_nano_banana_image used to do: body -> str -> JSON tree -> bytes
+        response_json = json.loads(b"".join(body[i:i + chunk_size] for i in range(0, len(body), chunk_size)))
+        data = response_json[-1]["candidates"][0]["content"]["parts"][0]["inlineData"]["data"]
+        return len(base64.b64decode(data))
+
+    def streamed_bytesio():
+        stream_parser = StreamedResponseParser()
+        for _ in iter_stream_chunks((body[i:i + chunk_size] for i in range(0, len(body), chunk_size)), stream_parser):
+            pass
+        return stream_parser.blobs[0].size
+
+    def streamed_file():
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sinks = []
+
+            def file_sink(index):
+                sinks.append(open(os.path.join(tmpdir, f"{index}.part"), "wb"))
+                return sinks[-1]
+
+            stream_parser = StreamedResponseParser(file_sink)
+            for _ in iter_stream_chunks((body[i:i + chunk_size] for i in range(0, len(body), chunk_size)), stream_parser):
+                pass
+            for sink in sinks:
+                sink.close()
+            return stream_parser.blobs[0].size
+
+    baseline = measure("buffered response.json()", buffered)
+    in_memory = measure("streamed -> BytesIO", streamed_bytesio)
+    to_file = measure("streamed -> file", streamed_file)
+    print("-" * 80)
+    print(f"Peak memory reduction: {baseline / in_memory:.1f}x (BytesIO), {baseline / max(to_file, 1):.0f}x (file)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Local stub HTTP(S) server for benchmarks.
+Answers every POST with a small canned JSON body after an optional delay, speaks
+HTTP/1.1 so clients can keep connections alive, and counts the TCP connections it
+accepted so benchmarks can show how many handshakes a client actually paid for.
+
+Usage (as a fixture):
+    with StubServer(tls=True) as server:
+        requests.post(server.url + "/v1/generate", json={}, verify=False)
+        print(server.connection_count)
+"""
+
+import json
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+def generate_self_signed_cert(directory: str) -> Optional[Tuple[str, str]]:
+    """
+    Create a throwaway self-signed certificate for localhost with the openssl CLI.
+
+    Returns:
+        (cert_path, key_path), or None if openssl is not available
+    """
+    if not shutil.which("openssl"):
+        return None
+    cert_path = str(Path(directory) / "stub_cert.pem")
+    key_path = str(Path(directory) / "stub_key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=localhost", "-keyout", key_path, "-out", cert_path],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    return cert_path, key_path
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive unless the client closes
+    disable_nagle_algorithm = True  # Avoid 40ms delayed-ACK stalls on keep-alive connections
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connection_count += 1
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        if self.server.delay_seconds:
+            time.sleep(self.server.delay_seconds)
+        body = self.server.response_body
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.stats_lock:
+            self.server.request_count += 1
+
+    do_POST = _respond
+    do_GET = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """Threaded stub server running in the background; use as a context manager"""
+
+    def __init__(self, tls: bool = False, delay_seconds: float = 0.0, response: Optional[dict] = None):
+        """
+        Args:
+            tls: Serve HTTPS with a self-signed certificate (falls back to HTTP without openssl)
+            delay_seconds: Artificial server-side latency per request
+            response: JSON body returned for every request
+        """
+        self.tls = tls
+        self.delay_seconds = delay_seconds
+        self.response = response or {"candidates": [{"content": {"parts": [{"text": "ok"}]}}]}
+        self._httpd = None
+        self._thread = None
+        self._tmpdir = None
+
+    def __enter__(self) -> 'StubServer':
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.delay_seconds = self.delay_seconds
+        self._httpd.response_body = json.dumps(self.response).encode("utf-8")
+        self._httpd.stats_lock = threading.Lock()
+        self._httpd.connection_count = 0
+        self._httpd.request_count = 0
+
+        if self.tls:
+            self._tmpdir = tempfile.mkdtemp(prefix="stub_server_")
+            cert = generate_self_signed_cert(self._tmpdir)
+            if cert:
+                context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+                context.load_cert_chain(*cert)
+                self._httpd.socket = context.wrap_socket(self._httpd.socket, server_side=True)
+            else:
+                print("[STUB] openssl not found, serving plain HTTP")
+                self.tls = False
+
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    @property
+    def url(self) -> str:
+        scheme = "https" if self.tls else "http"
+        return f"{scheme}://127.0.0.1:{self._httpd.server_address[1]}"
+
+    @property
+    def connection_count(self) -> int:
+        return self._httpd.connection_count
+
+    @property
+    def request_count(self) -> int:
+        return self._httpd.request_count
+
+    def reset_counts(self):
+        with self._httpd.stats_lock:
+            self._httpd.connection_count = 0
+            self._httpd.request_count = 0
@@ -0,0 +1,211 @@
+"""
+Synthetic dataset for API benchmarks.
+Seeds users (a few of them official characters), pocketshows, posts with show /
+episode tags, threaded comments and post / comment votes straight into the tables
+with multi-row INSERTs and explicit primary keys, so millions of rows load in
+seconds and the same seed always produces the same database.
+
+Usage (from a benchmark, inside an app context):
+    sizes = dataset_sizes('medium', posts=50000)
+    counts = seed_database(db, sizes, random.Random(7))
+"""
+
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List
+
+INSERT_CHUNK_SIZE = 5000
+SHOW_NAME = "Saving Nora"
+EPISODES = 100
+
+PRESETS: Dict[str, Dict[str, int]] = {
+    # ~25k rows
+    'small': {'users': 200, 'pocketshows': 5, 'posts': 2000, 'comments_per_post': 5,
+              'votes_per_post': 5, 'votes_per_comment': 1, 'official': 3},
+    # ~450k rows
+    'medium': {'users': 2000, 'pocketshows': 20, 'posts': 20000, 'comments_per_post': 8,
+               'votes_per_post': 10, 'votes_per_comment': 1, 'official': 3},
+    # ~4.5M rows
+    'large': {'users': 20000, 'pocketshows': 50, 'posts': 200000, 'comments_per_post': 8,
+              'votes_per_post': 10, 'votes_per_comment': 1, 'official': 3},
+}
+
+CHARACTER_NAMES = ["Nora", "Ethan", "Vivian", "Marcus", "Lena", "Victor", "Grace", "Julian"]
+TITLE_TEMPLATES = [
+    "Episode {episode} theory: {name} knew all along",
+    "Did anyone else catch {name}'s reaction in episode {episode}?",
+    "{name} deserved better (episode {episode} spoilers)",
+    "Rewatching episode {episode} and the hotel scene hits different",
+]
+COMMENT_TEMPLATES = [
+    "Totally agree, {name} was hiding something from the start.",
+    "I don't buy it. Episode {episode} makes it pretty clear.",
+    "This is exactly what I was thinking after the cliffhanger.",
+    "Wait until you see what {name} does next...",
+]
+
+
+def dataset_sizes(preset: str = 'small', **overrides) -> Dict[str, int]:
+    """
+    Row counts for a preset, with individual counts overridden.
+
+    Args:
+        preset: 'small', 'medium' or 'large'
+        **overrides: Any PRESETS key (None values are ignored)
+
+    Returns:
+        Dict of sizes
+    """
+    sizes = dict(PRESETS[preset])
+    sizes.update({key: value for key, value in overrides.items() if value is not None})
+    return sizes
+
+
+def _chunks(rows: Iterable[Dict[str, Any]], size: int = INSERT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _insert(connection, table, rows: Iterable[Dict[str, Any]]) -> int:
+    count = 0
+    for chunk in _chunks(rows):
+        connection.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def _users(sizes: Dict[str, int], rng: random.Random, created: datetime) -> Iterator[Dict[str, Any]]:
+    for user_id in range(1, sizes['users'] + 1):
+        official = user_id <= sizes['official']
+        name = CHARACTER_NAMES[(user_id - 1) % len(CHARACTER_NAMES)]
+        watched = None
+        if not official and rng.random() < 0.5:
+            watched = {SHOW_NAME: rng.randint(1, EPISODES)}
+        yield {
+            'id': user_id,
+            'username': f"{name.lower()}_official_{user_id}" if official else f"user_{user_id}",
+            'display_name': name if official else f"User {user_id}",
+            'password_hash': None,
+            'is_official': official,
+            'character_data': {
+                'show_name': SHOW_NAME,
+                'character_name': name,
+                'bio': f"{name} from {SHOW_NAME}",
+            } if official else None,
+            'watched_shows': watched,
+            'created_at': created,
+        }
+
+
+def _pocketshows(sizes: Dict[str, int], created: datetime) -> Iterator[Dict[str, Any]]:
+    for pocketshow_id in range(1, sizes['pocketshows'] + 1):
+        yield {
+            'id': pocketshow_id,
+            'name': f"pocketshow_{pocketshow_id}",
+            'description': f"Fan discussion board #{pocketshow_id}",
+            'created_at': created,
+        }
+
+
+def _posts(sizes: Dict[str, int], rng: random.Random, start: datetime) -> Iterator[Dict[str, Any]]:
+    for post_id in range(1, sizes['posts'] + 1):
+        tagged = rng.random() < 0.7
+        episode = rng.randint(1, EPISODES)
+        name = rng.choice(CHARACTER_NAMES)
+        yield {
+            'id': post_id,
+            'title': rng.choice(TITLE_TEMPLATES).format(episode=episode, name=name),
+            'content': f"Thoughts on what {name} did in episode {episode}. " * rng.randint(1, 6),
+            'description': None,
+            'pocketshow_id': rng.randint(1, sizes['pocketshows']),
+            'author_id': rng.randint(1, sizes['users']),
+            'image_url': None,
+            'video_url': None,
+            'post_metadata': None,
+            'show_name': SHOW_NAME if tagged else None,
+            'episode_tag': episode if tagged else None,
+            'created_at': start + timedelta(seconds=post_id * 30),
+        }
+
+
+def _threaded_comments(sizes: Dict[str, int], rng: random.Random, start: datetime) -> Iterator[Dict[str, Any]]:
+    """Comments per post vary around the average; half of them reply to an earlier comment on the post"""
+    comment_id = 0
+    for post_id in range(1, sizes['posts'] + 1):
+        thread: List[int] = []
+        for _ in range(rng.randint(0, 2 * sizes['comments_per_post'])):
+            comment_id += 1
+            parent_id = rng.choice(thread) if thread and rng.random() < 0.5 else None
+            thread.append(comment_id)
+            yield {
+                'id': comment_id,
+                'content': rng.choice(COMMENT_TEMPLATES).format(
+                    name=rng.choice(CHARACTER_NAMES), episode=rng.randint(1, EPISODES)),
+                'post_id': post_id,
+                'author_id': rng.randint(1, sizes['users']),
+                'author': None,
+                'parent_id': parent_id,
+                'created_at': start + timedelta(seconds=post_id * 30 + len(thread)),
+            }
+
+
+def _votes(sizes: Dict[str, int], rng: random.Random, created: datetime, comment_count: int) -> Iterator[Dict[str, Any]]:
+    """One vote per user per target (the unique constraints), mostly upvotes"""
+    vote_id = 0
+    users = range(1, sizes['users'] + 1)
+    targets = [('post_id', sizes['posts'], sizes['votes_per_post']),
+               ('comment_id', comment_count, sizes['votes_per_comment'])]
+    for column, target_count, average in targets:
+        if not average:
+            continue
+        for target_id in range(1, target_count + 1):
+            voters = rng.sample(users, min(rng.randint(0, 2 * average), len(users)))
+            for user_id in voters:
+                vote_id += 1
+                yield {
+                    'id': vote_id,
+                    'user_id': user_id,
+                    'post_id': target_id if column == 'post_id' else None,
+                    'comment_id': target_id if column == 'comment_id' else None,
+                    'is_upvote': rng.random() < 0.8,
+                    'created_at': created,
+                }
+
+
+def seed_database(db, sizes: Dict[str, int], rng: random.Random) -> Dict[str, Any]:
+    """
+    Fill an empty database with the synthetic dataset. Must be called inside an app context.
+
+    Args:
+        db: Flask-SQLAlchemy instance (tables must already exist)
+        sizes: Row counts from dataset_sizes()
+        rng: Random source (same seed -> same dataset)
+
+    Returns:
+        Row counts per table plus the seeding time
+    """
+    from models import Comment, Pocketshow, Post, User, Vote
+
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    start = now - timedelta(seconds=sizes['posts'] * 30)
+
+    connection = db.session.connection()
+    counts = {
+        'users': _insert(connection, User.__table__, _users(sizes, rng, start)),
+        'pocketshows': _insert(connection, Pocketshow.__table__, _pocketshows(sizes, start)),
+        'posts': _insert(connection, Post.__table__, _posts(sizes, rng, start)),
+        'comments': _insert(connection, Comment.__table__, _threaded_comments(sizes, rng, start)),
+    }
+    counts['votes'] = _insert(connection, Vote.__table__, _votes(sizes, rng, now, counts['comments']))
+    db.session.commit()
+
+    counts['seconds'] = round(time.perf_counter() - started, 2)
+    return counts
@@ -6,13 +6,91 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///pocketverse.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Database engine profile (services/database.py): 'auto' picks sqlite / postgres from the URL, 'none' = SQLAlchemy defaults
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE', 'auto')
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')  # Readers don't block on a committing writer
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')  # fsync at WAL checkpoints, not every commit
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))  # Writers wait this long for the lock
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_MB', 256)) * 1024 * 1024  # Memory-mapped reads (0 disables)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))  # Postgres: connections kept open per process
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))  # Postgres: extra connections under burst load
+    DB_POOL_TIMEOUT = 30  # Seconds to wait for a free pooled connection
+    DB_POOL_RECYCLE = 1800  # Seconds before a pooled connection is replaced
+    DB_STATEMENT_TIMEOUT_MS = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))  # Postgres statement_timeout
+    DB_LOCK_TIMEOUT_MS = int(os.environ.get('DB_LOCK_TIMEOUT_MS', 5000))  # Postgres lock_timeout
+    
+    # Read replicas (services/read_replicas.py): comma-separated URLs serving @read_replica views
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 10))  # Reads stay on the primary after a client's write
+    
+    # Rendered feed cache for /api/posts and pocketshow post lists (services/feed_cache.py)
+    FEED_CACHE_ENABLED = os.environ.get('FEED_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    FEED_CACHE_TTL_SECONDS = int(os.environ.get('FEED_CACHE_TTL_SECONDS', 60))  # Max age of a fresh entry
+    FEED_CACHE_STALE_SECONDS = int(os.environ.get('FEED_CACHE_STALE_SECONDS', 0))  # Stale-while-revalidate window (0 = off)
+    FEED_CACHE_MAX_ENTRIES = 2048
+    FEED_CACHE_MAX_BYTES = int(os.environ.get('FEED_CACHE_MAX_MB', 64)) * 1024 * 1024
+    FEED_CACHE_REDIS_URL = os.environ.get('FEED_CACHE_REDIS_URL')  # e.g. redis://localhost:6379/0 (shared by all processes)
+    # 'redis' (needs FEED_CACHE_REDIS_URL) or 'memory': opt-in in-process LRU, only correct with a single app process
+    FEED_CACHE_BACKEND = os.environ.get('FEED_CACHE_BACKEND', 'redis').lower()
+    
+    # HTTP: weak ETags on JSON GETs (304 when unchanged) and response compression
+    CONDITIONAL_REQUESTS_ENABLED = True
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    COMPRESS_MIN_BYTES = int(os.environ.get('COMPRESS_MIN_BYTES', 1024))  # Smaller bodies are sent uncompressed
+    COMPRESS_GZIP_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 5  # Used when the optional brotli package is installed
+    JSON_ENCODER = os.environ.get('JSON_ENCODER', 'auto')  # 'auto' (orjson when installed), 'orjson' or 'stdlib'
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
     # File upload settings
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+    BLOB_FOLDER = os.path.join(UPLOAD_FOLDER, 'blobs')  # Content-addressed image store (sha256 fan-out)
+    MEDIA_STORE_BACKEND = os.environ.get('MEDIA_STORE_BACKEND', 'local')  # 'local' (BLOB_FOLDER) or 'gcs'
+    MEDIA_GCS_BUCKET = os.environ.get('MEDIA_GCS_BUCKET')  # Bucket for the 'gcs' backend
+    MEDIA_GCS_PREFIX = os.environ.get('MEDIA_GCS_PREFIX', 'media/')
+    DERIVATIVE_FOLDER = os.path.join(UPLOAD_FOLDER, 'derivatives')  # Resized / WebP variants of blobs
+    DERIVATIVE_CACHE_MAX_BYTES = int(os.environ.get('DERIVATIVE_CACHE_MAX_MB', 512)) * 1024 * 1024
+    DERIVATIVE_WORKERS = 2  # Background threads precomputing common sizes
+    
+    # Media serving (content-addressed files are always sent with Cache-Control: immutable)
+    MEDIA_MAX_AGE = 3600  # Seconds clients may cache legacy (non-hashed) uploads
+    USE_X_SENDFILE = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')  # Apache / lighttpd
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX')  # nginx internal location, e.g. /_media/
+    
+    # Upload janitor (background thread; also `flask janitor [--dry-run]`)
+    JANITOR_INTERVAL_SECONDS = int(os.environ.get('JANITOR_INTERVAL_SECONDS', 600))  # 0 disables the thread
+    JANITOR_TEMP_MAX_AGE_SECONDS = 24 * 3600  # Abandoned temp/partial files older than this are deleted
+    JANITOR_BLOB_GRACE_SECONDS = 24 * 3600  # Unreferenced blobs younger than this are never evicted
+    UPLOAD_QUOTA_BYTES = int(os.environ.get('UPLOAD_QUOTA_MB', 0)) * 1024 * 1024  # 0 = no quota
+    
+    # Instrumentation (Prometheus metrics on /metrics, slow-request span logs)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    SLOW_REQUEST_MS = int(os.environ.get('SLOW_REQUEST_MS', 1000))  # 0 disables slow-request logs
     
     # Image generation provider settings
-    DEFAULT_IMAGE_PROVIDER = os.environ.get('IMAGE_PROVIDER', 'nanobanana')  # Options: nanobanana, veo, huggingface, replicate
-
+    DEFAULT_IMAGE_PROVIDER = os.environ.get('IMAGE_PROVIDER', 'nanobanana')  # Options: nanobanana, veo, huggingface, replicate, fake
+    # Providers image jobs may request (comma-separated IMAGE_PROVIDERS); only the default one when unset
+    IMAGE_PROVIDERS = [name.strip() for name in os.environ.get('IMAGE_PROVIDERS', '').split(',') if name.strip()] \
+        or [DEFAULT_IMAGE_PROVIDER]
+    LLM_PROVIDER = os.environ.get('LLM_PROVIDER', 'gemini')  # 'gemini' or 'fake'
+    
+    # Offline fake providers (LLM_PROVIDER=fake / IMAGE_PROVIDER=fake) for load testing without credentials
+    FAKE_LLM_LATENCY_MS = float(os.environ.get('FAKE_LLM_LATENCY_MS', 800))  # Median latency per LLM call
+    FAKE_IMAGE_LATENCY_MS = float(os.environ.get('FAKE_IMAGE_LATENCY_MS', 8000))  # Median latency per image
+    FAKE_LATENCY_SIGMA = float(os.environ.get('FAKE_LATENCY_SIGMA', 0.5))  # Log-normal spread (0 = fixed latency)
+    FAKE_ERROR_RATE = float(os.environ.get('FAKE_ERROR_RATE', 0))  # Share of calls failing with a 500
+    FAKE_THROTTLE_RATE = float(os.environ.get('FAKE_THROTTLE_RATE', 0))  # Share of calls answered with a 429
+    FAKE_IMAGE_SIZE = int(os.environ.get('FAKE_IMAGE_SIZE', 1024))  # Long side of fake images in pixels
+    FAKE_SEED = int(os.environ['FAKE_SEED']) if os.environ.get('FAKE_SEED') else None  # Latency / failure draws
+    
+    # Write API (bulk ingest, Idempotency-Key replay)
+    BULK_MAX_ITEMS = 10000  # Items accepted per request
+    IDEMPOTENCY_KEY_TTL_SECONDS = 24 * 3600  # Stored Idempotency-Key responses are purged after this
+    IDEMPOTENCY_LEASE_SECONDS = 60  # Renewed every third of this while the request runs; expires only if the process died
+    
+    # Asynchronous image generation jobs
+    IMAGE_JOB_WORKERS = int(os.environ.get('IMAGE_JOB_WORKERS', 2))  # Images rendered concurrently
+    IMAGE_JOB_STALE_SECONDS = 900  # `flask resume-image-jobs` re-queues running jobs started longer ago than this
@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from services.read_replicas import RoutingSession
 
-# Initialize extensions
-db = SQLAlchemy()
-
+# Initialize extensions (RoutingSession sends @read_replica views' reads to replica binds)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
@@ -0,0 +1,57 @@
+"""
+Migration script to add updated_at columns (used for collection ETags) to the
+users, pocketshows, posts, comments and votes tables.
+Run this script to update your existing database.
+"""
+import sqlite3
+from pathlib import Path
+
+TABLES = ['users', 'pocketshows', 'posts', 'comments', 'votes']
+
+def migrate_database():
+    # Find the database file
+    db_path = Path(__file__).parent / 'instance' / 'pocketverse.db'
+
+    if not db_path.exists():
+        print(f"Database not found at {db_path}")
+        print("Create it with `flask --app app init-db`.")
+        return
+
+    print(f"Migrating database at {db_path}...")
+
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.cursor()
+
+    try:
+        migrated = 0
+        for table in TABLES:
+            # Check if column already exists
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [column[1] for column in cursor.fetchall()]
+
+            if 'updated_at' in columns:
+                print(f"Column 'updated_at' already exists in {table}.")
+                continue
+
+            # Add the column, start it at created_at and index it for max(updated_at)
+            print(f"Adding 'updated_at' column to {table} table...")
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME")
+            cursor.execute(f"UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_updated_at ON {table} (updated_at)")
+            migrated += 1
+
+        conn.commit()
+        if migrated:
+            print("✅ Migration completed successfully!")
+        else:
+            print("Migration not needed.")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_database()
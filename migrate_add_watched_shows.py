@@ -12,7 +12,7 @@ def migrate_database():
     
     if not db_path.exists():
         print(f"Database not found at {db_path}")
-        print("The database will be created automatically on next app start.")
+        print("Create it with `flask --app app init-db`.")
         return
     
     print(f"Migrating database at {db_path}...")
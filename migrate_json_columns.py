@@ -0,0 +1,64 @@
+"""
+Migration script for the JSON columns (users.character_data, users.watched_shows,
+posts.post_metadata) of an existing SQLite database.
+SQLite stores JSON as text, so the columns keep their type; values that are not JSON
+objects (empty strings, invalid JSON, lists, null) used to be read back as {} and are
+set to NULL, and the expression index on character_data's character_name is created.
+Run this script to update your existing database.
+
+PostgreSQL databases convert the columns to JSONB instead:
+    ALTER TABLE users ALTER COLUMN character_data TYPE JSONB USING NULLIF(character_data, '')::jsonb;
+    ALTER TABLE users ALTER COLUMN watched_shows TYPE JSONB USING NULLIF(watched_shows, '')::jsonb;
+    ALTER TABLE posts ALTER COLUMN post_metadata TYPE JSONB USING NULLIF(post_metadata, '')::jsonb;
+    CREATE INDEX ix_users_character_name ON users ((CAST(character_data ->> 'character_name' AS VARCHAR)));
+"""
+import sqlite3
+from pathlib import Path
+
+JSON_COLUMNS = [('users', 'character_data'), ('users', 'watched_shows'), ('posts', 'post_metadata')]
+
+# Same expression as models.User.character_name_expr() (SQLite only uses the index for an identical expression)
+CHARACTER_NAME_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_users_character_name "
+    "ON users (CAST(JSON_EXTRACT(character_data, '$.\"character_name\"') AS VARCHAR))"
+)
+
+def migrate_database():
+    # Find the database file
+    db_path = Path(__file__).parent / 'instance' / 'pocketverse.db'
+
+    if not db_path.exists():
+        print(f"Database not found at {db_path}")
+        print("Create it with `flask --app app init-db`.")
+        return
+
+    print(f"Migrating database at {db_path}...")
+
+    conn = sqlite3.connect(str(db_path))
+    cursor = conn.cursor()
+
+    try:
+        for table, column in JSON_COLUMNS:
+            # json_type() raises on invalid JSON, so only call it for valid values
+            cursor.execute(
+                f"UPDATE {table} SET {column} = NULL WHERE {column} IS NOT NULL "
+                f"AND CASE WHEN json_valid({column}) THEN json_type({column}) END IS NOT 'object'"
+            )
+            if cursor.rowcount:
+                print(f"Cleared {cursor.rowcount} non-object value(s) in {table}.{column}")
+
+        print("Creating 'ix_users_character_name' index...")
+        cursor.execute(CHARACTER_NAME_INDEX)
+
+        conn.commit()
+        print("✅ Migration completed successfully!")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_database()
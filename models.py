@@ -2,6 +2,28 @@ from datetime import datetime
 from extensions import db
 import json
 import hashlib
+import uuid
+
+
+def _json_object(data, field):
+    """Copy of a dict for a JSON object column (None when empty); views reject other JSON values with a 400"""
+    if not data:
+        return None
+    if not isinstance(data, dict):
+        raise ValueError(f"{field} must be an object")
+    return dict(data)
+
+
+def JSONDocument():
+    """
+    Column type for JSON objects: JSONB on PostgreSQL, JSON (text) elsewhere.
+    Values are decoded once when a row is loaded and wrapped in a MutableDict, so in-place
+    changes to top-level keys mark the column dirty (nested changes need a reassignment).
+    """
+    from sqlalchemy.dialects.postgresql import JSONB
+    from sqlalchemy.ext.mutable import MutableDict
+    return MutableDict.as_mutable(db.JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), 'postgresql'))
+
 
 class User(db.Model):
     """Model for users (both official characters and unofficial users)"""
@@ -13,10 +35,11 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=True)  # For authentication
     is_official = db.Column(db.Boolean, default=False, nullable=False, index=True)
     # Character data for official users (JSON field)
-    character_data = db.Column(db.Text, nullable=True)  # JSON string: {show_name, character_name, avatar_url, bio, etc}
-    # Watched shows tracking: JSON string: {show_id: last_episode_watched, ...}
-    watched_shows = db.Column(db.Text, nullable=True)  # JSON string: {"show_name": episode_number, ...}
+    character_data = db.Column(JSONDocument(), nullable=True)  # {show_name, character_name, avatar_url, bio, etc}
+    # Watched shows tracking: {show_id: last_episode_watched, ...}
+    watched_shows = db.Column(JSONDocument(), nullable=True)  # {"show_name": episode_number, ...}
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)  # Bumped on every change (collection ETags)
     
     # Relationships
     posts = db.relationship('Post', backref='author_user', lazy=True, foreign_keys='Post.author_id')
@@ -26,31 +49,26 @@ class User(db.Model):
     def __repr__(self):
         return f'<User {self.username}>'
     
+    @classmethod
+    def character_name_expr(cls):
+        """SQL expression for character_data['character_name'] (matches ix_users_character_name)"""
+        return cls.character_data['character_name'].as_string()
+    
     def get_character_data(self):
-        """Parse and return character data as dict"""
-        if self.character_data:
-            try:
-                return json.loads(self.character_data)
-            except:
-                return {}
-        return {}
+        """Return character data as dict ({} when unset)"""
+        return self.character_data if self.character_data is not None else {}
     
     def set_character_data(self, data):
         """Set character data from dict"""
-        self.character_data = json.dumps(data) if data else None
+        self.character_data = _json_object(data, 'character_data')
     
     def get_watched_shows(self):
-        """Parse and return watched shows as dict"""
-        if self.watched_shows:
-            try:
-                return json.loads(self.watched_shows)
-            except:
-                return {}
-        return {}
+        """Return watched shows as dict (a copy: callers update it and pass it to set_watched_shows)"""
+        return dict(self.watched_shows) if self.watched_shows else {}
     
     def set_watched_shows(self, data):
         """Set watched shows from dict"""
-        self.watched_shows = json.dumps(data) if data else None
+        self.watched_shows = _json_object(data, 'watched_shows')
     
     def update_watched_episode(self, show_name, episode_number):
         """Update the last watched episode for a show"""
@@ -91,6 +109,11 @@ class User(db.Model):
         }
 
 
+# Expression index on the character name: official characters are looked up by name
+# (available / duplicate checks) without decoding every character_data document
+db.Index('ix_users_character_name', User.character_name_expr())
+
+
 class Pocketshow(db.Model):
     """Model for pocketshows (subreddits)"""
     __tablename__ = 'pocketshows'
@@ -99,6 +122,7 @@ class Pocketshow(db.Model):
     name = db.Column(db.String(100), unique=True, nullable=False, index=True)
     description = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     posts = db.relationship('Post', backref='pocketshow', lazy=True, cascade='all, delete-orphan')
@@ -129,12 +153,13 @@ class Post(db.Model):
     # Media support
     image_url = db.Column(db.String(500), nullable=True)
     video_url = db.Column(db.String(500), nullable=True)
-    # Metadata as JSON string (renamed from 'metadata' to avoid SQLAlchemy conflict)
-    post_metadata = db.Column(db.Text, nullable=True)  # JSON string for additional metadata
+    # Metadata as JSON (renamed from 'metadata' to avoid SQLAlchemy conflict)
+    post_metadata = db.Column(JSONDocument(), nullable=True)  # Additional metadata
     # Episode-based tagging for spoiler prevention
     show_name = db.Column(db.String(200), nullable=True, index=True)  # Name of the show this post relates to
     episode_tag = db.Column(db.Integer, nullable=True, index=True)  # Episode number this post is tagged with
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationships
     comments = db.relationship('Comment', backref='post', lazy=True, cascade='all, delete-orphan', order_by='Comment.created_at')
@@ -144,32 +169,38 @@ class Post(db.Model):
         return f'<Post {self.title}>'
     
     def get_metadata(self):
-        """Parse and return metadata as dict"""
-        if self.post_metadata:
-            try:
-                return json.loads(self.post_metadata)
-            except:
-                return {}
-        return {}
+        """Return metadata as dict ({} when unset)"""
+        return self.post_metadata if self.post_metadata is not None else {}
     
     def set_metadata(self, data):
         """Set metadata from dict"""
-        self.post_metadata = json.dumps(data) if data else None
+        self.post_metadata = Post.encode_metadata(data)
+    
+    @staticmethod
+    def encode_metadata(data):
+        """Column value for a metadata dict (used by bulk inserts that bypass the ORM)"""
+        return _json_object(data, 'metadata')
     
     def get_vote_score(self):
         """Calculate total vote score"""
         return sum(1 if v.is_upvote else -1 for v in self.votes)
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_author=True):
+        """
+        Args:
+            include_author: Embed the author's user dict (compact responses side-load authors by author_id instead)
+        """
+        from services.image_derivatives import variant_url
+        data = {
             'id': self.id,
             'title': self.title,
             'content': self.content,
             'description': self.description,
             'pocketshow_id': self.pocketshow_id,
             'author_id': self.author_id,
-            'author': self.author_user.to_dict() if self.author_user else None,
+            'author': self.author_user.to_dict() if include_author and self.author_user else None,
             'image_url': self.image_url,
+            'thumbnail_url': variant_url(self.image_url, 640),  # Feed-sized WebP/JPEG variant
             'video_url': self.video_url,
             'metadata': self.get_metadata(),
             'show_name': self.show_name,
@@ -178,6 +209,9 @@ class Post(db.Model):
             'comment_count': len(self.comments),
             'vote_score': self.get_vote_score()
         }
+        if not include_author:
+            del data['author']
+        return data
 
 
 class Comment(db.Model):
@@ -190,6 +224,7 @@ class Comment(db.Model):
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)  # Can be None for backward compatibility
     author = db.Column(db.String(100), nullable=True)  # Legacy field, kept for backward compatibility
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # For nested comments (replies)
     parent_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True)
@@ -234,6 +269,7 @@ class Vote(db.Model):
     comment_id = db.Column(db.Integer, db.ForeignKey('comments.id'), nullable=True)
     is_upvote = db.Column(db.Boolean, nullable=False)  # True for upvote, False for downvote
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Table constraints: ensure a vote is either for a post or comment, and one vote per user per post/comment
     __table_args__ = (
@@ -257,3 +293,134 @@ class Vote(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+
+
+class ImageJob(db.Model):
+    """Model for asynchronous image generation jobs"""
+    __tablename__ = 'image_jobs'
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    TERMINAL_STATUSES = (STATUS_COMPLETED, STATUS_FAILED)
+    
+    id = db.Column(db.String(32), primary_key=True, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED, index=True)
+    prompt = db.Column(db.Text, nullable=False)
+    story_context = db.Column(db.Text, nullable=True)  # JSON string passed to the image generator
+    provider = db.Column(db.String(50), nullable=True)
+    seed = db.Column(db.Integer, nullable=True)  # Fixed seed makes the result reusable for identical prompts
+    regenerate = db.Column(db.Boolean, default=False, nullable=False)  # Skip the prompt-result cache
+    cache_hit = db.Column(db.Boolean, default=False, nullable=False)  # Result came from the prompt-result cache
+    result_filename = db.Column(db.String(255), nullable=True)  # Blob name (<sha256>.<ext>) in the blob store
+    result_url = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<ImageJob {self.id} {self.status}>'
+    
+    def get_story_context(self):
+        """Parse and return story context as dict"""
+        if self.story_context:
+            try:
+                return json.loads(self.story_context)
+            except:
+                return {}
+        return {}
+    
+    def set_story_context(self, data):
+        """Set story context from dict"""
+        self.story_context = json.dumps(data) if data else None
+    
+    @property
+    def is_finished(self):
+        return self.status in self.TERMINAL_STATUSES
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'status': self.status,
+            'prompt': self.prompt,
+            'provider': self.provider,
+            'seed': self.seed,
+            'cache_hit': self.cache_hit,
+            'result_url': self.result_url,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class MediaBlob(db.Model):
+    """Model for content-addressed media files (images) in the blob store"""
+    __tablename__ = 'media_blobs'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    extension = db.Column(db.String(10), nullable=False)
+    mime_type = db.Column(db.String(50), nullable=True)
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    # Number of posts (or other records) using this blob; 0 means it may be garbage collected
+    ref_count = db.Column(db.Integer, nullable=False, default=0, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<MediaBlob {self.sha256[:12]} refs={self.ref_count}>'
+    
+    @property
+    def filename(self):
+        return f"{self.sha256}.{self.extension}"
+    
+    @property
+    def url(self):
+        return f"/uploads/{self.filename}"
+    
+    def to_dict(self):
+        return {
+            'sha256': self.sha256,
+            'url': self.url,
+            'mime_type': self.mime_type,
+            'size_bytes': self.size_bytes,
+            'ref_count': self.ref_count,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class PromptResult(db.Model):
+    """Model mapping a prompt + generation params hash to the blob it produced"""
+    __tablename__ = 'prompt_results'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    prompt_hash = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    blob_sha256 = db.Column(db.String(64), db.ForeignKey('media_blobs.sha256'), nullable=False, index=True)
+    provider = db.Column(db.String(50), nullable=True)
+    seed = db.Column(db.Integer, nullable=True)
+    params = db.Column(db.Text, nullable=True)  # JSON string of the hashed params, for debugging
+    hit_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    blob = db.relationship('MediaBlob', lazy='joined')
+    
+    def __repr__(self):
+        return f'<PromptResult {self.prompt_hash[:12]} -> {self.blob_sha256[:12]}>'
+
+
+class IdempotencyKey(db.Model):
+    """Model storing the response of a POST sent with an Idempotency-Key header, for replay on retry"""
+    __tablename__ = 'idempotency_keys'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)  # Method + path + body; reuse with another request is rejected
+    status_code = db.Column(db.Integer, nullable=True)  # None while the first request is still running
+    response_body = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<IdempotencyKey {self.key} {self.status_code}>'
@@ -0,0 +1,198 @@
+"""
+Concurrent batch executor with adaptive (AIMD) rate control.
+Runs a worker function over many items on a thread pool. The number of in-flight
+requests grows additively while calls succeed and is cut multiplicatively whenever
+the upstream API throttles us (429/499/504), so a batch settles near the quota
+instead of sleeping through fixed backoffs one request at a time.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+
+class AIMDLimiter:
+    """Concurrency limit with additive increase / multiplicative decrease"""
+
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 16,
+                 decrease_factor: float = 0.5, cooldown_seconds: float = 2.0):
+        """
+        Create a limiter.
+
+        Args:
+            initial: Starting concurrency
+            min_limit: Never allow fewer in-flight calls than this
+            max_limit: Never allow more in-flight calls than this
+            decrease_factor: Multiplier applied to the limit on throttling
+            cooldown_seconds: Throttles within this window of the last decrease are treated as
+                the same congestion event (a burst of 429s should only halve the limit once)
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self.in_flight = 0
+        self.throttle_count = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Block until a slot is free under the current limit"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        """Free a slot taken with acquire()"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_success(self):
+        """Additive increase: roughly +1 slot per full window of successful calls"""
+        with self._condition:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def on_throttle(self, status_code: Optional[int] = None):
+        """Multiplicative decrease on a throttling response"""
+        with self._condition:
+            self.throttle_count += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown_seconds:
+                return
+            self._last_decrease = now
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+
+class BatchResult(NamedTuple):
+    """Outcome of one item"""
+    item: Any
+    result: Any
+    error: Optional[BaseException]
+    latency: float
+
+
+class BatchExecutor:
+    """Runs a worker over items concurrently, adapting concurrency to upstream throttling"""
+
+    def __init__(self, worker: Callable[[Any], Any], initial_concurrency: int = 4,
+                 max_concurrency: int = 16, min_concurrency: int = 1,
+                 is_success: Optional[Callable[[Any], bool]] = None,
+                 throttle_cooldown_seconds: float = 2.0):
+        """
+        Create an executor.
+
+        Args:
+            worker: Function called once per item; its return value is passed back in BatchResult
+            initial_concurrency: Concurrency to start with
+            max_concurrency: Upper bound on concurrency (thread pool size)
+            min_concurrency: Lower bound on concurrency
+            is_success: Predicate on the worker's return value; failed results don't grow the limit
+            throttle_cooldown_seconds: Throttles closer together than this only cut the limit once;
+                roughly the latency of one call
+        """
+        self.worker = worker
+        self.max_concurrency = max(1, max_concurrency)
+        self.limiter = AIMDLimiter(initial=initial_concurrency, min_limit=min_concurrency,
+                                   max_limit=self.max_concurrency,
+                                   cooldown_seconds=throttle_cooldown_seconds)
+        self.is_success = is_success or (lambda result: True)
+        self.latencies: List[float] = []
+        self.completed = 0
+        self.failed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def record_throttle(self, status_code: Optional[int] = None):
+        """Throttle listener to hand to API clients (e.g. NanoBananaClient(throttle_listener=...))"""
+        self.limiter.on_throttle(status_code)
+
+    def _run_one(self, item: Any) -> BatchResult:
+        start = time.perf_counter()
+        try:
+            result = self.worker(item)
+            error = None
+        except Exception as e:
+            result, error = None, e
+        latency = time.perf_counter() - start
+
+        if error is None and self.is_success(result):
+            self.limiter.on_success()
+        return BatchResult(item, result, error, latency)
+
+    def map(self, items: Iterable[Any]) -> Iterator[BatchResult]:
+        """
+        Process items concurrently.
+
+        Args:
+            items: Items to process (consumed lazily as slots free up)
+
+        Returns:
+            Iterator of BatchResult in completion order
+        """
+        done: Queue = Queue()
+        self.started_at = time.perf_counter()
+        pending = 0
+
+        def finish(future):
+            self.limiter.release()
+            done.put(future.result())
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            for item in items:
+                # Drain finished results while we wait for capacity so callers see progress
+                while not done.empty():
+                    pending -= 1
+                    yield self._record(done.get())
+                self.limiter.acquire()
+                pool.submit(self._run_one, item).add_done_callback(finish)
+                pending += 1
+
+            while pending:
+                pending -= 1
+                yield self._record(done.get())
+
+        self.finished_at = time.perf_counter()
+
+    def _record(self, outcome: BatchResult) -> BatchResult:
+        self.latencies.append(outcome.latency)
+        if outcome.error is None and self.is_success(outcome.result):
+            self.completed += 1
+        else:
+            self.failed += 1
+        return outcome
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Summarize the run.
+
+        Returns:
+            Dictionary with counts, throughput (items/s), latency percentiles (s),
+            throttle count and the final concurrency limit
+        """
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(round(p * (len(latencies) - 1))))]
+
+        processed = self.completed + self.failed
+        return {
+            'processed': processed,
+            'completed': self.completed,
+            'failed': self.failed,
+            'elapsed_seconds': round(elapsed, 3),
+            'throughput_per_second': round(processed / elapsed, 3) if elapsed > 0 else 0.0,
+            'latency_p50_seconds': round(percentile(0.50), 3),
+            'latency_p95_seconds': round(percentile(0.95), 3),
+            'throttles': self.limiter.throttle_count,
+            'final_concurrency': round(self.limiter.limit, 2)
+        }
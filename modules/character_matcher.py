@@ -0,0 +1,156 @@
+"""
+Multi-pattern character mention matcher.
+Compiles every character name and alias into a single trie-shaped regex so a
+text can be scanned for all characters in one pass, with word-boundary semantics.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+
+class Mention(NamedTuple):
+    """A single character mention found in a text"""
+    character: str
+    alias: str
+    start: int
+    end: int
+
+
+class CharacterMatcher:
+    """Finds mentions of known characters (full names, first names and aliases) in text"""
+
+    # First names shorter than this are too ambiguous to match on their own
+    # (e.g. "The" in "The Hunt Tutors")
+    MIN_FIRST_NAME_LENGTH = 4
+
+    def __init__(self, characters: Union[Dict[str, Dict], Iterable[str]],
+                 aliases: Optional[Dict[str, List[str]]] = None,
+                 match_first_names: bool = True):
+        """
+        Build the matcher for a cast of characters.
+
+        Args:
+            characters: Character names, or a name -> character data dict as returned by
+                PromoCanonLoader.load_characters(). An 'aliases' list in the character data
+                is picked up automatically.
+            aliases: Extra aliases per character name (optional)
+            match_first_names: Whether a character's first name alone counts as a mention
+        """
+        if isinstance(characters, dict):
+            character_items = list(characters.items())
+        else:
+            character_items = [(name, {}) for name in characters]
+
+        self.characters = [name for name, _ in character_items]
+        self._order = {name: index for index, name in enumerate(self.characters)}
+
+        # alias (lowercased) -> canonical character names, in canon order
+        self._alias_map: Dict[str, List[str]] = {}
+        for name, char_data in character_items:
+            candidates = [name]
+            if match_first_names and ' ' in name:
+                first_name = name.split()[0]
+                if len(first_name) >= self.MIN_FIRST_NAME_LENGTH:
+                    candidates.append(first_name)
+            if isinstance(char_data, dict):
+                candidates.extend(char_data.get('aliases', []) or [])
+            if aliases:
+                candidates.extend(aliases.get(name, []))
+
+            for alias in candidates:
+                key = alias.strip().lower()
+                if not key:
+                    continue
+                names = self._alias_map.setdefault(key, [])
+                if name not in names:
+                    names.append(name)
+
+        self._pattern = self._compile(self._alias_map.keys())
+
+    @staticmethod
+    def _build_trie_pattern(node: Dict) -> str:
+        """Recursively turn a character trie into a regex fragment that shares common prefixes"""
+        is_terminal = '' in node
+        branches = []
+        for char in sorted(k for k in node if k != ''):
+            branches.append(re.escape(char) + CharacterMatcher._build_trie_pattern(node[char]))
+
+        if not branches:
+            return ''
+
+        if len(branches) == 1 and not is_terminal:
+            return branches[0]
+
+        body = f"(?:{'|'.join(branches)})"
+
+        # Greedy optional group so the longest alias wins (e.g. "nora smith" over "nora")
+        return body + '?' if is_terminal else body
+
+    @classmethod
+    def _compile(cls, aliases: Iterable[str]) -> Optional['re.Pattern']:
+        """Compile all aliases into one case-insensitive, word-bounded pattern"""
+        trie: Dict = {}
+        has_alias = False
+        for alias in aliases:
+            node = trie
+            for char in alias:
+                node = node.setdefault(char, {})
+            node[''] = True
+            has_alias = True
+
+        if not has_alias:
+            return None
+
+        return re.compile(r'(?<!\w)' + cls._build_trie_pattern(trie) + r'(?!\w)', re.IGNORECASE)
+
+    def find_mentions(self, text: str) -> List[Mention]:
+        """
+        Find every character mention in text in a single scan.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            List of Mention tuples (character, alias, start, end) in text order.
+            An alias shared by several characters yields one mention per character.
+        """
+        if not text or self._pattern is None:
+            return []
+
+        mentions = []
+        for match in self._pattern.finditer(text):
+            alias = match.group(0)
+            for name in self._alias_map.get(alias.lower(), []):
+                mentions.append(Mention(name, alias, match.start(), match.end()))
+        return mentions
+
+    def find_characters(self, text: str) -> List[str]:
+        """
+        Get the distinct characters mentioned in text.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            List of character names, in the order the characters were given to the matcher
+        """
+        found = {mention.character for mention in self.find_mentions(text)}
+        return sorted(found, key=self._order.__getitem__)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Resolve a name or alias to its canonical character name.
+
+        Args:
+            name: Full name, first name or alias (case-insensitive)
+
+        Returns:
+            Canonical character name, or None if the name is unknown
+        """
+        names = self._alias_map.get(name.strip().lower()) if name else None
+        return names[0] if names else None
+
+    def mentions_character(self, text: str, character_name: str) -> bool:
+        """Check whether a specific character is mentioned in text"""
+        canonical = self.resolve(character_name) or character_name
+        return canonical in self.find_characters(text)
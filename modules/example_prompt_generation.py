@@ -3,6 +3,7 @@ Example usage of the post generation engine for VEO prompts.
 Demonstrates how to generate prompts from cliffhangers.
 """
 
+from itertools import islice
 from .post_generation_engine import create_engine
 
 
@@ -57,19 +58,20 @@ def example_top_engaging():
 
 
 def example_episode_range():
-    """Example of generating prompts for an episode range"""
+    """Example of streaming prompts for an episode range"""
     canon_dir = "PromoCanon_Show_33adb096b04ecd6b23ce9341160b199f2d489311_1_100"
     engine = create_engine(canon_dir)
     
-    # Generate prompts for episodes 1-10, multiple character perspectives
-    prompts = engine.generate_prompts_for_episode_range(
+    # Stream prompts for episodes 1-10, multiple character perspectives.
+    # Prompts are built as they are consumed, so only the first 5 are ever generated.
+    prompts = engine.iter_prompts_for_episode_range(
         start_episode=1,
         end_episode=10,
         characters_per_cliffhanger=2  # Generate from 2 character perspectives
     )
     
-    print(f"\nGenerated {len(prompts)} prompts for episodes 1-10:")
-    for prompt in prompts[:5]:  # Show first 5
+    print("\nFirst 5 prompts for episodes 1-10:")
+    for prompt in islice(prompts, 5):
         print(f"\n{engine.get_prompt_summary(prompt)}")
         print(f"Full prompt: {prompt['prompt'][:200]}...")
 
@@ -150,6 +150,33 @@ def example_with_generated_content():
         print(f"Published comment: {comment['id']}")
 
 
+def example_seed_many_posts(count: int = 5000):
+    """Example: Seed thousands of posts quickly with the SDK (bulk endpoint + concurrent chunks)"""
+    import asyncio
+    import time
+    from pocketverse_client import AsyncPocketverseClient
+    
+    posts_data = [
+        {
+            "pocketshow_id": 1,
+            "title": f"Seeded post {i}",
+            "author_id": 1,
+            "content": "Generated post content here..."
+        }
+        for i in range(count)
+    ]
+    
+    async def seed():
+        async with AsyncPocketverseClient("http://localhost:5000") as client:
+            return await client.bulk_create_posts(posts_data, chunk_size=500, concurrency=4)
+    
+    start = time.perf_counter()
+    results = asyncio.run(seed())
+    elapsed = time.perf_counter() - start
+    created = sum(1 for result in results if result['success'])
+    print(f"Created {created}/{count} posts in {elapsed:.1f}s ({created / elapsed * 60:.0f} posts/minute)")
+
+
 if __name__ == "__main__":
     # Uncomment the example you want to run:
     
@@ -157,6 +184,7 @@ if __name__ == "__main__":
     # example_create_comment(post_id=1)
     # example_batch_creation()
     # example_with_generated_content()
+    # example_seed_many_posts()
     
     print("See the examples above. Uncomment the one you want to test.")
 
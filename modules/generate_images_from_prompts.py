@@ -6,6 +6,7 @@ Uses prompts generated by the post generation engine.
 import sys
 import json
 import time
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict
 
@@ -14,6 +15,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from modules.post_generation_engine import create_engine
 from modules.nano_banana_client import create_nano_banana_client
+from modules.run_manifest import RunManifest
+from modules.batch_executor import BatchExecutor
 
 # ============================================================================
 # CONFIGURATION
@@ -68,10 +71,144 @@ IMAGE_FILENAME_FORMAT = "episode_{episode}_{perspective}_{timestamp}.png"  # Fil
 
 # Output settings
 SAVE_RESULTS = True
-RESULTS_FILE = "generated_images.json"
+RESULTS_FILE = "generated_images.json"  # Run config + summary (computed from the manifest)
+MANIFEST_FILE = "generated_images.jsonl"  # Append-only per-image results; re-runs skip completed prompts
+MANIFEST_FSYNC_EVERY = 5  # Force manifest records to disk every N images
+INITIAL_CONCURRENCY = 4  # Parallel requests to start with
+MAX_CONCURRENCY = 16  # Upper bound; concurrency adapts between 1 and this based on 429/504s
+MAX_ATTEMPTS_PER_IMAGE = 5  # Retries per image (exponential backoff with jitter, honours Retry-After)
 MAX_IMAGES_TO_GENERATE = 3  # Limit for testing
 
 
+# Parameters that change the generated image (part of the resume key)
+GENERATION_PARAMS = {
+    'width': IMAGE_WIDTH,
+    'height': IMAGE_HEIGHT,
+    'style': IMAGE_STYLE,
+}
+
+
+def generate_image_record(client, prompt_data: Dict, prompt_hash: str) -> Dict:
+    """
+    Generate, save and upload one image.
+    
+    Args:
+        client: NanoBananaClient instance
+        prompt_data: Prompt dictionary from the post generation engine
+        prompt_hash: Resume key for this prompt
+        
+    Returns:
+        Manifest record for the item (never contains base64 image data)
+    """
+    prompt_text = prompt_data.get('prompt', '')
+    episode = prompt_data.get('episode', 'Unknown')
+    perspective = prompt_data.get('perspective_character', 'Generic')
+    record = {
+        'prompt_hash': prompt_hash,
+        'episode': episode,
+        'perspective_character': prompt_data.get('perspective_character'),
+        'cliffhanger_title': prompt_data.get('cliffhanger_title'),
+        'prompt': prompt_text,
+    }
+    
+    print(f"   Episode: {episode}")
+    print(f"   Perspective: {perspective}")
+    print(f"   Prompt: {prompt_text}...")
+    
+    try:
+        if SAVE_TO_DISK:
+            # Stream the image straight to disk; it never sits in memory as base64
+            timestamp = int(time.time())
+            safe_perspective = perspective.replace(" ", "_").replace("/", "_") if perspective else "generic"
+            filename = f"episode_{episode}_{safe_perspective}_{timestamp}_{prompt_hash[:8]}.png"
+            result = client.generate_image_to_file(
+                prompt=prompt_text,
+                filepath=str(Path(IMAGES_DIR) / filename),
+                width=IMAGE_WIDTH,
+                height=IMAGE_HEIGHT,
+                style=IMAGE_STYLE
+            )
+        else:
+            result = client.generate_image(
+                prompt=prompt_text,
+                width=IMAGE_WIDTH,
+                height=IMAGE_HEIGHT,
+                style=IMAGE_STYLE
+            )
+        
+        if result.get('status') == 'completed':
+            image_url = result.get('image_url')
+            image_id = result.get('image_id')
+            disk_path = result.get('disk_path')
+            
+            print(f"   ✓ Image generated successfully")
+            print(f"   Image ID: {image_id}")
+            if disk_path:
+                print(f"   ✓ Saved to: {disk_path} ({result.get('size_bytes', 0)} bytes)")
+            elif image_url and image_url.startswith("data:image"):
+                print(f"   Image format: Base64 data URL")
+            else:
+                print(f"   Image URL: {image_url[:100]}..." if image_url and len(image_url) > 100 else f"   Image URL: {image_url}")
+            
+            # Upload to GCS if configured
+            gcs_url = None
+            if GCS_UPLOAD and GCS_BUCKET_NAME:
+                try:
+                    # Files on disk are streamed from disk instead of being re-encoded to base64
+                    image_base64 = None
+                    if not disk_path:
+                        image_base64 = image_url.split(",")[1] if image_url and "," in image_url else None
+                    if disk_path or image_base64:
+                        print(f"   Uploading to GCS...")
+                        blob_name = f"images/episode_{episode}/{image_id}.png"
+                        gcs_url = client.upload_to_gcs(
+                            image_base64=image_base64,
+                            bucket_name=GCS_BUCKET_NAME,
+                            blob_name=blob_name,
+                            file_path=disk_path
+                        )
+                        print(f"   ✓ Uploaded to: {gcs_url}")
+                except Exception as e:
+                    print(f"   ⚠ GCS upload failed: {e}")
+            
+            record.update({
+                'image_id': image_id,
+                # Data URLs are multi-megabyte; the image lives on disk / GCS instead
+                'image_url': None if (disk_path or (image_url or '').startswith("data:image")) else image_url,
+                'disk_path': disk_path,
+                'gcs_url': gcs_url,
+                'status': 'completed',
+                'generated_at': time.time()
+            })
+            
+        elif result.get('status') == 'error':
+            print(f"   ✗ Error: {result.get('error')}")
+            record.update({
+                'status': 'error',
+                'error': result.get('error'),
+                'generated_at': time.time()
+            })
+        else:
+            print(f"   ⚠ Unexpected status: {result.get('status')}")
+            record.update({
+                'status': result.get('status'),
+                'error': result.get('error'),
+                'generated_at': time.time()
+            })
+            
+    except Exception as e:
+        print(f"   ✗ Exception: {e}")
+        import traceback
+        traceback.print_exc()
+        record.update({
+            'status': 'exception',
+            'error': str(e),
+            'generated_at': time.time()
+        })
+    
+    return record
+
+
 def generate_images_from_prompts():
     """Generate images from prompts"""
     print("="*80)
@@ -100,7 +237,7 @@ def generate_images_from_prompts():
             if EPISODE_CHARACTER:
                 print(f"   Character perspective: {EPISODE_CHARACTER}")
             print(f"   Prompts per cliffhanger: {PROMPTS_PER_CLIFFHANGER}")
-            prompts = engine.generate_prompts_for_cliffhanger(
+            prompts = engine.iter_prompts_for_cliffhanger(
                 episode_num=EPISODE_NUM,
                 perspective_character=EPISODE_CHARACTER,
                 prompts_per_cliffhanger=PROMPTS_PER_CLIFFHANGER
@@ -110,7 +247,7 @@ def generate_images_from_prompts():
             print(f"\n2. Generating prompts from {CHARACTER_NAME}'s perspective...")
             print(f"   Episode range: {CHARACTER_MIN_EPISODE}-{CHARACTER_MAX_EPISODE}")
             print(f"   Limit: {CHARACTER_LIMIT}")
-            prompts = engine.generate_prompts_for_character(
+            prompts = engine.iter_prompts_for_character(
                 character_name=CHARACTER_NAME,
                 min_episode=CHARACTER_MIN_EPISODE,
                 max_episode=CHARACTER_MAX_EPISODE,
@@ -120,7 +257,7 @@ def generate_images_from_prompts():
         elif GENERATION_MODE == "top_engaging":
             print(f"\n2. Generating top {TOP_COUNT} most engaging prompts...")
             print(f"   Episode range: {TOP_MIN_EPISODE}-{TOP_MAX_EPISODE}")
-            prompts = engine.generate_top_engaging_prompts(
+            prompts = engine.iter_top_engaging_prompts(
                 count=TOP_COUNT,
                 min_episode=TOP_MIN_EPISODE,
                 max_episode=TOP_MAX_EPISODE
@@ -129,7 +266,7 @@ def generate_images_from_prompts():
         elif GENERATION_MODE == "episode_range":
             print(f"\n2. Generating prompts for episodes {RANGE_START}-{RANGE_END}...")
             print(f"   Characters per cliffhanger: {RANGE_CHARACTERS_PER_CLIFFHANGER}")
-            prompts = engine.generate_prompts_for_episode_range(
+            prompts = engine.iter_prompts_for_episode_range(
                 start_episode=RANGE_START,
                 end_episode=RANGE_END,
                 characters_per_cliffhanger=RANGE_CHARACTERS_PER_CLIFFHANGER
@@ -140,16 +277,14 @@ def generate_images_from_prompts():
             print("   Valid modes: 'episode', 'character', 'top_engaging', 'episode_range'")
             return
         
+        # Limit to max images (only the prompts we use are ever built)
+        prompts = list(islice(prompts, MAX_IMAGES_TO_GENERATE))
         print(f"   ✓ Generated {len(prompts)} prompts")
         
         if not prompts:
             print("   ⚠ No prompts generated. Exiting.")
             return
         
-        # Limit to max images
-        prompts = prompts[:MAX_IMAGES_TO_GENERATE]
-        print(f"   → Using first {len(prompts)} prompts for image generation")
-        
     except Exception as e:
         print(f"   ✗ Error generating prompts: {e}")
         import traceback
@@ -161,7 +296,8 @@ def generate_images_from_prompts():
         print("\n3. Initializing Nano Banana client...")
         client = create_nano_banana_client(
             project_id=GCP_PROJECT_ID,
-            region=GCP_REGION
+            region=GCP_REGION,
+            max_attempts=MAX_ATTEMPTS_PER_IMAGE
         )
         print("   ✓ Client initialized")
     except Exception as e:
@@ -170,137 +306,49 @@ def generate_images_from_prompts():
         traceback.print_exc()
         return
     
+    # Skip prompts already completed by a previous run
+    manifest = RunManifest(MANIFEST_FILE, fsync_every=MANIFEST_FSYNC_EVERY)
+    completed_hashes = manifest.completed_hashes()
+    pending = []
+    for prompt_data in prompts:
+        prompt_hash = RunManifest.prompt_hash(prompt_data.get('prompt', ''), GENERATION_PARAMS)
+        if prompt_hash in completed_hashes:
+            print(f"   ↷ Skipping already generated prompt {prompt_hash[:12]} (episode {prompt_data.get('episode')})")
+            continue
+        pending.append((prompt_hash, prompt_data))
+    
     # Generate images
-    print(f"\n4. Generating {len(prompts)} images...")
-    print("   (This may take a few seconds per image)")
+    print(f"\n4. Generating {len(pending)} images ({len(prompts) - len(pending)} already done)...")
+    print(f"   Concurrency: starting at {INITIAL_CONCURRENCY}, adapting up to {MAX_CONCURRENCY}")
     print("-"*80)
     
-    results = []
+    executor = BatchExecutor(
+        worker=lambda job: generate_image_record(client, job[1], job[0]),
+        initial_concurrency=INITIAL_CONCURRENCY,
+        max_concurrency=MAX_CONCURRENCY,
+        is_success=lambda record: record.get('status') == 'completed'
+    )
+    # Throttled responses shrink the concurrency window immediately, even mid-retry
+    client.throttle_listener = executor.record_throttle
     
-    for i, prompt_data in enumerate(prompts, 1):
-        prompt_text = prompt_data.get('prompt', '')
-        episode = prompt_data.get('episode', 'Unknown')
-        perspective = prompt_data.get('perspective_character', 'Generic')
-        
-        print(f"\n   Image {i}/{len(prompts)}")
-        print(f"   Episode: {episode}")
-        print(f"   Perspective: {perspective}")
-        print(f"   Prompt: {prompt_text}...")
-        
-        try:
-            # Generate image
-            result = client.generate_image(
-                prompt=prompt_text,
-                width=IMAGE_WIDTH,
-                height=IMAGE_HEIGHT,
-                style=IMAGE_STYLE
-            )
-            
-            if result.get('status') == 'completed':
-                image_url = result.get('image_url')
-                image_id = result.get('image_id')
-                
-                print(f"   ✓ Image generated successfully")
-                print(f"   Image ID: {image_id}")
-                if image_url and image_url.startswith("data:image"):
-                    print(f"   Image format: Base64 data URL (saved to disk)")
-                else:
-                    print(f"   Image URL: {image_url[:100]}..." if image_url and len(image_url) > 100 else f"   Image URL: {image_url}")
-                
-                # Extract base64 data from data URL if present
-                image_base64 = None
-                if image_url and image_url.startswith("data:image"):
-                    # Extract base64 part from data URL
-                    image_base64 = image_url.split(",")[1] if "," in image_url else None
-                
-                # Save to disk if configured
-                disk_path = None
-                if SAVE_TO_DISK and image_base64:
-                    try:
-                        import os
-                        from pathlib import Path
-                        
-                        # Create images directory
-                        images_dir = Path(IMAGES_DIR)
-                        images_dir.mkdir(parents=True, exist_ok=True)
-                        
-                        # Generate filename
-                        timestamp = int(time.time())
-                        safe_perspective = perspective.replace(" ", "_").replace("/", "_") if perspective else "generic"
-                        filename = f"episode_{episode}_{safe_perspective}_{timestamp}.png"
-                        filepath = images_dir / filename
-                        
-                        print(f"   Saving to disk...")
-                        disk_path = client.save_image_to_disk(
-                            image_base64=image_base64,
-                            filepath=str(filepath)
-                        )
-                        print(f"   ✓ Saved to: {disk_path}")
-                    except Exception as e:
-                        print(f"   ⚠ Disk save failed: {e}")
-                
-                # Upload to GCS if configured
-                gcs_url = None
-                if GCS_UPLOAD and GCS_BUCKET_NAME and image_base64:
-                    try:
-                        print(f"   Uploading to GCS...")
-                        blob_name = f"images/episode_{episode}/{image_id}.png"
-                        gcs_url = client.upload_to_gcs(
-                            image_base64=image_base64,
-                            bucket_name=GCS_BUCKET_NAME,
-                            blob_name=blob_name
-                        )
-                        print(f"   ✓ Uploaded to: {gcs_url}")
-                    except Exception as e:
-                        print(f"   ⚠ GCS upload failed: {e}")
-                
-                # Store result
-                image_result = {
-                    'prompt_data': prompt_data,
-                    'image_id': image_id,
-                    'image_url': image_url,
-                    'disk_path': disk_path,
-                    'gcs_url': gcs_url,
-                    'status': 'completed',
-                    'generated_at': time.time()
-                }
-                results.append(image_result)
-                
-            elif result.get('status') == 'error':
-                print(f"   ✗ Error: {result.get('error')}")
-                results.append({
-                    'prompt_data': prompt_data,
-                    'status': 'error',
-                    'error': result.get('error'),
-                    'generated_at': time.time()
-                })
-            else:
-                print(f"   ⚠ Unexpected status: {result.get('status')}")
-                results.append({
-                    'prompt_data': prompt_data,
-                    'status': result.get('status'),
-                    'generated_at': time.time()
-                })
-                
-        except Exception as e:
-            print(f"   ✗ Exception: {e}")
-            import traceback
-            traceback.print_exc()
-            results.append({
-                'prompt_data': prompt_data,
-                'status': 'exception',
-                'error': str(e),
-                'generated_at': time.time()
-            })
-        
-        # Small delay between requests
-        if i < len(prompts):
-            print("   Waiting 1 second before next image...")
-            time.sleep(1)
+    with manifest:
+        for i, outcome in enumerate(executor.map(pending), 1):
+            record = outcome.result
+            print(f"\n   Image {i}/{len(pending)}: {record.get('status')} "
+                  f"(episode {record.get('episode')}, {outcome.latency:.1f}s)")
+            manifest.append(record)
+    
+    run_stats = executor.stats()
+    print(f"\n   Throughput: {run_stats['throughput_per_second']} images/s, "
+          f"p50 {run_stats['latency_p50_seconds']}s, p95 {run_stats['latency_p95_seconds']}s, "
+          f"{run_stats['throttles']} throttled responses, final concurrency {run_stats['final_concurrency']}")
+    
+    # Summary is computed by streaming over the manifest, so it covers resumed runs too
+    summary = manifest.summarize()
     
     # Save results
-    if SAVE_RESULTS and results:
-        print(f"\n5. Saving results to {RESULTS_FILE}...")
+    if SAVE_RESULTS:
+        print(f"\n5. Saving run summary to {RESULTS_FILE}...")
         try:
             # Build config based on generation mode
             config = {
@@ -338,42 +386,42 @@ def generate_images_from_prompts():
             
             output_data = {
                 'generation_config': config,
-                'results': results,
-                'summary': {
-                    'total': len(results),
-                    'completed': len([r for r in results if r.get('status') == 'completed']),
-                    'failed': len([r for r in results if r.get('status') in ['error', 'exception']])
-                }
+                'manifest_file': MANIFEST_FILE,
+                'summary': summary,
+                'run_stats': run_stats
             }
             
             with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, indent=2, ensure_ascii=False)
             
-            print(f"   ✓ Results saved")
+            print(f"   ✓ Summary saved")
         except Exception as e:
-            print(f"   ⚠ Failed to save results: {e}")
+            print(f"   ⚠ Failed to save summary: {e}")
     
     # Summary
     print("\n" + "="*80)
     print("SUMMARY")
     print("="*80)
-    print(f"Total images attempted: {len(results)}")
-    print(f"Completed: {len([r for r in results if r.get('status') == 'completed'])}")
-    print(f"Failed: {len([r for r in results if r.get('status') in ['error', 'exception']])}")
+    print(f"Total images attempted: {summary['total']}")
+    print(f"Completed: {summary['completed']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Manifest: {MANIFEST_FILE}")
     print("="*80)
     
-    # Print image summary (without base64 data)
-    completed = [r for r in results if r.get('status') == 'completed']
-    if completed:
-        print("\nGenerated Images Summary:")
-        for i, result in enumerate(completed, 1):
-            print(f"\n  {i}. Episode {result['prompt_data'].get('episode')} - {result['prompt_data'].get('perspective_character', 'Generic')}")
-            print(f"     Image ID: {result.get('image_id')}")
-            if result.get('disk_path'):
-                print(f"     Saved to: {result.get('disk_path')}")
-            if result.get('gcs_url'):
-                print(f"     GCS: {result.get('gcs_url')}")
-            # Don't print base64 data URLs - they're too long and clutter output
+    # Print image summary for this run (without base64 data)
+    print("\nGenerated Images Summary:")
+    run_hashes = {prompt_hash for prompt_hash, _ in pending}
+    count = 0
+    for record in manifest.iter_records():
+        if record.get('prompt_hash') not in run_hashes or record.get('status') != 'completed':
+            continue
+        count += 1
+        print(f"\n  {count}. Episode {record.get('episode')} - {record.get('perspective_character') or 'Generic'}")
+        print(f"     Image ID: {record.get('image_id')}")
+        if record.get('disk_path'):
+            print(f"     Saved to: {record.get('disk_path')}")
+        if record.get('gcs_url'):
+            print(f"     GCS: {record.get('gcs_url')}")
 
 
 if __name__ == "__main__":
@@ -6,6 +6,7 @@ Uses prompts generated by the post generation engine.
 import sys
 import json
 import time
+from itertools import islice
 from pathlib import Path
 from typing import List, Dict
 
@@ -14,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from modules.post_generation_engine import create_engine
 from modules.nano_banana_client import create_nano_banana_client
+from modules.run_manifest import RunManifest
 
 # ============================================================================
 # CONFIGURATION
@@ -40,9 +42,114 @@ GCS_UPLOAD = False  # Set to True to upload images to GCS
 
 # Output settings
 SAVE_RESULTS = True
-RESULTS_FILE = "generated_images.json"
+RESULTS_FILE = "generated_images.json"  # Run config + summary (computed from the manifest)
+MANIFEST_FILE = "generated_images.jsonl"  # Append-only per-image results; re-runs skip completed prompts
+MANIFEST_FSYNC_EVERY = 5  # Force manifest records to disk every N images
+REQUEST_DELAY_SECONDS = 0  # Optional pause between requests
 MAX_IMAGES_TO_GENERATE = 3  # Limit for testing
 
+# Parameters that change the generated image (part of the resume key)
+GENERATION_PARAMS = {
+    'width': IMAGE_WIDTH,
+    'height': IMAGE_HEIGHT,
+    'style': IMAGE_STYLE,
+}
+
+
+def generate_image_record(client, prompt_data: Dict, prompt_hash: str) -> Dict:
+    """
+    Generate and upload one image.
+    
+    Args:
+        client: NanoBananaClient instance
+        prompt_data: Prompt dictionary from the post generation engine
+        prompt_hash: Resume key for this prompt
+        
+    Returns:
+        Manifest record for the item
+    """
+    prompt_text = prompt_data.get('prompt', '')
+    episode = prompt_data.get('episode', 'Unknown')
+    perspective = prompt_data.get('perspective_character', 'Generic')
+    record = {
+        'prompt_hash': prompt_hash,
+        'episode': episode,
+        'perspective_character': prompt_data.get('perspective_character'),
+        'cliffhanger_title': prompt_data.get('cliffhanger_title'),
+        'prompt': prompt_text,
+    }
+    
+    print(f"   Episode: {episode}")
+    print(f"   Perspective: {perspective}")
+    print(f"   Prompt: {prompt_text[:100]}...")
+    
+    try:
+        # Generate image
+        result = client.generate_image(
+            prompt=prompt_text,
+            width=IMAGE_WIDTH,
+            height=IMAGE_HEIGHT,
+            style=IMAGE_STYLE
+        )
+        
+        if result.get('status') == 'completed':
+            image_url = result.get('image_url')
+            image_id = result.get('image_id')
+            
+            print(f"   ✓ Image generated successfully")
+            print(f"   Image ID: {image_id}")
+            print(f"   Image URL: {image_url}")
+            
+            # Upload to GCS if configured
+            gcs_url = None
+            if GCS_UPLOAD and GCS_BUCKET_NAME and image_url:
+                try:
+                    print(f"   Uploading to GCS...")
+                    blob_name = f"images/episode_{episode}/{image_id}.png"
+                    gcs_url = client.upload_to_gcs(
+                        image_url=image_url,
+                        bucket_name=GCS_BUCKET_NAME,
+                        blob_name=blob_name
+                    )
+                    print(f"   ✓ Uploaded to: {gcs_url}")
+                except Exception as e:
+                    print(f"   ⚠ GCS upload failed: {e}")
+            
+            record.update({
+                'image_id': image_id,
+                'image_url': image_url,
+                'gcs_url': gcs_url,
+                'status': 'completed',
+                'generated_at': time.time()
+            })
+            
+        elif result.get('status') == 'error':
+            print(f"   ✗ Error: {result.get('error')}")
+            record.update({
+                'status': 'error',
+                'error': result.get('error'),
+                'generated_at': time.time()
+            })
+        else:
+            print(f"   ⚠ Unexpected status: {result.get('status')}")
+            record.update({
+                'status': result.get('status'),
+                'error': result.get('error'),
+                'generated_at': time.time()
+            })
+            
+    except Exception as e:
+        print(f"   ✗ Exception: {e}")
+        import traceback
+        traceback.print_exc()
+        record.update({
+            'status': 'exception',
+            'error': str(e),
+            'generated_at': time.time()
+        })
+    
+    return record
+
 
 def generate_images_from_prompts():
     """Generate images from prompts"""
@@ -68,21 +175,19 @@ def generate_images_from_prompts():
     # Generate prompts
     try:
         print(f"\n2. Generating prompts for Episode {EPISODE_NUM}...")
-        prompts = engine.generate_prompts_for_cliffhanger(
+        prompts = engine.iter_prompts_for_cliffhanger(
             episode_num=EPISODE_NUM,
             perspective_character=EPISODE_CHARACTER,
             prompts_per_cliffhanger=PROMPTS_PER_CLIFFHANGER
         )
+        # Limit to max images (only the prompts we use are ever built)
+        prompts = list(islice(prompts, MAX_IMAGES_TO_GENERATE))
         print(f"   ✓ Generated {len(prompts)} prompts")
         
         if not prompts:
             print("   ⚠ No prompts generated. Exiting.")
             return
         
-        # Limit to max images
-        prompts = prompts[:MAX_IMAGES_TO_GENERATE]
-        print(f"   → Using first {len(prompts)} prompts for image generation")
-        
     except Exception as e:
         print(f"   ✗ Error generating prompts: {e}")
         import traceback
@@ -103,144 +208,81 @@ def generate_images_from_prompts():
         traceback.print_exc()
         return
     
+    # Skip prompts already completed by a previous run
+    manifest = RunManifest(MANIFEST_FILE, fsync_every=MANIFEST_FSYNC_EVERY)
+    completed_hashes = manifest.completed_hashes()
+    pending = []
+    for prompt_data in prompts:
+        prompt_hash = RunManifest.prompt_hash(prompt_data.get('prompt', ''), GENERATION_PARAMS)
+        if prompt_hash in completed_hashes:
+            print(f"   ↷ Skipping already generated prompt {prompt_hash[:12]} (episode {prompt_data.get('episode')})")
+            continue
+        pending.append((prompt_hash, prompt_data))
+    
     # Generate images
-    print(f"\n4. Generating {len(prompts)} images...")
+    print(f"\n4. Generating {len(pending)} images ({len(prompts) - len(pending)} already done)...")
     print("   (This may take a few seconds per image)")
     print("-"*80)
     
-    results = []
-    
-    for i, prompt_data in enumerate(prompts, 1):
-        prompt_text = prompt_data.get('prompt', '')
-        episode = prompt_data.get('episode', 'Unknown')
-        perspective = prompt_data.get('perspective_character', 'Generic')
-        
-        print(f"\n   Image {i}/{len(prompts)}")
-        print(f"   Episode: {episode}")
-        print(f"   Perspective: {perspective}")
-        print(f"   Prompt: {prompt_text[:100]}...")
-        
-        try:
-            # Generate image
-            result = client.generate_image(
-                prompt=prompt_text,
-                width=IMAGE_WIDTH,
-                height=IMAGE_HEIGHT,
-                style=IMAGE_STYLE
-            )
+    with manifest:
+        for i, (prompt_hash, prompt_data) in enumerate(pending, 1):
+            print(f"\n   Image {i}/{len(pending)}")
+            record = generate_image_record(client, prompt_data, prompt_hash)
+            manifest.append(record)
             
-            if result.get('status') == 'completed':
-                image_url = result.get('image_url')
-                image_id = result.get('image_id')
-                
-                print(f"   ✓ Image generated successfully")
-                print(f"   Image ID: {image_id}")
-                print(f"   Image URL: {image_url}")
-                
-                # Upload to GCS if configured
-                gcs_url = None
-                if GCS_UPLOAD and GCS_BUCKET_NAME and image_url:
-                    try:
-                        print(f"   Uploading to GCS...")
-                        blob_name = f"images/episode_{episode}/{image_id}.png"
-                        gcs_url = client.upload_to_gcs(
-                            image_url=image_url,
-                            bucket_name=GCS_BUCKET_NAME,
-                            blob_name=blob_name
-                        )
-                        print(f"   ✓ Uploaded to: {gcs_url}")
-                    except Exception as e:
-                        print(f"   ⚠ GCS upload failed: {e}")
-                
-                # Store result
-                image_result = {
-                    'prompt_data': prompt_data,
-                    'image_id': image_id,
-                    'image_url': image_url,
-                    'gcs_url': gcs_url,
-                    'status': 'completed',
-                    'generated_at': time.time()
-                }
-                results.append(image_result)
-                
-            elif result.get('status') == 'error':
-                print(f"   ✗ Error: {result.get('error')}")
-                results.append({
-                    'prompt_data': prompt_data,
-                    'status': 'error',
-                    'error': result.get('error'),
-                    'generated_at': time.time()
-                })
-            else:
-                print(f"   ⚠ Unexpected status: {result.get('status')}")
-                results.append({
-                    'prompt_data': prompt_data,
-                    'status': result.get('status'),
-                    'generated_at': time.time()
-                })
-                
-        except Exception as e:
-            print(f"   ✗ Exception: {e}")
-            import traceback
-            traceback.print_exc()
-            results.append({
-                'prompt_data': prompt_data,
-                'status': 'exception',
-                'error': str(e),
-                'generated_at': time.time()
-            })
-        
-        # Small delay between requests
-        if i < len(prompts):
-            print("   Waiting 1 second before next image...")
-            time.sleep(1)
+            # Optional delay between requests
+            if REQUEST_DELAY_SECONDS and i < len(pending):
+                time.sleep(REQUEST_DELAY_SECONDS)
+    
+    # Summary is computed by streaming over the manifest, so it covers resumed runs too
+    summary = manifest.summarize()
     
     # Save results
-    if SAVE_RESULTS and results:
-        print(f"\n5. Saving results to {RESULTS_FILE}...")
+    if SAVE_RESULTS:
+        print(f"\n5. Saving run summary to {RESULTS_FILE}...")
         try:
             output_data = {
                 'generation_config': {
                     'canon_directory': CANON_DIRECTORY,
-                'episode_num': EPISODE_NUM,
-                'prompts_per_cliffhanger': PROMPTS_PER_CLIFFHANGER,
-                'max_images': MAX_IMAGES_TO_GENERATE,
-                'image_size': f"{IMAGE_WIDTH}x{IMAGE_HEIGHT}"
+                    'episode_num': EPISODE_NUM,
+                    'prompts_per_cliffhanger': PROMPTS_PER_CLIFFHANGER,
+                    'max_images': MAX_IMAGES_TO_GENERATE,
+                    'image_size': f"{IMAGE_WIDTH}x{IMAGE_HEIGHT}"
                 },
-                'results': results,
-                'summary': {
-                    'total': len(results),
-                    'completed': len([r for r in results if r.get('status') == 'completed']),
-                    'failed': len([r for r in results if r.get('status') in ['error', 'exception']])
-                }
+                'manifest_file': MANIFEST_FILE,
+                'summary': summary
             }
             
             with open(RESULTS_FILE, 'w', encoding='utf-8') as f:
                 json.dump(output_data, f, indent=2, ensure_ascii=False)
             
-            print(f"   ✓ Results saved")
+            print(f"   ✓ Summary saved")
         except Exception as e:
-            print(f"   ⚠ Failed to save results: {e}")
+            print(f"   ⚠ Failed to save summary: {e}")
     
     # Summary
     print("\n" + "="*80)
     print("SUMMARY")
     print("="*80)
-    print(f"Total images attempted: {len(results)}")
-    print(f"Completed: {len([r for r in results if r.get('status') == 'completed'])}")
-    print(f"Failed: {len([r for r in results if r.get('status') in ['error', 'exception']])}")
+    print(f"Total images attempted: {summary['total']}")
+    print(f"Completed: {summary['completed']}")
+    print(f"Failed: {summary['failed']}")
+    print(f"Manifest: {MANIFEST_FILE}")
     print("="*80)
     
-    # Print image URLs
-    completed = [r for r in results if r.get('status') == 'completed']
-    if completed:
-        print("\nGenerated Images:")
-        for i, result in enumerate(completed, 1):
-            print(f"\n  {i}. Episode {result['prompt_data'].get('episode')} - {result['prompt_data'].get('perspective_character', 'Generic')}")
-            print(f"     Image ID: {result.get('image_id')}")
-            print(f"     URL: {result.get('image_url')}")
-            if result.get('gcs_url'):
-                print(f"     GCS: {result.get('gcs_url')}")
+    # Print image URLs for this run
+    run_hashes = {prompt_hash for prompt_hash, _ in pending}
+    print("\nGenerated Images:")
+    count = 0
+    for record in manifest.iter_records():
+        if record.get('prompt_hash') not in run_hashes or record.get('status') != 'completed':
+            continue
+        count += 1
+        print(f"\n  {count}. Episode {record.get('episode')} - {record.get('perspective_character') or 'Generic'}")
+        print(f"     Image ID: {record.get('image_id')}")
+        print(f"     URL: {record.get('image_url')}")
+        if record.get('gcs_url'):
+            print(f"     GCS: {record.get('gcs_url')}")
 
 
 if __name__ == "__main__":
@@ -4,8 +4,12 @@ Uses GCP credentials from creds.py for authentication.
 """
 
 import json
+import os
+import random
+import threading
 import time
-from typing import Dict, Optional, List, Tuple, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Optional, List, Tuple, Any
 from pathlib import Path
 import sys
 import requests
@@ -14,26 +18,60 @@ import base64
 # Add parent directory to path to import creds
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-try:
-    from creds import get_gcp_creds
-except ImportError:
-    raise ImportError("creds.py not found. Please ensure creds.py exists in the project root.")
+from services.gcp_auth import DEFAULT_POOL_MAXSIZE, create_pooled_session, get_token_manager
+from modules.stream_parser import StreamedResponseParser, iter_stream_chunks
+from services.instrumentation import traced
 
 HTTPS_TIMEOUT = 90  # Timeout for API calls
+RETRY_STATUS_CODES = (504, 499, 429)  # Throttling / overload responses worth retrying
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read from the response stream at a time
+ASYNC_WORKERS = 4  # Threads serving generate_image_async jobs
 
 class NanoBananaClient:
     """Client for Nano Banana image generation API"""
 
-    def __init__(self, project_id: Optional[str] = None, region: str = "us-central1"):
+    def __init__(self, project_id: Optional[str] = None, region: str = "us-central1",
+                 max_attempts: int = 5, backoff_base: float = 2.0, backoff_max: float = 40.0,
+                 throttle_listener: Optional[Callable[[int], None]] = None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE, creds: Optional[Dict[str, Any]] = None,
+                 session=None):
         """
         Initialize Nano Banana client with GCP credentials.
         Args:
             project_id: GCP project ID (default: from creds)
             region: GCP region (default: us-central1)
+            max_attempts: Attempts per image before giving up
+            backoff_base: First retry delay in seconds; doubles on every attempt (with jitter)
+            backoff_max: Upper bound for a single retry delay in seconds
+            throttle_listener: Called with the status code whenever the API throttles us (429/499/504),
+                so a batch executor can adapt its concurrency
+            pool_maxsize: Keep-alive connections kept per host (should cover batch concurrency)
+            creds: Service-account info (default: creds.get_gcp_creds())
+            session: HTTP session to send requests with (default: a pooled keep-alive session)
         """
-        self.creds = get_gcp_creds()
+        if creds is None:
+            try:
+                from creds import get_gcp_creds
+            except ImportError:
+                raise ImportError("creds.py not found. Please ensure creds.py exists in the project root.")
+            creds = get_gcp_creds()
+        self.creds = creds
         self.project_id = project_id or self.creds.get("project_id")
         self.region = region
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.throttle_listener = throttle_listener
+        # Keep-alive pooled session so concurrent requests reuse TLS connections
+        self.session = session or create_pooled_session(pool_maxsize=pool_maxsize)
+        # Token shared with every other client using these credentials; refreshed lazily
+        self.token_manager = get_token_manager(self.creds)
+        # In-memory state for generate_image_async / check_image_status
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._jobs_lock = threading.Lock()
+        self._async_executor = None
+        # GCS media stores by bucket (all share one storage client)
+        self._gcs_stores: Dict[str, Any] = {}
 
         # Configuration for the Nano Banana (Gemini) API
         # Using Vertex AI endpoint format for Gemini models
@@ -47,25 +85,19 @@ class NanoBananaClient:
             },
             "generate_content_api": "streamGenerateContent"
         }
-        self.headers = None
-        self._refresh_credentials()
 
-    def _refresh_credentials(self):
-        """Refresh bearer token using service account for Nano Banana API"""
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Request headers with a cached bearer token (refreshed shortly before expiry)"""
         try:
-            from google.auth.transport.requests import Request as GoogleAuthRequest
-            from google.oauth2 import service_account
+            return self.token_manager.auth_headers()
+        except Exception as e:
+            raise RuntimeError(f"Failed to refresh Nano Banana API credentials: {e}")
 
-            credentials = service_account.Credentials.from_service_account_info(
-                self.creds,
-                scopes=["https://www.googleapis.com/auth/cloud-platform"]
-            )
-            credentials.refresh(GoogleAuthRequest())
-            token = credentials.token
-            self.headers = {
-                "Authorization": f"Bearer {token}",
-                "Content-Type": "application/json"
-            }
+    def _refresh_credentials(self):
+        """Force a token refresh (e.g. after a 401) for every client sharing these credentials"""
+        try:
+            self.token_manager.get_token(force_refresh=True)
         except Exception as e:
             raise RuntimeError(f"Failed to refresh Nano Banana API credentials: {e}")
 
@@ -81,19 +113,190 @@ class NanoBananaClient:
             return base64.b64encode(image).decode("utf-8")
         raise ValueError("Input image must be a PIL Image or bytes.")
 
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        """Exponential backoff with full jitter, honouring a Retry-After header when present"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
     def _handle_api_error_response(self, response, attempt):
         if response.status_code >= 400:
             try:
                 message = response.json()
             except Exception:
                 message = response.text
-            msg = f"Nano Banana API Error {response.status_code} (attempt {attempt+1}/5): {message}"
-            if response.status_code >= 500:
-                time.sleep(2**attempt)
-            if attempt == 4:
+            msg = f"Nano Banana API Error {response.status_code} (attempt {attempt+1}/{self.max_attempts}): {message}"
+            if attempt == self.max_attempts - 1:
                 raise Exception(msg)
+            if response.status_code >= 500:
+                time.sleep(self._retry_delay(attempt))
+
+    def _build_generate_request(self, prompt: str, aspect_ratio=None, input_images=None,
+                                model_id=None, resolution=None) -> Tuple[str, Dict[str, Any]]:
+        """Build the streamGenerateContent URL and request body"""
+        config = self.nano_banana_config
+        if model_id is None:
+            model_id = "gemini-3-pro-image-preview"
+
+        # For Gemini models, some locations might need to be "us" instead of "us-central1"
+        # Try "us" first as it's the default for many Gemini models
+        # location = config['location_id']
+        # if location == "us-central1":
+        #     # Some Gemini models work better with "us" location
+        #     location = "us"
+        
+        # api_url = (
+        #     f"https://{config['api_endpoint']}/v1/projects/{config['project_id']}"
+        #     f"/locations/{location}/publishers/google/models/"
+        #     f"{model_id}:{config['generate_content_api']}"
+        # )
+        
+        api_url = (
+            f"https://{config['api_endpoint']}/v1/projects/{config['project_id']}"
+            f"/locations/{config['location_id']}/publishers/google/models/"
+            f"{model_id}:{config['generate_content_api']}"
+        )
+        
+        # Debug: Uncomment to see the actual endpoint being called
+        # print(f"Calling Gemini API endpoint: {api_url}")
+
+        request_data = {
+            "contents": [{
+                "role": "user",
+                "parts": []
+            }]
+        }
 
-    def generate_nano_banana_image(
+        if prompt.strip():
+            request_data["contents"][0]["parts"].append({"text": prompt})
+        if input_images:
+            images_list = input_images if isinstance(input_images, list) else [input_images]
+            for input_image in images_list:
+                img_base64 = self._image_to_base64(input_image)
+                request_data["contents"][0]["parts"].append({
+                    "inlineData": {
+                        "mimeType": "image/png",
+                        "data": img_base64
+                    }
+                })
+        
+        # Build generationConfig - must include responseModalities for image generation
+        request_data["generationConfig"] = {
+            "temperature": 0.7,
+            "maxOutputTokens": 2048,
+            "responseModalities": ["IMAGE"]
+        }
+        
+        # Add imageConfig if aspect_ratio or resolution is specified
+        # Only add imageConfig if we have at least one valid parameter
+        image_config = {}
+        if aspect_ratio:
+            # Validate aspect ratio format (should be like "1:1", "16:9", etc.)
+            if isinstance(aspect_ratio, str) and ":" in aspect_ratio:
+                image_config["aspectRatio"] = aspect_ratio
+        if resolution and model_id == "gemini-3-pro-image-preview":
+            image_config["imageSize"] = resolution
+        
+        # Only add imageConfig to request if it has at least one valid field
+        if image_config:
+            request_data["generationConfig"]["imageConfig"] = image_config
+
+        return api_url, request_data
+
+    def _post_with_retries(self, api_url: str, request_data: Dict[str, Any]):
+        """
+        POST a generation request, retrying throttling and transient errors.
+
+        Returns:
+            A successful streaming response whose body has not been read yet
+        """
+        last_attempt = self.max_attempts - 1
+        response = None
+        for attempt in range(self.max_attempts):
+            try:
+                response = self.session.post(
+                    api_url, headers=self.headers, json=request_data, timeout=HTTPS_TIMEOUT,
+                    stream=True
+                )
+                if response.status_code == 401 and attempt < last_attempt:
+                    response.close()
+                    self._refresh_credentials()
+                    continue
+
+                if response.status_code in RETRY_STATUS_CODES:
+                    if self.throttle_listener:
+                        self.throttle_listener(response.status_code)
+                    if attempt < last_attempt:
+                        delay = self._retry_delay(attempt, response)
+                        print(f"Rate limit hit {response.status_code}, waiting {delay:.1f} seconds before retry {attempt + 1}/{self.max_attempts}...")
+                        response.close()
+                        time.sleep(delay)
+                        continue
+
+                self._handle_api_error_response(response, attempt)
+                response.raise_for_status()
+                break
+            except requests.exceptions.RequestException as e:
+                if attempt == last_attempt:
+                    raise Exception(f"API Request Error: {e}")
+                time.sleep(self._retry_delay(attempt))
+                continue
+            except Exception as e:
+                if attempt == last_attempt:
+                    raise
+                continue
+        if response is None:
+            raise Exception("No response received from API after retries")
+        return response
+
+    def _consume_stream(self, response, sink_factory=None) -> Tuple[str, List[Tuple[str, Any]], Dict[str, int]]:
+        """
+        Parse a streamGenerateContent response as it arrives.
+        Inline image data is decoded chunk by chunk into sinks from sink_factory, so the
+        base64 text, the decoded bytes and the JSON tree are never all in memory at once.
+
+        Args:
+            response: Streaming response from _post_with_retries
+            sink_factory: Called with a blob index, returns a writable binary sink (default: BytesIO)
+
+        Returns:
+            Tuple of (text_output, [(mime_type, sink), ...] for image parts, usage_metadata_dict)
+        """
+        parser = StreamedResponseParser(sink_factory)
+        text_output = ""
+        images = []
+        usage_metadata = {}
+        try:
+            for chunk in iter_stream_chunks(response.iter_content(chunk_size=STREAM_CHUNK_SIZE), parser):
+                if "usageMetadata" in chunk:
+                    usage_metadata = {
+                        "input_tokens": chunk["usageMetadata"].get("promptTokenCount", 0),
+                        "output_tokens": chunk["usageMetadata"].get("candidatesTokenCount", 0),
+                        "total_tokens": chunk["usageMetadata"].get("totalTokenCount", 0),
+                        "thinking_tokens": chunk["usageMetadata"].get("thoughtsTokenCount", 0)
+                    }
+                for candidate in chunk.get("candidates", []):
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if "text" in part:
+                            text_output += part["text"]
+                        elif "inlineData" in part:
+                            inline_data = part["inlineData"]
+                            blob_index = inline_data.get("data")
+                            if isinstance(blob_index, int) and inline_data.get("mimeType", "").startswith("image/"):
+                                blob = parser.blobs[blob_index]
+                                if blob.size:
+                                    images.append((inline_data["mimeType"], blob.sink))
+        finally:
+            response.close()
+        return text_output, images, usage_metadata
+
+    @traced('image.generate', provider='nanobanana')
+    def generate_nano_banana_image_streams(
         self,
         prompt: str,
         aspect_ratio=None,
@@ -101,9 +304,11 @@ class NanoBananaClient:
         model_id=None,
         resolution=None,
         num_images=1
-    ) -> Tuple[str, List[str], Dict[str, Any]]:
+    ) -> Tuple[str, List[Tuple[str, BinaryIO]], Dict[str, Any]]:
         """
         Generate text + images from Nano Banana (Gemini) using the streamGenerateContent API.
+        Images stay in the BytesIO they were decoded into while streaming; hand them to a
+        media store (put_stream) rather than converting them to base64.
 
         Args:
             prompt: Text prompt
@@ -113,37 +318,12 @@ class NanoBananaClient:
             resolution: Resolution for Gemini 3.0 Pro
             num_images: Number of images to generate (1 or 2)
         Returns:
-            Tuple of (text_output, images_base64_list, usage_metadata_dict)
+            Tuple of (text_output, [(mime_type, BytesIO), ...], usage_metadata_dict)
         """
         try:
-            if not self.headers:
-                self._refresh_credentials()
-
-            config = self.nano_banana_config
-            if model_id is None:
-                model_id = "gemini-3-pro-image-preview"
-
-            # For Gemini models, some locations might need to be "us" instead of "us-central1"
-            # Try "us" first as it's the default for many Gemini models
-            # location = config['location_id']
-            # if location == "us-central1":
-            #     # Some Gemini models work better with "us" location
-            #     location = "us"
-            
-            # api_url = (
-            #     f"https://{config['api_endpoint']}/v1/projects/{config['project_id']}"
-            #     f"/locations/{location}/publishers/google/models/"
-            #     f"{model_id}:{config['generate_content_api']}"
-            # )
-            
-            api_url = (
-                f"https://{config['api_endpoint']}/v1/projects/{config['project_id']}"
-                f"/locations/{config['location_id']}/publishers/google/models/"
-                f"{model_id}:{config['generate_content_api']}"
+            api_url, request_data = self._build_generate_request(
+                prompt, aspect_ratio, input_images, model_id, resolution
             )
-            
-            # Debug: Uncomment to see the actual endpoint being called
-            # print(f"Calling Gemini API endpoint: {api_url}")
 
             all_images = []
             all_text_output = ""
@@ -153,122 +333,19 @@ class NanoBananaClient:
                 "total_tokens": 0,
                 "thinking_tokens": 0
             }
-            # Build request_data once (same for all API calls)
-            request_data = {
-                "contents": [{
-                    "role": "user",
-                    "parts": []
-                }]
-            }
-
-            if prompt.strip():
-                request_data["contents"][0]["parts"].append({"text": prompt})
-            if input_images:
-                images_list = input_images if isinstance(input_images, list) else [input_images]
-                for input_image in images_list:
-                    img_base64 = self._image_to_base64(input_image)
-                    request_data["contents"][0]["parts"].append({
-                        "inlineData": {
-                            "mimeType": "image/png",
-                            "data": img_base64
-                        }
-                    })
-            
-            # Build generationConfig - must include responseModalities for image generation
-            request_data["generationConfig"] = {
-                "temperature": 0.7,
-                "maxOutputTokens": 2048,
-                "responseModalities": ["IMAGE"]
-            }
-            
-            # Add imageConfig if aspect_ratio or resolution is specified
-            # Only add imageConfig if we have at least one valid parameter
-            image_config = {}
-            if aspect_ratio:
-                # Validate aspect ratio format (should be like "1:1", "16:9", etc.)
-                if isinstance(aspect_ratio, str) and ":" in aspect_ratio:
-                    image_config["aspectRatio"] = aspect_ratio
-            if resolution and model_id == "gemini-3-pro-image-preview":
-                image_config["imageSize"] = resolution
-            
-            # Only add imageConfig to request if it has at least one valid field
-            if image_config:
-                request_data["generationConfig"]["imageConfig"] = image_config
-
-            backoff_delays = [5, 10, 20, 40]
-            retry_codes = [504, 499, 429]
 
             # Make multiple API calls if num_images > 1
             for image_idx in range(num_images):
-                response = None
-                for attempt in range(5):
-                    try:
-                        response = requests.post(
-                            api_url, headers=self.headers, json=request_data, timeout=HTTPS_TIMEOUT
-                        )
-                        if response.status_code == 401 and attempt < 4:
-                            self._refresh_credentials()
-                            continue
-
-                        if response.status_code in retry_codes and attempt < 4:
-                            delay = backoff_delays[attempt]
-                            print(f"Rate limit hit {response.status_code}, waiting {delay} seconds before retry {attempt + 1}/5...")
-                            time.sleep(delay)
-                            continue
-
-                        self._handle_api_error_response(response, attempt)
-                        response.raise_for_status()
-                        break
-                    except requests.exceptions.RequestException as e:
-                        if attempt == 4:
-                            raise Exception(f"API Request Error: {e}")
-                        continue
-                    except Exception as e:
-                        if attempt == 4:
-                            raise
-                        continue
-                if response is None:
-                    raise Exception("No response received from API after retries")
-
-                response_json = response.json()
-                text_output = ""
-                images = []
-                usage_metadata = {}
-                if isinstance(response_json, list) and len(response_json) > 0:
-                    response_data = response_json[-1]
-                elif isinstance(response_json, dict):
-                    response_data = response_json
-                else:
-                    print(f"Unexpected response format: {type(response_json)}")
-                    continue
+                response = self._post_with_retries(api_url, request_data)
+                text_output, images, usage_metadata = self._consume_stream(response)
 
-                if "usageMetadata" in response_data:
-                    usage_metadata = {
-                        "input_tokens": response_data["usageMetadata"].get("promptTokenCount", 0),
-                        "output_tokens": response_data["usageMetadata"].get("candidatesTokenCount", 0),
-                        "total_tokens": response_data["usageMetadata"].get("totalTokenCount", 0),
-                        "thinking_tokens": response_data["usageMetadata"].get("thoughtsTokenCount", 0)
-                    }
-                    total_usage_metadata["input_tokens"] += usage_metadata["input_tokens"]
-                    total_usage_metadata["output_tokens"] += usage_metadata["output_tokens"]
-                    total_usage_metadata["total_tokens"] += usage_metadata["total_tokens"]
-                    total_usage_metadata["thinking_tokens"] += usage_metadata["thinking_tokens"]
-
-                if "candidates" in response_data:
-                    for candidate in response_data["candidates"]:
-                        if "content" in candidate:
-                            for part in candidate["content"].get("parts", []):
-                                if "text" in part:
-                                    text_output += part["text"]
-                                elif "inlineData" in part:
-                                    inline_data = part["inlineData"]
-                                    if inline_data.get("mimeType", "").startswith("image/"):
-                                        image_data = inline_data.get("data", "")
-                                        if image_data:
-                                            images.append(image_data)
+                for key in total_usage_metadata:
+                    total_usage_metadata[key] += usage_metadata.get(key, 0)
 
                 if images:
-                    all_images.append(images[0])
+                    mime_type, sink = images[0]
+                    sink.seek(0)
+                    all_images.append((mime_type, sink))
                 if text_output:
                     if all_text_output:
                         all_text_output += "\n\n"
@@ -282,6 +359,152 @@ class NanoBananaClient:
             print("Nano Banana error:", e)
             return f"Error during generation: {e}", [], {}
 
+    def generate_nano_banana_image(
+        self,
+        prompt: str,
+        aspect_ratio=None,
+        input_images=None,
+        model_id=None,
+        resolution=None,
+        num_images=1
+    ) -> Tuple[str, List[str], Dict[str, Any]]:
+        """
+        Same as generate_nano_banana_image_streams, with the images as base64 strings
+        (for callers that need text; this holds each image twice in memory).
+
+        Returns:
+            Tuple of (text_output, images_base64_list, usage_metadata_dict)
+        """
+        text_output, images, usage_metadata = self.generate_nano_banana_image_streams(
+            prompt, aspect_ratio, input_images, model_id, resolution, num_images
+        )
+        return text_output, [base64.b64encode(sink.getbuffer()).decode("utf-8") for _, sink in images], usage_metadata
+
+    def generate_image_bytes(
+        self,
+        prompt: str,
+        width: int = 1024,
+        height: int = 1024,
+        style: Optional[str] = None,
+        model_id: Optional[str] = None,
+        resolution: Optional[str] = None
+    ) -> Dict:
+        """
+        Generate a single image and return it as the in-memory stream it was decoded into.
+
+        Args:
+            prompt: Text prompt
+            width: Image width (used to pick the aspect ratio)
+            height: Image height (used to pick the aspect ratio)
+            style: Optional style (kept for interface parity with generate_image)
+            model_id: Model ID to use
+            resolution: Resolution for Gemini 3.0 Pro
+
+        Returns:
+            Dictionary with status, image_id, image_bytes (BytesIO at position 0), mime_type and metadata
+        """
+        aspect_ratio = self._calculate_aspect_ratio(width, height) if width and height else None
+        text_output, images, usage_metadata = self.generate_nano_banana_image_streams(
+            prompt, aspect_ratio=aspect_ratio, model_id=model_id, resolution=resolution
+        )
+        if not images:
+            return {"status": "failed", "error": "No images generated", "text_output": text_output}
+        mime_type, stream = images[0]
+        return {
+            "image_id": f"nano_banana_{int(time.time())}_0",
+            "image_bytes": stream,
+            "mime_type": mime_type,
+            "status": "completed",
+            "metadata": {
+                "prompt": prompt,
+                "width": width,
+                "height": height,
+                "aspect_ratio": aspect_ratio,
+                "generated_at": time.time(),
+                "usage": usage_metadata,
+                "text_output": text_output
+            }
+        }
+
+    def generate_image_to_file(
+        self,
+        prompt: str,
+        filepath: str,
+        width: int = 1024,
+        height: int = 1024,
+        style: Optional[str] = None,
+        model_id: Optional[str] = None,
+        resolution: Optional[str] = None
+    ) -> Dict:
+        """
+        Generate a single image and stream it straight to disk.
+        The image is decoded from the response as it downloads, so it never exists in
+        memory as a base64 string or a full byte buffer.
+
+        Args:
+            prompt: Text prompt
+            filepath: Where to write the image (directory will be created if needed)
+            width: Image width (used to pick the aspect ratio)
+            height: Image height (used to pick the aspect ratio)
+            style: Optional style (kept for interface parity with generate_image)
+            model_id: Model ID to use
+            resolution: Resolution for Gemini 3.0 Pro
+
+        Returns:
+            Dictionary with status, image_id, disk_path, size_bytes, mime_type and metadata
+        """
+        file_path = Path(filepath)
+        part_files = []
+
+        def file_sink(index: int):
+            # Each inline blob streams into its own .part file; the image is renamed into place
+            part_file = open(file_path.with_name(f"{file_path.name}.{index}.part"), "wb")
+            part_files.append(part_file)
+            return part_file
+
+        try:
+            aspect_ratio = self._calculate_aspect_ratio(width, height) if width and height else None
+            api_url, request_data = self._build_generate_request(
+                prompt, aspect_ratio, None, model_id, resolution
+            )
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+
+            response = self._post_with_retries(api_url, request_data)
+            text_output, images, usage_metadata = self._consume_stream(response, file_sink)
+            for part_file in part_files:
+                part_file.close()
+            if not images:
+                return {"status": "failed", "error": "No images generated", "text_output": text_output}
+
+            mime_type, sink = images[0]
+            size_bytes = os.path.getsize(sink.name)
+            os.replace(sink.name, file_path)
+            return {
+                "image_id": f"nano_banana_{int(time.time())}_0",
+                "disk_path": str(file_path.absolute()),
+                "size_bytes": size_bytes,
+                "mime_type": mime_type,
+                "status": "completed",
+                "metadata": {
+                    "prompt": prompt,
+                    "width": width,
+                    "height": height,
+                    "aspect_ratio": aspect_ratio,
+                    "generated_at": time.time(),
+                    "usage": usage_metadata,
+                    "text_output": text_output
+                }
+            }
+        except Exception as e:
+            print("Nano Banana error:", e)
+            return {"status": "error", "error": str(e)}
+        finally:
+            # Close and remove partial or unused blobs (the image itself was renamed away)
+            for part_file in part_files:
+                part_file.close()
+                if os.path.exists(part_file.name):
+                    os.remove(part_file.name)
+
     def _calculate_aspect_ratio(self, width: int, height: int) -> Optional[str]:
         """
         Convert pixel dimensions to standard aspect ratio format.
@@ -333,7 +556,7 @@ class NanoBananaClient:
         aspect_ratio = None
         if width and height:
             aspect_ratio = self._calculate_aspect_ratio(width, height)
-        text_output, images_base64_list, usage_metadata = self.generate_nano_banana_image(
+        text_output, images, usage_metadata = self.generate_nano_banana_image_streams(
             prompt,
             aspect_ratio=aspect_ratio,
             input_images=None,
@@ -341,36 +564,84 @@ class NanoBananaClient:
             resolution=None,
             num_images=num_images
         )
-        # Compute a fake image URL using base64 (for actual deployment, upload image to GCS or serve endpoint)
-        results = []
-        for idx, image_b64 in enumerate(images_base64_list):
-            image_id = f"nano_banana_{int(time.time())}_{idx}"
-            # Return base64 string as "image_url" just as placeholder
-            results.append({
-                "image_url": f"data:image/png;base64,{image_b64}",
-                "image_id": image_id,
-                "status": "completed",
-                "metadata": {
-                    "prompt": prompt,
-                    "width": width,
-                    "height": height,
-                    "aspect_ratio": aspect_ratio,
-                    "generated_at": time.time(),
-                    "usage": usage_metadata,
-                    "text_output": text_output
-                }
-            })
-        return results[0] if results else {
-            "status": "failed",
-            "error": "No images generated"
+        if not images:
+            return {
+                "status": "failed",
+                "error": "No images generated"
+            }
+        # Return the image as a data URL placeholder (generate_image_bytes / generate_image_to_file avoid the encoding)
+        mime_type, stream = images[0]
+        return {
+            "image_url": f"data:{mime_type};base64,{base64.b64encode(stream.getbuffer()).decode('ascii')}",
+            "image_id": f"nano_banana_{int(time.time())}_0",
+            "status": "completed",
+            "metadata": {
+                "prompt": prompt,
+                "width": width,
+                "height": height,
+                "aspect_ratio": aspect_ratio,
+                "generated_at": time.time(),
+                "usage": usage_metadata,
+                "text_output": text_output
+            }
         }
 
-    # The async/status/upload methods are not implemented for NanoBananaClient (http API).
-    def generate_image_async(self, *args, **kwargs):
-        raise NotImplementedError("Async image generation is not supported by the NanoBanana HTTP API client.")
+    # Async interface: jobs run on a small in-process thread pool and are tracked in memory
+    def generate_image_async(
+        self,
+        prompt: str,
+        width: int = 1024,
+        height: int = 1024,
+        style: Optional[str] = None,
+        output_format: str = "png",
+        num_images: int = 1
+    ) -> Dict:
+        """
+        Submit an image generation and return immediately.
+        Poll the returned job_id with check_image_status().
+
+        Returns:
+            Dictionary with job_id and status ("queued")
+        """
+        import uuid
+        job_id = f"nano_banana_job_{uuid.uuid4().hex}"
+        with self._jobs_lock:
+            if self._async_executor is None:
+                self._async_executor = ThreadPoolExecutor(
+                    max_workers=ASYNC_WORKERS, thread_name_prefix="nano-banana"
+                )
+            self._jobs[job_id] = {"job_id": job_id, "status": "queued", "submitted_at": time.time()}
+        self._async_executor.submit(
+            self._run_async_job, job_id,
+            dict(prompt=prompt, width=width, height=height, style=style,
+                 output_format=output_format, num_images=num_images)
+        )
+        return {"job_id": job_id, "status": "queued"}
+
+    def _run_async_job(self, job_id: str, params: Dict[str, Any]):
+        with self._jobs_lock:
+            self._jobs[job_id]["status"] = "running"
+        try:
+            result = self.generate_image(**params)
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        with self._jobs_lock:
+            job = self._jobs[job_id]
+            job.update(result)
+            job["job_id"] = job_id
+            job["finished_at"] = time.time()
 
     def check_image_status(self, job_id: str) -> Dict:
-        raise NotImplementedError("Async job polling is not supported by the NanoBanana HTTP API client.")
+        """
+        Get the state of a job submitted with generate_image_async().
+
+        Returns:
+            Dictionary with job_id and status ("queued", "running", "completed", "failed", "error"
+            or "not_found"); finished jobs include the generate_image() result fields
+        """
+        with self._jobs_lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else {"job_id": job_id, "status": "not_found"}
 
     def save_image_to_disk(self, image_base64: str, filepath: str) -> str:
         """
@@ -402,40 +673,73 @@ class NanoBananaClient:
         except Exception as e:
             raise Exception(f"Failed to save image to disk: {e}")
     
-    def upload_to_gcs(self, image_base64: str, bucket_name: str, blob_name: str) -> str:
+    def upload_to_gcs(self, image_base64: Optional[str], bucket_name: str, blob_name: str,
+                      file_path: Optional[str] = None) -> str:
         """
-        Upload a base64-encoded image to Google Cloud Storage.
+        Upload an image to Google Cloud Storage.
+        Uses the process-wide storage client; files are streamed with a resumable chunked upload.
         Args:
-            image_base64: The base64-encoded image string (PNG)
+            image_base64: The base64-encoded image string (PNG); ignored when file_path is given
             bucket_name: GCS bucket name
             blob_name: Name for the blob in GCS
+            file_path: Image file on disk to stream instead of decoding image_base64
 
         Returns:
             GCS URL of uploaded image
         """
         try:
-            from google.cloud import storage
-            img_bytes = base64.b64decode(image_base64)
-
-            # Initialize storage client
-            storage_client = storage.Client(credentials=self.creds, project=self.project_id)
-            bucket = storage_client.bucket(bucket_name)
-            blob = bucket.blob(blob_name)
-
-            blob.upload_from_string(img_bytes, content_type="image/png")
-            return f"gs://{bucket_name}/{blob_name}"
+            store = self._gcs_stores.get(bucket_name)
+            if store is None:
+                from services.media_store import GCSMediaStore, get_storage_client
+                store = GCSMediaStore(bucket_name, client=get_storage_client(self.creds, self.project_id))
+                self._gcs_stores[bucket_name] = store
+            if file_path:
+                return store.put_file(blob_name, file_path, content_type="image/png")
+            return store.put_bytes(blob_name, base64.b64decode(image_base64), content_type="image/png")
         except Exception as e:
             raise Exception(f"Failed to upload to GCS: {e}")
 
-def create_nano_banana_client(project_id: Optional[str] = None, region: str = "us-central1") -> NanoBananaClient:
+class FakeNanoBananaClient(NanoBananaClient):
+    """
+    NanoBananaClient whose HTTP session is answered locally (services.fake_providers).
+    Retries, throttle callbacks and stream parsing run exactly as against the real API.
+    """
+
+    def __init__(self, transport=None, **kwargs):
+        """
+        Args:
+            transport: FakeGeminiTransport (default: configured from FAKE_* settings)
+            **kwargs: Retry/backoff settings passed through to NanoBananaClient
+        """
+        if transport is None:
+            from services.fake_providers import FakeGeminiTransport
+            transport = FakeGeminiTransport.from_settings()
+        kwargs.setdefault('project_id', 'fake-project')
+        super().__init__(creds={}, session=transport, **kwargs)
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": "Bearer fake-token"}
+
+    def _refresh_credentials(self):
+        pass
+
+
+def create_nano_banana_client(project_id: Optional[str] = None, region: str = "us-central1",
+                              **kwargs) -> NanoBananaClient:
     """
     Factory function to create a Nano Banana client.
+    With IMAGE_PROVIDER=fake the client talks to a local fake transport instead of Vertex AI.
 
     Args:
         project_id: GCP project ID (optional, uses from creds)
         region: GCP region (default: us-central1)
+        **kwargs: Retry/backoff settings passed through to NanoBananaClient
 
     Returns:
         NanoBananaClient instance
     """
-    return NanoBananaClient(project_id=project_id, region=region)
+    from services.providers import FAKE_PROVIDER, provider_setting
+    if provider_setting('DEFAULT_IMAGE_PROVIDER') == FAKE_PROVIDER:
+        return FakeNanoBananaClient(project_id=project_id, region=region, **kwargs)
+    return NanoBananaClient(project_id=project_id, region=region, **kwargs)
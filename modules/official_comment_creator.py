@@ -3,8 +3,13 @@ Module for creating comments by official users (characters).
 This module provides a clean interface to create comments via the API.
 """
 
-import requests
 from typing import Optional, Dict, Any
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.pocketverse_client import PocketverseClient
 
 
 class OfficialCommentCreator:
@@ -19,6 +24,8 @@ class OfficialCommentCreator:
         """
         self.base_url = base_url.rstrip('/')
         self.api_base = f"{self.base_url}/api"
+        # Keep-alive session with retries and idempotency keys, shared by every call
+        self.client = PocketverseClient(self.base_url)
     
     def create_comment(
         self,
@@ -49,20 +56,12 @@ class OfficialCommentCreator:
         if not author_id:
             raise ValueError("author_id is required")
         
-        url = f"{self.api_base}/posts/{post_id}/comments"
-        
-        payload = {
-            "content": content.strip(),
-            "author_id": author_id
-        }
-        
-        if parent_id:
-            payload["parent_id"] = parent_id
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        return response.json()
+        return self.client.create_comment(
+            post_id=post_id,
+            content=content.strip(),
+            author_id=author_id,
+            parent_id=parent_id or None
+        )
     
     def create_comment_from_dict(self, comment_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -125,39 +124,42 @@ class OfficialCommentCreator:
     def batch_create_comments(
         self,
         comments_data: list[Dict[str, Any]],
-        stop_on_error: bool = False
+        stop_on_error: bool = False,
+        chunk_size: int = 1000
     ) -> list[Dict[str, Any]]:
         """
-        Create multiple comments in batch.
+        Create multiple comments in batch via the bulk endpoint (one request and transaction per chunk).
+        Replies must refer to comments that already exist (not to comments in the same chunk).
         
         Args:
             comments_data: List of dictionaries, each containing comment data
-            stop_on_error: If True, stop on first error. If False, continue and collect errors.
+            stop_on_error: If True, a chunk containing an invalid comment is rejected as a whole and
+                no further chunks are sent. If False, valid comments are created and errors collected.
+            chunk_size: Comments sent per request
         
         Returns:
-            List of dictionaries containing created comments and any errors
+            List of dictionaries containing created comment ids and any errors
         """
         results = []
         
-        for i, comment_data in enumerate(comments_data):
-            try:
-                result = self.create_comment_from_dict(comment_data)
-                results.append({
-                    'index': i,
-                    'success': True,
-                    'data': result
-                })
-            except Exception as e:
-                error_result = {
-                    'index': i,
-                    'success': False,
-                    'error': str(e),
-                    'comment_data': comment_data
-                }
-                results.append(error_result)
-                
-                if stop_on_error:
-                    break
+        for start in range(0, len(comments_data), chunk_size):
+            chunk = comments_data[start:start + chunk_size]
+            item_results = self.client.bulk_create_comments(chunk, chunk_size=chunk_size, atomic=stop_on_error)
+            
+            for item in item_results:
+                index = start + item['index']
+                if item['success']:
+                    results.append({'index': index, 'success': True, 'data': {'id': item['id']}})
+                else:
+                    results.append({
+                        'index': index,
+                        'success': False,
+                        'error': item.get('error'),
+                        'comment_data': comments_data[index]
+                    })
+            
+            if stop_on_error and any(not item['success'] for item in item_results):
+                break
         
         return results
 
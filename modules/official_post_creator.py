@@ -3,8 +3,13 @@ Module for creating posts by official users (characters).
 This module provides a clean interface to create posts via the API.
 """
 
-import requests
 from typing import Optional, Dict, Any
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.pocketverse_client import PocketverseClient
 
 
 class OfficialPostCreator:
@@ -19,6 +24,8 @@ class OfficialPostCreator:
         """
         self.base_url = base_url.rstrip('/')
         self.api_base = f"{self.base_url}/api"
+        # Keep-alive session with retries and idempotency keys, shared by every call
+        self.client = PocketverseClient(self.base_url)
     
     def create_post(
         self,
@@ -57,32 +64,16 @@ class OfficialPostCreator:
         if not author_id:
             raise ValueError("author_id is required")
         
-        url = f"{self.api_base}/pocketshows/{pocketshow_id}/posts"
-        
-        payload = {
-            "title": title.strip(),
-            "author_id": author_id
-        }
-        
-        if content:
-            payload["content"] = content.strip()
-        
-        if description:
-            payload["description"] = description.strip()
-        
-        if image_url:
-            payload["image_url"] = image_url.strip()
-        
-        if video_url:
-            payload["video_url"] = video_url.strip()
-        
-        if metadata:
-            payload["metadata"] = metadata
-        
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-        
-        return response.json()
+        return self.client.create_post(
+            pocketshow_id=pocketshow_id,
+            title=title.strip(),
+            author_id=author_id,
+            content=content.strip() if content else None,
+            description=description.strip() if description else None,
+            image_url=image_url.strip() if image_url else None,
+            video_url=video_url.strip() if video_url else None,
+            metadata=metadata or None
+        )
     
     def create_post_from_dict(self, post_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -123,39 +114,48 @@ class OfficialPostCreator:
     def batch_create_posts(
         self,
         posts_data: list[Dict[str, Any]],
-        stop_on_error: bool = False
+        stop_on_error: bool = False,
+        chunk_size: int = 1000,
+        generate_comments: bool = True
     ) -> list[Dict[str, Any]]:
         """
-        Create multiple posts in batch.
+        Create multiple posts in batch via the bulk endpoint (one request and transaction per chunk).
         
         Args:
             posts_data: List of dictionaries, each containing post data
-            stop_on_error: If True, stop on first error. If False, continue and collect errors.
+            stop_on_error: If True, a chunk containing an invalid post is rejected as a whole and
+                no further chunks are sent. If False, valid posts are created and errors collected.
+            chunk_size: Posts sent per request
+            generate_comments: Queue automatic character comments for the created posts
         
         Returns:
-            List of dictionaries containing created posts and any errors
+            List of dictionaries containing created post ids and any errors
         """
         results = []
         
-        for i, post_data in enumerate(posts_data):
-            try:
-                result = self.create_post_from_dict(post_data)
-                results.append({
-                    'index': i,
-                    'success': True,
-                    'data': result
-                })
-            except Exception as e:
-                error_result = {
-                    'index': i,
-                    'success': False,
-                    'error': str(e),
-                    'post_data': post_data
-                }
-                results.append(error_result)
-                
-                if stop_on_error:
-                    break
+        for start in range(0, len(posts_data), chunk_size):
+            chunk = posts_data[start:start + chunk_size]
+            item_results = self.client.bulk_create_posts(
+                chunk,
+                chunk_size=chunk_size,
+                atomic=stop_on_error,
+                generate_comments=generate_comments
+            )
+            
+            for item in item_results:
+                index = start + item['index']
+                if item['success']:
+                    results.append({'index': index, 'success': True, 'data': {'id': item['id']}})
+                else:
+                    results.append({
+                        'index': index,
+                        'success': False,
+                        'error': item.get('error'),
+                        'post_data': posts_data[index]
+                    })
+            
+            if stop_on_error and any(not item['success'] for item in item_results):
+                break
         
         return results
 
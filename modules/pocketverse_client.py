@@ -0,0 +1,396 @@
+"""
+Python SDK for the Pocketverse API.
+PocketverseClient wraps one keep-alive requests.Session (connection pool sized for
+the thread pool used by its batch helpers); AsyncPocketverseClient is the asyncio
+variant built on httpx. Both retry throttled / failed requests with exponential
+backoff and send an Idempotency-Key with every POST, so a retry never creates a
+second post or toggles a vote twice.
+
+Example:
+    client = PocketverseClient("http://localhost:5000")
+    post = client.create_post(pocketshow_id=1, title="Hello", author_id=3)
+    results = client.create_posts_concurrently(posts, max_workers=16)  # or client.bulk_create_posts(posts)
+"""
+
+import asyncio
+import random
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import sys
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.gcp_auth import create_pooled_session
+
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+DEFAULT_TIMEOUT = 30
+DEFAULT_CONCURRENCY = 16
+BULK_CHUNK_SIZE = 1000
+
+
+class PocketverseError(requests.RequestException):
+    """API request failed (after retries)"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, body: Any = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+def _retry_delay(attempt: int, backoff_base: float, backoff_max: float, retry_after: Optional[str] = None) -> float:
+    """Exponential backoff with full jitter, honouring Retry-After"""
+    if retry_after:
+        try:
+            return min(float(retry_after), backoff_max)
+        except ValueError:
+            pass
+    return random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt)))
+
+
+def _post_payload(pocketshow_id: int, title: str, author_id: Optional[int] = None, **fields) -> Dict[str, Any]:
+    payload = {'pocketshow_id': pocketshow_id, 'title': title}
+    if author_id is not None:
+        payload['author_id'] = author_id
+    payload.update({key: value for key, value in fields.items() if value is not None})
+    return payload
+
+
+def _raise_for_response(method: str, path: str, status_code: int, body: Any):
+    message = body.get('error') if isinstance(body, dict) else None
+    raise PocketverseError(f"{method} {path} failed with {status_code}: {message or body}", status_code, body)
+
+
+def _bulk_outcome(chunk_start: int, response_body: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Re-index a bulk chunk's per-item results to positions in the full input"""
+    return [dict(item, index=chunk_start + item['index']) for item in response_body.get('results', [])]
+
+
+class PocketverseClient:
+    """Synchronous, thread-safe client with a shared keep-alive session"""
+
+    def __init__(self, base_url: str = "http://localhost:5000", timeout: float = DEFAULT_TIMEOUT,
+                 max_attempts: int = 5, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 pool_maxsize: int = DEFAULT_CONCURRENCY):
+        """
+        Args:
+            base_url: Base URL of the Pocketverse server
+            timeout: Per-request timeout in seconds
+            max_attempts: Attempts per request (connection errors, 429 and 502-504 are retried)
+            backoff_base: First retry delay in seconds; doubles on every attempt (with jitter)
+            backoff_max: Upper bound for a single retry delay in seconds
+            pool_maxsize: Keep-alive connections (should cover the concurrency you use)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.api_base = f"{self.base_url}/api"
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = create_pooled_session(pool_connections=1, pool_maxsize=pool_maxsize)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def request(self, method: str, path: str, json: Any = None, params: Optional[Dict[str, Any]] = None,
+                idempotency_key: Optional[str] = None) -> Any:
+        """
+        Send a request with retries and return the decoded JSON body.
+
+        Args:
+            method: HTTP method
+            path: Path below /api (e.g. '/posts')
+            json: JSON body
+            params: Query parameters
+            idempotency_key: Key for a POST (default: a new UUID, reused across retries)
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            PocketverseError: On a 4xx response or when retries are exhausted
+        """
+        headers = {}
+        if method.upper() == 'POST':
+            headers['Idempotency-Key'] = idempotency_key or str(uuid.uuid4())
+        url = f"{self.api_base}{path}"
+
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            try:
+                response = self.session.request(method, url, json=json, params=params,
+                                                headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt:
+                    raise PocketverseError(f"{method} {path} failed: {e}")
+                time.sleep(_retry_delay(attempt, self.backoff_base, self.backoff_max))
+                continue
+
+            # 409: an earlier attempt with this key is still being processed
+            if (response.status_code in RETRY_STATUS_CODES or response.status_code == 409
+                    or response.status_code >= 500) and not last_attempt:
+                time.sleep(_retry_delay(attempt, self.backoff_base, self.backoff_max,
+                                        response.headers.get('Retry-After')))
+                continue
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            if response.status_code >= 400:
+                _raise_for_response(method, path, response.status_code, body)
+            return body
+
+    # ==================== Resources ====================
+
+    def create_post(self, pocketshow_id: int, title: str, author_id: Optional[int] = None,
+                    idempotency_key: Optional[str] = None, **fields) -> Dict[str, Any]:
+        """
+        Create a post.
+
+        Args:
+            pocketshow_id: Pocketshow to post in
+            title: Post title
+            author_id: Posting user
+            idempotency_key: Stable key if the caller retries across processes
+            **fields: content, description, image_url, video_url, metadata, show_name, episode_tag
+
+        Returns:
+            The created post
+        """
+        payload = _post_payload(pocketshow_id, title, author_id, **fields)
+        payload.pop('pocketshow_id')
+        return self.request('POST', f'/pocketshows/{pocketshow_id}/posts', json=payload,
+                            idempotency_key=idempotency_key)
+
+    def create_comment(self, post_id: int, content: str, author_id: Optional[int] = None,
+                       parent_id: Optional[int] = None, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Create a comment (or a reply when parent_id is given)"""
+        payload = {'content': content}
+        if author_id is not None:
+            payload['author_id'] = author_id
+        if parent_id is not None:
+            payload['parent_id'] = parent_id
+        return self.request('POST', f'/posts/{post_id}/comments', json=payload, idempotency_key=idempotency_key)
+
+    def vote_post(self, post_id: int, user_id: int, is_upvote: bool = True,
+                  idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Toggle a vote on a post (see bulk_set_votes for set semantics)"""
+        return self.request('POST', f'/posts/{post_id}/vote', json={'user_id': user_id, 'is_upvote': is_upvote},
+                            idempotency_key=idempotency_key)
+
+    def get_post(self, post_id: int) -> Dict[str, Any]:
+        return self.request('GET', f'/posts/{post_id}')
+
+    def list_posts(self, pocketshow_id: Optional[int] = None, **params) -> List[Dict[str, Any]]:
+        path = f'/pocketshows/{pocketshow_id}/posts' if pocketshow_id else '/posts'
+        return self.request('GET', path, params=params or None)
+
+    # ==================== Batch helpers ====================
+
+    def _bulk(self, path: str, items: List[Dict[str, Any]], chunk_size: int, **options) -> List[Dict[str, Any]]:
+        results = []
+        for start in range(0, len(items), chunk_size):
+            chunk = items[start:start + chunk_size]
+            try:
+                body = self.request('POST', path, json=dict(options, items=chunk))
+            except PocketverseError as e:
+                if isinstance(e.body, dict) and 'results' in e.body:
+                    body = e.body  # Rejected atomic chunk: still has per-item errors
+                else:
+                    body = {'results': [{'index': i, 'success': False, 'error': str(e)} for i in range(len(chunk))]}
+            results.extend(_bulk_outcome(start, body))
+        return results
+
+    def bulk_create_posts(self, posts: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE,
+                          atomic: bool = False, generate_comments: bool = False) -> List[Dict[str, Any]]:
+        """
+        Create posts through /bulk/posts (one request and transaction per chunk).
+
+        Args:
+            posts: Post dicts, each with pocketshow_id and title
+            chunk_size: Posts per request
+            atomic: Reject a chunk entirely if any of its posts is invalid
+            generate_comments: Queue automatic character comments for the created posts
+
+        Returns:
+            Per-item results ({'index', 'success', 'id' | 'error'})
+        """
+        return self._bulk('/bulk/posts', posts, chunk_size, atomic=atomic, generate_comments=generate_comments)
+
+    def bulk_create_comments(self, comments: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE,
+                             atomic: bool = False) -> List[Dict[str, Any]]:
+        """Create comments through /bulk/comments (see bulk_create_posts)"""
+        return self._bulk('/bulk/comments', comments, chunk_size, atomic=atomic)
+
+    def bulk_set_votes(self, votes: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE,
+                       atomic: bool = False) -> List[Dict[str, Any]]:
+        """Set votes through /bulk/votes (see bulk_create_posts)"""
+        return self._bulk('/bulk/votes', votes, chunk_size, atomic=atomic)
+
+    def create_posts_concurrently(self, posts: List[Dict[str, Any]],
+                                  max_workers: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Create posts through the single-post endpoint with bounded concurrency
+        (use when every post needs its own automatic comment generation).
+
+        Returns:
+            Per-item results ({'index', 'success', 'data' | 'error'}) in input order
+        """
+        def create(indexed):
+            index, post = indexed
+            try:
+                fields = dict(post)
+                data = self.create_post(fields.pop('pocketshow_id'), fields.pop('title'), **fields)
+                return {'index': index, 'success': True, 'data': data}
+            except Exception as e:
+                return {'index': index, 'success': False, 'error': str(e)}
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pocketverse') as pool:
+            return list(pool.map(create, enumerate(posts)))
+
+
+class AsyncPocketverseClient:
+    """asyncio client (requires httpx) with the same retry and idempotency behaviour"""
+
+    def __init__(self, base_url: str = "http://localhost:5000", timeout: float = DEFAULT_TIMEOUT,
+                 max_attempts: int = 5, backoff_base: float = 0.5, backoff_max: float = 20.0,
+                 max_connections: int = DEFAULT_CONCURRENCY):
+        """
+        Args:
+            base_url: Base URL of the Pocketverse server
+            timeout: Per-request timeout in seconds
+            max_attempts: Attempts per request (connection errors, 429 and 502-504 are retried)
+            backoff_base: First retry delay in seconds; doubles on every attempt (with jitter)
+            backoff_max: Upper bound for a single retry delay in seconds
+            max_connections: Keep-alive connection pool size
+        """
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("httpx is required for AsyncPocketverseClient (pip install httpx)")
+        self._httpx = httpx
+        self.api_base = f"{base_url.rstrip('/')}/api"
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def request(self, method: str, path: str, json: Any = None, params: Optional[Dict[str, Any]] = None,
+                      idempotency_key: Optional[str] = None) -> Any:
+        """Async counterpart of PocketverseClient.request"""
+        headers = {}
+        if method.upper() == 'POST':
+            headers['Idempotency-Key'] = idempotency_key or str(uuid.uuid4())
+        url = f"{self.api_base}{path}"
+
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            try:
+                response = await self.client.request(method, url, json=json, params=params, headers=headers)
+            except self._httpx.TransportError as e:
+                if last_attempt:
+                    raise PocketverseError(f"{method} {path} failed: {e}")
+                await asyncio.sleep(_retry_delay(attempt, self.backoff_base, self.backoff_max))
+                continue
+
+            if (response.status_code in RETRY_STATUS_CODES or response.status_code == 409
+                    or response.status_code >= 500) and not last_attempt:
+                await asyncio.sleep(_retry_delay(attempt, self.backoff_base, self.backoff_max,
+                                                 response.headers.get('Retry-After')))
+                continue
+            try:
+                body = response.json()
+            except ValueError:
+                body = response.text
+            if response.status_code >= 400:
+                _raise_for_response(method, path, response.status_code, body)
+            return body
+
+    async def create_post(self, pocketshow_id: int, title: str, author_id: Optional[int] = None,
+                          idempotency_key: Optional[str] = None, **fields) -> Dict[str, Any]:
+        payload = _post_payload(pocketshow_id, title, author_id, **fields)
+        payload.pop('pocketshow_id')
+        return await self.request('POST', f'/pocketshows/{pocketshow_id}/posts', json=payload,
+                                  idempotency_key=idempotency_key)
+
+    async def create_comment(self, post_id: int, content: str, author_id: Optional[int] = None,
+                             parent_id: Optional[int] = None, idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        payload = {'content': content}
+        if author_id is not None:
+            payload['author_id'] = author_id
+        if parent_id is not None:
+            payload['parent_id'] = parent_id
+        return await self.request('POST', f'/posts/{post_id}/comments', json=payload,
+                                  idempotency_key=idempotency_key)
+
+    async def bulk_create_posts(self, posts: List[Dict[str, Any]], chunk_size: int = BULK_CHUNK_SIZE,
+                                atomic: bool = False, generate_comments: bool = False,
+                                concurrency: int = 4) -> List[Dict[str, Any]]:
+        """
+        Create posts through /bulk/posts, sending up to `concurrency` chunks at once.
+
+        Returns:
+            Per-item results ({'index', 'success', 'id' | 'error'}) in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(start):
+            chunk = posts[start:start + chunk_size]
+            async with semaphore:
+                try:
+                    body = await self.request('POST', '/bulk/posts', json={
+                        'items': chunk, 'atomic': atomic, 'generate_comments': generate_comments
+                    })
+                except PocketverseError as e:
+                    if isinstance(e.body, dict) and 'results' in e.body:
+                        body = e.body
+                    else:
+                        body = {'results': [{'index': i, 'success': False, 'error': str(e)}
+                                            for i in range(len(chunk))]}
+            return _bulk_outcome(start, body)
+
+        chunks = await asyncio.gather(*(send(start) for start in range(0, len(posts), chunk_size)))
+        return [item for chunk in chunks for item in chunk]
+
+    async def create_posts_concurrently(self, posts: List[Dict[str, Any]],
+                                        concurrency: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
+        """
+        Create posts through the single-post endpoint with at most `concurrency` in flight.
+
+        Returns:
+            Per-item results ({'index', 'success', 'data' | 'error'}) in input order
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def create(index, post):
+            fields = dict(post)
+            async with semaphore:
+                try:
+                    data = await self.create_post(fields.pop('pocketshow_id'), fields.pop('title'), **fields)
+                    return {'index': index, 'success': True, 'data': data}
+                except Exception as e:
+                    return {'index': index, 'success': False, 'error': str(e)}
+
+        return list(await asyncio.gather(*(create(i, post) for i, post in enumerate(posts))))
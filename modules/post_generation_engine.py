@@ -3,7 +3,8 @@ Main post generation engine that orchestrates prompt generation for VEO.
 Modular system for generating engaging post prompts from cliffhangers.
 """
 
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Iterator, List, Dict, Optional
 from pathlib import Path
 from .promo_canon_parser import PromoCanonLoader
 from .scene_extractor import SceneExtractor
@@ -27,6 +28,52 @@ class PostGenerationEngine:
         self.scene_extractor = SceneExtractor(self.canon_loader)
         self.prompt_generator = VEOPromptGenerator(self.scene_extractor)
     
+    def iter_prompts_for_cliffhanger(self, episode_num: int,
+                                     perspective_character: Optional[str] = None,
+                                     prompts_per_cliffhanger: int = 2) -> Iterator[Dict]:
+        """
+        Lazily generate VEO prompts for a specific episode's cliffhangers.
+        
+        Args:
+            episode_num: Episode number
+            perspective_character: Specific character perspective (optional)
+            prompts_per_cliffhanger: Number of prompts to generate per cliffhanger (default: 2)
+            
+        Yields:
+            Prompt dictionaries
+        """
+        for cliffhanger in self.canon_loader.get_cliffhanger_by_episode(episode_num):
+            if perspective_character:
+                # Generate from specified character perspective
+                yield self.prompt_generator.generate_veo_prompt(
+                    cliffhanger, 
+                    perspective_character=perspective_character
+                )
+                continue
+            
+            # Extract characters from the cliffhanger
+            characters = self.scene_extractor.extract_visual_elements(cliffhanger)['characters']
+            
+            # Generate multiple prompts from different character perspectives
+            # If not enough characters, generate generic prompts
+            if characters and len(characters) >= prompts_per_cliffhanger:
+                # Use different character perspectives
+                for char in characters[:prompts_per_cliffhanger]:
+                    yield self.prompt_generator.generate_veo_prompt(
+                        cliffhanger,
+                        perspective_character=char
+                    )
+            else:
+                # Generate generic prompt, then from available characters
+                yield self.prompt_generator.generate_veo_prompt(cliffhanger)
+                
+                # Add character-specific prompts if available
+                for char in characters[:prompts_per_cliffhanger - 1]:
+                    yield self.prompt_generator.generate_veo_prompt(
+                        cliffhanger,
+                        perspective_character=char
+                    )
+    
     def generate_prompts_for_cliffhanger(self, episode_num: int, 
                                          perspective_character: Optional[str] = None,
                                          prompts_per_cliffhanger: int = 2) -> List[Dict]:
@@ -41,49 +88,44 @@ class PostGenerationEngine:
         Returns:
             List of prompt dictionaries
         """
-        cliffhangers = self.canon_loader.get_cliffhanger_by_episode(episode_num)
+        return list(self.iter_prompts_for_cliffhanger(
+            episode_num,
+            perspective_character=perspective_character,
+            prompts_per_cliffhanger=prompts_per_cliffhanger
+        ))
+    
+    def iter_prompts_for_character(self, character_name: str,
+                                   min_episode: int = 1,
+                                   max_episode: int = 100,
+                                   limit: int = 10) -> Iterator[Dict]:
+        """
+        Lazily generate prompts from a specific character's perspective,
+        most engaging cliffhangers first. Only the top `limit` cliffhangers are selected
+        and each prompt is built when the caller asks for it.
         
-        if not cliffhangers:
-            return []
+        Args:
+            character_name: Name of the character
+            min_episode: Minimum episode number
+            max_episode: Maximum episode number
+            limit: Maximum number of prompts to generate
+            
+        Yields:
+            Prompt dictionaries
+        """
+        # Find the most engaging cliffhangers with this character (top-k selection)
+        cliffhangers = self.scene_extractor.find_engaging_cliffhangers(
+            min_episode=min_episode,
+            max_episode=max_episode,
+            character_filter=character_name,
+            limit=limit
+        )
         
-        prompts = []
+        # Generate prompts from this character's perspective
         for cliffhanger in cliffhangers:
-            # Extract characters from the cliffhanger
-            scene_data = self.scene_extractor.create_non_spoiler_scene(cliffhanger)
-            characters = scene_data.get('characters', [])
-            
-            if perspective_character:
-                # Generate from specified character perspective
-                prompt = self.prompt_generator.generate_veo_prompt(
-                    cliffhanger, 
-                    perspective_character=perspective_character
-                )
-                prompts.append(prompt)
-            else:
-                # Generate multiple prompts from different character perspectives
-                # If not enough characters, generate generic prompts
-                if characters and len(characters) >= prompts_per_cliffhanger:
-                    # Use different character perspectives
-                    for char in characters[:prompts_per_cliffhanger]:
-                        prompt = self.prompt_generator.generate_veo_prompt(
-                            cliffhanger,
-                            perspective_character=char
-                        )
-                        prompts.append(prompt)
-                else:
-                    # Generate generic prompt, then from available characters
-                    prompt = self.prompt_generator.generate_veo_prompt(cliffhanger)
-                    prompts.append(prompt)
-                    
-                    # Add character-specific prompts if available
-                    for char in characters[:prompts_per_cliffhanger - 1]:
-                        prompt = self.prompt_generator.generate_veo_prompt(
-                            cliffhanger,
-                            perspective_character=char
-                        )
-                        prompts.append(prompt)
-        
-        return prompts
+            yield self.prompt_generator.generate_veo_prompt(
+                cliffhanger,
+                perspective_character=character_name
+            )
     
     def generate_prompts_for_character(self, character_name: str, 
                                        min_episode: int = 1, 
@@ -101,26 +143,37 @@ class PostGenerationEngine:
         Returns:
             List of prompt dictionaries
         """
-        # Find engaging cliffhangers with this character
-        cliffhangers = self.scene_extractor.find_engaging_cliffhangers(
+        return list(self.iter_prompts_for_character(
+            character_name,
             min_episode=min_episode,
             max_episode=max_episode,
-            character_filter=character_name
-        )
+            limit=limit
+        ))
+    
+    def iter_top_engaging_prompts(self, count: int = 20,
+                                  min_episode: int = 1,
+                                  max_episode: int = 100) -> Iterator[Dict]:
+        """
+        Lazily generate prompts for the most engaging cliffhangers.
+        Only the top `count` cliffhangers are selected; prompts are built on demand.
         
-        # Generate prompts from this character's perspective
-        prompts = self.prompt_generator.generate_multiple_prompts(
-            cliffhangers[:limit],
-            characters_per_cliffhanger=1
+        Args:
+            count: Number of prompts to generate
+            min_episode: Minimum episode number
+            max_episode: Maximum episode number
+            
+        Yields:
+            Prompt dictionaries sorted by engagement potential
+        """
+        # Find most engaging cliffhangers (top-k selection)
+        cliffhangers = self.scene_extractor.find_engaging_cliffhangers(
+            min_episode=min_episode,
+            max_episode=max_episode,
+            limit=count
         )
         
-        # Filter to only this character's perspective
-        filtered = [
-            p for p in prompts 
-            if p.get('perspective_character') == character_name
-        ]
-        
-        return filtered[:limit]
+        # Generate prompts (one per cliffhanger, from first character's perspective)
+        return islice(self.prompt_generator.iter_prompts(cliffhangers, characters_per_cliffhanger=1), count)
     
     def generate_top_engaging_prompts(self, count: int = 20,
                                      min_episode: int = 1,
@@ -136,19 +189,38 @@ class PostGenerationEngine:
         Returns:
             List of prompt dictionaries sorted by engagement potential
         """
-        # Find most engaging cliffhangers
-        cliffhangers = self.scene_extractor.find_engaging_cliffhangers(
+        return list(self.iter_top_engaging_prompts(
+            count=count,
             min_episode=min_episode,
             max_episode=max_episode
-        )
+        ))
+    
+    def iter_prompts_for_episode_range(self, start_episode: int,
+                                       end_episode: int,
+                                       characters_per_cliffhanger: int = 1) -> Iterator[Dict]:
+        """
+        Lazily generate prompts for all cliffhangers in an episode range.
         
-        # Generate prompts (one per cliffhanger, from first character's perspective)
-        prompts = self.prompt_generator.generate_multiple_prompts(
-            cliffhangers[:count],
-            characters_per_cliffhanger=1
+        Args:
+            start_episode: Starting episode number
+            end_episode: Ending episode number
+            characters_per_cliffhanger: Number of character perspectives per cliffhanger
+            
+        Yields:
+            Prompt dictionaries
+        """
+        all_cliffhangers = self.canon_loader.load_major_cliffhangers() + self.canon_loader.load_minor_cliffhangers()
+        
+        # Filter by episode range
+        filtered = (
+            c for c in all_cliffhangers
+            if start_episode <= c.get('episode', 0) <= end_episode
         )
         
-        return prompts
+        return self.prompt_generator.iter_prompts(
+            filtered,
+            characters_per_cliffhanger=characters_per_cliffhanger
+        )
     
     def generate_prompts_for_episode_range(self, start_episode: int, 
                                           end_episode: int,
@@ -164,23 +236,11 @@ class PostGenerationEngine:
         Returns:
             List of prompt dictionaries
         """
-        all_cliffhangers = []
-        all_cliffhangers.extend(self.canon_loader.load_major_cliffhangers())
-        all_cliffhangers.extend(self.canon_loader.load_minor_cliffhangers())
-        
-        # Filter by episode range
-        filtered = [
-            c for c in all_cliffhangers
-            if start_episode <= c.get('episode', 0) <= end_episode
-        ]
-        
-        # Generate prompts
-        prompts = self.prompt_generator.generate_multiple_prompts(
-            filtered,
+        return list(self.iter_prompts_for_episode_range(
+            start_episode,
+            end_episode,
             characters_per_cliffhanger=characters_per_cliffhanger
-        )
-        
-        return prompts
+        ))
     
     def get_available_characters(self) -> List[str]:
         """
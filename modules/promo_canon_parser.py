@@ -7,9 +7,11 @@ Caches parsed data to JSON files for faster subsequent loads.
 import re
 import json
 import os
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional
 from pathlib import Path
 from datetime import datetime
+from .character_matcher import CharacterMatcher
+from services.instrumentation import traced
 
 
 class CliffhangerParser:
@@ -254,6 +256,7 @@ class PromoCanonLoader:
         self._minor_cliffhangers = None
         self._characters = None
         self._episodes = None
+        self._character_matcher = None
         
         # Cache file paths
         self._cache_files = {
@@ -261,6 +264,7 @@ class PromoCanonLoader:
             'minor_cliffhangers': self.cache_dir / 'minor_cliffhangers.json',
             'characters': self.cache_dir / 'characters.json',
             'episodes': self.cache_dir / 'episodes.json',
+            'visual_features': self.cache_dir / 'visual_features.json',
             'cache_metadata': self.cache_dir / 'cache_metadata.json'
         }
     
@@ -316,6 +320,7 @@ class PromoCanonLoader:
         }
         self._save_to_cache(metadata, self._cache_files['cache_metadata'])
     
+    @traced('canon.load_major_cliffhangers')
     def load_major_cliffhangers(self) -> List[Dict]:
         """Load and cache major cliffhangers"""
         if self._major_cliffhangers is None:
@@ -343,6 +348,7 @@ class PromoCanonLoader:
         
         return self._major_cliffhangers
     
+    @traced('canon.load_minor_cliffhangers')
     def load_minor_cliffhangers(self) -> List[Dict]:
         """Load and cache minor cliffhangers"""
         if self._minor_cliffhangers is None:
@@ -370,6 +376,7 @@ class PromoCanonLoader:
         
         return self._minor_cliffhangers
     
+    @traced('canon.load_characters')
     def load_characters(self) -> Dict[str, Dict]:
         """Load and cache character information"""
         if self._characters is None:
@@ -397,6 +404,7 @@ class PromoCanonLoader:
         
         return self._characters
     
+    @traced('canon.load_episodes')
     def load_episodes(self) -> List[Dict]:
         """Load and cache all episode summaries"""
         if self._episodes is None:
@@ -424,6 +432,46 @@ class PromoCanonLoader:
         
         return self._episodes
     
+    def load_visual_features(self, extract_features: Callable[[Dict], Dict[str, Any]],
+                             version: str) -> List[Dict[str, Any]]:
+        """
+        Load and cache the per-cliffhanger visual feature table.
+        Rows are aligned with load_major_cliffhangers() + load_minor_cliffhangers().
+        
+        Args:
+            extract_features: Function computing the feature row for one cliffhanger
+            version: Version of the extraction rules; a cached table with another version is rebuilt
+            
+        Returns:
+            List of feature dictionaries, one per cliffhanger
+        """
+        cliffhangers = self.load_major_cliffhangers() + self.load_minor_cliffhangers()
+        cache_file = self._cache_files['visual_features']
+        source_files = [
+            "5_Major_Cliffhangers_1-100.md",
+            "6_Minor_Cliffhangers_1-100.md",
+            "2_Characters_1-20.md",
+        ]
+        
+        # Try to load from cache first
+        if self._is_cache_valid(cache_file, source_files):
+            cached_data = self._load_from_cache(cache_file)
+            if (isinstance(cached_data, dict)
+                    and cached_data.get('version') == version
+                    and len(cached_data.get('features', [])) == len(cliffhangers)):
+                return cached_data['features']
+        
+        features = [extract_features(cliffhanger) for cliffhanger in cliffhangers]
+        self._save_to_cache({'version': version, 'features': features}, cache_file)
+        self._update_cache_metadata()
+        return features
+    
+    def get_character_matcher(self) -> CharacterMatcher:
+        """Get the character mention matcher for this canon (built once, on first use)"""
+        if self._character_matcher is None:
+            self._character_matcher = CharacterMatcher(self.load_characters())
+        return self._character_matcher
+    
     def get_cliffhanger_by_episode(self, episode_num: int) -> List[Dict]:
         """Get all cliffhangers (major and minor) for a specific episode"""
         major = [c for c in self.load_major_cliffhangers() if c['episode'] == episode_num]
@@ -450,6 +498,7 @@ class PromoCanonLoader:
         self._minor_cliffhangers = None
         self._characters = None
         self._episodes = None
+        self._character_matcher = None
     
     def get_cache_info(self) -> Dict:
         """Get information about cache status"""
@@ -0,0 +1,137 @@
+"""
+Append-only JSONL manifest for batch generation runs.
+Each processed item is written as one JSON line as soon as it finishes, so a crash
+loses at most the unsynced tail and a restarted run can skip completed items.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+COMPLETED_STATUS = 'completed'
+FAILED_STATUSES = ('error', 'exception')
+
+
+class RunManifest:
+    """JSONL manifest with batched fsync and prompt-hash based resume"""
+
+    def __init__(self, path: str, fsync_every: int = 10):
+        """
+        Open (or create) a manifest file for appending.
+
+        Args:
+            path: Path to the .jsonl manifest file
+            fsync_every: Force records to disk after this many appends (1 = every record)
+        """
+        self.path = Path(path)
+        self.fsync_every = max(1, fsync_every)
+        self._lock = threading.Lock()
+        self._file = None
+        self._unsynced = 0
+
+    @staticmethod
+    def prompt_hash(prompt_text: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Stable hash identifying a generation request.
+
+        Args:
+            prompt_text: The prompt sent to the model
+            params: Generation parameters that change the output (size, style, model...)
+
+        Returns:
+            Hex sha256 digest
+        """
+        payload = json.dumps({'prompt': prompt_text, 'params': params or {}}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream records from the manifest, skipping a torn last line from a crashed run"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def completed_hashes(self) -> Set[str]:
+        """Prompt hashes that already have a completed record"""
+        return {
+            record['prompt_hash'] for record in self.iter_records()
+            if record.get('status') == COMPLETED_STATUS and record.get('prompt_hash')
+        }
+
+    def _ends_with_torn_line(self) -> bool:
+        """Check whether the manifest's last line is missing its newline"""
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return False
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) != b'\n'
+
+    def append(self, record: Dict[str, Any]):
+        """
+        Append one record. Safe to call from several threads.
+
+        Args:
+            record: JSON-serializable dictionary (should include 'prompt_hash' and 'status')
+        """
+        record.setdefault('recorded_at', time.time())
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                needs_newline = self._ends_with_torn_line()
+                self._file = open(self.path, 'a', encoding='utf-8')
+                if needs_newline:
+                    # Terminate a record left half-written by a crash so it can't swallow this one
+                    self._file.write('\n')
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def close(self):
+        """Sync any pending records and close the file"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+                self._unsynced = 0
+
+    def __enter__(self) -> 'RunManifest':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def summarize(self) -> Dict[str, int]:
+        """
+        Summarize the manifest by streaming over it.
+        When an item was retried across runs, its latest record wins.
+
+        Returns:
+            Dictionary with total, completed and failed counts
+        """
+        latest_status: Dict[str, Optional[str]] = {}
+        for record in self.iter_records():
+            latest_status[record.get('prompt_hash') or f"line-{len(latest_status)}"] = record.get('status')
+
+        statuses = list(latest_status.values())
+        return {
+            'total': len(statuses),
+            'completed': sum(1 for status in statuses if status == COMPLETED_STATUS),
+            'failed': sum(1 for status in statuses if status in FAILED_STATUSES)
+        }
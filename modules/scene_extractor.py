@@ -4,9 +4,80 @@ Extracts visual scenes that would make good posts without spoilers.
 """
 
 import re
-from typing import List, Dict, Optional, Set
+from typing import Any, List, Dict, Optional, Set, Tuple
+import numpy as np
 from .promo_canon_parser import PromoCanonLoader
 
+# Bump when the extraction rules below change so cached feature tables are rebuilt
+VISUAL_FEATURES_VERSION = "1"
+
+# Common location patterns
+LOCATION_PATTERNS = [
+    re.compile(r'(?:in|at|inside|outside|near|by)\s+(?:the\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)', re.IGNORECASE),
+    re.compile(r'(?:hotel|restaurant|airport|lobby|suite|villa|deck|stairwell|garage|conference|kindergarten)', re.IGNORECASE),
+]
+
+# Action verbs and key moments
+ACTION_PATTERNS = [
+    re.compile(r'(?:picks? up|carries?|hugs?|kisses?|stops?|confronts?|discovers?|sees?|spots?|meets?)', re.IGNORECASE),
+    re.compile(r'(?:cries?|shouts?|says?|declares?|asks?|exclaims?)', re.IGNORECASE),
+    re.compile(r'(?:walks?|runs?|rushes?|arrives?|leaves?)', re.IGNORECASE),
+]
+
+# Emotional tone keywords (matched as substrings of the lowercased text)
+EMOTION_KEYWORDS = {
+    'dramatic': ['stunned', 'shocked', 'disbelief', 'frozen', 'speechless'],
+    'tense': ['struggling', 'protesting', 'cries out', 'confrontation', 'threat'],
+    'emotional': ['tears', 'cries', 'hugs', 'devastation', 'grief', 'longing'],
+    'mysterious': ['mysterious', 'unknown', 'secret', 'hidden', 'unaware'],
+    'action': ['forcibly', 'authoritatively', 'rushes', 'catches', 'discovers']
+}
+EMOTION_PATTERNS = [
+    (emotion, re.compile('|'.join(re.escape(kw) for kw in keywords)))
+    for emotion, keywords in EMOTION_KEYWORDS.items()
+]
+
+
+class _FeatureTable:
+    """Column-oriented view of the visual feature table used for scoring and filtering"""
+    
+    def __init__(self, cliffhangers: List[Dict], features: List[Dict[str, Any]]):
+        self.cliffhangers = cliffhangers
+        self.features = features
+        self.row_by_key = {
+            SceneExtractor.feature_key(cliffhanger): row
+            for row, cliffhanger in enumerate(cliffhangers)
+        }
+        
+        self.episodes = np.array([c.get('episode', 0) or 0 for c in cliffhangers], dtype=np.int64)
+        
+        # Score based on:
+        # - Number of characters (more = more engaging)
+        # - Presence of clear location
+        # - Emotional intensity
+        # - Action elements
+        character_counts = np.array([len(f['characters']) for f in features], dtype=np.int64)
+        has_location = np.array([bool(f['location']) for f in features], dtype=bool)
+        emotion_counts = np.array([len(f['emotions']) for f in features], dtype=np.int64)
+        action_counts = np.array([len(f['actions']) for f in features], dtype=np.int64)
+        is_major = np.array([c.get('severity') == 'major' for c in cliffhangers], dtype=bool)
+        self.scores = (
+            character_counts * 2
+            + np.where(has_location, 3, 0)
+            + emotion_counts * 2
+            + action_counts
+            + np.where(is_major, 5, 2)
+        )
+        
+        # Inverted index: character name -> rows mentioning them
+        rows_by_character: Dict[str, List[int]] = {}
+        for row, feature in enumerate(features):
+            for name in feature['characters']:
+                rows_by_character.setdefault(name, []).append(row)
+        self.character_rows = {
+            name: np.array(rows, dtype=np.int64) for name, rows in rows_by_character.items()
+        }
+
 
 class SceneExtractor:
     """Extracts engaging visual scenes from cliffhangers for post generation"""
@@ -20,10 +91,13 @@ class SceneExtractor:
         """
         self.canon_loader = canon_loader
         self.characters = canon_loader.load_characters()
+        self.matcher = canon_loader.get_character_matcher()
+        self._feature_table: Optional[_FeatureTable] = None
     
     def extract_characters_from_text(self, text: str) -> List[str]:
         """
         Extract character names mentioned in text.
+        Matches full names, first names and aliases on word boundaries in a single pass.
         
         Args:
             text: Text to analyze
@@ -31,20 +105,7 @@ class SceneExtractor:
         Returns:
             List of character names found
         """
-        found_characters = []
-        text_lower = text.lower()
-        
-        for char_name, char_data in self.characters.items():
-            # Check for full name
-            if char_name.lower() in text_lower:
-                found_characters.append(char_name)
-            else:
-                # Check for first name only
-                first_name = char_name.split()[0] if ' ' in char_name else char_name
-                if first_name.lower() in text_lower and len(first_name) > 3:
-                    found_characters.append(char_name)
-        
-        return found_characters
+        return self.matcher.find_characters(text)
     
     def extract_location_from_text(self, text: str) -> Optional[str]:
         """
@@ -56,16 +117,9 @@ class SceneExtractor:
         Returns:
             Location string or None
         """
-        # Common location patterns
-        location_patterns = [
-            r'(?:in|at|inside|outside|near|by)\s+(?:the\s+)?([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)',
-            r'(?:hotel|restaurant|airport|lobby|suite|villa|deck|stairwell|garage|conference|kindergarten)',
-        ]
-        
         locations = []
-        for pattern in location_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern in LOCATION_PATTERNS:
+            for match in pattern.finditer(text):
                 location = match.group(1) if match.lastindex else match.group(0)
                 if location and len(location) > 2:
                     locations.append(location)
@@ -75,52 +129,74 @@ class SceneExtractor:
             return locations[0]
         return None
     
-    def extract_visual_elements(self, cliffhanger: Dict) -> Dict:
+    @staticmethod
+    def feature_key(cliffhanger: Dict) -> Tuple:
+        """Key identifying a cliffhanger in the feature table"""
+        return (cliffhanger.get('severity'), cliffhanger.get('episode'), cliffhanger.get('cliffhanger_text', ''))
+    
+    def compute_visual_features(self, cliffhanger: Dict) -> Dict[str, Any]:
         """
-        Extract visual elements from a cliffhanger for scene description.
+        Run the text extraction for a cliffhanger (uncached).
         
         Args:
             cliffhanger: Cliffhanger dictionary
             
         Returns:
-            Dictionary with visual scene elements
+            Dictionary with characters, location, actions and emotions
         """
         text = cliffhanger.get('cliffhanger_text', '')
-        characters = self.extract_characters_from_text(text)
-        location = self.extract_location_from_text(text)
-        
-        # Extract action verbs and key moments
-        action_patterns = [
-            r'(?:picks? up|carries?|hugs?|kisses?|stops?|confronts?|discovers?|sees?|spots?|meets?)',
-            r'(?:cries?|shouts?|says?|declares?|asks?|exclaims?)',
-            r'(?:walks?|runs?|rushes?|arrives?|leaves?)',
-        ]
         
         actions = []
-        for pattern in action_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            actions.extend([m.group(0) for m in matches])
-        
-        # Extract emotional tone
-        emotion_keywords = {
-            'dramatic': ['stunned', 'shocked', 'disbelief', 'frozen', 'speechless'],
-            'tense': ['struggling', 'protesting', 'cries out', 'confrontation', 'threat'],
-            'emotional': ['tears', 'cries', 'hugs', 'devastation', 'grief', 'longing'],
-            'mysterious': ['mysterious', 'unknown', 'secret', 'hidden', 'unaware'],
-            'action': ['forcibly', 'authoritatively', 'rushes', 'catches', 'discovers']
-        }
+        for pattern in ACTION_PATTERNS:
+            actions.extend(m.group(0) for m in pattern.finditer(text))
         
-        detected_emotions = []
         text_lower = text.lower()
-        for emotion, keywords in emotion_keywords.items():
-            if any(kw in text_lower for kw in keywords):
-                detected_emotions.append(emotion)
+        detected_emotions = [
+            emotion for emotion, pattern in EMOTION_PATTERNS
+            if pattern.search(text_lower)
+        ]
         
         return {
-            'characters': characters,
-            'location': location,
-            'actions': list(set(actions))[:5],  # Limit to 5 unique actions
+            'characters': self.extract_characters_from_text(text),
+            'location': self.extract_location_from_text(text),
+            'actions': list(dict.fromkeys(actions))[:5],  # Limit to 5 unique actions
             'emotions': detected_emotions,
+        }
+    
+    def _get_feature_table(self) -> _FeatureTable:
+        """Build (or load from the canon cache) the feature table for all cliffhangers"""
+        if self._feature_table is None:
+            cliffhangers = self.canon_loader.load_major_cliffhangers() + self.canon_loader.load_minor_cliffhangers()
+            features = self.canon_loader.load_visual_features(
+                self.compute_visual_features,
+                version=VISUAL_FEATURES_VERSION
+            )
+            self._feature_table = _FeatureTable(cliffhangers, features)
+        return self._feature_table
+    
+    def extract_visual_elements(self, cliffhanger: Dict) -> Dict:
+        """
+        Extract visual elements from a cliffhanger for scene description.
+        Canon cliffhangers are served from the precomputed feature table.
+        
+        Args:
+            cliffhanger: Cliffhanger dictionary
+            
+        Returns:
+            Dictionary with visual scene elements
+        """
+        table = self._get_feature_table()
+        row = table.row_by_key.get(self.feature_key(cliffhanger))
+        if row is not None:
+            features = table.features[row]
+        else:
+            features = self.compute_visual_features(cliffhanger)
+        
+        return {
+            'characters': list(features['characters']),
+            'location': features['location'],
+            'actions': list(features['actions']),
+            'emotions': list(features['emotions']),
             'episode': cliffhanger.get('episode'),
             'title': cliffhanger.get('title'),
             'severity': cliffhanger.get('severity', 'unknown')
@@ -178,7 +254,8 @@ class SceneExtractor:
         }
     
     def find_engaging_cliffhangers(self, min_episode: int = 1, max_episode: int = 100, 
-                                   character_filter: Optional[str] = None) -> List[Dict]:
+                                   character_filter: Optional[str] = None,
+                                   limit: Optional[int] = None) -> List[Dict]:
         """
         Find cliffhangers that would make engaging posts.
         
@@ -186,51 +263,36 @@ class SceneExtractor:
             min_episode: Minimum episode number
             max_episode: Maximum episode number
             character_filter: Filter by character name (optional)
+            limit: Only return the top N cliffhangers (optional)
             
         Returns:
-            List of cliffhanger dictionaries with scene extractions
+            List of cliffhanger dictionaries, highest engagement score first
         """
-        all_cliffhangers = []
-        all_cliffhangers.extend(self.canon_loader.load_major_cliffhangers())
-        all_cliffhangers.extend(self.canon_loader.load_minor_cliffhangers())
+        table = self._get_feature_table()
         
         # Filter by episode range
-        filtered = [
-            c for c in all_cliffhangers 
-            if min_episode <= c.get('episode', 0) <= max_episode
-        ]
+        mask = (table.episodes >= min_episode) & (table.episodes <= max_episode)
         
         # Filter by character if specified
         if character_filter:
-            filtered = [
-                c for c in filtered 
-                if character_filter in self.extract_characters_from_text(c.get('cliffhanger_text', ''))
-            ]
-        
-        # Score cliffhangers by engagement potential
-        scored_cliffhangers = []
-        for cliffhanger in filtered:
-            visual = self.extract_visual_elements(cliffhanger)
-            
-            # Score based on:
-            # - Number of characters (more = more engaging)
-            # - Presence of clear location
-            # - Emotional intensity
-            # - Action elements
-            score = 0
-            score += len(visual['characters']) * 2
-            score += 3 if visual['location'] else 0
-            score += len(visual['emotions']) * 2
-            score += len(visual['actions']) * 1
-            score += 5 if cliffhanger.get('severity') == 'major' else 2
-            
-            scored_cliffhangers.append({
-                'cliffhanger': cliffhanger,
-                'score': score,
-                'visual_elements': visual
-            })
+            name = character_filter if character_filter in table.character_rows else self.matcher.resolve(character_filter)
+            character_mask = np.zeros(len(mask), dtype=bool)
+            if name in table.character_rows:
+                character_mask[table.character_rows[name]] = True
+            mask &= character_mask
         
-        # Sort by score (highest first)
-        scored_cliffhangers.sort(key=lambda x: x['score'], reverse=True)
+        rows = np.flatnonzero(mask)
+        scores = table.scores[rows]
+        
+        if limit is not None and 0 <= limit < len(rows):
+            if limit == 0:
+                return []
+            # Unique sort key: score descending, then canon order (same as a stable sort)
+            keys = (scores.max() - scores) * len(table.cliffhangers) + rows
+            top = np.argpartition(keys, limit - 1)[:limit]
+            rows = rows[top[np.argsort(keys[top])]]
+        else:
+            # Sort by score (highest first)
+            rows = rows[np.argsort(-scores, kind='stable')]
         
-        return [item['cliffhanger'] for item in scored_cliffhangers]
+        return [table.cliffhangers[row] for row in rows]
@@ -0,0 +1,206 @@
+"""
+Incremental parser for Gemini streamGenerateContent responses.
+The endpoint returns a JSON array of response chunks, and image parts carry their
+pixels as multi-megabyte base64 strings in inlineData.data. Instead of buffering the
+whole body and building a JSON tree around those strings, the parser scans the byte
+stream as it arrives, decodes every inlineData.data value chunk by chunk straight
+into a sink (file or BytesIO), and only json-parses the small remainder of each chunk.
+"""
+
+import binascii
+import codecs
+import io
+import json
+import re
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional
+
+# Body of a JSON string up to and including its closing quote (unrolled, linear time)
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_WHITESPACE = ' \t\r\n'
+
+
+class Base64StreamDecoder:
+    """Decodes base64 text written in arbitrary pieces into a binary sink"""
+
+    def __init__(self, sink: BinaryIO):
+        self.sink = sink
+        self.bytes_written = 0
+        self._pending = ''
+
+    def write(self, text: str):
+        """Decode every complete 4-character quantum and keep the rest for the next write"""
+        text = self._pending + text
+        usable = len(text) - len(text) % 4
+        self._pending = text[usable:]
+        if usable:
+            data = binascii.a2b_base64(text[:usable])
+            self.sink.write(data)
+            self.bytes_written += len(data)
+
+    def close(self):
+        """Flush a final, possibly unpadded, quantum"""
+        if self._pending:
+            data = binascii.a2b_base64(self._pending + '=' * (-len(self._pending) % 4))
+            self.sink.write(data)
+            self.bytes_written += len(data)
+            self._pending = ''
+
+
+class InlineBlob:
+    """An inlineData payload that was decoded into a sink instead of kept as a string"""
+
+    def __init__(self, index: int, sink: BinaryIO):
+        self.index = index
+        self.sink = sink
+        self.decoder = Base64StreamDecoder(sink)
+
+    @property
+    def size(self) -> int:
+        return self.decoder.bytes_written
+
+
+class StreamedResponseParser:
+    """
+    Feed raw response bytes in; get parsed response chunks out.
+
+    In every emitted chunk, inlineData.data holds an int index into `blobs` rather than
+    the base64 string; the decoded bytes live in that blob's sink.
+    """
+
+    def __init__(self, sink_factory: Optional[Callable[[int], BinaryIO]] = None):
+        """
+        Args:
+            sink_factory: Called with the blob index to get a writable binary sink for each
+                inlineData payload (default: io.BytesIO)
+        """
+        self.sink_factory = sink_factory or (lambda index: io.BytesIO())
+        self.blobs: List[InlineBlob] = []
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._text = ''
+        self._base_depth: Optional[int] = None  # 1 inside a top-level array, 0 for a bare object
+        self._depth = 0
+        self._element: Optional[List[str]] = None
+        self._key_stack: List[Optional[str]] = []
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+        self._active_blob: Optional[InlineBlob] = None
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """
+        Consume the next piece of the response body.
+
+        Returns:
+            Response chunks completed by this piece (possibly none)
+        """
+        self._text += self._utf8.decode(data)
+        return self._scan()
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush the decoder at end of stream"""
+        self._text += self._utf8.decode(b'', final=True)
+        return self._scan()
+
+    def _start_blob(self) -> InlineBlob:
+        blob = InlineBlob(len(self.blobs), self.sink_factory(len(self.blobs)))
+        self.blobs.append(blob)
+        return blob
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        text = self._text
+        length = len(text)
+        pos = 0
+        emitted = []
+
+        while pos < length:
+            if self._active_blob is not None:
+                # Fast path: hand the base64 run to the decoder without touching it char by char
+                end = text.find('"', pos)
+                segment = text[pos:] if end == -1 else text[pos:end]
+                if end == -1 and segment.endswith('\\'):
+                    segment = segment[:-1]  # Split escape; finish it on the next feed
+                if '\\' in segment:
+                    segment = segment.replace('\\/', '/')
+                self._active_blob.decoder.write(segment)
+                if end == -1:
+                    pos = length - (1 if text.endswith('\\') else 0)
+                    break
+                self._active_blob.decoder.close()
+                self._element.append(str(self._active_blob.index))
+                self._active_blob = None
+                pos = end + 1
+                continue
+
+            char = text[pos]
+
+            if self._base_depth is None:
+                if char in _WHITESPACE:
+                    pos += 1
+                    continue
+                self._base_depth = 1 if char == '[' else 0
+                if char == '[':
+                    self._depth = 1
+                    pos += 1
+                    continue
+
+            in_element = self._element is not None
+
+            if char == '"':
+                if (in_element and self._pending_key == 'data'
+                        and self._key_stack and self._key_stack[-1] == 'inlineData'):
+                    self._active_blob = self._start_blob()
+                    self._pending_key = None
+                    pos += 1
+                    continue
+                match = _STRING_BODY.match(text, pos + 1)
+                if match is None:
+                    break  # Incomplete string; wait for more data
+                raw = text[pos:match.end()]
+                if in_element:
+                    self._element.append(raw)
+                self._last_string = raw
+                pos = match.end()
+                continue
+
+            if char == '{' or char == '[':
+                if self._depth == self._base_depth and char == '{':
+                    self._element = []
+                    in_element = True
+                self._key_stack.append(self._pending_key)
+                self._pending_key = None
+                self._depth += 1
+            elif char == '}' or char == ']':
+                self._depth -= 1
+                if self._key_stack:
+                    self._key_stack.pop()
+                self._pending_key = None
+            elif char == ':':
+                self._pending_key = json.loads(self._last_string) if self._last_string else None
+            elif char == ',':
+                self._pending_key = None
+
+            if in_element:
+                self._element.append(char)
+                if char == '}' and self._depth == self._base_depth:
+                    emitted.append(json.loads(''.join(self._element)))
+                    self._element = None
+            pos += 1
+
+        self._text = text[pos:]
+        return emitted
+
+
+def iter_stream_chunks(byte_chunks: Iterable[bytes], parser: StreamedResponseParser) -> Iterator[Dict[str, Any]]:
+    """
+    Parse a streamed response body incrementally.
+
+    Args:
+        byte_chunks: Raw body pieces (e.g. response.iter_content(chunk_size=...))
+        parser: Parser whose blobs receive the decoded inline data
+
+    Returns:
+        Iterator over response chunks as they complete
+    """
+    for data in byte_chunks:
+        if data:
+            yield from parser.feed(data)
+    yield from parser.close()
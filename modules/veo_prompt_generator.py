@@ -3,7 +3,7 @@ VEO (Google's video generation model) prompt generator.
 Creates structured prompts with scene, characters, and descriptions for video generation.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 from .scene_extractor import SceneExtractor
 
 
@@ -203,33 +203,41 @@ class VEOPromptGenerator:
             'location': scene_data.get('location')
         }
     
-    def generate_multiple_prompts(self, cliffhangers: List[Dict], 
-                                  characters_per_cliffhanger: int = 1) -> List[Dict]:
+    def iter_prompts(self, cliffhangers: Iterable[Dict],
+                     characters_per_cliffhanger: int = 1) -> Iterator[Dict]:
         """
-        Generate multiple VEO prompts from a list of cliffhangers.
-        Can generate prompts from different character perspectives.
+        Lazily generate VEO prompts from cliffhangers, one prompt at a time.
+        Stop iterating early to avoid building prompts that won't be used.
         
         Args:
-            cliffhangers: List of cliffhanger dictionaries
+            cliffhangers: Iterable of cliffhanger dictionaries
             characters_per_cliffhanger: Number of character perspectives per cliffhanger
             
-        Returns:
-            List of prompt dictionaries
+        Yields:
+            Prompt dictionaries
         """
-        all_prompts = []
-        
         for cliffhanger in cliffhangers:
-            scene_data = self.scene_extractor.create_non_spoiler_scene(cliffhanger)
-            characters = scene_data.get('characters', [])
+            characters = self.scene_extractor.extract_visual_elements(cliffhanger)['characters']
             
             if characters and characters_per_cliffhanger > 0:
                 # Generate from different character perspectives
                 for char in characters[:characters_per_cliffhanger]:
-                    prompt = self.generate_veo_prompt(cliffhanger, perspective_character=char)
-                    all_prompts.append(prompt)
+                    yield self.generate_veo_prompt(cliffhanger, perspective_character=char)
             else:
                 # Generate generic prompt
-                prompt = self.generate_veo_prompt(cliffhanger)
-                all_prompts.append(prompt)
+                yield self.generate_veo_prompt(cliffhanger)
+    
+    def generate_multiple_prompts(self, cliffhangers: List[Dict], 
+                                  characters_per_cliffhanger: int = 1) -> List[Dict]:
+        """
+        Generate multiple VEO prompts from a list of cliffhangers.
+        Can generate prompts from different character perspectives.
         
-        return all_prompts
+        Args:
+            cliffhangers: List of cliffhanger dictionaries
+            characters_per_cliffhanger: Number of character perspectives per cliffhanger
+            
+        Returns:
+            List of prompt dictionaries
+        """
+        return list(self.iter_prompts(cliffhangers, characters_per_cliffhanger))
@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, url_for, current_app
 from extensions import db
-from models import Pocketshow, Post, Comment, User, Vote
+from models import Pocketshow, Post, Comment, User, Vote, ImageJob
+from services.conditional_requests import conditional
+from services.feed_cache import feed_cached
+from services.idempotency import idempotent
+from services.read_replicas import read_replica
 
 api_bp = Blueprint('api', __name__)
 
@@ -19,8 +23,12 @@ def register():
     display_name = data['display_name'].strip()
     password = data.get('password', '').strip()
     is_official = data.get('is_official', False)
-    character_data = data.get('character_data', {})
-    watched_shows = data.get('watched_shows', {})
+    character_data = data.get('character_data') or {}
+    watched_shows = data.get('watched_shows') or {}
+    if not isinstance(character_data, dict):
+        return jsonify({'error': 'character_data must be an object'}), 400
+    if not isinstance(watched_shows, dict):
+        return jsonify({'error': 'watched_shows must be an object'}), 400
     
     # Support for setting initial watched episodes during registration
     # Can be passed as: { "show_name": episode_number } or via initial_episodes parameter
@@ -161,7 +169,9 @@ def create_user():
     display_name = data['display_name'].strip()
     password = data.get('password', '').strip()
     is_official = data.get('is_official', False)
-    character_data = data.get('character_data', {})
+    character_data = data.get('character_data') or {}
+    if not isinstance(character_data, dict):
+        return jsonify({'error': 'character_data must be an object'}), 400
     
     # Check if username already exists
     if User.query.filter_by(username=username).first():
@@ -197,16 +207,14 @@ def get_available_characters():
         canon_loader = PromoCanonLoader(canon_directory)
         characters = canon_loader.load_characters()
         
-        # Get all existing official users
-        existing_users = User.query.filter_by(is_official=True).all()
+        # Character and display names of existing official users (no full character_data load)
         existing_character_names = set()
-        for user in existing_users:
-            char_data = user.get_character_data()
-            char_name = char_data.get('character_name') if char_data else None
+        for char_name, display_name in (db.session.query(User.character_name_expr(), User.display_name)
+                                        .filter(User.is_official.is_(True))):
             if char_name:
                 existing_character_names.add(char_name)
             # Also check display_name
-            existing_character_names.add(user.display_name)
+            existing_character_names.add(display_name)
         
         # Filter out characters that already exist
         available_characters = []
@@ -255,14 +263,13 @@ def create_character_from_promocanon():
         if character_name not in characters:
             return jsonify({'error': f'Character "{character_name}" not found in PromoCanon'}), 404
         
-        # Check if character already exists
-        existing_users = User.query.filter_by(is_official=True).all()
-        for user in existing_users:
-            char_data = user.get_character_data()
-            if char_data and char_data.get('character_name') == character_name:
-                return jsonify({'error': f'Character "{character_name}" already exists as a user'}), 400
-            if user.display_name == character_name:
-                return jsonify({'error': f'Character "{character_name}" already exists as a user'}), 400
+        # Check if character already exists (ix_users_character_name covers the character name lookup)
+        existing = (db.session.query(User.id)
+                    .filter(User.is_official.is_(True),
+                            db.or_(User.character_name_expr() == character_name, User.display_name == character_name))
+                    .first())
+        if existing:
+            return jsonify({'error': f'Character "{character_name}" already exists as a user'}), 400
         
         # Get character data from PromoCanon
         canon_char = characters[character_name]
@@ -313,6 +320,8 @@ def create_character_from_promocanon():
 
 
 @api_bp.route('/users', methods=['GET'])
+@read_replica
+@conditional(User)
 def list_users():
     """API endpoint to list all users"""
     is_official = request.args.get('is_official', type=bool)
@@ -321,11 +330,13 @@ def list_users():
     if is_official is not None:
         query = query.filter_by(is_official=is_official)
     
-    users = query.order_by(User.created_at.desc()).all()
-    return jsonify([u.to_dict() for u in users]), 200
+    from services.dtos import user_rows
+    return jsonify(user_rows(query.order_by(User.created_at.desc()))), 200
 
 
 @api_bp.route('/users/<int:user_id>', methods=['GET'])
+@read_replica
+@conditional(lambda user_id: [(User, User.id == user_id)])
 def get_user(user_id):
     """API endpoint to get a user"""
     user = User.query.get_or_404(user_id)
@@ -338,6 +349,9 @@ def update_user(user_id):
     user = User.query.get_or_404(user_id)
     data = request.get_json()
     
+    if data.get('character_data') and not isinstance(data['character_data'], dict):
+        return jsonify({'error': 'character_data must be an object'}), 400
+    
     if data.get('display_name'):
         user.display_name = data['display_name'].strip()
     
@@ -352,6 +366,7 @@ def update_user(user_id):
 
 
 @api_bp.route('/pocketshows', methods=['POST'])
+@idempotent
 def create_pocketshow():
     """API endpoint to create a pocketshow"""
     data = request.get_json()
@@ -374,6 +389,8 @@ def create_pocketshow():
 
 
 @api_bp.route('/pocketshows', methods=['GET'])
+@read_replica
+@conditional(Pocketshow, Post)
 def list_pocketshows():
     """API endpoint to list all pocketshows"""
     pocketshows = Pocketshow.query.order_by(Pocketshow.created_at.desc()).all()
@@ -381,6 +398,7 @@ def list_pocketshows():
 
 
 @api_bp.route('/pocketshows/<int:pocketshow_id>/posts', methods=['POST'])
+@idempotent
 def create_post(pocketshow_id):
     """API endpoint to create a post in a pocketshow"""
     print(f"[API] POST /pocketshows/{pocketshow_id}/posts - Creating post...")
@@ -406,7 +424,9 @@ def create_post(pocketshow_id):
             author_id = int(author_id)
         except (ValueError, TypeError):
             return jsonify({'error': 'author_id must be an integer'}), 400
-    metadata = data.get('metadata', {})
+    metadata = data.get('metadata') or {}
+    if not isinstance(metadata, dict):
+        return jsonify({'error': 'metadata must be an object'}), 400
     
     # Episode-based tagging
     show_name = data.get('show_name', '').strip() or None
@@ -441,6 +461,9 @@ def create_post(pocketshow_id):
         post.set_metadata(metadata)
     
     db.session.add(post)
+    # Posts hold a reference on their blob-store image so it is never garbage collected
+    from services.blob_store import get_blob_store
+    get_blob_store().add_ref_for_url(image_url)
     db.session.commit()
     
     # Trigger automatic comment generation from official characters
@@ -460,7 +483,30 @@ def create_post(pocketshow_id):
     return jsonify(post.to_dict()), 201
 
 
+def _posts_response(query):
+    """
+    Post list response for a Post query, built from row DTOs (one SQL statement). With ?compact=1
+    authors are referenced by author_id and sent once in a side-loaded users map:
+    {"posts": [...], "users": {"<id>": user}}.
+    """
+    from services.dtos import post_rows, user_rows
+    
+    if request.args.get('compact', '').lower() not in ('1', 'true', 'yes'):
+        return jsonify(post_rows(query)), 200
+    
+    posts = post_rows(query, include_author=False)
+    author_ids = {p.author_id for p in posts if p.author_id is not None}
+    users = user_rows(User.query.filter(User.id.in_(author_ids))) if author_ids else []
+    return jsonify({
+        'posts': posts,
+        'users': {str(u.id): u for u in users}
+    }), 200
+
+
 @api_bp.route('/posts', methods=['GET'])
+@read_replica
+@conditional(Post, Comment, Vote, User)
+@feed_cached
 def list_all_posts():
     """API endpoint to list all posts, filtered by user's watched episodes"""
     query = Post.query
@@ -500,11 +546,13 @@ def list_all_posts():
                 if conditions:
                     query = query.filter(or_(*conditions))
     
-    posts = query.order_by(Post.created_at.desc()).all()
-    return jsonify([p.to_dict() for p in posts]), 200
+    return _posts_response(query.order_by(Post.created_at.desc()))
 
 
 @api_bp.route('/pocketshows/<int:pocketshow_id>/posts', methods=['GET'])
+@read_replica
+@conditional(lambda pocketshow_id: [(Post, Post.pocketshow_id == pocketshow_id), Comment, Vote, User])
+@feed_cached
 def list_posts(pocketshow_id):
     """API endpoint to list posts in a pocketshow, filtered by user's watched episodes"""
     Pocketshow.query.get_or_404(pocketshow_id)
@@ -545,11 +593,13 @@ def list_posts(pocketshow_id):
                 if conditions:
                     query = query.filter(or_(*conditions))
     
-    posts = query.order_by(Post.created_at.desc()).all()
-    return jsonify([p.to_dict() for p in posts]), 200
+    return _posts_response(query.order_by(Post.created_at.desc()))
 
 
 @api_bp.route('/posts/<int:post_id>', methods=['GET'])
+@read_replica
+@conditional(lambda post_id: [(Post, Post.id == post_id), (Comment, Comment.post_id == post_id),
+                              (Vote, Vote.post_id == post_id), User])
 def get_post(post_id):
     """API endpoint to get a post"""
     post = Post.query.get_or_404(post_id)
@@ -557,6 +607,7 @@ def get_post(post_id):
 
 
 @api_bp.route('/posts/<int:post_id>/comments', methods=['POST'])
+@idempotent
 def create_comment(post_id):
     """API endpoint to create a comment on a post"""
     post = Post.query.get_or_404(post_id)
@@ -621,6 +672,8 @@ def create_comment(post_id):
 
 
 @api_bp.route('/posts/<int:post_id>/comments', methods=['GET'])
+@read_replica
+@conditional(lambda post_id: [(Comment, Comment.post_id == post_id), Vote, User])
 def list_comments(post_id):
     """API endpoint to list comments on a post"""
     Post.query.get_or_404(post_id)
@@ -631,6 +684,7 @@ def list_comments(post_id):
 # ==================== VOTING ENDPOINTS ====================
 
 @api_bp.route('/posts/<int:post_id>/vote', methods=['POST'])
+@idempotent
 def vote_post(post_id):
     """API endpoint to vote on a post"""
     post = Post.query.get_or_404(post_id)
@@ -670,6 +724,7 @@ def vote_post(post_id):
 
 
 @api_bp.route('/comments/<int:comment_id>/vote', methods=['POST'])
+@idempotent
 def vote_comment(comment_id):
     """API endpoint to vote on a comment"""
     comment = Comment.query.get_or_404(comment_id)
@@ -709,6 +764,8 @@ def vote_comment(comment_id):
 
 
 @api_bp.route('/posts/<int:post_id>/votes', methods=['GET'])
+@read_replica
+@conditional(lambda post_id: [(Vote, Vote.post_id == post_id)])
 def get_post_votes(post_id):
     """API endpoint to get votes for a post"""
     post = Post.query.get_or_404(post_id)
@@ -721,6 +778,8 @@ def get_post_votes(post_id):
 
 
 @api_bp.route('/comments/<int:comment_id>/votes', methods=['GET'])
+@read_replica
+@conditional(lambda comment_id: [(Vote, Vote.comment_id == comment_id)])
 def get_comment_votes(comment_id):
     """API endpoint to get votes for a comment"""
     comment = Comment.query.get_or_404(comment_id)
@@ -731,3 +790,213 @@ def get_comment_votes(comment_id):
         'votes': [v.to_dict() for v in votes]
     }), 200
 
+
+
+# ==================== IMAGE JOB ENDPOINTS ====================
+
+IMAGE_JOB_POLL_SECONDS = 2  # Retry-After sent while a job is queued or running
+
+
+@api_bp.route('/images/jobs', methods=['POST'])
+@idempotent
+def create_image_job():
+    """API endpoint to submit an image generation job for the logged-in official user (returns a job id)"""
+    from services.image_jobs import build_story_context, get_image_job_queue
+    
+    # Same access as the dashboard's image generation: jobs always run as the session user
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    user = User.query.get(session['user_id'])
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    if not user.is_official:
+        return jsonify({'error': 'Image generation is only available to official users'}), 403
+    
+    data = request.get_json() or {}
+    prompt = (data.get('custom_prompt') or data.get('prompt') or '').strip()
+    if not prompt:
+        return jsonify({'error': 'Prompt is required'}), 400
+    
+    story_context = data.get('story_context')
+    if not isinstance(story_context, dict):
+        story_context = build_story_context(
+            user,
+            plot_points=data.get('plot_points', '').strip(),
+            subplots=data.get('subplots', '').strip(),
+            cliffhangers=data.get('cliffhangers', '').strip()
+        )
+    
+    if data.get('webhook_url'):
+        return jsonify({'error': 'webhook_url is not supported; poll status_url'}), 400
+    
+    provider = data.get('provider') or current_app.config.get('DEFAULT_IMAGE_PROVIDER', 'nanobanana')
+    if provider not in current_app.config.get('IMAGE_PROVIDERS', [provider]):
+        return jsonify({'error': f'Unknown provider: {provider}'}), 400
+    
+    seed = data.get('seed')
+    if seed is not None:
+        try:
+            seed = int(seed)
+        except (ValueError, TypeError):
+            return jsonify({'error': 'seed must be an integer'}), 400
+    
+    job = get_image_job_queue().create_job(
+        prompt=prompt,
+        story_context=story_context,
+        user_id=user.id,
+        provider=provider,
+        seed=seed,
+        regenerate=bool(data.get('regenerate', False))
+    )
+    print(f"[API] Image job {job.id} queued")
+    
+    response = job.to_dict()
+    response['status_url'] = url_for('api.get_image_job', job_id=job.id)
+    return jsonify(response), 202, {'Location': response['status_url'], 'Retry-After': str(IMAGE_JOB_POLL_SECONDS)}
+
+
+def _remember_pending_image(job):
+    """Hand a finished job's image to the dashboard accept/reject flow of its owner"""
+    if job.status == ImageJob.STATUS_COMPLETED and job.result_filename \
+            and job.user_id and session.get('user_id') == job.user_id:
+        session['pending_image_filename'] = job.result_filename
+        session['pending_image_type'] = 'generated'
+        session['pending_image_prompt'] = job.prompt
+
+
+def _owned_image_job(job_id):
+    """
+    Load an image job of the session user.
+
+    Returns:
+        (job, None) or (None, error response); other users' jobs are reported as missing
+    """
+    if 'user_id' not in session:
+        return None, (jsonify({'error': 'Not authenticated'}), 401)
+    job = db.session.get(ImageJob, job_id)
+    if job is None or job.user_id != session['user_id']:
+        return None, (jsonify({'error': 'Job not found'}), 404)
+    return job, None
+
+
+@api_bp.route('/images/jobs/<job_id>', methods=['GET'])
+def get_image_job(job_id):
+    """API endpoint to poll an image generation job (owner only)"""
+    job, error = _owned_image_job(job_id)
+    if error:
+        return error
+    _remember_pending_image(job)
+    if job.is_finished:
+        return jsonify(job.to_dict()), 200
+    # Polling is the supported way to wait: the worker thread renders the image, the web worker is free
+    return jsonify(job.to_dict()), 200, {'Retry-After': str(IMAGE_JOB_POLL_SECONDS)}
+
+
+# ==================== STORAGE ENDPOINTS ====================
+
+@api_bp.route('/storage/stats', methods=['GET'])
+def storage_stats():
+    """Upload directory usage and cleanup metrics (janitor and variant cache); official users only"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    user = User.query.get(session['user_id'])
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    if not user.is_official:
+        return jsonify({'error': 'Storage stats are only available to official users'}), 403
+    
+    janitor = current_app.extensions.get('janitor')
+    derivatives = current_app.extensions.get('image_derivatives')
+    return jsonify({
+        'janitor': janitor.stats() if janitor else None,
+        'derivatives': {
+            'total_bytes': derivatives.total_bytes,
+            'max_bytes': derivatives.max_bytes,
+            'hits': derivatives.hits,
+            'misses': derivatives.misses
+        } if derivatives else None
+    }), 200
+
+
+# ==================== BULK INGEST ENDPOINTS ====================
+
+def _bulk_request():
+    """Parse a bulk request body: {"items": [...], "atomic": false, ...}"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('items')
+    if not isinstance(items, list) or not items:
+        return None, data, (jsonify({'error': 'items must be a non-empty list'}), 400)
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 10000)
+    if len(items) > max_items:
+        return None, data, (jsonify({'error': f'At most {max_items} items per request'}), 413)
+    return items, data, None
+
+
+def _bulk_response(results, atomic):
+    """Commit (or roll back a rejected atomic batch) and summarize per-item results"""
+    succeeded = sum(1 for r in results if r['success'])
+    if atomic and succeeded < len(results):
+        db.session.rollback()
+        status = 400
+    else:
+        db.session.commit()
+        status = 200
+    return jsonify({
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results
+    }), status
+
+
+@api_bp.route('/bulk/posts', methods=['POST'])
+@idempotent
+def bulk_create_posts():
+    """Create many posts in one transaction; automatic comments are generated in one background task"""
+    from services.bulk_ingest import ingest_posts, enqueue_comment_generation
+    
+    items, data, error = _bulk_request()
+    if error:
+        return error
+    atomic = bool(data.get('atomic', False))
+    results, post_ids = ingest_posts(items, atomic=atomic)
+    response = _bulk_response(results, atomic)
+    
+    # Off by default: seeding / migrations don't want an LLM call per post
+    if post_ids and response[1] == 200 and data.get('generate_comments', False):
+        enqueue_comment_generation(current_app._get_current_object(), post_ids)
+    return response
+
+
+@api_bp.route('/bulk/comments', methods=['POST'])
+@idempotent
+def bulk_create_comments():
+    """Create many comments in one transaction; character replies are generated in one background task"""
+    from services.bulk_ingest import ingest_comments, group_comments_by_post, enqueue_comment_generation
+    
+    items, data, error = _bulk_request()
+    if error:
+        return error
+    atomic = bool(data.get('atomic', False))
+    results, comment_ids = ingest_comments(items, atomic=atomic)
+    response = _bulk_response(results, atomic)
+    
+    # Off by default, like /bulk/posts: one round of replies per post, to its newest comment
+    if comment_ids and response[1] == 200 and data.get('generate_comments', False):
+        by_post = group_comments_by_post(comment_ids)
+        enqueue_comment_generation(current_app._get_current_object(), list(by_post),
+                                   trigger_type='user_commented', comment_ids=by_post)
+    return response
+
+
+@api_bp.route('/bulk/votes', methods=['POST'])
+@idempotent
+def bulk_set_votes():
+    """Set many votes in one transaction (idempotent: a vote is set, not toggled)"""
+    from services.bulk_ingest import ingest_votes
+    
+    items, data, error = _bulk_request()
+    if error:
+        return error
+    atomic = bool(data.get('atomic', False))
+    results = ingest_votes(items, atomic=atomic)
+    return _bulk_response(results, atomic)
@@ -1,11 +1,10 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session, current_app, send_from_directory
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session, current_app
 from extensions import db
 from models import Pocketshow, Post, Comment, User, Vote
+from services.read_replicas import read_replica
 from functools import wraps
 import os
-from werkzeug.utils import secure_filename
 import base64
-from datetime import datetime
 
 main_bp = Blueprint('main', __name__)
 
@@ -37,6 +36,7 @@ def official_user_required(f):
 
 
 @main_bp.route('/')
+@read_replica
 def index():
     """Home page - list all pocketshows"""
     pocketshows = Pocketshow.query.order_by(Pocketshow.created_at.desc()).all()
@@ -44,6 +44,7 @@ def index():
 
 
 @main_bp.route('/pocketshow/<int:pocketshow_id>')
+@read_replica
 def view_pocketshow(pocketshow_id):
     """View a pocketshow and its posts"""
     pocketshow = Pocketshow.query.get_or_404(pocketshow_id)
@@ -56,6 +57,7 @@ def view_pocketshow(pocketshow_id):
 
 
 @main_bp.route('/post/<int:post_id>')
+@read_replica
 def view_post(post_id):
     """View a post and its comments"""
     post = Post.query.get_or_404(post_id)
@@ -374,18 +376,7 @@ def create_post_dashboard():
     video_url = request.form.get('video_url', '').strip() or None
     
     # Clear any pending image session data
-    # Also clean up any temporary image files
-    temp_filename = session.get('pending_image_filename')
-    if temp_filename:
-        try:
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            temp_filepath = os.path.join(upload_folder, temp_filename)
-            if os.path.exists(temp_filepath):
-                print(f"[POST CREATE] Cleaning up temp file: {temp_filename}")
-                os.remove(temp_filepath)
-        except Exception as e:
-            print(f"[POST CREATE] Warning: Could not delete temp file: {str(e)}")
-    
+    # (unused generated images are unreferenced blobs and get garbage collected)
     session.pop('pending_image', None)
     session.pop('pending_image_filename', None)
     session.pop('pending_image_url', None)
@@ -411,6 +402,9 @@ def create_post_dashboard():
         )
         
         db.session.add(post)
+        # Posts hold a reference on their blob-store image so it is never garbage collected
+        from services.blob_store import get_blob_store
+        get_blob_store().add_ref_for_url(image_url)
         db.session.commit()
         
         # Trigger automatic comment generation from official characters
@@ -503,10 +497,10 @@ def allowed_file(filename):
 @main_bp.route('/dashboard/generate_image', methods=['POST'])
 @official_user_required
 def generate_image():
-    """Generate an image using AI based on prompt and story context"""
-    print(f"[IMAGE GEN] Starting image generation...")
+    """Queue an AI image generation job based on prompt and story context"""
+    print(f"[IMAGE GEN] Queueing image generation...")
     
-    from services.image_generator import ImageGenerator
+    from services.image_jobs import build_story_context, get_image_job_queue
     
     user_id = session['user_id']
     user = User.query.get(user_id)
@@ -526,102 +520,37 @@ def generate_image():
     # Use custom prompt if provided, otherwise use the base prompt
     final_prompt = custom_prompt if custom_prompt else prompt
     
-    # Build story context from user's character data
-    story_context = {}
-    if user.is_official:
-        char_data = user.get_character_data()
-        if char_data:
-            story_context = {
-                'show_name': char_data.get('show_name'),
-                'character_details': {
-                    'name': char_data.get('character_name'),
-                    'bio': char_data.get('bio'),
-                    'personality': char_data.get('personality')
-                }
-            }
-    
-    # Get additional context from form
-    plot_points = request.form.get('plot_points', '').strip()
-    subplots = request.form.get('subplots', '').strip()
-    cliffhangers = request.form.get('cliffhangers', '').strip()
-    
-    if plot_points:
-        story_context['plot_points'] = [p.strip() for p in plot_points.split(',') if p.strip()]
-    if subplots:
-        story_context['subplots'] = [s.strip() for s in subplots.split(',') if s.strip()]
-    if cliffhangers:
-        story_context['cliffhangers'] = [c.strip() for c in cliffhangers.split(',') if c.strip()]
-    
-    # Generate image
+    # Build story context from user's character data and the form
+    story_context = build_story_context(
+        user,
+        plot_points=request.form.get('plot_points', '').strip(),
+        subplots=request.form.get('subplots', '').strip(),
+        cliffhangers=request.form.get('cliffhangers', '').strip()
+    )
+    
     # Get provider from config or use default (nanobanana)
     provider = current_app.config.get('DEFAULT_IMAGE_PROVIDER', 'nanobanana')
     print(f"[IMAGE GEN] Using provider: {provider}")
     
-    # Hardcode PromoCanon directory
-    import os
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    canon_directory = os.path.join(project_root, 'PromoCanon_Show_33adb096b04ecd6b23ce9341160b199f2d489311_1_100')
-    print(f"[IMAGE GEN] Using PromoCanon directory: {canon_directory}")
-    
-    generator = ImageGenerator(provider=provider, canon_directory=canon_directory)
-    result = generator.generate_image(final_prompt, story_context)
-    
-    if result['success']:
-        # Save image to disk immediately to avoid storing large data in session
-        image_base64 = result.get('image_base64')
-        if image_base64:
-            try:
-                print(f"[IMAGE GEN] Saving generated image to disk...")
-                # Decode base64 image
-                image_data = base64.b64decode(image_base64)
-                image_size = len(image_data)
-                print(f"[IMAGE GEN] Decoded image size: {image_size} bytes")
-                
-                # Create temporary filename with user ID and timestamp
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-                temp_filename = f"temp_gen_{user_id}_{timestamp}.png"
-                
-                upload_folder = current_app.config['UPLOAD_FOLDER']
-                filepath = os.path.join(upload_folder, temp_filename)
-                
-                # Save to disk
-                with open(filepath, 'wb') as f:
-                    f.write(image_data)
-                
-                print(f"[IMAGE GEN] ✅ Image saved to: {temp_filename}")
-                
-                # Store only the filename in session (not the base64 data)
-                session['pending_image_filename'] = temp_filename
-                session['pending_image_type'] = 'generated'
-                session['pending_image_prompt'] = final_prompt
-                
-                # Return image URL for preview (serve from disk)
-                image_url = url_for('main.uploaded_file', filename=temp_filename)
-                
-                return jsonify({
-                    'success': True,
-                    'image_url': image_url,  # Return URL instead of base64
-                    'prompt': final_prompt
-                })
-            except Exception as e:
-                print(f"[IMAGE GEN] ❌ Error saving image to disk: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                return jsonify({
-                    'success': False,
-                    'error': f'Error saving image: {str(e)}'
-                }), 500
-        else:
-            print(f"[IMAGE GEN] ❌ No image_base64 in result")
-            return jsonify({
-                'success': False,
-                'error': 'No image data received from generator'
-            }), 400
-    else:
-        return jsonify({
-            'success': False,
-            'error': result.get('error', 'Failed to generate image')
-        }), 400
+    # The image renders on the job worker pool; the dashboard polls the job and the
+    # poll that sees it finish stores the image in the session for accept/reject
+    job = get_image_job_queue().create_job(
+        prompt=final_prompt,
+        story_context=story_context,
+        user_id=user_id,
+        provider=provider,
+        seed=request.form.get('seed', type=int),
+        regenerate=request.form.get('regenerate') == 'true'
+    )
+    print(f"[IMAGE GEN] ✅ Job queued: {job.id}")
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('api.get_image_job', job_id=job.id),
+        'prompt': final_prompt
+    }), 202
 
 
 @main_bp.route('/dashboard/upload_image', methods=['POST'])
@@ -637,14 +566,22 @@ def upload_image():
         return jsonify({'success': False, 'error': 'No file selected'}), 400
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        # Add timestamp to avoid conflicts
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"{timestamp}_{filename}"
+        from services.blob_store import get_blob_store, verify_image
+        
+        # Reject anything Pillow can't read before it reaches the store; the extension
+        # comes from the detected format rather than the client's filename
+        extension = verify_image(file.stream)
+        if extension is None:
+            return jsonify({'success': False, 'error': 'File is not a valid image'}), 400
         
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
+        # Stored by content hash: re-uploading the same image reuses the existing file
+        blob_store = get_blob_store()
+        blob = blob_store.put_stream(file.stream, extension)
+        filename = blob.filename
+        
+        # Render the feed sizes now so the first viewer doesn't wait for them
+        from services.image_derivatives import get_image_derivatives
+        get_image_derivatives().precompute(blob_store.source_for(blob.sha256, blob.extension), blob.sha256)
         
         # Store in session for verification
         image_url = url_for('main.uploaded_file', filename=filename)
@@ -666,16 +603,8 @@ def reject_image():
     """Clean up rejected image file"""
     print(f"[IMAGE REJECT] Cleaning up rejected image...")
     
-    temp_filename = session.get('pending_image_filename')
-    if temp_filename:
-        try:
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            temp_filepath = os.path.join(upload_folder, temp_filename)
-            if os.path.exists(temp_filepath):
-                print(f"[IMAGE REJECT] Deleting temp file: {temp_filename}")
-                os.remove(temp_filepath)
-        except Exception as e:
-            print(f"[IMAGE REJECT] Warning: Could not delete temp file: {str(e)}")
+    # Generated images live in the shared blob store (another job may have produced the
+    # same bytes), so nothing is deleted here; unreferenced blobs are garbage collected
     
     # Clear session
     session.pop('pending_image', None)
@@ -688,35 +617,75 @@ def reject_image():
 
 @main_bp.route('/uploads/<filename>')
 def uploaded_file(filename):
-    """Serve uploaded files"""
-    print(f"[UPLOAD SERVE] Request for file: {filename}")
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    filepath = os.path.join(upload_folder, filename)
-    
-    print(f"[UPLOAD SERVE] Full path: {filepath}")
-    print(f"[UPLOAD SERVE] File exists: {os.path.exists(filepath)}")
-    
-    if not os.path.exists(filepath):
-        print(f"[UPLOAD SERVE] ❌ File not found: {filepath}")
-        from flask import abort
-        abort(404)
-    
-    print(f"[UPLOAD SERVE] ✅ Serving file: {filename}")
-    # Use send_from_directory with proper MIME type
-    return send_from_directory(
-        upload_folder, 
-        filename,
-        mimetype='image/png' if filename.lower().endswith('.png') else 
-                 'image/jpeg' if filename.lower().endswith(('.jpg', '.jpeg')) else
-                 'image/gif' if filename.lower().endswith('.gif') else
-                 'image/webp' if filename.lower().endswith('.webp') else None
-    )
+    """Serve uploaded files (content-addressed blobs are cached by clients forever)"""
+    from flask import abort
+    from werkzeug.security import safe_join
+    from services.blob_store import get_blob_store, parse_blob_name
+    from services.media_serving import send_media, send_media_stream, not_modified
+    
+    blob = parse_blob_name(filename)
+    if blob is None:
+        # Legacy timestamped uploads: may be replaced, so only short-lived caching
+        filepath = safe_join(current_app.config['UPLOAD_FOLDER'], filename)
+        if filepath is None:
+            abort(404)
+        return send_media(filepath)
+    
+    # Resized / re-encoded variant, e.g. /uploads/<sha256>.png?w=320&fmt=webp
+    if request.args.get('w') or request.args.get('fmt'):
+        return _serve_image_variant(blob['sha256'], blob['extension'])
+    
+    # The hash is the ETag, so a revalidation never needs to look at the disk
+    etag = blob['sha256']
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    blob_store = get_blob_store()
+    filepath = blob_store.path_for(blob['sha256'], blob['extension'])
+    if filepath is None:
+        # Remote media store: stream the object through
+        return send_media_stream(blob_store.open(blob['sha256'], blob['extension']), filename, etag=etag)
+    return send_media(filepath, etag=etag, immutable=True)
+
+
+def _serve_image_variant(sha256, extension):
+    """Serve a cached (or freshly rendered) variant of a blob store image"""
+    from flask import abort
+    from services.blob_store import get_blob_store
+    from services.image_derivatives import get_image_derivatives, negotiate_format, format_supported, snap_width, FORMAT_ALIASES
+    from services.media_serving import send_media, not_modified
+    
+    try:
+        width = snap_width(int(request.args.get('w', 0)) or 1920)
+    except ValueError:
+        abort(400)
+    fmt = (request.args.get('fmt') or extension).lower()
+    negotiated = fmt == 'auto'
+    if negotiated:
+        fmt = negotiate_format(request.headers.get('Accept'))
+    fmt = FORMAT_ALIASES.get(fmt, fmt)
+    if width <= 0 or not format_supported(fmt):
+        abort(400)
+    
+    etag = f"{sha256}-w{width}-{fmt}"
+    response = not_modified(etag)
+    if response is None:
+        try:
+            variant_path, mime_type = get_image_derivatives().get(
+                get_blob_store().source_for(sha256, extension), sha256, width, fmt
+            )
+        except FileNotFoundError:
+            abort(404)
+        response = send_media(variant_path, mimetype=mime_type, etag=etag, immutable=True)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
 
 
 @main_bp.route('/dashboard/save_image', methods=['POST'])
 @official_user_required
 def save_image():
-    """Save the verified image and return URL (image already saved, just rename if needed)"""
+    """Save the verified image and return URL (generated images are already in the blob store)"""
     print(f"[IMAGE SAVE] Starting image save...")
     
     image_type = session.get('pending_image_type', 'generated')
@@ -724,49 +693,32 @@ def save_image():
     
     if image_type == 'generated':
         print(f"[IMAGE SAVE] Processing generated image...")
-        temp_filename = session.get('pending_image_filename')
-        if not temp_filename:
+        blob_filename = session.get('pending_image_filename')
+        if not blob_filename:
             print(f"[IMAGE SAVE] ❌ No pending_image_filename in session")
             return jsonify({'success': False, 'error': 'No image to save'}), 400
         
-        try:
-            upload_folder = current_app.config['UPLOAD_FOLDER']
-            temp_filepath = os.path.join(upload_folder, temp_filename)
-            
-            # Check if temp file exists
-            if not os.path.exists(temp_filepath):
-                print(f"[IMAGE SAVE] ❌ Temp file not found: {temp_filename}")
-                return jsonify({'success': False, 'error': 'Temporary image file not found'}), 400
-            
-            # Rename from temp to permanent filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            permanent_filename = f"generated_{timestamp}.png"
-            permanent_filepath = os.path.join(upload_folder, permanent_filename)
-            
-            print(f"[IMAGE SAVE] Renaming from {temp_filename} to {permanent_filename}")
-            os.rename(temp_filepath, permanent_filepath)
-            
-            file_size = os.path.getsize(permanent_filepath)
-            print(f"[IMAGE SAVE] ✅ File saved - Size: {file_size} bytes")
-            
-            image_url = url_for('main.uploaded_file', filename=permanent_filename)
-            
-            # Clear session
-            session.pop('pending_image_filename', None)
-            session.pop('pending_image_type', None)
-            session.pop('pending_image_prompt', None)
-            
-            print(f"[IMAGE SAVE] ✅ Image URL: {image_url}")
-            
-            return jsonify({
-                'success': True,
-                'image_url': image_url
-            })
-        except Exception as e:
-            print(f"[IMAGE SAVE] ❌ Error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            return jsonify({'success': False, 'error': str(e)}), 400
+        from services.blob_store import parse_blob_name
+        from models import MediaBlob
+        blob = parse_blob_name(blob_filename)
+        if not blob or db.session.get(MediaBlob, blob['sha256']) is None:
+            print(f"[IMAGE SAVE] ❌ Image not found: {blob_filename}")
+            return jsonify({'success': False, 'error': 'Generated image file not found'}), 400
+        
+        # Content-addressed names are already permanent and collision-free: nothing to rename
+        image_url = url_for('main.uploaded_file', filename=blob_filename)
+        
+        # Clear session
+        session.pop('pending_image_filename', None)
+        session.pop('pending_image_type', None)
+        session.pop('pending_image_prompt', None)
+        
+        print(f"[IMAGE SAVE] ✅ Image URL: {image_url}")
+        
+        return jsonify({
+            'success': True,
+            'image_url': image_url
+        })
     
     elif image_type == 'uploaded':
         print(f"[IMAGE SAVE] Processing uploaded image...")
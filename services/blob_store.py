@@ -0,0 +1,423 @@
+"""
+Content-addressed blob store for generated and uploaded images.
+Files are named by the sha256 of their bytes and fanned out into two key levels
+(ab/cd/<sha256>.png) in a MediaStore (the local blobs/ directory or a GCS bucket),
+so identical images are stored once, names can never collide under concurrency,
+and a URL always refers to the same bytes.
+Each blob has a MediaBlob row with a reference count, and PromptResult rows map a
+prompt + generation params hash to the blob it produced so a seeded regeneration
+can be answered from the store instead of calling the model again.
+
+Posts take a reference on their image when they are created (add_ref_for_url); a
+flush hook releases it when a post is deleted and moves it when a post's image_url
+changes, so blobs no post uses drop back to zero and become evictable.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+from typing import Any, BinaryIO, Callable, Dict, Optional, Union
+
+from extensions import db
+from models import MediaBlob, PromptResult
+from services.media_store import MediaStore
+
+BLOB_NAME_PATTERN = re.compile(r'^([0-9a-f]{64})\.([a-z0-9]{1,10})$')
+COPY_CHUNK_SIZE = 1024 * 1024
+TOMBSTONE_SUFFIX = '.deleting'  # Objects being removed by delete_unreferenced
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp',
+}
+
+
+def compute_prompt_hash(prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Stable hash of a generation request (prompt + everything that changes the output).
+
+    Args:
+        prompt: Final prompt text
+        params: Provider, seed, story context, model... (must be JSON-serializable)
+
+    Returns:
+        Hex sha256 digest
+    """
+    payload = json.dumps({'prompt': prompt, 'params': params or {}}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def parse_blob_name(filename: str) -> Optional[Dict[str, str]]:
+    """Split '<sha256>.<ext>' into its parts, or None if it is not a blob name"""
+    match = BLOB_NAME_PATTERN.match(filename or '')
+    if not match:
+        return None
+    return {'sha256': match.group(1), 'extension': match.group(2)}
+
+
+# Pillow format name -> stored extension
+IMAGE_FORMAT_EXTENSIONS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+
+
+def verify_image(stream: BinaryIO) -> Optional[str]:
+    """
+    Check that an uploaded stream is an image Pillow can read, without decoding the pixels.
+    The stream is rewound afterwards.
+
+    Args:
+        stream: Seekable binary stream
+
+    Returns:
+        Extension matching the detected format, or None if the data is not a supported image
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(stream) as image:
+            image_format = image.format
+            image.verify()
+    except Exception:
+        return None
+    finally:
+        stream.seek(0)
+    return IMAGE_FORMAT_EXTENSIONS.get(image_format)
+
+
+class BlobStore:
+    """Stores files by content hash under a fan-out key layout in a MediaStore"""
+
+    def __init__(self, media: MediaStore, staging_dir: Optional[str] = None):
+        """
+        Args:
+            media: Backend holding the blob objects (local directory or GCS bucket)
+            staging_dir: Local directory for hashing streamed uploads before they are stored
+                (default: the local backend's root, so the final step is a rename)
+        """
+        self.media = media
+        self.staging_dir = staging_dir or media.local_path('') or tempfile.gettempdir()
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    @staticmethod
+    def key_for(sha256: str, extension: str) -> str:
+        """Object key of a blob (two fan-out levels: ab/cd/<sha256>.<ext>)"""
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}"
+
+    def path_for(self, sha256: str, extension: str) -> Optional[str]:
+        """Filesystem path of a blob, or None when the backend is not local"""
+        return self.media.local_path(self.key_for(sha256, extension))
+
+    def path_for_name(self, filename: str) -> Optional[str]:
+        """Filesystem path for a '<sha256>.<ext>' name, or None if the name is not a blob name"""
+        parts = parse_blob_name(filename)
+        return self.path_for(parts['sha256'], parts['extension']) if parts else None
+
+    def source_for(self, sha256: str, extension: str) -> Union[str, Callable[[], BinaryIO]]:
+        """Local path of a blob, or a function opening it for reading (remote backends)"""
+        key = self.key_for(sha256, extension)
+        return self.media.local_path(key) or (lambda: self.media.open(key))
+
+    def open(self, sha256: str, extension: str) -> BinaryIO:
+        return self.media.open(self.key_for(sha256, extension))
+
+    @staticmethod
+    def sha_from_url(url: Optional[str]) -> Optional[str]:
+        """Blob hash referenced by an /uploads/<sha256>.<ext> URL, if any"""
+        if not url:
+            return None
+        parts = parse_blob_name(url.rsplit('/', 1)[-1].split('?', 1)[0])
+        return parts['sha256'] if parts else None
+
+    def _register(self, sha256: str, extension: str, size_bytes: int) -> MediaBlob:
+        """
+        Touch the MediaBlob row, or insert it if it does not exist yet (blobs are immutable).
+        The touch is what keeps a concurrent delete_unreferenced from removing the row.
+        Two requests storing the same bytes at once both see no row; the one losing
+        the INSERT race rolls back and uses the row the other one committed.
+        """
+        from sqlalchemy.exc import IntegrityError
+
+        touched = MediaBlob.query.filter_by(sha256=sha256).update(
+            {'last_accessed_at': datetime.utcnow()}, synchronize_session=False
+        )
+        db.session.commit()
+        if touched:
+            blob = db.session.get(MediaBlob, sha256)
+            if blob is not None:
+                return blob
+
+        db.session.add(MediaBlob(
+            sha256=sha256,
+            extension=extension,
+            mime_type=MIME_TYPES.get(extension),
+            size_bytes=size_bytes,
+            ref_count=0
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            blob = db.session.get(MediaBlob, sha256)
+            if blob is None:
+                raise
+            return blob
+        return db.session.get(MediaBlob, sha256)
+
+    def put_bytes(self, data: bytes, extension: str = 'png') -> MediaBlob:
+        """
+        Store bytes, deduplicating by content.
+        The row is registered before the object is checked, so an object removed by a
+        concurrent delete_unreferenced is written again instead of being trusted to exist.
+
+        Args:
+            data: File contents
+            extension: File extension without the dot
+
+        Returns:
+            The MediaBlob (existing one if the same bytes were stored before)
+        """
+        extension = extension.lower().lstrip('.')
+        sha256 = hashlib.sha256(data).hexdigest()
+        key = self.key_for(sha256, extension)
+        blob = self._register(sha256, extension, len(data))
+        if not self.media.exists(key):
+            self.media.put_bytes(key, data, MIME_TYPES.get(extension))
+        return blob
+
+    def put_stream(self, stream: BinaryIO, extension: str = 'png') -> MediaBlob:
+        """
+        Store a file-like object without loading it into memory.
+        The stream is hashed while it is copied to a staging file, which is then moved
+        (local backend) or uploaded (remote backend) under its content key unless the
+        object is already there once the row is registered.
+
+        Args:
+            stream: Readable binary stream (e.g. a werkzeug FileStorage stream)
+            extension: File extension without the dot
+
+        Returns:
+            The MediaBlob
+        """
+        extension = extension.lower().lstrip('.')
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.staging_dir, prefix='.incoming_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            key = self.key_for(sha256, extension)
+            blob = self._register(sha256, extension, size)
+            if self.media.exists(key):
+                os.remove(temp_path)
+            else:
+                self.media.put_file(key, temp_path, MIME_TYPES.get(extension), move=True)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return blob
+
+    def exists(self, blob: MediaBlob) -> bool:
+        return self.media.exists(self.key_for(blob.sha256, blob.extension))
+
+    def add_ref(self, sha256: Optional[str], count: int = 1) -> bool:
+        """
+        Increment a blob's reference count (atomic UPDATE; caller commits).
+
+        Returns:
+            True if the blob exists
+        """
+        if not sha256:
+            return False
+        updated = MediaBlob.query.filter_by(sha256=sha256).update(
+            {'ref_count': MediaBlob.ref_count + count, 'last_accessed_at': datetime.utcnow()},
+            synchronize_session=False
+        )
+        return bool(updated)
+
+    def release(self, sha256: Optional[str], count: int = 1) -> bool:
+        """Decrement a blob's reference count, never below zero (caller commits)"""
+        if not sha256:
+            return False
+        updated = MediaBlob.query.filter(MediaBlob.sha256 == sha256, MediaBlob.ref_count >= count).update(
+            {'ref_count': MediaBlob.ref_count - count},
+            synchronize_session=False
+        )
+        return bool(updated)
+
+    def add_ref_for_url(self, url: Optional[str]) -> bool:
+        """Take a reference on the blob behind an image URL (no-op for external URLs)"""
+        return self.add_ref(self.sha_from_url(url))
+
+    def release_for_url(self, url: Optional[str]) -> bool:
+        """Drop a reference taken with add_ref_for_url (no-op for external URLs)"""
+        return self.release(self.sha_from_url(url))
+
+    def delete_unreferenced(self, sha256: str, older_than: Optional[datetime] = None) -> int:
+        """
+        Remove a blob whose reference count is zero, with its prompt index entries.
+        The object is moved aside to a tombstone key first, then the row is deleted on
+        condition that it is still unreferenced and untouched. A put_* of the same bytes
+        running meanwhile either touches the row (the DELETE matches nothing and the
+        object is moved back) or finds the row gone and writes the object again.
+
+        Args:
+            sha256: Blob to remove
+            older_than: Only remove the blob if it was last touched before this
+
+        Returns:
+            Bytes freed (0 if the blob was still referenced or recently used)
+        """
+        query = MediaBlob.query.filter(MediaBlob.sha256 == sha256, MediaBlob.ref_count == 0)
+        if older_than is not None:
+            query = query.filter(MediaBlob.last_accessed_at < older_than)
+        row = query.with_entities(MediaBlob.extension, MediaBlob.size_bytes, MediaBlob.last_accessed_at).first()
+        if row is None:
+            return 0
+        extension, size, last_accessed_at = row
+        key = self.key_for(sha256, extension)
+        tombstone = key + TOMBSTONE_SUFFIX
+        moved = self.media.rename(key, tombstone)
+
+        PromptResult.query.filter_by(blob_sha256=sha256).delete(synchronize_session=False)
+        deleted = MediaBlob.query.filter(
+            MediaBlob.sha256 == sha256,
+            MediaBlob.ref_count == 0,
+            MediaBlob.last_accessed_at == last_accessed_at
+        ).delete(synchronize_session=False)
+        if not deleted:
+            db.session.rollback()
+            if moved:
+                # A concurrent put_* may already have written the object again
+                if self.media.exists(key):
+                    self.media.delete(tombstone)
+                else:
+                    self.media.rename(tombstone, key)
+            return 0
+        db.session.commit()
+        if not moved:
+            return 0
+        self.media.delete(tombstone)
+        return size or 0
+
+    def lookup_prompt(self, prompt_hash: str) -> Optional[MediaBlob]:
+        """
+        Find the blob a previous identical generation produced.
+
+        Returns:
+            The MediaBlob if it is indexed and still on disk, otherwise None
+        """
+        result = PromptResult.query.filter_by(prompt_hash=prompt_hash).first()
+        if result is None or result.blob is None:
+            return None
+        if not self.exists(result.blob):
+            # The file was evicted; drop the stale index entry
+            db.session.delete(result)
+            db.session.commit()
+            return None
+        result.hit_count += 1
+        result.blob.last_accessed_at = datetime.utcnow()
+        db.session.commit()
+        return result.blob
+
+    def record_prompt(self, prompt_hash: str, blob: MediaBlob, provider: Optional[str] = None,
+                      seed: Optional[int] = None, params: Optional[Dict[str, Any]] = None):
+        """Index a generation result by its prompt hash (latest result wins)"""
+        from sqlalchemy.exc import IntegrityError
+
+        values = {'blob_sha256': blob.sha256, 'provider': provider, 'seed': seed,
+                  'params': json.dumps(params) if params else None}
+        for attempt in range(2):
+            result = PromptResult.query.filter_by(prompt_hash=prompt_hash).first()
+            if result is None:
+                result = PromptResult(prompt_hash=prompt_hash)
+                db.session.add(result)
+            for name, value in values.items():
+                setattr(result, name, value)
+            try:
+                db.session.commit()
+                return
+            except IntegrityError:
+                # An identical generation indexed the hash first: update its row instead
+                db.session.rollback()
+                if attempt:
+                    raise
+
+
+# ==================== REFERENCE TRACKING ====================
+
+def _sync_post_references(session, flush_context, instances):
+    """Release the images of deleted posts and move the reference when a post's image_url changes"""
+    from flask import current_app, has_app_context
+    from sqlalchemy import inspect
+    from models import Post
+
+    if not has_app_context():
+        return
+    store = current_app.extensions.get('blob_store')
+    if store is None:
+        return
+    for obj in list(session.deleted):
+        if isinstance(obj, Post):
+            # The committed value: the reference was taken when it was saved
+            history = inspect(obj).attrs.image_url.load_history()
+            for url in history.deleted or history.unchanged:
+                store.release_for_url(url)
+    for obj in list(session.dirty):
+        if not isinstance(obj, Post) or obj in session.deleted:
+            continue
+        history = inspect(obj).attrs.image_url.history
+        for url in history.deleted:
+            store.release_for_url(url)
+        for url in history.added:
+            store.add_ref_for_url(url)
+
+
+_hooks_installed = False
+
+
+def install_reference_hooks():
+    """Listen for flushes on the app's session class (idempotent)"""
+    global _hooks_installed
+    if _hooks_installed:
+        return
+    from sqlalchemy import event
+    from services.read_replicas import RoutingSession
+
+    event.listen(RoutingSession, 'before_flush', _sync_post_references)
+    _hooks_installed = True
+
+
+def init_blob_store(app) -> BlobStore:
+    """
+    Create the application's blob store and install the post reference hooks.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The BlobStore (also stored in app.extensions['blob_store'])
+    """
+    from services.media_store import create_media_store
+    store = BlobStore(create_media_store(app.config), staging_dir=app.config.get('MEDIA_STAGING_FOLDER'))
+    app.extensions['blob_store'] = store
+    install_reference_hooks()
+    return store
+
+
+def get_blob_store() -> BlobStore:
+    """Blob store of the current Flask app"""
+    from flask import current_app
+    return current_app.extensions['blob_store']
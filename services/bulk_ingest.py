@@ -0,0 +1,425 @@
+"""
+Bulk ingest of posts, comments and votes.
+Each batch is validated with one IN query per referenced table (users, pocketshows,
+posts, parent comments), written with executemany-style bulk INSERT/UPDATE
+statements in a single transaction, and answered with a per-item result list.
+Automatic comment generation is not run per item: the created post ids are
+handed to one background task that reuses a single CommentGenerator.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, update
+
+from extensions import db
+from models import Comment, Pocketshow, Post, User, Vote
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CANON_DIRECTORY = os.path.join(PROJECT_ROOT, 'PromoCanon_Show_33adb096b04ecd6b23ce9341160b199f2d489311_1_100')
+
+_comment_executor: Optional[ThreadPoolExecutor] = None
+_comment_executor_lock = threading.Lock()
+
+
+class BulkValidationError(ValueError):
+    """Raised for a malformed item; the message is returned in that item's result"""
+
+
+def _optional_int(item: Dict[str, Any], field: str, minimum: Optional[int] = None) -> Optional[int]:
+    value = item.get(field)
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise BulkValidationError(f'{field} must be an integer')
+    try:
+        value = int(value)
+    except (ValueError, TypeError):
+        raise BulkValidationError(f'{field} must be an integer')
+    if minimum is not None and value < minimum:
+        raise BulkValidationError(f'{field} must be >= {minimum}')
+    return value
+
+
+def _required_int(item: Dict[str, Any], field: str) -> int:
+    value = _optional_int(item, field)
+    if value is None:
+        raise BulkValidationError(f'{field} is required')
+    return value
+
+
+def _text(item: Dict[str, Any], field: str) -> Optional[str]:
+    value = item.get(field)
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        raise BulkValidationError(f'{field} must be a string')
+    return value.strip() or None
+
+
+def _existing_ids(model, ids: Set[int]) -> Set[int]:
+    """One IN query returning which of the ids exist"""
+    if not ids:
+        return set()
+    return {row[0] for row in db.session.query(model.id).filter(model.id.in_(ids))}
+
+
+def _insert_returning_ids(model, rows: List[Dict[str, Any]]) -> List[int]:
+    """executemany INSERT returning the new primary keys in input order"""
+    if not rows:
+        return []
+    result = db.session.execute(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        rows
+    )
+    return [row[0] for row in result]
+
+
+def _finish(results: List[Dict[str, Any]], rows: List[Dict[str, Any]], row_indexes: List[int],
+            model, atomic: bool) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """Insert the valid rows (unless an atomic batch has errors) and fill in the results"""
+    has_errors = any(not result['success'] for result in results)
+    if atomic and has_errors:
+        for result in results:
+            if result['success']:
+                result.update({'success': False, 'error': 'Batch rejected (atomic) because other items are invalid'})
+        return results, []
+
+    ids = _insert_returning_ids(model, rows)
+    for index, new_id in zip(row_indexes, ids):
+        results[index]['id'] = new_id
+    return results, ids
+
+
+def ingest_posts(items: List[Dict[str, Any]], atomic: bool = False) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Validate and insert posts. The caller commits.
+
+    Args:
+        items: Post dicts (pocketshow_id, title, and the optional fields of POST /pocketshows/<id>/posts)
+        atomic: Insert nothing if any item is invalid
+
+    Returns:
+        (per-item results, ids of the created posts)
+    """
+    parsed: List[Optional[Dict[str, Any]]] = []
+    results: List[Dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise BulkValidationError('Item must be an object')
+            title = _text(item, 'title')
+            if not title:
+                raise BulkValidationError('Title is required')
+            metadata = item.get('metadata')
+            if metadata is not None and not isinstance(metadata, dict):
+                raise BulkValidationError('metadata must be an object')
+            row = {
+                'title': title,
+                'content': _text(item, 'content') or '',
+                'description': _text(item, 'description') or '',
+                'pocketshow_id': _required_int(item, 'pocketshow_id'),
+                'author_id': _optional_int(item, 'author_id'),
+                'image_url': _text(item, 'image_url'),
+                'video_url': _text(item, 'video_url'),
+                'show_name': _text(item, 'show_name'),
+                'episode_tag': _optional_int(item, 'episode_tag', minimum=0),
+                'post_metadata': Post.encode_metadata(metadata),
+            }
+            parsed.append(row)
+            results.append({'index': index, 'success': True})
+        except BulkValidationError as e:
+            parsed.append(None)
+            results.append({'index': index, 'success': False, 'error': str(e)})
+
+    valid = [row for row in parsed if row is not None]
+    pocketshow_ids = _existing_ids(Pocketshow, {row['pocketshow_id'] for row in valid})
+    author_ids = _existing_ids(User, {row['author_id'] for row in valid if row['author_id']})
+
+    rows, row_indexes = [], []
+    now = datetime.utcnow()
+    for index, row in enumerate(parsed):
+        if row is None:
+            continue
+        if row['pocketshow_id'] not in pocketshow_ids:
+            results[index].update({'success': False, 'error': 'Invalid pocketshow_id'})
+        elif row['author_id'] and row['author_id'] not in author_ids:
+            results[index].update({'success': False, 'error': 'Invalid author_id'})
+        else:
+            row['created_at'] = now
+            rows.append(row)
+            row_indexes.append(index)
+
+    results, ids = _finish(results, rows, row_indexes, Post, atomic)
+
+    # Posts hold a reference on their blob-store images (one UPDATE per distinct image)
+    if ids:
+        from services.blob_store import get_blob_store
+        blob_store = get_blob_store()
+        ref_counts: Dict[str, int] = {}
+        for row in rows:
+            sha256 = blob_store.sha_from_url(row['image_url'])
+            if sha256:
+                ref_counts[sha256] = ref_counts.get(sha256, 0) + 1
+        for sha256, count in ref_counts.items():
+            blob_store.add_ref(sha256, count)
+    return results, ids
+
+
+def ingest_comments(items: List[Dict[str, Any]], atomic: bool = False) -> Tuple[List[Dict[str, Any]], List[int]]:
+    """
+    Validate and insert comments. The caller commits.
+    A parent_id must refer to an existing comment on the same post.
+
+    Args:
+        items: Comment dicts (post_id, content, optional author_id, author, parent_id)
+        atomic: Insert nothing if any item is invalid
+
+    Returns:
+        (per-item results, ids of the created comments)
+    """
+    parsed: List[Optional[Dict[str, Any]]] = []
+    results: List[Dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise BulkValidationError('Item must be an object')
+            content = _text(item, 'content')
+            if not content:
+                raise BulkValidationError('Content is required')
+            parsed.append({
+                'content': content,
+                'post_id': _required_int(item, 'post_id'),
+                'author_id': _optional_int(item, 'author_id'),
+                'author': _text(item, 'author'),
+                'parent_id': _optional_int(item, 'parent_id'),
+            })
+            results.append({'index': index, 'success': True})
+        except BulkValidationError as e:
+            parsed.append(None)
+            results.append({'index': index, 'success': False, 'error': str(e)})
+
+    valid = [row for row in parsed if row is not None]
+    post_ids = _existing_ids(Post, {row['post_id'] for row in valid})
+    author_ids = _existing_ids(User, {row['author_id'] for row in valid if row['author_id']})
+    parent_ids = {row['parent_id'] for row in valid if row['parent_id']}
+    parent_posts = dict(
+        db.session.query(Comment.id, Comment.post_id).filter(Comment.id.in_(parent_ids))
+    ) if parent_ids else {}
+
+    rows, row_indexes = [], []
+    now = datetime.utcnow()
+    for index, row in enumerate(parsed):
+        if row is None:
+            continue
+        if row['post_id'] not in post_ids:
+            results[index].update({'success': False, 'error': 'Invalid post_id'})
+        elif row['author_id'] and row['author_id'] not in author_ids:
+            results[index].update({'success': False, 'error': 'Invalid author_id'})
+        elif row['parent_id'] and parent_posts.get(row['parent_id']) != row['post_id']:
+            results[index].update({'success': False, 'error': 'Invalid parent comment'})
+        else:
+            row['created_at'] = now
+            rows.append(row)
+            row_indexes.append(index)
+
+    return _finish(results, rows, row_indexes, Comment, atomic)
+
+
+def ingest_votes(items: List[Dict[str, Any]], atomic: bool = False) -> List[Dict[str, Any]]:
+    """
+    Validate and upsert votes. The caller commits.
+    Unlike the single-vote endpoints (which toggle), a bulk vote sets the user's vote on the
+    target, so replaying a batch is idempotent. Later items win over earlier ones for the
+    same user and target.
+
+    Args:
+        items: Vote dicts (user_id, is_upvote and exactly one of post_id / comment_id)
+        atomic: Write nothing if any item is invalid
+
+    Returns:
+        Per-item results ('action' is 'created' or 'updated', as of when the batch read the
+        existing votes; a vote a concurrent request created meanwhile is overwritten)
+    """
+    parsed: List[Optional[Dict[str, Any]]] = []
+    results: List[Dict[str, Any]] = []
+    for index, item in enumerate(items):
+        try:
+            if not isinstance(item, dict):
+                raise BulkValidationError('Item must be an object')
+            if 'is_upvote' not in item:
+                raise BulkValidationError('is_upvote is required')
+            post_id = _optional_int(item, 'post_id')
+            comment_id = _optional_int(item, 'comment_id')
+            if (post_id is None) == (comment_id is None):
+                raise BulkValidationError('Exactly one of post_id or comment_id is required')
+            parsed.append({
+                'user_id': _required_int(item, 'user_id'),
+                'post_id': post_id,
+                'comment_id': comment_id,
+                'is_upvote': bool(item['is_upvote']),
+            })
+            results.append({'index': index, 'success': True})
+        except BulkValidationError as e:
+            parsed.append(None)
+            results.append({'index': index, 'success': False, 'error': str(e)})
+
+    valid = [row for row in parsed if row is not None]
+    user_ids = _existing_ids(User, {row['user_id'] for row in valid})
+    post_ids = _existing_ids(Post, {row['post_id'] for row in valid if row['post_id']})
+    comment_ids = _existing_ids(Comment, {row['comment_id'] for row in valid if row['comment_id']})
+
+    # Last write wins per (user, target) within the batch
+    latest: Dict[Tuple[int, Optional[int], Optional[int]], int] = {}
+    for index, row in enumerate(parsed):
+        if row is None:
+            continue
+        if row['user_id'] not in user_ids:
+            results[index].update({'success': False, 'error': 'Invalid user_id'})
+        elif row['post_id'] and row['post_id'] not in post_ids:
+            results[index].update({'success': False, 'error': 'Invalid post_id'})
+        elif row['comment_id'] and row['comment_id'] not in comment_ids:
+            results[index].update({'success': False, 'error': 'Invalid comment_id'})
+        else:
+            latest[(row['user_id'], row['post_id'], row['comment_id'])] = index
+
+    if atomic and any(not result['success'] for result in results):
+        for result in results:
+            if result['success']:
+                result.update({'success': False, 'error': 'Batch rejected (atomic) because other items are invalid'})
+        return results
+
+    # Existing votes for the touched users, in two IN queries (posts, comments)
+    existing: Dict[Tuple[int, Optional[int], Optional[int]], int] = {}
+    touched_users = {key[0] for key in latest}
+    voted_posts = {key[1] for key in latest if key[1]}
+    voted_comments = {key[2] for key in latest if key[2]}
+    if voted_posts:
+        for vote_id, user_id, post_id in db.session.query(Vote.id, Vote.user_id, Vote.post_id).filter(
+                Vote.user_id.in_(touched_users), Vote.post_id.in_(voted_posts)):
+            existing[(user_id, post_id, None)] = vote_id
+    if voted_comments:
+        for vote_id, user_id, comment_id in db.session.query(Vote.id, Vote.user_id, Vote.comment_id).filter(
+                Vote.user_id.in_(touched_users), Vote.comment_id.in_(voted_comments)):
+            existing[(user_id, None, comment_id)] = vote_id
+
+    inserts, updates = [], []
+    now = datetime.utcnow()
+    for key, index in latest.items():
+        row = parsed[index]
+        vote_id = existing.get(key)
+        if vote_id is None:
+            inserts.append(dict(row, created_at=now))
+            results[index]['action'] = 'created'
+        else:
+            updates.append({'id': vote_id, 'is_upvote': row['is_upvote']})
+            results[index].update({'action': 'updated', 'id': vote_id})
+    for index, result in enumerate(results):
+        if result['success'] and 'action' not in result:
+            result['action'] = 'superseded'  # A later item in the batch set this vote
+
+    if inserts:
+        _insert_votes(inserts)
+    if updates:
+        db.session.execute(update(Vote), updates)
+    return results
+
+
+def _insert_votes(rows: List[Dict[str, Any]]):
+    """
+    Insert new votes as an upsert: a single-vote request may insert the same
+    (user, target) pair after the existing votes were read, and the batch then
+    sets that vote instead of failing on the unique constraint.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        db.session.execute(insert(Vote), rows)
+        return
+
+    # One statement per unique constraint (user_id + post_id, user_id + comment_id)
+    for target in (Vote.post_id, Vote.comment_id):
+        group = [row for row in rows if row[target.key] is not None]
+        if not group:
+            continue
+        stmt = dialect_insert(Vote)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Vote.user_id, target],
+            set_={'is_upvote': stmt.excluded.is_upvote, 'updated_at': datetime.utcnow()}
+        )
+        db.session.execute(stmt, group)
+
+
+def group_comments_by_post(comment_ids: List[int]) -> Dict[int, List[int]]:
+    """
+    Group created comments by the post they belong to (one query).
+
+    Args:
+        comment_ids: Ids returned by ingest_comments
+
+    Returns:
+        {post_id: [comment ids in creation order]}
+    """
+    groups: Dict[int, List[int]] = {}
+    if not comment_ids:
+        return groups
+    rows = db.session.query(Comment.id, Comment.post_id).filter(
+        Comment.id.in_(comment_ids)
+    ).order_by(Comment.id)
+    for comment_id, post_id in rows:
+        groups.setdefault(post_id, []).append(comment_id)
+    return groups
+
+
+def enqueue_comment_generation(app, post_ids: List[int], trigger_type: str = 'post_created',
+                               comment_ids: Optional[Dict[int, List[int]]] = None):
+    """
+    Generate automatic character comments for many posts in one background task.
+
+    Args:
+        app: Flask application
+        post_ids: Posts to comment on
+        trigger_type: Trigger passed to CommentGenerator.generate_comments_for_post
+        comment_ids: For "user_commented", the new comments grouped by post (see group_comments_by_post).
+            Characters reply once per post, to its newest comment.
+    """
+    global _comment_executor
+    if not post_ids:
+        return
+    with _comment_executor_lock:
+        if _comment_executor is None:
+            _comment_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bulk-comments')
+    _comment_executor.submit(_generate_comments, app, list(post_ids), trigger_type, dict(comment_ids or {}))
+
+
+def _generate_comments(app, post_ids: List[int], trigger_type: str, comment_ids: Dict[int, List[int]]):
+    with app.app_context():
+        try:
+            from services.comment_generator import CommentGenerator
+            generator = CommentGenerator(canon_directory=CANON_DIRECTORY)
+        except Exception as e:
+            print(f"[BULK] ⚠️ Comment generation unavailable: {e}")
+            return
+        generated = 0
+        for post_id in post_ids:
+            post = db.session.get(Post, post_id)
+            if post is None:
+                continue
+            user_comment = None
+            if comment_ids.get(post_id):
+                user_comment = db.session.get(Comment, comment_ids[post_id][-1])
+                if user_comment is None:
+                    continue
+            try:
+                generator.generate_comments_for_post(post, trigger_type=trigger_type, user_comment=user_comment)
+                generated += 1
+            except Exception as e:
+                db.session.rollback()
+                print(f"[BULK] ⚠️ Comment generation failed for post {post_id}: {e}")
+        print(f"[BULK] Generated automatic comments for {generated}/{len(post_ids)} post(s)")
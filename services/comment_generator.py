@@ -5,10 +5,37 @@ Uses LLM (Gemini) to generate plot-relevant comments.
 """
 import os
 import random
-from typing import List, Dict, Optional, Any
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Tuple
 from models import User, Post, Comment
 from extensions import db
-from services.llm_client import GeminiLLMClient, GeminiModels
+from services.instrumentation import traced
+from services.providers import create_llm_client
+from modules.character_matcher import CharacterMatcher
+
+# Canon-wide mention matchers, compiled once per canon directory for the life of the process
+# (CommentGenerator is created per request). A first name alone is not a mention here:
+# common first names would make characters comment on unrelated posts.
+_canon_matchers: Dict[str, CharacterMatcher] = {}
+_canon_matchers_lock = threading.Lock()
+
+
+def canon_character_matcher(canon_loader) -> CharacterMatcher:
+    """The mention matcher of a PromoCanon directory (shared by all generators)"""
+    key = str(canon_loader.canon_dir)
+    with _canon_matchers_lock:
+        matcher = _canon_matchers.get(key)
+        if matcher is None:
+            matcher = CharacterMatcher(canon_loader.load_characters(), match_first_names=False)
+            _canon_matchers[key] = matcher
+        return matcher
+
+
+@lru_cache(maxsize=256)
+def own_character_matcher(char_name: str, aliases: Tuple[str, ...] = ()) -> CharacterMatcher:
+    """Matcher for one character's full name and aliases (official users outside the canon)"""
+    return CharacterMatcher([char_name], aliases={char_name: list(aliases)}, match_first_names=False)
 
 
 class CommentGenerator:
@@ -34,9 +61,10 @@ class CommentGenerator:
     def initialize_llm(self):
         """Initialize LLM client for comment generation"""
         try:
-            self.llm_client = GeminiLLMClient(model_id=GeminiModels.TWO_POINT_5_FLASH)
+            # Gemini 2.5 Flash unless LLM_PROVIDER selects the offline fake
+            self.llm_client = create_llm_client()
             self.llm_client.initialize_client()
-            if self.llm_client.gemini_client:
+            if self.llm_client.available:
                 print(f"[COMMENT_GEN] ✅ LLM client initialized successfully")
             else:
                 print(f"[COMMENT_GEN] ⚠️ LLM client initialization failed")
@@ -105,6 +133,28 @@ class CommentGenerator:
         
         return persona
     
+    def get_character_matcher(self, char_name: str, aliases: Optional[List[str]] = None) -> CharacterMatcher:
+        """
+        Get the matcher detecting mentions of a character: its full name or an explicit
+        alias, never the first name alone.
+
+        Args:
+            char_name: Character name
+            aliases: The user's own aliases (character_data 'aliases')
+
+        Returns:
+            The canon-wide matcher when the canon knows the character and there are no extra
+            aliases, otherwise a matcher for the character's own name and aliases
+        """
+        if self.canon_loader and not aliases:
+            try:
+                matcher = canon_character_matcher(self.canon_loader)
+                if matcher.resolve(char_name):
+                    return matcher
+            except Exception as e:
+                print(f"[COMMENT_GEN] ⚠️ Error building character matcher: {e}")
+        return own_character_matcher(char_name, tuple(alias for alias in aliases or [] if isinstance(alias, str)))
+    
     def should_character_comment(self, character: User, post: Post, trigger_type: str = "post_created", 
                                  user_comment: Optional[Comment] = None) -> bool:
         """
@@ -163,25 +213,19 @@ class CommentGenerator:
             return False
         
         # Rule 5: Check if character is directly mentioned in content (strong signal - skip LLM check)
-        char_name_lower = char_name.lower()
         content_to_check = ""
         if trigger_type == "post_created":
-            content_to_check = f"{post.title} {post.description or ''} {post.content or ''}".lower()
+            content_to_check = f"{post.title} {post.description or ''} {post.content or ''}"
         elif trigger_type == "user_commented" and user_comment:
-            content_to_check = f"{user_comment.content}".lower()
+            content_to_check = f"{user_comment.content}"
             # Also include post context
-            content_to_check += f" {post.title} {post.description or ''} {post.content or ''}".lower()
+            content_to_check += f" {post.title} {post.description or ''} {post.content or ''}"
         
         # Check if character is directly mentioned (hardcoded check - strong signal)
-        if char_name_lower in content_to_check:
-            import re
-            first_name = char_name.split()[0].lower() if ' ' in char_name else char_name_lower
-            full_name_pattern = re.compile(r'\b' + re.escape(char_name_lower) + r'\b', re.IGNORECASE)
-            first_name_pattern = re.compile(r'\b' + re.escape(first_name) + r'\b', re.IGNORECASE)
-            
-            if full_name_pattern.search(content_to_check) or first_name_pattern.search(content_to_check):
-                print(f"[COMMENT_GEN] ✅ {char_name} mentioned in content - will comment (hardcoded check)")
-                return True
+        aliases = char_data.get('aliases') if isinstance(char_data.get('aliases'), list) else None
+        if self.get_character_matcher(char_name, aliases).mentions_character(content_to_check, char_name):
+            print(f"[COMMENT_GEN] ✅ {char_name} mentioned in content - will comment (hardcoded check)")
+            return True
         
         # Rule 6: Use LLM to check plot relevance
         # Build plot context from PromoCanon
@@ -219,7 +263,7 @@ class CommentGenerator:
             user_comment_context = f"\nA user ({user_name}) commented: {user_comment.content}"
         
         # Use LLM to determine if character should comment
-        if self.llm_client and self.llm_client.gemini_client:
+        if self.llm_client and self.llm_client.available:
             try:
                 relevance_prompt = f"""You are analyzing whether a character should comment on a post/comment based on plot relevance.
 
@@ -376,7 +420,7 @@ Instructions:
 Comment:"""
 
         # Generate comment using LLM
-        if self.llm_client and self.llm_client.gemini_client:
+        if self.llm_client and self.llm_client.available:
             try:
                 print(f"[COMMENT_GEN] Calling LLM to generate comment for {char_name}...")
                 print(f"[COMMENT_GEN] Prompt length: {len(prompt)} characters")
@@ -426,6 +470,7 @@ Comment:"""
             print(f"[COMMENT_GEN] ⚠️ LLM not available, using fallback comment")
             return "I see."
     
+    @traced('comments.generate_for_post')
     def generate_comments_for_post(self, post: Post, trigger_type: str = "post_created", 
                                    user_comment: Optional[Comment] = None) -> List[Comment]:
         """
@@ -0,0 +1,87 @@
+"""
+Response compression.
+JSON and HTML responses of at least COMPRESS_MIN_BYTES are encoded with the best
+encoding the client accepts: brotli when the optional `brotli` package is installed
+(smaller than gzip at a similar CPU cost for JSON), otherwise gzip. Small bodies go
+out as-is, since the encoding overhead outweighs the savings. Streamed responses (SSE, file
+downloads) and bodies that already carry a Content-Encoding are left alone.
+"""
+
+import gzip
+from typing import Optional
+
+from services.instrumentation import registry
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+RESPONSE_BYTES = registry.counter(
+    'pocketverse_http_response_body_bytes_total', 'Response body bytes before / after compression',
+    ('encoding', 'stage'))
+
+
+def _brotli():
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def choose_encoding(accept_encodings, brotli_available: bool) -> Optional[str]:
+    """
+    'br', 'gzip' or None for a request's Accept-Encoding.
+
+    Args:
+        accept_encodings: werkzeug Accept for the Accept-Encoding header
+        brotli_available: Whether the brotli package is installed
+    """
+    candidates = (['br'] if brotli_available else []) + ['gzip']
+    best = max(candidates, key=lambda encoding: accept_encodings.quality(encoding))
+    return best if accept_encodings.quality(best) > 0 else None
+
+
+def compress_body(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == 'br':
+        return _brotli().compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app):
+    """
+    Register the after_request hook compressing eligible responses (unless COMPRESS_ENABLED is off).
+
+    Args:
+        app: Flask application
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    min_bytes = app.config.get('COMPRESS_MIN_BYTES', 1024)
+    gzip_level = app.config.get('COMPRESS_GZIP_LEVEL', 6)
+    brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 5)
+    brotli_available = _brotli() is not None
+
+    def compress_response(response):
+        from flask import request
+
+        if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code in (204, 206, 304) or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        # Varies whether or not this particular body ends up compressed
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        if len(body) < min_bytes:
+            return response
+        encoding = choose_encoding(request.accept_encodings, brotli_available)
+        if encoding is None:
+            return response
+
+        compressed = compress_body(body, encoding, gzip_level, brotli_quality)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        RESPONSE_BYTES.inc(len(body), encoding=encoding, stage='identity')
+        RESPONSE_BYTES.inc(len(compressed), encoding=encoding, stage='encoded')
+        return response
+
+    app.after_request(compress_response)
+    print(f"[COMPRESS] ✅ {'brotli + gzip' if brotli_available else 'gzip'} for responses >= {min_bytes} bytes")
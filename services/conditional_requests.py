@@ -0,0 +1,109 @@
+"""
+Conditional GETs for the JSON API.
+@conditional(...) derives a weak ETag from count(*) and max(updated_at) of the
+collections a response is built from (one round trip of scalar subqueries), plus the
+endpoint, its arguments, the query string and the viewer's spoiler-progress
+signature. A request whose If-None-Match still matches gets an empty 304 before the
+view runs; otherwise the view's 200 carries the ETag and Last-Modified.
+
+Counts catch deletions, which never move max(updated_at), so Last-Modified is
+informational and revalidation relies on the ETag. ETags are weak because the same
+representation may be sent gzip / brotli encoded.
+
+Bodies served by the feed cache (X-Feed-Cache: hit / stale) may predate the current
+table versions (stale-while-revalidate, or a commit racing the generation bump), so
+their ETag is a hash of the body itself and If-None-Match is checked against it after
+the view: a client is never told that an old body is current.
+"""
+
+import hashlib
+from functools import wraps
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+from flask import current_app, request
+
+from services.instrumentation import registry
+
+# A collection: a model (whole table) or (model, *criteria) for a filtered subset
+Collection = Union[type, Tuple[Any, ...]]
+
+NOT_MODIFIED = registry.counter(
+    'pocketverse_http_not_modified_total', 'Conditional GETs answered with 304', ('endpoint',))
+
+
+def collection_versions(collections: Sequence[Collection]) -> Tuple[List[Any], Optional[Any]]:
+    """
+    count(*) and max(updated_at) for each collection, in a single query.
+
+    Returns:
+        ([count, max_updated_at, ...] per collection, newest updated_at overall or None)
+    """
+    from sqlalchemy import func, select
+    from extensions import db
+
+    columns = []
+    for collection in collections:
+        model, *criteria = collection if isinstance(collection, tuple) else (collection,)
+        columns.append(select(func.count()).select_from(model).where(*criteria).scalar_subquery())
+        columns.append(select(func.max(model.updated_at)).where(*criteria).scalar_subquery())
+    values = list(db.session.execute(select(*columns)).one())
+    newest = max((value for value in values[1::2] if value is not None), default=None)
+    return values, newest
+
+
+def collection_etag(*parts: Any) -> str:
+    """Opaque ETag value (without quotes) for the parts"""
+    digest = hashlib.sha1(repr(parts).encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def body_etag(body: bytes) -> str:
+    """Opaque ETag value (without quotes) for a response body"""
+    return collection_etag('body', hashlib.sha1(body).hexdigest())
+
+
+def conditional(*collections: Union[Collection, Callable[..., Sequence[Collection]]]):
+    """
+    Decorator adding a weak ETag / Last-Modified to a GET view and answering 304 when unchanged.
+
+    Args:
+        *collections: Models or (model, *criteria) tuples the response is built from, or a single
+            function receiving the view's keyword arguments and returning them
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not current_app.config.get('CONDITIONAL_REQUESTS_ENABLED', True):
+                return view(*args, **kwargs)
+
+            from services.feed_cache import CACHE_HEADER, RESULT_HIT, RESULT_STALE, current_spoiler_signature
+            specs = collections[0](**kwargs) if len(collections) == 1 and callable(collections[0]) \
+                and not isinstance(collections[0], type) else collections
+            versions, newest = collection_versions(specs)
+            etag = collection_etag(request.endpoint, sorted(kwargs.items()),
+                                   sorted(request.args.items(multi=True)), current_spoiler_signature(), versions)
+
+            if request.if_none_match.contains_weak(etag):
+                NOT_MODIFIED.inc(endpoint=request.endpoint)
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if response.headers.get(CACHE_HEADER) in (RESULT_HIT, RESULT_STALE):
+                    # The cached body isn't necessarily built from `versions`: describe the body itself
+                    etag = body_etag(response.get_data())
+                    if request.if_none_match.contains_weak(etag):
+                        NOT_MODIFIED.inc(endpoint=request.endpoint)
+                        cached = response
+                        response = current_app.response_class(status=304)
+                        response.headers[CACHE_HEADER] = cached.headers[CACHE_HEADER]
+                elif newest is not None:
+                    response.last_modified = newest
+            response.set_etag(etag, weak=True)
+            # Per-viewer content: browsers may keep it but must revalidate, shared caches must not store it
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,214 @@
+"""
+Database engine profiles.
+SQLALCHEMY_ENGINE_OPTIONS are derived from the database URL (or DB_ENGINE_PROFILE):
+  - sqlite: every new connection switches the file to WAL (readers keep reading while
+    a vote or AI comment commits), synchronous=NORMAL (fsync at checkpoints instead of
+    on every commit; safe against app crashes, the last commits can be lost on power
+    loss), a busy timeout so concurrent writers queue instead of failing with
+    "database is locked", and memory-mapped reads.
+  - postgres: a sized QueuePool with pre-ping and recycling, plus server-side
+    statement and lock timeouts so a runaway query can't pin a pooled connection.
+  - none: SQLAlchemy defaults (rollback journal on SQLite); the benchmark baseline.
+Options set explicitly in SQLALCHEMY_ENGINE_OPTIONS override the profile's.
+Every bind (e.g. the read replicas) gets the options of its own URL's dialect, passed
+as a SQLALCHEMY_BINDS dict; DB_ENGINE_PROFILE and SQLALCHEMY_ENGINE_OPTIONS only
+apply to the primary, except that 'none' turns the profiles off everywhere.
+"""
+
+from typing import Any, Dict, List, Mapping, Tuple
+
+PROFILE_AUTO = 'auto'
+PROFILE_SQLITE = 'sqlite'
+PROFILE_POSTGRES = 'postgres'
+PROFILE_NONE = 'none'
+PROFILES = (PROFILE_AUTO, PROFILE_SQLITE, PROFILE_POSTGRES, PROFILE_NONE)
+
+# Drivers that accept libpq `options` (server settings applied at connect time)
+LIBPQ_DRIVERS = ('psycopg2', 'psycopg')
+
+
+def resolve_profile(database_url: str, profile: str = PROFILE_AUTO) -> str:
+    """
+    Engine profile for a database URL.
+
+    Args:
+        database_url: SQLAlchemy URL
+        profile: 'auto' (pick by dialect), 'sqlite', 'postgres' or 'none'
+
+    Returns:
+        'sqlite', 'postgres' or 'none'
+    """
+    from sqlalchemy.engine import make_url
+
+    profile = (profile or PROFILE_AUTO).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown DB_ENGINE_PROFILE {profile!r} (expected one of {', '.join(PROFILES)})")
+    if profile != PROFILE_AUTO:
+        return profile
+    backend = make_url(database_url).get_backend_name()
+    if backend == 'sqlite':
+        return PROFILE_SQLITE
+    if backend == 'postgresql':
+        return PROFILE_POSTGRES
+    return PROFILE_NONE
+
+
+def _is_memory_database(database_url: str) -> bool:
+    from sqlalchemy.engine import make_url
+    database = make_url(database_url).database
+    return database in (None, '', ':memory:') or 'mode=memory' in database
+
+
+def sqlite_pragmas(config: Mapping[str, Any], database_url: str) -> List[Tuple[str, Any]]:
+    """
+    PRAGMAs run on every new SQLite connection, in order.
+
+    Args:
+        config: App config (SQLITE_* settings)
+        database_url: SQLite URL (in-memory databases can't use WAL)
+    """
+    pragmas = []
+    journal_mode = config.get('SQLITE_JOURNAL_MODE', 'WAL')
+    if journal_mode and not _is_memory_database(database_url):
+        pragmas.append(('journal_mode', journal_mode))
+    pragmas.append(('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')))
+    pragmas.append(('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))))
+    mmap_size = int(config.get('SQLITE_MMAP_SIZE', 0))
+    if mmap_size:
+        pragmas.append(('mmap_size', mmap_size))
+    return pragmas
+
+
+def profile_options(config: Mapping[str, Any], profile: str, database_url: str) -> Dict[str, Any]:
+    """
+    Engine options of a profile for one database URL.
+
+    Args:
+        config: App config (DB_* and SQLITE_* settings)
+        profile: Resolved profile from resolve_profile()
+        database_url: URL of the engine the options are for
+    """
+    from sqlalchemy.engine import make_url
+
+    options: Dict[str, Any] = {}
+    if profile == PROFILE_SQLITE:
+        # pysqlite waits `timeout` seconds for a lock before the busy_timeout PRAGMA applies
+        options['connect_args'] = {'timeout': int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)) / 1000}
+    elif profile == PROFILE_POSTGRES:
+        options.update(
+            pool_size=int(config.get('DB_POOL_SIZE', 10)),
+            max_overflow=int(config.get('DB_MAX_OVERFLOW', 20)),
+            pool_timeout=int(config.get('DB_POOL_TIMEOUT', 30)),
+            pool_recycle=int(config.get('DB_POOL_RECYCLE', 1800)),
+            pool_pre_ping=True,
+        )
+        driver = make_url(database_url).get_driver_name()
+        if driver in LIBPQ_DRIVERS:
+            settings = [f"-c statement_timeout={int(config.get('DB_STATEMENT_TIMEOUT_MS', 30000))}",
+                        f"-c lock_timeout={int(config.get('DB_LOCK_TIMEOUT_MS', 5000))}"]
+            options['connect_args'] = {'options': ' '.join(settings),
+                                       'application_name': config.get('DB_APPLICATION_NAME', 'pocketverse')}
+        else:
+            print(f"[DB] ⚠️ Driver {driver} doesn't take libpq options; statement timeouts not applied")
+    return options
+
+
+def _merge_options(options: Dict[str, Any], explicit: Mapping[str, Any]) -> Dict[str, Any]:
+    """Profile options with explicit ones on top (connect_args are merged key by key)"""
+    explicit = dict(explicit)
+    if 'connect_args' in explicit and 'connect_args' in options:
+        explicit['connect_args'] = {**options['connect_args'], **explicit['connect_args']}
+    return {**options, **explicit}
+
+
+def engine_options(config: Mapping[str, Any], profile: str) -> Dict[str, Any]:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS of the primary database: the profile's options with the
+    config's explicit options on top.
+
+    Args:
+        config: App config (DB_* settings, SQLALCHEMY_DATABASE_URI)
+        profile: Resolved profile from resolve_profile()
+    """
+    options = profile_options(config, profile, config['SQLALCHEMY_DATABASE_URI'])
+    return _merge_options(options, config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+
+
+def bind_engine_options(config: Mapping[str, Any], profile: str) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    SQLALCHEMY_BINDS with each bind's engine options picked from its own URL.
+    A bind given as a dict keeps its explicit options on top of the profile's.
+
+    Args:
+        config: App config (SQLALCHEMY_BINDS, DB_* and SQLITE_* settings)
+        profile: The primary's resolved profile ('none' leaves every bind on SQLAlchemy's defaults)
+
+    Returns:
+        (SQLALCHEMY_BINDS with dict values, {bind key: resolved profile})
+    """
+    binds: Dict[str, Any] = {}
+    profiles: Dict[str, str] = {}
+    for key, value in (config.get('SQLALCHEMY_BINDS') or {}).items():
+        explicit = {'url': value} if not isinstance(value, Mapping) else dict(value)
+        url = str(explicit['url'])
+        profiles[key] = PROFILE_NONE if profile == PROFILE_NONE else resolve_profile(url)
+        binds[key] = _merge_options(profile_options(config, profiles[key], url), explicit)
+    return binds, profiles
+
+
+def install_sqlite_pragmas(engine, pragmas: List[Tuple[str, Any]]):
+    """Run the PRAGMAs on every connection the engine opens"""
+    from sqlalchemy import event
+
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name}={value}")
+                if name == 'journal_mode':
+                    mode = cursor.fetchone()[0]
+                    if mode.lower() != str(value).lower():
+                        print(f"[DB] ⚠️ SQLite journal_mode is {mode}, requested {value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, 'connect', _set_pragmas)
+
+
+def init_database(app) -> str:
+    """
+    Apply the engine profile to the app's config, then initialize Flask-SQLAlchemy.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The resolved profile (also stored in app.extensions['db_engine_profile'])
+    """
+    from extensions import db
+
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+    profile = resolve_profile(database_url, app.config.get('DB_ENGINE_PROFILE', PROFILE_AUTO))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config, profile)
+    app.config['SQLALCHEMY_BINDS'], bind_profiles = bind_engine_options(app.config, profile)
+    db.init_app(app)
+
+    # PRAGMAs follow each engine's own URL (an in-memory replica can't use WAL)
+    profiles = {None: profile, **bind_profiles}
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if profiles.get(key) == PROFILE_SQLITE and engine.dialect.name == 'sqlite':
+                install_sqlite_pragmas(engine, sqlite_pragmas(app.config, str(engine.url)))
+
+    if profile == PROFILE_SQLITE:
+        pragmas = sqlite_pragmas(app.config, database_url)
+        print(f"[DB] ✅ Engine profile sqlite: {', '.join(f'{name}={value}' for name, value in pragmas)}")
+    elif profile == PROFILE_POSTGRES:
+        options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+        print(f"[DB] ✅ Engine profile postgres: pool_size={options.get('pool_size')}, "
+              f"max_overflow={options.get('max_overflow')}, pre_ping={options.get('pool_pre_ping')}")
+    if bind_profiles:
+        print(f"[DB] Bind engine profiles: {', '.join(f'{key}={value}' for key, value in bind_profiles.items())}")
+
+    app.extensions['db_engine_profile'] = profile
+    return profile
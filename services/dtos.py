@@ -0,0 +1,152 @@
+"""
+Lightweight read models for the list endpoints.
+PostDTO / UserDTO are slotted dataclasses filled straight from row tuples of a single
+query: comment counts and vote scores are aggregated in SQL, and authors are joined,
+instead of loading ORM objects and lazy-loading author, comments and votes per post
+for to_dict(). JSON columns are selected as text and decoded once per distinct value
+(an official character's character_data repeats on every post it wrote). The JSON provider
+(services.json_encoding) serializes the DTOs directly. Keys and values match
+to_dict().
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+
+@lru_cache(maxsize=4096)
+def _decode_json(raw: str) -> Any:
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return {}
+
+
+def decode_json_column(raw: Optional[Any]) -> Any:
+    """
+    Decoded value of a JSON column selected with json_text() ({} when empty or invalid).
+    Drivers that decode JSON themselves (psycopg2 for JSONB) pass the value through.
+    Results are shared between calls: treat them as read-only.
+    """
+    if not raw:
+        return {}
+    if not isinstance(raw, str):
+        return raw
+    return _decode_json(raw)
+
+
+def json_text(column):
+    """A JSON column selected as its raw text (skips the per-row decode of the JSON type)"""
+    from sqlalchemy import Text, type_coerce
+    return type_coerce(column, Text)
+
+
+@dataclass(slots=True)
+class UserDTO:
+    id: int
+    username: str
+    display_name: str
+    is_official: bool
+    character_data: Dict[str, Any]
+    created_at: datetime
+
+    @classmethod
+    def from_row(cls, user_id, username, display_name, is_official, character_data, created_at) -> 'UserDTO':
+        return cls(user_id, username, display_name, bool(is_official), decode_json_column(character_data), created_at)
+
+
+@dataclass(slots=True)
+class PostDTO:
+    """Post.to_dict(include_author=False)"""
+    id: int
+    title: str
+    content: Optional[str]
+    description: Optional[str]
+    pocketshow_id: int
+    author_id: Optional[int]
+    image_url: Optional[str]
+    thumbnail_url: Optional[str]
+    video_url: Optional[str]
+    metadata: Dict[str, Any]
+    show_name: Optional[str]
+    episode_tag: Optional[int]
+    created_at: datetime
+    comment_count: int
+    vote_score: int
+
+
+@dataclass(slots=True)
+class PostWithAuthorDTO(PostDTO):
+    """Post.to_dict()"""
+    author: Optional[UserDTO]
+
+
+USER_COLUMNS = ('id', 'username', 'display_name', 'is_official', 'character_data', 'created_at')
+
+
+def _user_columns() -> List[Any]:
+    from models import User
+    return [json_text(User.character_data) if column == 'character_data' else getattr(User, column)
+            for column in USER_COLUMNS]
+
+
+def user_rows(query) -> List[UserDTO]:
+    """
+    UserDTOs for a User query (filters and ordering are kept).
+
+    Args:
+        query: User.query with any filters / order_by applied
+    """
+    rows = query.with_entities(*_user_columns()).all()
+    return [UserDTO.from_row(*row) for row in rows]
+
+
+def post_rows(query, include_author: bool = True) -> List[PostDTO]:
+    """
+    PostDTOs for a Post query in one statement (filters and ordering are kept).
+
+    Args:
+        query: Post.query with any filters / order_by applied
+        include_author: Join and embed the author (PostWithAuthorDTO); False for compact responses
+
+    Returns:
+        PostWithAuthorDTO or PostDTO per row
+    """
+    from sqlalchemy import case, func
+    from extensions import db
+    from models import Comment, Post, User, Vote
+    from services.image_derivatives import variant_url
+
+    comment_counts = (db.session.query(Comment.post_id.label('post_id'), func.count(Comment.id).label('count'))
+                      .group_by(Comment.post_id)
+                      .subquery())
+    vote_scores = (db.session.query(Vote.post_id.label('post_id'),
+                                    func.sum(case((Vote.is_upvote, 1), else_=-1)).label('score'))
+                   .filter(Vote.post_id.isnot(None))
+                   .group_by(Vote.post_id)
+                   .subquery())
+
+    columns = [Post.id, Post.title, Post.content, Post.description, Post.pocketshow_id, Post.author_id,
+               Post.image_url, Post.video_url, json_text(Post.post_metadata), Post.show_name, Post.episode_tag,
+               Post.created_at, func.coalesce(comment_counts.c.count, 0), func.coalesce(vote_scores.c.score, 0)]
+    query = (query.outerjoin(comment_counts, comment_counts.c.post_id == Post.id)
+             .outerjoin(vote_scores, vote_scores.c.post_id == Post.id))
+    if include_author:
+        columns += _user_columns()
+        query = query.outerjoin(User, User.id == Post.author_id)
+
+    posts = []
+    for row in query.with_entities(*columns).all():
+        (post_id, title, content, description, pocketshow_id, author_id, image_url, video_url, metadata,
+         show_name, episode_tag, created_at, comment_count, vote_score) = row[:14]
+        fields = (post_id, title, content, description, pocketshow_id, author_id, image_url,
+                  variant_url(image_url, 640), video_url, decode_json_column(metadata), show_name, episode_tag,
+                  created_at, int(comment_count), int(vote_score))
+        if include_author:
+            author = UserDTO.from_row(*row[14:]) if row[14] is not None else None
+            posts.append(PostWithAuthorDTO(*fields, author))
+        else:
+            posts.append(PostDTO(*fields))
+    return posts
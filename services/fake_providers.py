@@ -0,0 +1,307 @@
+"""
+Deterministic offline stand-ins for the Vertex AI backends, for load testing.
+FakeLLMClient, FakeImageGenerator and FakeGeminiTransport (the HTTP layer under
+FakeNanoBananaClient) answer without credentials or network:
+  - latency is drawn from a log-normal distribution around a configurable median
+    (FAKE_LATENCY_SIGMA = 0 makes it fixed),
+  - a configurable share of calls fails (FAKE_ERROR_RATE) or is throttled with a
+    429 (FAKE_THROTTLE_RATE), so retry and backoff paths get exercised,
+  - outputs depend only on the request: the same prompt always yields the same
+    text or image, and images are noise PNGs about as large as real generations.
+Select them with LLM_PROVIDER=fake and IMAGE_PROVIDER=fake.
+"""
+
+import base64
+import hashlib
+import io
+import json
+import math
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from services.instrumentation import span
+from services.providers import ImageProvider, LLMProvider, provider_setting
+
+OUTCOME_OK = 'ok'
+OUTCOME_ERROR = 'error'
+OUTCOME_THROTTLED = 'throttled'
+
+RELEVANCE_MARKER = 'Respond with ONLY "YES" or "NO"'
+YES_RATE = 0.6  # Share of relevance checks answered YES
+CHARS_PER_TOKEN = 4
+
+COMMENT_SENTENCES = [
+    "I knew this moment was coming.",
+    "Nobody else saw what happened in that hallway, but I did.",
+    "You're all missing the real question here.",
+    "Some secrets are kept for a reason.",
+    "After everything in the last few episodes, this changes nothing for me.",
+    "Watch closely next time, the clues were always there.",
+    "I'd do it all again if it meant keeping her safe.",
+    "Trust is earned, and this wasn't it.",
+]
+
+
+class FakeProviderError(Exception):
+    """Injected provider failure"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class FakeBehavior:
+    """Latency and failure injection shared by the fake providers (thread-safe)"""
+
+    def __init__(self, latency_ms: float = 0.0, sigma: float = 0.5, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, seed: Optional[int] = None):
+        """
+        Args:
+            latency_ms: Median latency per call
+            sigma: Log-normal shape; 0 gives a fixed latency, 0.5 a realistic long tail
+            error_rate: Share of calls that fail with a 500
+            throttle_rate: Share of calls that are throttled with a 429
+            seed: Seed for the latency / failure draws (None: random)
+        """
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, kind: str) -> 'FakeBehavior':
+        """
+        Args:
+            kind: 'LLM' or 'IMAGE' (selects FAKE_<kind>_LATENCY_MS)
+        """
+        return cls(
+            latency_ms=provider_setting(f'FAKE_{kind}_LATENCY_MS', 0.0),
+            sigma=provider_setting('FAKE_LATENCY_SIGMA', 0.5),
+            error_rate=provider_setting('FAKE_ERROR_RATE', 0.0),
+            throttle_rate=provider_setting('FAKE_THROTTLE_RATE', 0.0),
+            seed=provider_setting('FAKE_SEED'),
+        )
+
+    def draw(self) -> Tuple[float, str]:
+        """Latency in seconds and the outcome of the next call"""
+        with self._lock:
+            if self.latency_ms <= 0:
+                latency = 0.0
+            elif self.sigma > 0:
+                latency = self._rng.lognormvariate(math.log(self.latency_ms), self.sigma) / 1000
+            else:
+                latency = self.latency_ms / 1000
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return latency, OUTCOME_THROTTLED
+        if roll < self.throttle_rate + self.error_rate:
+            return latency, OUTCOME_ERROR
+        return latency, OUTCOME_OK
+
+    def call(self):
+        """Wait out one call's latency; raise FakeProviderError for an injected failure"""
+        latency, outcome = self.draw()
+        if latency:
+            time.sleep(latency)
+        if outcome == OUTCOME_THROTTLED:
+            raise FakeProviderError("429 RESOURCE_EXHAUSTED (fake provider)", 429)
+        if outcome == OUTCOME_ERROR:
+            raise FakeProviderError("500 INTERNAL (fake provider)", 500)
+
+
+def _digest(*parts: Any) -> bytes:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).digest()
+
+
+@lru_cache(maxsize=32)
+def render_fake_image(digest: bytes, width: int, height: int) -> bytes:
+    """
+    Deterministic PNG for a request digest. Smoothed noise keeps the file close to the
+    size of a real generation (~2 MB at 1024x1024) instead of compressing to nothing.
+    """
+    from PIL import Image
+
+    rng = random.Random(digest)
+    small = (max(1, width // 4), max(1, height // 4))
+    image = Image.frombytes('RGB', small, rng.randbytes(small[0] * small[1] * 3))
+    image = image.resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def image_dimensions(aspect_ratio: Optional[str], long_side: int) -> Tuple[int, int]:
+    """Pixel size for an aspect ratio string like '16:9'"""
+    try:
+        w, h = (float(x) for x in (aspect_ratio or '1:1').split(':'))
+    except ValueError:
+        w, h = 1.0, 1.0
+    if w >= h:
+        return long_side, max(1, round(long_side * h / w))
+    return max(1, round(long_side * w / h)), long_side
+
+
+# ==================== LLM ====================
+
+class FakeLLMClient(LLMProvider):
+    """Offline stand-in for GeminiLLMClient"""
+
+    def __init__(self, behavior: Optional[FakeBehavior] = None, model_id: Optional[str] = None):
+        self.behavior = behavior or FakeBehavior()
+        self.model_id = model_id or 'fake-llm'
+        self.calls = 0
+
+    @classmethod
+    def from_settings(cls, model_id: Optional[str] = None) -> 'FakeLLMClient':
+        return cls(FakeBehavior.from_settings('LLM'), model_id=model_id)
+
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.7,
+                 max_tokens: Optional[int] = None, top_p: float = 0.8, top_k: int = 40,
+                 model_id: Optional[str] = None) -> Optional[str]:
+        if not prompt:
+            return None
+        self.calls += 1
+        try:
+            with span('llm.generate', model=model_id or self.model_id):
+                self.behavior.call()
+        except FakeProviderError as e:
+            # Same contract as the real client: errors are logged and surface as None
+            print(f"[LLM_CLIENT] ⚠️ Error generating response: {e}")
+            return None
+
+        rng = random.Random(_digest(system_prompt, prompt, model_id or self.model_id))
+        if RELEVANCE_MARKER in prompt:
+            return "YES" if rng.random() < YES_RATE else "NO"
+        text = ' '.join(rng.sample(COMMENT_SENTENCES, rng.randint(1, 3)))
+        if max_tokens:
+            text = text[:max_tokens * CHARS_PER_TOKEN]
+        return text
+
+
+# ==================== IMAGES ====================
+
+class FakeImageGenerator(ImageProvider):
+    """Offline stand-in for ImageGenerator (the image job provider)"""
+
+    def __init__(self, behavior: Optional[FakeBehavior] = None, image_size: int = 1024):
+        """
+        Args:
+            behavior: Latency / failure injection
+            image_size: Long side of generated images in pixels
+        """
+        self.behavior = behavior or FakeBehavior()
+        self.image_size = image_size
+
+    @classmethod
+    def from_settings(cls) -> 'FakeImageGenerator':
+        return cls(FakeBehavior.from_settings('IMAGE'), image_size=provider_setting('FAKE_IMAGE_SIZE', 1024))
+
+    def generate_image(self, prompt: str, story_context: Optional[Dict[str, Any]] = None,
+                       aspect_ratio: Optional[str] = None, seed: Optional[int] = None,
+                       **kwargs) -> Dict[str, Any]:
+        try:
+            with span('image.generate', provider='fake'):
+                self.behavior.call()
+                width, height = image_dimensions(aspect_ratio, self.image_size)
+                image_bytes = render_fake_image(_digest(prompt, story_context, seed), width, height)
+        except FakeProviderError as e:
+            print(f"[IMG_GEN] ❌ API Error: {e}")
+            return {"success": False, "error": f"Error during generation: {e}", "extra_info": {}}
+
+        return {
+            "success": True,
+            "image_bytes": image_bytes,
+            "extra_info": {
+                "provider": "fake",
+                "prompt": prompt,
+                "aspect_ratio": aspect_ratio or "1:1",
+                "model_id": "fake-image",
+                "num_images": 1,
+                "seed": seed,
+            }
+        }
+
+
+class _FakeResponse:
+    """Just enough of requests.Response for NanoBananaClient's retry and streaming code"""
+
+    def __init__(self, status_code: int, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    @property
+    def text(self) -> str:
+        return self._body.decode('utf-8')
+
+    def json(self):
+        return json.loads(self._body)
+
+    def iter_content(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        for start in range(0, len(self._body), chunk_size):
+            yield self._body[start:start + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code} Error (fake provider)", response=self)
+
+    def close(self):
+        pass
+
+
+class FakeGeminiTransport:
+    """
+    Session replacement answering streamGenerateContent requests locally, in the same
+    chunked JSON-array format as the real endpoint (base64 image in inlineData.data).
+    """
+
+    def __init__(self, behavior: Optional[FakeBehavior] = None, image_size: int = 1024):
+        self.behavior = behavior or FakeBehavior()
+        self.image_size = image_size
+
+    @classmethod
+    def from_settings(cls) -> 'FakeGeminiTransport':
+        return cls(FakeBehavior.from_settings('IMAGE'), image_size=provider_setting('FAKE_IMAGE_SIZE', 1024))
+
+    def post(self, url: str, json: Optional[Dict[str, Any]] = None, **kwargs) -> _FakeResponse:
+        latency, outcome = self.behavior.draw()
+        if latency:
+            time.sleep(latency)
+        if outcome == OUTCOME_THROTTLED:
+            return _FakeResponse(429, b'{"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}',
+                                 {"Retry-After": "1"})
+        if outcome == OUTCOME_ERROR:
+            return _FakeResponse(500, b'{"error": {"code": 500, "status": "INTERNAL"}}')
+
+        request_data = json or {}
+        parts = request_data.get('contents', [{}])[0].get('parts', [])
+        prompt = ' '.join(part['text'] for part in parts if 'text' in part)
+        aspect_ratio = request_data.get('generationConfig', {}).get('imageConfig', {}).get('aspectRatio')
+        width, height = image_dimensions(aspect_ratio, self.image_size)
+        image_bytes = render_fake_image(_digest(url, prompt, aspect_ratio), width, height)
+
+        chunks = [
+            {"candidates": [{"content": {"role": "model", "parts": [
+                {"inlineData": {"mimeType": "image/png",
+                                "data": base64.b64encode(image_bytes).decode('ascii')}}]}}]},
+            {"candidates": [{"content": {"role": "model", "parts": [{"text": ""}]}, "finishReason": "STOP"}],
+             "usageMetadata": {"promptTokenCount": max(1, len(prompt) // CHARS_PER_TOKEN),
+                               "candidatesTokenCount": 1290,
+                               "totalTokenCount": max(1, len(prompt) // CHARS_PER_TOKEN) + 1290}},
+        ]
+        body = ('[' + ',\n'.join(_json_dumps(chunk) for chunk in chunks) + ']').encode('utf-8')
+        return _FakeResponse(200, body, {"Content-Type": "application/json"})
+
+    def close(self):
+        pass
+
+
+def _json_dumps(value: Any) -> str:
+    # The post() keyword argument shadows the json module inside that method
+    return json.dumps(value)
@@ -0,0 +1,492 @@
+"""
+Rendered feed cache for the post listing endpoints.
+A feed response only depends on the viewer's spoiler progress (watched_shows) and on
+the posts, comments and votes behind it, so rendered JSON bodies are cached under
+(endpoint, pocketshow, spoiler-progress signature, page cursor) and shared by every
+viewer with the same progress.
+
+Invalidation is event-driven: a session that commits changes to posts, comments or
+votes (or to a user's public profile) bumps a generation counter for the affected
+scope ('all' for /api/posts, 'pocketshow:<id>' for a board, 'epoch' for everything),
+and entries stored under an older generation are out of date. Bulk INSERT / UPDATE
+statements bump 'epoch'. update_watched_episode changes the viewer's signature, so
+their next request is a miss without disturbing anyone else's entries.
+
+Stale-while-revalidate (FEED_CACHE_STALE_SECONDS > 0): an out-of-date entry younger
+than the stale window is served immediately while one background refresh per key
+re-renders it. Clients that just wrote (read_replicas.wrote_recently) bypass the
+cache entirely, so they always see their own post / comment / vote.
+
+Backends: a Redis-compatible server (FEED_CACHE_REDIS_URL) shared by all app
+processes (default), or an in-process LRU bounded by entries and bytes
+(FEED_CACHE_BACKEND='memory'). Generations live in the backend, so the in-process
+LRU only sees commits made by its own process: it is opt-in, for deployments that
+run a single app process (development, one gunicorn worker).
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from services.instrumentation import registry
+
+SCOPE_EPOCH = 'epoch'
+SCOPE_ALL = 'all'
+ANONYMOUS_SIGNATURE = 'anon'
+CACHE_HEADER = 'X-Feed-Cache'
+PENDING_SCOPES_KEY = 'feed_cache_scopes'
+
+RESULT_HIT = 'hit'
+RESULT_MISS = 'miss'
+RESULT_STALE = 'stale'
+RESULT_BYPASS = 'bypass'
+
+FEED_CACHE_REQUESTS = registry.counter(
+    'pocketverse_feed_cache_requests_total', 'Feed requests by cache result', ('endpoint', 'result'))
+FEED_CACHE_LATENCY = registry.histogram(
+    'pocketverse_feed_cache_request_duration_seconds', 'Feed view time by cache result', ('endpoint', 'result'))
+FEED_CACHE_INVALIDATIONS = registry.counter(
+    'pocketverse_feed_cache_invalidations_total', 'Generation bumps per scope kind', ('scope',))
+FEED_CACHE_REFRESHES = registry.counter(
+    'pocketverse_feed_cache_refreshes_total', 'Background stale-while-revalidate refreshes', ('status',))
+
+
+def pocketshow_scope(pocketshow_id: Any) -> str:
+    return f"pocketshow:{pocketshow_id}"
+
+
+def spoiler_signature(watched_shows: Optional[Dict[str, Any]]) -> str:
+    """Short stable hash of a user's watched episodes ('anon' when nothing is filtered)"""
+    if not watched_shows:
+        return ANONYMOUS_SIGNATURE
+    canonical = json.dumps(sorted((str(show), str(episode)) for show, episode in watched_shows.items()))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+# ==================== BACKENDS ====================
+
+class MemoryFeedBackend:
+    """In-process LRU of rendered feeds plus the scope generations (thread-safe)"""
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # key -> entry, oldest first
+        self._generations: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Dict[str, Any], ttl_seconds: float):
+        size = len(entry['body'])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= len(previous['body'])
+            self._entries[key] = entry
+            self.total_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted['body'])
+
+    def generations(self, scopes: Iterable[str]) -> Tuple[int, ...]:
+        with self._lock:
+            return tuple(self._generations.get(scope, 0) for scope in scopes)
+
+    def bump(self, scopes: Iterable[str]):
+        with self._lock:
+            for scope in scopes:
+                self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+
+class RedisFeedBackend:
+    """
+    Feeds and generations in a Redis-compatible server, shared across processes.
+    Errors are logged and behave like a miss, so a cache outage never breaks the feed.
+    """
+
+    def __init__(self, url: str, prefix: str = 'pocketverse:feed:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def __len__(self) -> int:
+        return 0  # Not tracked (the server owns eviction)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.client.get(self.prefix + 'entry:' + key)
+        except Exception as e:
+            print(f"[FEED_CACHE] ⚠️ Redis get failed: {e}")
+            return None
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        entry['body'] = entry['body'].encode('utf-8')
+        entry['version'] = tuple(entry['version'])
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any], ttl_seconds: float):
+        value = dict(entry, body=entry['body'].decode('utf-8'))
+        try:
+            self.client.set(self.prefix + 'entry:' + key, json.dumps(value), ex=max(1, int(ttl_seconds)))
+        except Exception as e:
+            print(f"[FEED_CACHE] ⚠️ Redis set failed: {e}")
+
+    def generations(self, scopes: Iterable[str]) -> Tuple[int, ...]:
+        scopes = list(scopes)
+        try:
+            values = self.client.mget([self.prefix + 'gen:' + scope for scope in scopes])
+        except Exception as e:
+            print(f"[FEED_CACHE] ⚠️ Redis mget failed: {e}")
+            return tuple(-1 for _ in scopes)  # Never matches a stored version
+        return tuple(int(value or 0) for value in values)
+
+    def bump(self, scopes: Iterable[str]):
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for scope in scopes:
+                pipeline.incr(self.prefix + 'gen:' + scope)
+            pipeline.execute()
+        except Exception as e:
+            print(f"[FEED_CACHE] ⚠️ Redis incr failed: {e}")
+
+    def clear(self):
+        try:
+            keys = list(self.client.scan_iter(self.prefix + 'entry:*'))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            print(f"[FEED_CACHE] ⚠️ Redis clear failed: {e}")
+
+
+# ==================== CACHE ====================
+
+class FeedCache:
+    """Rendered feed lookups, stale-while-revalidate refreshes and invalidation"""
+
+    def __init__(self, backend, ttl_seconds: float = 60, stale_seconds: float = 0, refresh_workers: int = 2):
+        """
+        Args:
+            backend: MemoryFeedBackend or RedisFeedBackend
+            ttl_seconds: Maximum age of an entry served as fresh
+            stale_seconds: How much longer an out-of-date entry may be served while it's refreshed (0 disables)
+            refresh_workers: Background threads re-rendering stale entries
+        """
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._refreshing: Set[str] = set()
+        self._refresh_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix='feed-refresh') \
+            if stale_seconds > 0 else None
+
+    @staticmethod
+    def version_scopes(scope: str) -> Tuple[str, ...]:
+        return (SCOPE_EPOCH, scope)
+
+    def lookup(self, key: str, scope: str, allow_stale: bool = True) -> Tuple[Optional[Dict[str, Any]], str, Tuple[int, ...]]:
+        """
+        Returns:
+            (entry or None, 'hit' / 'stale' / 'miss', current version of the scope)
+        """
+        version = self.backend.generations(self.version_scopes(scope))
+        entry = self.backend.get(key)
+        if entry is None:
+            return None, RESULT_MISS, version
+        age = time.time() - entry['stored_at']
+        if entry['version'] == version and age < self.ttl_seconds:
+            return entry, RESULT_HIT, version
+        if allow_stale and self.stale_seconds > 0 and age < self.ttl_seconds + self.stale_seconds:
+            return entry, RESULT_STALE, version
+        return None, RESULT_MISS, version
+
+    def store(self, key: str, body: bytes, status: int, version: Tuple[int, ...]):
+        entry = {'body': body, 'status': status, 'version': version, 'stored_at': time.time()}
+        self.backend.set(key, entry, self.ttl_seconds + self.stale_seconds)
+
+    def schedule_refresh(self, key: str, refresh) -> bool:
+        """Run refresh() in the background unless this key is already being refreshed"""
+        if self._executor is None:
+            return False
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                refresh()
+                FEED_CACHE_REFRESHES.inc(status='ok')
+            except Exception as e:
+                FEED_CACHE_REFRESHES.inc(status='error')
+                print(f"[FEED_CACHE] ⚠️ Refresh of {key} failed: {e}")
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+        return True
+
+    def invalidate(self, scopes: Iterable[str]):
+        scopes = set(scopes)
+        if not scopes:
+            return
+        self.backend.bump(scopes)
+        for scope in scopes:
+            FEED_CACHE_INVALIDATIONS.inc(scope=scope.split(':', 1)[0])
+
+    def clear(self):
+        self.backend.clear()
+
+
+def current_spoiler_signature() -> str:
+    """Spoiler-progress signature of the logged-in viewer"""
+    from flask import session
+    from extensions import db
+    from models import User
+
+    user_id = session.get('user_id')
+    if user_id is None:
+        return ANONYMOUS_SIGNATURE
+    user = db.session.get(User, user_id)
+    return spoiler_signature(user.get_watched_shows() if user else None)
+
+
+def feed_cache_key(endpoint: str, scope: str, signature: str, cursor: str) -> str:
+    return f"{endpoint}|{scope}|{signature}|{cursor}"
+
+
+def feed_cached(view):
+    """
+    Decorator caching a feed view's rendered 200 response. The scope is the
+    pocketshow_id view argument when present, otherwise the all-posts feed.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from flask import current_app, request
+        from services.read_replicas import wrote_recently
+
+        cache = current_app.extensions.get('feed_cache')
+        if cache is None or request.method != 'GET':
+            return view(*args, **kwargs)
+
+        started = time.perf_counter()
+        endpoint = request.endpoint
+        if wrote_recently():
+            # Read-your-writes: even a fresh entry may predate this client's commit in another process
+            response = current_app.make_response(view(*args, **kwargs))
+            response.headers[CACHE_HEADER] = RESULT_BYPASS
+            FEED_CACHE_REQUESTS.inc(endpoint=endpoint, result=RESULT_BYPASS)
+            FEED_CACHE_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, result=RESULT_BYPASS)
+            return response
+
+        scope = pocketshow_scope(kwargs['pocketshow_id']) if 'pocketshow_id' in kwargs else SCOPE_ALL
+        cursor = '&'.join(f"{name}={value}" for name, value in sorted(request.args.items(multi=True)))
+        key = feed_cache_key(endpoint, scope, current_spoiler_signature(), cursor)
+
+        entry, result, version = cache.lookup(key, scope)
+        if entry is None:
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                cache.store(key, response.get_data(), response.status_code, version)
+        else:
+            response = current_app.response_class(entry['body'], status=entry['status'], mimetype='application/json')
+            if result == RESULT_STALE:
+                app = current_app._get_current_object()
+                cache.schedule_refresh(key, _refresher(app, cache, view, args, kwargs, key, scope))
+
+        response.headers[CACHE_HEADER] = result
+        FEED_CACHE_REQUESTS.inc(endpoint=endpoint, result=result)
+        FEED_CACHE_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, result=result)
+        return response
+    return wrapper
+
+
+def _refresher(app, cache: FeedCache, view, args, kwargs, key: str, scope: str):
+    """Re-render a stale entry later, as the same viewer (same path, query string and session cookie)"""
+    from flask import request
+    path, query_string = request.path, request.query_string
+    cookie = request.headers.get('Cookie')
+
+    def refresh():
+        headers = {'Cookie': cookie} if cookie else {}
+        with app.test_request_context(path, query_string=query_string, headers=headers):
+            version = cache.backend.generations(cache.version_scopes(scope))
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                cache.store(key, response.get_data(), response.status_code, version)
+    return refresh
+
+
+# ==================== INVALIDATION EVENTS ====================
+
+def _post_scopes(session, post_id: Optional[int]) -> Set[str]:
+    """Feeds showing a post; every feed when its pocketshow isn't loaded in the session"""
+    from sqlalchemy import inspect
+    from models import Post
+
+    if post_id is None:
+        return {SCOPE_EPOCH}
+    post = session.identity_map.get(inspect(Post).identity_key_from_primary_key((post_id,)))
+    if post is None or post.pocketshow_id is None:
+        return {SCOPE_EPOCH}
+    return {SCOPE_ALL, pocketshow_scope(post.pocketshow_id)}
+
+
+def changed_scopes(session, instances: Iterable[Any]) -> Set[str]:
+    """Feed scopes affected by flushing these instances"""
+    from sqlalchemy import inspect
+    from models import Comment, Post, User, Vote
+
+    scopes: Set[str] = set()
+    for obj in instances:
+        if isinstance(obj, Post):
+            scopes |= {SCOPE_ALL, pocketshow_scope(obj.pocketshow_id)}
+        elif isinstance(obj, Comment):
+            scopes |= _post_scopes(session, obj.post_id)
+        elif isinstance(obj, Vote):
+            if obj.post_id is not None:
+                scopes |= _post_scopes(session, obj.post_id)
+            else:
+                comment = session.identity_map.get(inspect(Comment).identity_key_from_primary_key((obj.comment_id,)))
+                scopes |= _post_scopes(session, comment.post_id if comment is not None else None)
+        elif isinstance(obj, User):
+            # Authors are embedded in posts; watched_shows only changes that user's own signature
+            state = inspect(obj)
+            changed = any(state.attrs[column.key].history.has_changes()
+                          for column in state.mapper.column_attrs if column.key != 'watched_shows')
+            if state.deleted or changed:
+                scopes.add(SCOPE_EPOCH)
+    return scopes
+
+
+def _session_cache(session) -> Optional[FeedCache]:
+    from flask import current_app, has_app_context
+    if not has_app_context():
+        return None
+    return current_app.extensions.get('feed_cache')
+
+
+def _after_flush(session, flush_context):
+    if _session_cache(session) is None:
+        return
+    instances = list(session.new) + list(session.dirty) + list(session.deleted)
+    session.info.setdefault(PENDING_SCOPES_KEY, set()).update(changed_scopes(session, instances))
+
+
+def _do_orm_execute(orm_execute_state):
+    # Bulk INSERT / UPDATE / DELETE statements (services.bulk_ingest) bypass the flush
+    from models import Comment, Post, User, Vote
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Post, Comment, Vote, User):
+        orm_execute_state.session.info.setdefault(PENDING_SCOPES_KEY, set()).add(SCOPE_EPOCH)
+
+
+def _after_commit(session):
+    scopes = session.info.pop(PENDING_SCOPES_KEY, None)
+    cache = _session_cache(session)
+    if scopes and cache is not None:
+        cache.invalidate(scopes)
+
+
+def _after_rollback(session):
+    session.info.pop(PENDING_SCOPES_KEY, None)
+
+
+_events_installed = False
+
+
+def install_invalidation_hooks():
+    """Listen for commits on the app's session class (idempotent)"""
+    global _events_installed
+    if _events_installed:
+        return
+    from sqlalchemy import event
+    from services.read_replicas import RoutingSession
+
+    event.listen(RoutingSession, 'after_flush', _after_flush)
+    event.listen(RoutingSession, 'do_orm_execute', _do_orm_execute)
+    event.listen(RoutingSession, 'after_commit', _after_commit)
+    event.listen(RoutingSession, 'after_rollback', _after_rollback)
+    _events_installed = True
+
+
+def init_feed_cache(app) -> Optional[FeedCache]:
+    """
+    Create the application's feed cache (unless FEED_CACHE_ENABLED is off) and
+    register its invalidation hooks and metrics. The default backend is Redis; without
+    a working FEED_CACHE_REDIS_URL the cache stays off. The in-process LRU is only used
+    when FEED_CACHE_BACKEND is 'memory': other processes' commits never invalidate it,
+    and the app cannot tell how many worker processes it runs in.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The FeedCache (also stored in app.extensions['feed_cache']), or None when disabled
+    """
+    if not app.config.get('FEED_CACHE_ENABLED', True):
+        return None
+
+    backend_name = (app.config.get('FEED_CACHE_BACKEND') or 'redis').lower()
+    if backend_name == 'memory':
+        backend = MemoryFeedBackend(max_entries=app.config.get('FEED_CACHE_MAX_ENTRIES', 2048),
+                                    max_bytes=app.config.get('FEED_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        print("[FEED_CACHE] Using the in-process backend (single app process only)")
+    elif backend_name == 'redis':
+        redis_url = app.config.get('FEED_CACHE_REDIS_URL')
+        if not redis_url:
+            print("[FEED_CACHE] Feed cache disabled: set FEED_CACHE_REDIS_URL, or FEED_CACHE_BACKEND=memory "
+                  "when running a single app process")
+            return None
+        try:
+            backend = RedisFeedBackend(redis_url)
+        except ImportError:
+            print("[FEED_CACHE] ⚠️ Feed cache disabled: FEED_CACHE_REDIS_URL is set but the redis package "
+                  "isn't installed")
+            return None
+        print(f"[FEED_CACHE] ✅ Using Redis backend at {redis_url}")
+    else:
+        raise ValueError(f"Unknown FEED_CACHE_BACKEND: {backend_name}")
+
+    cache = FeedCache(backend,
+                      ttl_seconds=app.config.get('FEED_CACHE_TTL_SECONDS', 60),
+                      stale_seconds=app.config.get('FEED_CACHE_STALE_SECONDS', 0))
+    install_invalidation_hooks()
+    app.extensions['feed_cache'] = cache
+
+    registry.gauge_callback('pocketverse_feed_cache_entries', 'Rendered feeds in the in-process cache',
+                            lambda: len(cache.backend) if isinstance(cache.backend, MemoryFeedBackend) else None)
+    registry.gauge_callback('pocketverse_feed_cache_bytes', 'Bytes of rendered feeds in the in-process cache',
+                            lambda: cache.backend.total_bytes if isinstance(cache.backend, MemoryFeedBackend) else None)
+    return cache
+
+
+def get_feed_cache() -> Optional[FeedCache]:
+    """Feed cache of the current Flask app (None when disabled)"""
+    from flask import current_app
+    return current_app.extensions.get('feed_cache')
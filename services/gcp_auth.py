@@ -0,0 +1,147 @@
+"""
+Shared GCP authentication and HTTP session helpers.
+One TokenManager per service account is shared by every client in the process
+(NanoBananaClient, GeminiLLMClient, ImageGenerator). It refreshes the OAuth token
+proactively shortly before it expires, under a lock, so concurrent callers never
+stampede the token endpoint and requests never go out with an expired token.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CLOUD_PLATFORM_SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
+REFRESH_MARGIN_SECONDS = 300  # Refresh tokens this long before they expire
+DEFAULT_POOL_CONNECTIONS = 10  # Distinct hosts kept in the pool
+DEFAULT_POOL_MAXSIZE = 32  # Keep-alive connections per host (>= batch concurrency)
+
+
+class TokenManager:
+    """Thread-safe, proactively refreshed OAuth token for one service account"""
+
+    def __init__(self, creds_info: Dict[str, Any], scopes=None,
+                 refresh_margin_seconds: int = REFRESH_MARGIN_SECONDS):
+        """
+        Create a token manager. No network call is made until a token is needed.
+
+        Args:
+            creds_info: Service account info dictionary
+            scopes: OAuth scopes (default: cloud-platform)
+            refresh_margin_seconds: Refresh when the token expires within this many seconds
+        """
+        self.creds_info = dict(creds_info)
+        if "private_key" in self.creds_info:
+            # Keys pasted into env/config often carry literal "\n" sequences
+            self.creds_info["private_key"] = self.creds_info["private_key"].replace("\\n", "\n")
+        self.scopes = scopes or CLOUD_PLATFORM_SCOPES
+        self.refresh_margin = timedelta(seconds=refresh_margin_seconds)
+        self.refresh_count = 0
+        self._credentials = None
+        self._lock = threading.Lock()
+
+    @property
+    def credentials(self):
+        """Scoped google-auth credentials object (shared by all users of this manager)"""
+        if self._credentials is None:
+            with self._lock:
+                if self._credentials is None:
+                    from google.oauth2 import service_account
+                    self._credentials = service_account.Credentials.from_service_account_info(
+                        self.creds_info, scopes=self.scopes
+                    )
+        return self._credentials
+
+    def _needs_refresh(self) -> bool:
+        credentials = self._credentials
+        if credentials is None or not credentials.token:
+            return True
+        expiry = credentials.expiry
+        if expiry is None:
+            return False
+        # google-auth stores expiry as a naive UTC datetime
+        return datetime.utcnow() >= expiry - self.refresh_margin
+
+    def get_token(self, force_refresh: bool = False) -> str:
+        """
+        Get a valid access token, refreshing it if missing or close to expiry.
+
+        Args:
+            force_refresh: Refresh even if the cached token looks valid (e.g. after a 401)
+
+        Returns:
+            Bearer token string
+        """
+        credentials = self.credentials
+        if not force_refresh and not self._needs_refresh():
+            return credentials.token
+
+        with self._lock:
+            # Another thread may have refreshed while we waited for the lock
+            if force_refresh or self._needs_refresh():
+                from google.auth.transport.requests import Request as GoogleAuthRequest
+                credentials.refresh(GoogleAuthRequest())
+                self.refresh_count += 1
+            return credentials.token
+
+    def auth_headers(self, force_refresh: bool = False) -> Dict[str, str]:
+        """Authorization + JSON content-type headers for REST calls"""
+        return {
+            "Authorization": f"Bearer {self.get_token(force_refresh=force_refresh)}",
+            "Content-Type": "application/json"
+        }
+
+
+_token_managers: Dict[str, TokenManager] = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_token_manager(creds_info: Dict[str, Any], scopes=None) -> TokenManager:
+    """
+    Get the process-wide TokenManager for a service account.
+
+    Args:
+        creds_info: Service account info dictionary
+        scopes: OAuth scopes (default: cloud-platform)
+
+    Returns:
+        Shared TokenManager instance
+    """
+    key = "|".join([
+        creds_info.get("client_email", ""),
+        creds_info.get("private_key_id", ""),
+        ",".join(scopes or CLOUD_PLATFORM_SCOPES)
+    ])
+    with _token_managers_lock:
+        manager = _token_managers.get(key)
+        if manager is None:
+            manager = TokenManager(creds_info, scopes=scopes)
+            _token_managers[key] = manager
+        return manager
+
+
+def create_pooled_session(pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                          pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                          headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """
+    Create a keep-alive requests.Session with a connection pool sized for concurrent use.
+
+    Args:
+        pool_connections: Number of per-host pools to cache
+        pool_maxsize: Connections kept alive per host; should be >= the number of threads
+            sharing the session, otherwise extra connections are opened and thrown away
+        headers: Default headers for every request (optional)
+
+    Returns:
+        Configured session (retries are left to the caller)
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                          pool_block=False, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
@@ -0,0 +1,168 @@
+"""
+Idempotency-Key support for write endpoints.
+A client that may retry a POST (timeouts, 5xx, dropped connections) sends a unique
+Idempotency-Key header. The first request with a key runs normally and its response
+is stored; a retry with the same key gets the stored response back instead of
+creating a second post / comment or toggling a vote twice.
+
+Keys are scoped per client: the logged-in user, otherwise an id kept in the
+anonymous client's session cookie, so two clients never see each other's responses.
+While the first request runs, its row holds a lease (created_at + IDEMPOTENCY_LEASE_SECONDS)
+that a background thread renews every third of the lease for as long as the view runs,
+so slow views (AI post and comment generation) are never taken over. Retries get 409
+with Retry-After until it completes; once the lease has expired (the process died
+mid-request and stopped renewing it) the next retry takes the key over and runs the request.
+"""
+
+import hashlib
+import math
+import threading
+import uuid
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import current_app, jsonify, make_response, request, session
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+CLIENT_SESSION_KEY = 'idempotency_client'
+
+
+def _scoped_key(key: str) -> str:
+    """Stored key: the client's key namespaced by user (or anonymous session), hashed to a fixed length"""
+    user_id = session.get('user_id')
+    if user_id is not None:
+        scope = f"user:{user_id}"
+    else:
+        if CLIENT_SESSION_KEY not in session:
+            session[CLIENT_SESSION_KEY] = uuid.uuid4().hex
+        scope = f"client:{session[CLIENT_SESSION_KEY]}"
+    return hashlib.sha256(f"{scope}\n{key}".encode('utf-8')).hexdigest()
+
+
+def _take_over_expired(key: str, lease_seconds: int) -> bool:
+    """Claim an in-progress key whose lease expired (atomic: only one retry wins)"""
+    now = datetime.utcnow()
+    claimed = IdempotencyKey.query.filter(
+        IdempotencyKey.key == key,
+        IdempotencyKey.status_code.is_(None),
+        IdempotencyKey.created_at < now - timedelta(seconds=lease_seconds)
+    ).update({'created_at': now}, synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def _renew_lease(app, key: str, lease_seconds: int, stop: threading.Event):
+    """Push the lease of an in-progress key forward until stop is set (runs in its own thread and session)"""
+    interval = max(1.0, lease_seconds / 3)
+    while not stop.wait(interval):
+        try:
+            with app.app_context():
+                IdempotencyKey.query.filter(
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.status_code.is_(None)
+                ).update({'created_at': datetime.utcnow()}, synchronize_session=False)
+                db.session.commit()
+        except Exception as e:
+            # A missed renewal is retried on the next tick, well before the lease runs out
+            print(f"[IDEMPOTENCY] ⚠️ Lease renewal failed: {e}")
+
+
+def _request_hash() -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def idempotent(view):
+    """
+    Decorator replaying the stored response for a repeated Idempotency-Key.
+
+    Responses below 500 are stored; server errors release the key so the client can retry.
+    A key reused for a different request gets 422, and a retry that arrives while the
+    first request is still running (within its lease) gets 409.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        client_key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not client_key:
+            return view(*args, **kwargs)
+        if len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+        key = _scoped_key(client_key)
+        lease_seconds = current_app.config.get('IDEMPOTENCY_LEASE_SECONDS', 60)
+        request_hash = _request_hash()
+        record = db.session.get(IdempotencyKey, key)
+        if record is None:
+            db.session.add(IdempotencyKey(key=key, request_hash=request_hash))
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another request claimed the key between our read and insert
+                db.session.rollback()
+                record = db.session.get(IdempotencyKey, key)
+
+        if record is not None:
+            if record.request_hash != request_hash:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used for a different request'}), 422
+            if record.status_code is None and not _take_over_expired(key, lease_seconds):
+                db.session.refresh(record)
+                if record.status_code is None:
+                    remaining = lease_seconds - (datetime.utcnow() - record.created_at).total_seconds()
+                    return (jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409,
+                            {'Retry-After': str(max(1, math.ceil(remaining)))})
+            if record.status_code is not None:
+                response = make_response(record.response_body or '', record.status_code)
+                response.mimetype = 'application/json'
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            # Lease taken over: run the request as the new owner of the key
+
+        stop_renewing = threading.Event()
+        threading.Thread(target=_renew_lease, name='idempotency-lease', daemon=True,
+                         args=(current_app._get_current_object(), key, lease_seconds, stop_renewing)).start()
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            _release(key)
+            raise
+        finally:
+            stop_renewing.set()
+
+        if response.status_code >= 500:
+            _release(key)
+        else:
+            IdempotencyKey.query.filter_by(key=key).update({
+                'status_code': response.status_code,
+                'response_body': response.get_data(as_text=True)
+            }, synchronize_session=False)
+            db.session.commit()
+        return response
+
+    return wrapper
+
+
+def _release(key: str):
+    IdempotencyKey.query.filter_by(key=key).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def purge_expired_keys(max_age_seconds: int = 24 * 3600) -> int:
+    """
+    Delete stored responses older than max_age_seconds. Must be called inside an app context.
+
+    Returns:
+        Number of keys deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age_seconds)
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
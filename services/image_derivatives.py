@@ -0,0 +1,300 @@
+"""
+Resized / re-encoded variants of blob store images.
+Feeds ask for /uploads/<sha256>.png?w=320&fmt=webp instead of the 1-2 MB original.
+Variants are rendered with Pillow on first request (or ahead of time in a small
+background pool when an image is saved), written next to each other in a
+derivative cache directory and evicted least-recently-used once the cache grows
+past its byte budget. Widths are snapped to a fixed ladder so the cache stays small
+and browsers / CDNs share entries.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+from services.blob_store import parse_blob_name
+
+# Width ladder requested sizes are snapped up to (originals are never upscaled)
+SNAP_WIDTHS = [160, 320, 640, 960, 1280, 1920]
+
+# Output formats: Pillow encoder name, extension, mime type, encoder options
+FORMATS = {
+    'webp': ('WEBP', 'webp', 'image/webp', {'quality': 80, 'method': 4}),
+    'avif': ('AVIF', 'avif', 'image/avif', {'quality': 60}),
+    'jpeg': ('JPEG', 'jpg', 'image/jpeg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'png': ('PNG', 'png', 'image/png', {'optimize': True}),
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+
+# Original image: a local path, or a function opening it (remote media stores)
+ImageSource = Union[str, Callable[[], BinaryIO]]
+
+# Variants rendered in the background as soon as an image is stored
+DEFAULT_PRECOMPUTE = [(320, 'webp'), (640, 'webp'), (1280, 'webp')]
+
+
+def snap_width(width: int) -> int:
+    """Round a requested width up to the nearest ladder step (capped at the largest step)"""
+    for step in SNAP_WIDTHS:
+        if width <= step:
+            return step
+    return SNAP_WIDTHS[-1]
+
+
+def format_supported(fmt: str) -> bool:
+    """Whether the installed Pillow can encode the format (AVIF needs Pillow >= 11.3 built with libavif)"""
+    if fmt == 'avif':
+        try:
+            from PIL import features
+            return bool(features.check('avif'))
+        except Exception:
+            return False
+    return fmt in FORMATS
+
+
+def negotiate_format(accept_header: Optional[str]) -> str:
+    """Pick the best output format for fmt=auto from the request's Accept header"""
+    accept = accept_header or ''
+    if 'image/avif' in accept and format_supported('avif'):
+        return 'avif'
+    if 'image/webp' in accept:
+        return 'webp'
+    return 'jpeg'
+
+
+def variant_url(image_url: Optional[str], width: int, fmt: str = 'auto') -> Optional[str]:
+    """
+    URL of a resized variant of a blob store image.
+
+    Args:
+        image_url: Original image URL (external or legacy URLs are returned unchanged)
+        width: Desired display width in CSS pixels
+        fmt: Output format, or 'auto' to negotiate from the Accept header
+
+    Returns:
+        Variant URL
+    """
+    if not image_url or not image_url.startswith('/uploads/'):
+        return image_url
+    if not parse_blob_name(image_url.rsplit('/', 1)[-1].split('?', 1)[0]):
+        return image_url
+    return f"{image_url.split('?', 1)[0]}?w={snap_width(width)}&fmt={fmt}"
+
+
+class DerivativeCache:
+    """Disk cache of image variants with an LRU byte cap"""
+
+    def __init__(self, root: str, max_bytes: int = 512 * 1024 * 1024, workers: int = 2):
+        """
+        Args:
+            root: Directory holding the variants (created if missing)
+            max_bytes: Total size the cache is trimmed back to
+            workers: Background threads for precomputing variants
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # path -> size, oldest first
+        self._total_bytes = 0
+        self._in_flight: Dict[str, threading.Event] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-derivative')
+        self.hits = 0
+        self.misses = 0
+        self._load_existing()
+
+    def _load_existing(self):
+        """Index variants left by a previous process, oldest access first"""
+        found = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_atime, path, stat.st_size))
+        for _, path, size in sorted(found):
+            self._entries[path] = size
+            self._total_bytes += size
+
+    def path_for(self, sha256: str, width: int, fmt: str) -> str:
+        extension = FORMATS[fmt][1]
+        return os.path.join(self.root, sha256[:2], f"{sha256}_w{width}.{extension}")
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def get(self, source: ImageSource, sha256: str, width: int, fmt: str) -> Tuple[str, str]:
+        """
+        Path of a variant, rendering it first if it is not cached.
+        Concurrent requests for the same variant wait for a single render.
+
+        Args:
+            source: Original image (path or opener)
+            sha256: Content hash of the original
+            width: Target width (snapped to the ladder)
+            fmt: Output format key ('webp', 'avif', 'jpeg', 'png')
+
+        Returns:
+            (variant path, mime type)
+        """
+        fmt = FORMAT_ALIASES.get(fmt, fmt)
+        if not format_supported(fmt):
+            raise ValueError(f"Unsupported image format: {fmt}")
+        width = snap_width(width)
+        path = self.path_for(sha256, width, fmt)
+        mime_type = FORMATS[fmt][2]
+
+        while True:
+            with self._lock:
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+                    self.hits += 1
+                    return path, mime_type
+                pending = self._in_flight.get(path)
+                if pending is None:
+                    pending = threading.Event()
+                    self._in_flight[path] = pending
+                    self.misses += 1
+                    break
+            pending.wait()
+            if not os.path.exists(path):
+                # The other render failed; try ourselves
+                continue
+
+        try:
+            size = self._render(source, path, width, fmt)
+            with self._lock:
+                self._entries[path] = size
+                self._total_bytes += size
+            self._evict()
+        finally:
+            with self._lock:
+                self._in_flight.pop(path, None)
+            pending.set()
+        return path, mime_type
+
+    def _render(self, source: ImageSource, path: str, width: int, fmt: str) -> int:
+        from PIL import Image
+
+        encoder, _, _, options = FORMATS[fmt]
+        if callable(source):
+            with source() as f:
+                return self._render_image(Image.open(f), path, width, encoder, options)
+        return self._render_image(Image.open(source), path, width, encoder, options)
+
+    def _render_image(self, image, path: str, width: int, encoder: str, options: Dict) -> int:
+        from PIL import Image
+
+        with image:
+            image.draft('RGB', (width, width))  # Lets JPEG sources decode at reduced size
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+            if encoder == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            elif image.mode == 'P':
+                image = image.convert('RGBA')
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.part"
+            try:
+                image.save(temp_path, encoder, **options)
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return os.path.getsize(path)
+
+    def _evict(self):
+        """Delete least recently used variants until the cache fits its byte cap"""
+        removed = []
+        with self._lock:
+            while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+                path, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                removed.append(path)
+        for path in removed:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if removed:
+            print(f"[DERIVATIVES] Evicted {len(removed)} variant(s), cache now {self._total_bytes / 1e6:.1f} MB")
+
+    def discard(self, sha256: str) -> int:
+        """
+        Delete every cached variant of an image (e.g. when the original is evicted).
+
+        Returns:
+            Bytes freed
+        """
+        prefix = os.path.join(self.root, sha256[:2], f"{sha256}_w")
+        with self._lock:
+            paths = [path for path in self._entries if path.startswith(prefix)]
+            freed = 0
+            for path in paths:
+                size = self._entries.pop(path)
+                self._total_bytes -= size
+                freed += size
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return freed
+
+    def precompute(self, source: ImageSource, sha256: str,
+                   variants: Optional[List[Tuple[int, str]]] = None):
+        """
+        Render the common variants of a newly stored image in the background.
+
+        Args:
+            source: Original image (path or opener)
+            sha256: Content hash of the original
+            variants: (width, format) pairs (default: DEFAULT_PRECOMPUTE)
+        """
+        for width, fmt in variants or DEFAULT_PRECOMPUTE:
+            self._executor.submit(self._precompute_one, source, sha256, width, fmt)
+
+    def _precompute_one(self, source: ImageSource, sha256: str, width: int, fmt: str):
+        try:
+            self.get(source, sha256, width, fmt)
+        except Exception as e:
+            print(f"[DERIVATIVES] ⚠️ Could not precompute {sha256[:12]} w={width} {fmt}: {e}")
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def init_image_derivatives(app) -> DerivativeCache:
+    """
+    Create the application's derivative cache.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The DerivativeCache (also stored in app.extensions['image_derivatives'])
+    """
+    root = app.config.get('DERIVATIVE_FOLDER') or os.path.join(app.config['UPLOAD_FOLDER'], 'derivatives')
+    cache = DerivativeCache(
+        root,
+        max_bytes=app.config.get('DERIVATIVE_CACHE_MAX_BYTES', 512 * 1024 * 1024),
+        workers=app.config.get('DERIVATIVE_WORKERS', 2)
+    )
+    app.extensions['image_derivatives'] = cache
+    app.add_template_filter(variant_url, 'image_variant')
+    return cache
+
+
+def get_image_derivatives() -> DerivativeCache:
+    """Derivative cache of the current Flask app"""
+    from flask import current_app
+    return current_app.extensions['image_derivatives']
@@ -3,13 +3,12 @@ import os
 import base64
 import json
 import re
-from google.oauth2 import service_account  # ← Use this instead
 from typing import Optional, Dict, Any
-import vertexai
-from vertexai.preview.vision_models import ImageGenerationModel
+from services.instrumentation import traced
+from services.providers import ImageProvider
 
 GCP_CREDS = {}
-class ImageGenerator:
+class ImageGenerator(ImageProvider):
     """Service for generating images using Google Imagen 3 via Vertex AI"""
     
     def __init__(self, provider: str = "google", canon_directory: Optional[str] = None):
@@ -33,26 +32,13 @@ class ImageGenerator:
     def initialize_client(self):
         print(f"[IMG_GEN] Initializing Vertex AI...")
         
-        # Clean existing credentials
-        if "GOOGLE_APPLICATION_CREDENTIALS" in os.environ:
-            del os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
-            print("[IMG_GEN] Cleaned existing GOOGLE_APPLICATION_CREDENTIALS path.")
-        
         try:
-            # Parse the credentials
-            # gcp_creds = json.loads(gcp_creds_raw) if isinstance(gcp_creds_raw, str) else gcp_creds_raw
-            gcp_creds = GCP_CREDS
-            # Repair the private key
-            if "private_key" in gcp_creds:
-                gcp_creds["private_key"] = gcp_creds["private_key"].replace("\\n", "\n")
-            
-            # ✅ FIX: Use google.oauth2.service_account.Credentials instead
-            scoped_credentials = service_account.Credentials.from_service_account_info(
-                gcp_creds,
-                scopes=['https://www.googleapis.com/auth/cloud-platform']  # Add required scope
-            )
+            # Shared, proactively refreshed credentials (same instance the LLM client uses)
+            from services.gcp_auth import get_token_manager
+            scoped_credentials = get_token_manager(GCP_CREDS).credentials
             
             # Initialize Vertex AI with proper credentials
+            import vertexai
             vertexai.init(
                 project=self.project_id,
                 location=self.location,
@@ -70,6 +56,7 @@ class ImageGenerator:
         enhanced_prompt = self._build_enhanced_prompt(prompt, story_context)
         return self.generate_nano_banana_image(enhanced_prompt, **kwargs)
 
+    @traced('canon.context')
     def _load_promocanon_context(self, show_name: Optional[str] = None, character_name: Optional[str] = None) -> Dict[str, Any]:
         """
         Load PromoCanon data into usable context for the show.
@@ -155,19 +142,22 @@ class ImageGenerator:
         print(f"[IMG_GEN] Enhanced Prompt (length: {len(enhanced)}): {enhanced}")
         return enhanced
 
+    @traced('image.generate', provider='imagen')
     def generate_nano_banana_image(self, prompt: str, aspect_ratio=None, input_images=None, 
-                                   model_id=None, resolution=None, num_images=1):
+                                   model_id=None, resolution=None, num_images=1, seed=None):
         """
         Generate images using Google's Imagen 3 on Vertex AI.
-        Returns: dict with "success", "image_base64", and "extra_info"
+        A fixed seed makes the output reproducible (Imagen requires the watermark off for seeds).
+        Returns: dict with "success", "image_bytes" (raw image, not base64), and "extra_info"
         """
         print(f"[IMG_GEN] Sending request to Imagen 3 using model_id={model_id or 'imagen-3.0-generate-001'}...")
         
         model_to_use = model_id or "imagen-3.0-generate-001"
-        images_base64 = []
+        images = []
         extra_info = {}
         
         try:
+            from vertexai.preview.vision_models import ImageGenerationModel
             model = ImageGenerationModel.from_pretrained(model_to_use)
             
             gen_kwargs = {
@@ -180,6 +170,9 @@ class ImageGenerator:
             
             if resolution:
                 gen_kwargs["resolution"] = resolution
+            if seed is not None:
+                gen_kwargs["seed"] = seed
+                gen_kwargs["add_watermark"] = False
 
             print(f"[IMG_GEN] Gen kwargs: {gen_kwargs}")
             
@@ -190,21 +183,22 @@ class ImageGenerator:
                 for img_obj in response.images:
                     img_bytes = getattr(img_obj, "_image_bytes", None)
                     if img_bytes:
-                        images_base64.append(base64.b64encode(img_bytes).decode('utf-8'))
+                        images.append(img_bytes)
                 
-                if images_base64:
-                    print(f"[IMG_GEN] ✅ Success! Received {len(images_base64)} image(s).")
+                if images:
+                    print(f"[IMG_GEN] ✅ Success! Received {len(images)} image(s).")
                     extra_info = {
                         "provider": "google_imagen",
                         "prompt": prompt,
                         "aspect_ratio": aspect_ratio or "1:1",
                         "model_id": model_to_use,
                         "num_images": num_images,
+                        "seed": seed,
                     }
                     
                     return {
                         "success": True,
-                        "image_base64": images_base64[0],
+                        "image_bytes": images[0],
                         "extra_info": extra_info
                     }
                 else:
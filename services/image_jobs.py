@@ -0,0 +1,257 @@
+"""
+Asynchronous image generation jobs.
+Requests only insert an ImageJob row and return its id; a small worker pool runs
+the (slow) Imagen / Gemini call in the background, stores the image in the blob
+store and records the result on the job. Clients poll the job or subscribe to its
+SSE stream.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from extensions import db
+from models import ImageJob
+from services.blob_store import compute_prompt_hash
+from services.instrumentation import profile
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CANON_DIRECTORY = os.path.join(PROJECT_ROOT, 'PromoCanon_Show_33adb096b04ecd6b23ce9341160b199f2d489311_1_100')
+
+
+def build_story_context(user, plot_points: str = '', subplots: str = '', cliffhangers: str = '') -> Dict[str, Any]:
+    """
+    Build the story context for an image prompt from a user's character data and form fields.
+
+    Args:
+        user: User requesting the image (may be None)
+        plot_points: Comma-separated plot points
+        subplots: Comma-separated subplots
+        cliffhangers: Comma-separated cliffhangers
+
+    Returns:
+        Story context dictionary for ImageGenerator.generate_image
+    """
+    story_context = {}
+    if user and user.is_official:
+        char_data = user.get_character_data()
+        if char_data:
+            story_context = {
+                'show_name': char_data.get('show_name'),
+                'character_details': {
+                    'name': char_data.get('character_name'),
+                    'bio': char_data.get('bio'),
+                    'personality': char_data.get('personality')
+                }
+            }
+
+    if plot_points:
+        story_context['plot_points'] = [p.strip() for p in plot_points.split(',') if p.strip()]
+    if subplots:
+        story_context['subplots'] = [s.strip() for s in subplots.split(',') if s.strip()]
+    if cliffhangers:
+        story_context['cliffhangers'] = [c.strip() for c in cliffhangers.split(',') if c.strip()]
+    return story_context
+
+
+class ImageJobQueue:
+    """Worker pool executing ImageJob rows"""
+
+    def __init__(self, app, max_workers: int = 2):
+        """
+        Args:
+            app: Flask application (workers push its app context)
+            max_workers: Number of images rendered concurrently
+        """
+        self.app = app
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='image-job')
+        self.default_provider = app.config.get('DEFAULT_IMAGE_PROVIDER', 'nanobanana')
+        self.allowed_providers = set(app.config.get('IMAGE_PROVIDERS') or [self.default_provider])
+        self._generators: Dict[str, Any] = {}
+        self._generators_lock = threading.Lock()
+
+    def create_job(self, prompt: str, story_context: Optional[Dict[str, Any]] = None,
+                   user_id: Optional[int] = None, provider: Optional[str] = None, seed: Optional[int] = None,
+                   regenerate: bool = False) -> ImageJob:
+        """
+        Persist a new job and schedule it. Must be called inside an app context.
+        With a seed, an identical earlier generation (same prompt, context, provider and seed)
+        is reused from the blob store unless regenerate is set.
+
+        Returns:
+            The queued ImageJob
+
+        Raises:
+            ValueError: provider isn't one of IMAGE_PROVIDERS
+        """
+        provider = provider or self.default_provider
+        if provider not in self.allowed_providers:
+            raise ValueError(f"Unknown image provider: {provider}")
+        job = ImageJob(
+            prompt=prompt,
+            user_id=user_id,
+            provider=provider,
+            seed=seed,
+            regenerate=bool(regenerate),
+            status=ImageJob.STATUS_QUEUED
+        )
+        job.set_story_context(story_context)
+        db.session.add(job)
+        db.session.commit()
+        self.submit(job.id)
+        return job
+
+    def submit(self, job_id: str):
+        """Schedule an existing job on the worker pool"""
+        self._executor.submit(self._run, job_id)
+
+    def resume_pending(self, stale_after_seconds: int = 900) -> int:
+        """
+        Re-queue jobs left behind by a process that died: queued jobs, and running jobs
+        started more than stale_after_seconds ago (younger ones may still be rendering in
+        a live worker). Queued jobs are safe to submit again, _run claims each job once.
+
+        Args:
+            stale_after_seconds: Age after which a running job is considered abandoned
+
+        Returns:
+            Number of jobs re-queued
+        """
+        from datetime import timedelta
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        with self.app.app_context():
+            # Conditional UPDATE, so a job finishing meanwhile is left alone
+            reset = ImageJob.query.filter(
+                ImageJob.status == ImageJob.STATUS_RUNNING,
+                db.or_(ImageJob.started_at.is_(None), ImageJob.started_at < cutoff)
+            ).update({'status': ImageJob.STATUS_QUEUED, 'started_at': None}, synchronize_session=False)
+            db.session.commit()
+            job_ids = [job_id for (job_id,) in ImageJob.query
+                       .filter_by(status=ImageJob.STATUS_QUEUED)
+                       .order_by(ImageJob.created_at.asc())
+                       .with_entities(ImageJob.id)]
+        for job_id in job_ids:
+            self.submit(job_id)
+        if job_ids:
+            print(f"[IMAGE JOBS] Re-queued {len(job_ids)} unfinished job(s) ({reset} abandoned while running)")
+        return len(job_ids)
+
+    def _get_generator(self, provider: str):
+        """Reuse one image generator per provider (initialization loads the canon and SDK clients)"""
+        with self._generators_lock:
+            generator = self._generators.get(provider)
+            if generator is None:
+                from services.providers import create_image_generator
+                generator = create_image_generator(provider, canon_directory=CANON_DIRECTORY)
+                self._generators[provider] = generator
+            return generator
+
+    def _run(self, job_id: str):
+        with self.app.app_context(), profile('image_job', job=job_id):
+            # Claim the job atomically so a job is never run twice (e.g. by two processes)
+            claimed = ImageJob.query.filter_by(id=job_id, status=ImageJob.STATUS_QUEUED).update(
+                {'status': ImageJob.STATUS_RUNNING, 'started_at': datetime.utcnow()},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if not claimed:
+                return
+            job = db.session.get(ImageJob, job_id)
+            print(f"[IMAGE JOBS] Running job {job_id} (provider: {job.provider})")
+
+            try:
+                from services.blob_store import get_blob_store
+                blob_store = get_blob_store()
+                story_context = job.get_story_context()
+                hash_params = {'provider': job.provider, 'seed': job.seed, 'story_context': story_context}
+                prompt_hash = compute_prompt_hash(job.prompt, hash_params)
+
+                # Seeded generations are deterministic, so an identical request can reuse the stored image
+                blob = None
+                if job.seed is not None and not job.regenerate:
+                    blob = blob_store.lookup_prompt(prompt_hash)
+                    job.cache_hit = blob is not None
+
+                error = None
+                if blob is None:
+                    generator = self._get_generator(job.provider)
+                    result = generator.generate_image(job.prompt, story_context, seed=job.seed)
+                    image = result.get('image_bytes') if result.get('success') else None
+                    if image:
+                        # Raw bytes or the stream the provider decoded into; never round-tripped through base64
+                        if isinstance(image, (bytes, bytearray)):
+                            blob = blob_store.put_bytes(bytes(image), 'png')
+                        else:
+                            blob = blob_store.put_stream(image, 'png')
+                        blob_store.record_prompt(prompt_hash, blob, provider=job.provider,
+                                                 seed=job.seed, params=hash_params)
+                        from services.image_derivatives import get_image_derivatives
+                        get_image_derivatives().precompute(blob_store.source_for(blob.sha256, blob.extension),
+                                                           blob.sha256)
+                    else:
+                        error = result.get('error') or 'No image data received from generator'
+
+                if blob is not None:
+                    job.result_filename = blob.filename
+                    job.result_url = blob.url
+                    job.status = ImageJob.STATUS_COMPLETED
+                    print(f"[IMAGE JOBS] ✅ Job {job_id} completed: {blob.filename}"
+                          f"{' (reused)' if job.cache_hit else ''}")
+                else:
+                    job.status = ImageJob.STATUS_FAILED
+                    job.error = error
+                    print(f"[IMAGE JOBS] ❌ Job {job_id} failed: {job.error}")
+            except Exception as e:
+                db.session.rollback()
+                job = db.session.get(ImageJob, job_id)
+                job.status = ImageJob.STATUS_FAILED
+                job.error = str(e)
+                print(f"[IMAGE JOBS] ❌ Job {job_id} raised: {e}")
+                import traceback
+                traceback.print_exc()
+
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+def init_image_jobs(app) -> ImageJobQueue:
+    """
+    Create the application's job queue and register the `flask resume-image-jobs` command.
+    Unfinished jobs are not resumed here: create_app() runs in every web worker and CLI
+    command, and each of them would re-queue (and render again) the others' running jobs.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The ImageJobQueue (also stored in app.extensions['image_jobs'])
+    """
+    import click
+
+    queue = ImageJobQueue(app, max_workers=app.config.get('IMAGE_JOB_WORKERS', 2))
+    app.extensions['image_jobs'] = queue
+
+    @app.cli.command('resume-image-jobs')
+    @click.option('--stale-after', type=int, default=None,
+                  help='Seconds after which a running job is abandoned (default: IMAGE_JOB_STALE_SECONDS)')
+    def resume_image_jobs_command(stale_after):
+        """Run jobs left queued, or running past the stale timeout, by a dead process (waits for them)."""
+        if stale_after is None:
+            stale_after = app.config.get('IMAGE_JOB_STALE_SECONDS', 900)
+        count = queue.resume_pending(stale_after_seconds=stale_after)
+        queue.shutdown(wait=True)
+        click.echo(f"Resumed {count} job(s)")
+
+    return queue
+
+
+def get_image_job_queue() -> ImageJobQueue:
+    """Job queue of the current Flask app"""
+    from flask import current_app
+    return current_app.extensions['image_jobs']
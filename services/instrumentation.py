@@ -0,0 +1,468 @@
+"""
+Request-level performance instrumentation.
+Every request gets a profile: wall time, the number of SQL statements it ran and
+the time spent in them (SQLAlchemy cursor events), and a tree of nested spans for
+the slow parts (LLM calls, image generation, PromoCanon loads). Totals are kept in
+a small in-process metrics registry exposed in Prometheus text format on /metrics,
+a Server-Timing header shows the breakdown in the browser's network panel, and
+requests slower than SLOW_REQUEST_MS are logged with their span tree, which is
+where N+1 query regressions and slow prompts show up.
+
+Spans work outside requests too: background work (image jobs, comment generation)
+opens its own profile with `profile()`, and a span with no profile around it only
+feeds the duration histogram.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+# ==================== METRICS REGISTRY ====================
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        return self._values.get(key, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # label values -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named metrics plus gauges read from callbacks at scrape time"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._gauges: Dict[str, Tuple[str, Callable[[], Optional[float]]]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Counter(name, documentation, labelnames)
+            return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            return metric
+
+    def gauge_callback(self, name: str, documentation: str, read: Callable[[], Optional[float]]):
+        """
+        Register a gauge whose value is read when /metrics is scraped.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            read: Returns the current value (None skips the sample)
+        """
+        with self._lock:
+            self._gauges[name] = (documentation, read)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+            gauges = list(self._gauges.items())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        for name, (documentation, read) in gauges:
+            try:
+                value = read()
+            except Exception:
+                value = None
+            if value is None:
+                continue
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUESTS = registry.counter(
+    'pocketverse_http_requests_total', 'HTTP requests handled', ('method', 'endpoint', 'status'))
+HTTP_DURATION = registry.histogram(
+    'pocketverse_http_request_duration_seconds', 'Wall time per HTTP request', ('method', 'endpoint'))
+SQL_QUERIES = registry.counter(
+    'pocketverse_sql_queries_total', 'SQL statements executed', ('endpoint',))
+SQL_DURATION = registry.counter(
+    'pocketverse_sql_duration_seconds_total', 'Time spent executing SQL statements', ('endpoint',))
+SQL_PER_REQUEST = registry.histogram(
+    'pocketverse_sql_queries_per_request', 'SQL statements per HTTP request', ('endpoint',),
+    buckets=QUERY_COUNT_BUCKETS)
+SPAN_DURATION = registry.histogram(
+    'pocketverse_span_duration_seconds', 'Duration of traced operations (LLM, image, canon loads)', ('span',))
+SPAN_ERRORS = registry.counter(
+    'pocketverse_span_errors_total', 'Traced operations that raised', ('span',))
+SLOW_REQUESTS = registry.counter(
+    'pocketverse_slow_requests_total', 'Requests slower than SLOW_REQUEST_MS', ('endpoint',))
+
+
+# ==================== SPANS ====================
+
+class Span:
+    """A timed operation with child spans and the SQL it ran directly"""
+
+    __slots__ = ('name', 'attrs', 'started', 'duration', 'children', 'sql_count', 'sql_seconds', 'error')
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.started = time.perf_counter()
+        self.duration = None
+        self.children: List['Span'] = []
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.error = None
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def total_sql(self) -> Tuple[int, float]:
+        """SQL statements and seconds in this span and all of its children"""
+        count, seconds = self.sql_count, self.sql_seconds
+        for child in self.children:
+            child_count, child_seconds = child.total_sql()
+            count += child_count
+            seconds += child_seconds
+        return count, seconds
+
+    def format_tree(self, depth: int = 0) -> List[str]:
+        """Indented one-line-per-span rendering for logs"""
+        duration_ms = (self.duration if self.duration is not None else time.perf_counter() - self.started) * 1000
+        line = f"{'  ' * depth}{self.name} {duration_ms:.1f} ms"
+        if self.sql_count:
+            line += f", {self.sql_count} SQL ({self.sql_seconds * 1000:.1f} ms)"
+        if self.attrs:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in self.attrs.items())
+        if self.error:
+            line += f" ! {self.error}"
+        lines = [line]
+        for child in self.children:
+            lines.extend(child.format_tree(depth + 1))
+        return lines
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('pocketverse_current_span', default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Innermost open span of the current request / profiled task"""
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Span]:
+    """
+    Time a block as a child of the current span.
+
+    Args:
+        name: Span name, e.g. 'llm.generate' (also the metrics label, so keep it low-cardinality)
+        **attrs: Extra details shown in slow-request logs (model, provider, ...)
+    """
+    parent = _current_span.get()
+    node = Span(name, attrs)
+    if parent is not None:
+        parent.children.append(node)
+    token = _current_span.set(node)
+    try:
+        yield node
+    except Exception as e:
+        node.error = type(e).__name__
+        SPAN_ERRORS.inc(span=name)
+        raise
+    finally:
+        node.finish()
+        _current_span.reset(token)
+        SPAN_DURATION.observe(node.duration, span=name)
+
+
+def traced(name: str, **attrs) -> Callable:
+    """Decorator form of span()"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attrs):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile(name: str, slow_ms: Optional[float] = None, **attrs) -> Iterator[Span]:
+    """
+    Root span for work outside a request (background jobs, CLI commands).
+
+    Args:
+        name: Span name
+        slow_ms: Log the span tree when the work takes longer than this
+        **attrs: Extra details for the log
+    """
+    root = Span(name, attrs)
+    token = _current_span.set(root)
+    try:
+        yield root
+    finally:
+        root.finish()
+        _current_span.reset(token)
+        SPAN_DURATION.observe(root.duration, span=name)
+        if slow_ms is not None and root.duration * 1000 >= slow_ms:
+            _log_slow(root)
+
+
+def _log_slow(root: Span):
+    sql_count, sql_seconds = root.total_sql()
+    print(f"[PERF] 🐢 Slow {root.name}: {root.duration * 1000:.1f} ms, "
+          f"{sql_count} SQL ({sql_seconds * 1000:.1f} ms)")
+    for line in root.format_tree()[1:]:
+        print(f"[PERF]   {line}")
+
+
+# ==================== SQL HOOKS ====================
+
+_sql_hooks_installed = False
+_sql_hooks_lock = threading.Lock()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('pocketverse_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('pocketverse_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    node = _current_span.get()
+    if node is not None:
+        node.sql_count += 1
+        node.sql_seconds += elapsed
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None:
+        starts = conn.info.get('pocketverse_query_start')
+        if starts:
+            starts.pop()
+
+
+def install_sql_hooks():
+    """Count SQL statements on every engine (primary and any replicas) into the current span"""
+    global _sql_hooks_installed
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    with _sql_hooks_lock:
+        if _sql_hooks_installed:
+            return
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _sql_hooks_installed = True
+
+
+# ==================== FLASK MIDDLEWARE ====================
+
+def _endpoint_label() -> str:
+    from flask import request
+    return request.endpoint or 'unmatched'
+
+
+def _start_request():
+    from flask import g, request
+    root = Span(f"{request.method} {request.path}")
+    g._perf_root = root
+    g._perf_token = _current_span.set(root)
+
+
+def _finish_request(status: int) -> Optional[Span]:
+    from flask import current_app, g, request
+
+    root = g.pop('_perf_root', None)
+    if root is None:
+        return None
+    token = g.pop('_perf_token', None)
+    if token is not None:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            _current_span.set(None)  # Finished in a different context than it started
+    root.finish()
+
+    endpoint = _endpoint_label()
+    sql_count, sql_seconds = root.total_sql()
+    HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=status)
+    HTTP_DURATION.observe(root.duration, method=request.method, endpoint=endpoint)
+    SQL_QUERIES.inc(sql_count, endpoint=endpoint)
+    SQL_DURATION.inc(sql_seconds, endpoint=endpoint)
+    SQL_PER_REQUEST.observe(sql_count, endpoint=endpoint)
+
+    slow_ms = current_app.config.get('SLOW_REQUEST_MS', 1000)
+    if slow_ms and root.duration * 1000 >= slow_ms:
+        SLOW_REQUESTS.inc(endpoint=endpoint)
+        root.attrs['status'] = status
+        _log_slow(root)
+    return root
+
+
+def _after_request(response):
+    root = _finish_request(response.status_code)
+    if root is not None:
+        sql_count, sql_seconds = root.total_sql()
+        response.headers['Server-Timing'] = (
+            f'app;dur={root.duration * 1000:.1f}, '
+            f'db;dur={sql_seconds * 1000:.1f};desc="{sql_count} queries"'
+        )
+    return response
+
+
+def _teardown_request(exc):
+    # Only still open when the view raised and after_request never ran
+    if exc is not None:
+        _finish_request(500)
+
+
+def metrics_view():
+    """Prometheus scrape endpoint"""
+    from flask import Response
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _register_service_gauges(app):
+    """Expose the counters other services already keep"""
+    def from_extension(name: str, read: Callable[[Any], Optional[float]]) -> Callable[[], Optional[float]]:
+        def value():
+            service = app.extensions.get(name)
+            return read(service) if service is not None else None
+        return value
+
+    registry.gauge_callback('pocketverse_derivative_cache_hits', 'Image variant cache hits',
+                            from_extension('image_derivatives', lambda d: d.hits))
+    registry.gauge_callback('pocketverse_derivative_cache_misses', 'Image variant cache misses (renders)',
+                            from_extension('image_derivatives', lambda d: d.misses))
+    registry.gauge_callback('pocketverse_derivative_cache_bytes', 'Bytes in the image variant cache',
+                            from_extension('image_derivatives', lambda d: d.total_bytes))
+    registry.gauge_callback('pocketverse_janitor_reclaimed_bytes', 'Bytes reclaimed by the upload janitor',
+                            from_extension('janitor', lambda j: j.reclaimed_bytes_total))
+    registry.gauge_callback('pocketverse_upload_usage_bytes', 'Upload folder size at the last janitor run',
+                            from_extension('janitor', lambda j: j.last_usage_bytes))
+
+
+def init_instrumentation(app) -> MetricsRegistry:
+    """
+    Register the per-request profiler, the SQL hooks and the /metrics endpoint.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The metrics registry (also stored in app.extensions['metrics'])
+    """
+    install_sql_hooks()
+    app.before_request(_start_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if app.config.get('METRICS_ENABLED', True):
+        app.add_url_rule('/metrics', 'metrics', metrics_view)
+    _register_service_gauges(app)
+    app.extensions['metrics'] = registry
+    return registry
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Process-wide metrics registry"""
+    return registry
@@ -0,0 +1,255 @@
+"""
+Background cleanup of the upload directory.
+Two passes run on a timer thread (or once via `flask janitor`):
+  1. Temp sweep: abandoned temp_gen_* previews, half-written .incoming_* blob files
+     and *.part renders older than the temp age limit are deleted.
+  2. Quota: when UPLOAD_FOLDER grows past its byte quota, blobs nobody references
+     (ref_count 0) are evicted least recently used first, together with their
+     prompt index rows and cached variants, until usage is back under the quota.
+Stored Idempotency-Key responses past their TTL are purged on the same schedule.
+Reclaimed bytes and removed files are counted so they can be reported as metrics.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+from extensions import db
+from models import MediaBlob
+
+TEMP_PREFIXES = ('temp_gen_', '.incoming_')
+TEMP_SUFFIXES = ('.part',)
+
+
+def directory_size(root: str) -> int:
+    """Total size in bytes of the files under a directory"""
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+class Janitor:
+    """Sweeps stale temp files and enforces the upload directory quota"""
+
+    def __init__(self, app, interval_seconds: int = 600, temp_max_age_seconds: int = 24 * 3600,
+                 quota_bytes: int = 0, blob_grace_seconds: int = 24 * 3600):
+        """
+        Args:
+            app: Flask application (runs push its app context)
+            interval_seconds: Seconds between background runs
+            temp_max_age_seconds: Age after which temp files are considered abandoned
+            quota_bytes: Byte quota for UPLOAD_FOLDER (0 disables eviction)
+            blob_grace_seconds: Unreferenced blobs touched more recently than this are kept
+                (a generated image waits unreferenced until the user saves the post)
+        """
+        self.app = app
+        self.upload_folder = app.config['UPLOAD_FOLDER']
+        self.interval_seconds = interval_seconds
+        self.temp_max_age_seconds = temp_max_age_seconds
+        self.quota_bytes = quota_bytes
+        self.blob_grace_seconds = blob_grace_seconds
+        self._stop = threading.Event()
+        self._thread = None
+        self._run_lock = threading.Lock()
+
+        # Metrics
+        self.runs = 0
+        self.reclaimed_bytes_total = 0
+        self.temp_files_removed_total = 0
+        self.blobs_evicted_total = 0
+        self.last_run_at = None
+        self.last_usage_bytes = None
+
+    def sweep_temp_files(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Delete temp files older than the age limit anywhere under UPLOAD_FOLDER.
+
+        Returns:
+            {'files': removed count, 'bytes': bytes reclaimed}
+        """
+        cutoff = time.time() - self.temp_max_age_seconds
+        removed = 0
+        reclaimed = 0
+        for dirpath, _, filenames in os.walk(self.upload_folder):
+            for name in filenames:
+                if not (name.startswith(TEMP_PREFIXES) or name.endswith(TEMP_SUFFIXES)):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                    if stat.st_mtime > cutoff:
+                        continue
+                    if not dry_run:
+                        os.remove(path)
+                except OSError:
+                    continue
+                removed += 1
+                reclaimed += stat.st_size
+        return {'files': removed, 'bytes': reclaimed}
+
+    def enforce_quota(self, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Evict unreferenced blobs, least recently used first, until usage fits the quota.
+        Must be called inside an app context.
+
+        Returns:
+            {'blobs': evicted count, 'bytes': bytes reclaimed, 'usage_bytes': usage afterwards}
+        """
+        usage = directory_size(self.upload_folder)
+        evicted = 0
+        reclaimed = 0
+        if not self.quota_bytes or usage <= self.quota_bytes:
+            return {'blobs': 0, 'bytes': 0, 'usage_bytes': usage}
+
+        from services.blob_store import get_blob_store
+        blob_store = get_blob_store()
+        derivatives = self.app.extensions.get('image_derivatives')
+        grace_cutoff = datetime.utcnow() - timedelta(seconds=self.blob_grace_seconds)
+
+        candidates = (MediaBlob.query
+                      .filter(MediaBlob.ref_count == 0, MediaBlob.last_accessed_at < grace_cutoff)
+                      .order_by(MediaBlob.last_accessed_at.asc())
+                      .with_entities(MediaBlob.sha256, MediaBlob.size_bytes)
+                      .all())
+        for sha256, size_bytes in candidates:
+            if usage - reclaimed <= self.quota_bytes:
+                break
+            if dry_run:
+                freed = size_bytes
+            else:
+                freed = blob_store.delete_unreferenced(sha256, older_than=grace_cutoff)
+                if derivatives is not None:
+                    freed += derivatives.discard(sha256)
+            if freed:
+                evicted += 1
+                reclaimed += freed
+
+        if usage - reclaimed > self.quota_bytes:
+            print(f"[JANITOR] ⚠️ Upload folder still at {(usage - reclaimed) / 1e6:.1f} MB "
+                  f"(quota {self.quota_bytes / 1e6:.1f} MB); no more unreferenced blobs to evict")
+        return {'blobs': evicted, 'bytes': reclaimed, 'usage_bytes': usage - reclaimed}
+
+    def run_once(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Run both passes.
+
+        Args:
+            dry_run: Only report what would be removed
+
+        Returns:
+            Summary of the run
+        """
+        with self._run_lock, self.app.app_context():
+            started = time.perf_counter()
+            temp = self.sweep_temp_files(dry_run=dry_run)
+            try:
+                quota = self.enforce_quota(dry_run=dry_run)
+            except Exception as e:
+                db.session.rollback()
+                print(f"[JANITOR] ⚠️ Quota pass failed: {e}")
+                quota = {'blobs': 0, 'bytes': 0, 'usage_bytes': None}
+
+            if not dry_run:
+                try:
+                    from services.idempotency import purge_expired_keys
+                    purge_expired_keys(self.app.config.get('IDEMPOTENCY_KEY_TTL_SECONDS', 24 * 3600))
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"[JANITOR] ⚠️ Could not purge idempotency keys: {e}")
+                self.runs += 1
+                self.temp_files_removed_total += temp['files']
+                self.blobs_evicted_total += quota['blobs']
+                self.reclaimed_bytes_total += temp['bytes'] + quota['bytes']
+                self.last_run_at = datetime.utcnow()
+                self.last_usage_bytes = quota['usage_bytes']
+
+            summary = {
+                'dry_run': dry_run,
+                'temp_files_removed': temp['files'],
+                'blobs_evicted': quota['blobs'],
+                'reclaimed_bytes': temp['bytes'] + quota['bytes'],
+                'usage_bytes': quota['usage_bytes'],
+                'duration_seconds': round(time.perf_counter() - started, 3),
+            }
+            if summary['reclaimed_bytes']:
+                print(f"[JANITOR] {'Would reclaim' if dry_run else 'Reclaimed'} "
+                      f"{summary['reclaimed_bytes'] / 1e6:.1f} MB ({temp['files']} temp file(s), "
+                      f"{quota['blobs']} blob(s))")
+            return summary
+
+    def stats(self) -> Dict[str, Any]:
+        """Cumulative metrics since the process started"""
+        return {
+            'runs': self.runs,
+            'reclaimed_bytes_total': self.reclaimed_bytes_total,
+            'temp_files_removed_total': self.temp_files_removed_total,
+            'blobs_evicted_total': self.blobs_evicted_total,
+            'last_run_at': self.last_run_at.isoformat() if self.last_run_at else None,
+            'upload_usage_bytes': self.last_usage_bytes,
+            'quota_bytes': self.quota_bytes,
+        }
+
+    def start(self):
+        """Run in a daemon thread every interval_seconds"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='upload-janitor', daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"[JANITOR] ⚠️ Run failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def init_janitor(app) -> Janitor:
+    """
+    Create the application's janitor, register the `flask janitor` command and
+    start the background thread (unless JANITOR_INTERVAL_SECONDS is 0).
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The Janitor (also stored in app.extensions['janitor'])
+    """
+    import click
+
+    janitor = Janitor(
+        app,
+        interval_seconds=app.config.get('JANITOR_INTERVAL_SECONDS', 600),
+        temp_max_age_seconds=app.config.get('JANITOR_TEMP_MAX_AGE_SECONDS', 24 * 3600),
+        quota_bytes=app.config.get('UPLOAD_QUOTA_BYTES', 0),
+        blob_grace_seconds=app.config.get('JANITOR_BLOB_GRACE_SECONDS', 24 * 3600)
+    )
+    app.extensions['janitor'] = janitor
+
+    @app.cli.command('janitor')
+    @click.option('--dry-run', is_flag=True, help='Only report what would be removed')
+    def janitor_command(dry_run):
+        """Sweep stale temp files and enforce the upload quota once."""
+        summary = janitor.run_once(dry_run=dry_run)
+        for key, value in summary.items():
+            click.echo(f"{key}: {value}")
+
+    if janitor.interval_seconds:
+        janitor.start()
+    return janitor
+
+
+def get_janitor() -> Janitor:
+    """Janitor of the current Flask app"""
+    from flask import current_app
+    return current_app.extensions['janitor']
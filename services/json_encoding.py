@@ -0,0 +1,117 @@
+"""
+Pluggable JSON encoding for the app.
+FastJSONProvider replaces Flask's JSON provider, so jsonify() and request.get_json()
+use orjson when it is installed (JSON_ENCODER 'auto' or 'orjson') and the stdlib
+encoder otherwise. Both paths serialize the DTOs from services.dtos (dataclasses)
+directly and write datetimes as ISO 8601, the same as the models' to_dict(), rather
+than Flask's default HTTP dates.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+from functools import lru_cache
+from typing import Any, Tuple
+
+from flask.json.provider import DefaultJSONProvider
+
+ENCODER_AUTO = 'auto'
+ENCODER_ORJSON = 'orjson'
+ENCODER_STDLIB = 'stdlib'
+
+
+def _load_orjson():
+    try:
+        import orjson
+        return orjson
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls) -> Tuple[str, ...]:
+    return tuple(field.name for field in dataclasses.fields(cls))
+
+
+def _stdlib_default(o: Any) -> Any:
+    if dataclasses.is_dataclass(o):
+        # Shallow: nested DTOs are encoded by the next default() call (asdict would deep-copy)
+        return {name: getattr(o, name) for name in _field_names(type(o))}
+    if isinstance(o, date):
+        return o.isoformat()
+    return _common_default(o)
+
+
+def _common_default(o: Any) -> Any:
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson when available"""
+
+    def __init__(self, app, encoder: str = ENCODER_AUTO):
+        """
+        Args:
+            app: Flask application
+            encoder: 'auto' (orjson if installed), 'orjson' or 'stdlib'
+        """
+        super().__init__(app)
+        self._orjson = _load_orjson() if encoder in (ENCODER_AUTO, ENCODER_ORJSON) else None
+        if encoder == ENCODER_ORJSON and self._orjson is None:
+            print("[JSON] ⚠️ JSON_ENCODER=orjson but orjson isn't installed; using the stdlib encoder")
+
+    @property
+    def encoder_name(self) -> str:
+        return ENCODER_ORJSON if self._orjson is not None else ENCODER_STDLIB
+
+    def _encode(self, obj: Any, indent: bool = False) -> bytes:
+        if self._orjson is not None:
+            option = self._orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= self._orjson.OPT_SORT_KEYS
+            if indent:
+                option |= self._orjson.OPT_INDENT_2
+            return self._orjson.dumps(obj, default=_common_default, option=option)
+        return json.dumps(obj, default=_stdlib_default, ensure_ascii=self.ensure_ascii, sort_keys=self.sort_keys,
+                          indent=2 if indent else None,
+                          separators=None if indent else (',', ':')).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            kwargs.setdefault('default', _stdlib_default)
+            kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+            kwargs.setdefault('sort_keys', self.sort_keys)
+            return json.dumps(obj, **kwargs)
+        return self._encode(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if self._orjson is not None and not kwargs:
+            return self._orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._encode(obj, indent) + b'\n', mimetype=self.mimetype)
+
+
+def init_json_encoding(app) -> FastJSONProvider:
+    """
+    Install FastJSONProvider as app.json.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        The provider
+    """
+    provider = FastJSONProvider(app, encoder=app.config.get('JSON_ENCODER', ENCODER_AUTO))
+    app.json = provider
+    print(f"[JSON] ✅ Encoding responses with {provider.encoder_name}")
+    return provider
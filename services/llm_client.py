@@ -1,20 +1,14 @@
 """
 LLM client for Gemini models using the new google.genai API.
 Used by comment generator and other services for LLM-based operations.
+The google.genai / vertexai SDKs are imported on first use, so importing this
+module (and everything that imports it) stays cheap.
 """
-import os
-import tempfile
-import atexit
 import json
 import time
 from typing import Optional, Any
-from google import genai
-from google.genai import types
-from vertexai.generative_models import (
-    HarmCategory,
-    HarmBlockThreshold,
-    SafetySetting,
-)
+from services.instrumentation import span
+from services.providers import LLMProvider
 
 
 class GeminiModels:
@@ -26,7 +20,7 @@ class GeminiModels:
     THREE_POINT_ZERO_PRO_PREVIEW = "gemini-3-pro-preview"
 
 
-class GeminiLLMClient:
+class GeminiLLMClient(LLMProvider):
     """LLM client for Gemini models using google.genai API"""
     
     DEFAULT_MODEL_ID = GeminiModels.TWO_POINT_5_FLASH
@@ -36,9 +30,12 @@ class GeminiLLMClient:
     def __init__(self, model_id: str = DEFAULT_MODEL_ID):
         self.model_id = model_id
         self.gemini_client = None
-        self.temp_key_file_path = None
         self._initialized = False
     
+    @property
+    def available(self) -> bool:
+        return self.gemini_client is not None
+    
     def initialize_client(self):
         """Initialize the Gemini client with GCP credentials"""
         if self._initialized and self.gemini_client:
@@ -52,35 +49,17 @@ class GeminiLLMClient:
                 print(f"[LLM_CLIENT] ⚠️ No GCP credentials found")
                 return
             
-            # Clean existing credentials
-            if "GOOGLE_APPLICATION_CREDENTIALS" in os.environ:
-                del os.environ["GOOGLE_APPLICATION_CREDENTIALS"]
-            
-            # Prepare credentials
-            gcp_creds = GCP_CREDS.copy()
-            if "private_key" in gcp_creds:
-                gcp_creds["private_key"] = gcp_creds["private_key"].replace("\\n", "\n")
-            
-            # Create temporary file for credentials
-            with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".json") as temp_key_file:
-                json.dump(gcp_creds, temp_key_file, indent=2)
-                self.temp_key_file_path = temp_key_file.name
-            
-            # Register cleanup function
-            atexit.register(
-                lambda: os.remove(self.temp_key_file_path) 
-                if self.temp_key_file_path and os.path.exists(self.temp_key_file_path) 
-                else None
-            )
-            
-            # Set environment variable
-            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = self.temp_key_file_path
+            # Shared, proactively refreshed credentials (no temp key file / env var juggling)
+            from services.gcp_auth import get_token_manager
+            token_manager = get_token_manager(GCP_CREDS)
             
             # Initialize Gemini client
+            from google import genai
             self.gemini_client = genai.Client(
                 vertexai=True,
                 project=self.PROJECT_ID,
                 location=self.LOCATION,
+                credentials=token_manager.credentials,
                 http_options={
                     "api_version": "v1",  # Use REST instead of gRPC
                     "timeout": 300000,  # 5 minutes timeout in milliseconds
@@ -132,6 +111,9 @@ class GeminiLLMClient:
             return None
         
         try:
+            from google.genai import types
+            from vertexai.generative_models import HarmBlockThreshold, HarmCategory, SafetySetting
+            
             # Safety settings - allow all content for character comments
             safety_config = [
                 SafetySetting(
@@ -173,14 +155,15 @@ class GeminiLLMClient:
             # Use provided model_id or default
             actual_model_id = model_id or self.model_id
             
-            # Create chat
-            chat = self.gemini_client.chats.create(
-                model=actual_model_id,
-                config=generate_content_config,
-            )
-            
-            # Send message
-            response = chat.send_message(message=prompt)
+            with span('llm.generate', model=actual_model_id):
+                # Create chat
+                chat = self.gemini_client.chats.create(
+                    model=actual_model_id,
+                    config=generate_content_config,
+                )
+                
+                # Send message
+                response = chat.send_message(message=prompt)
             
             # Check for safety blocks
             if not response.text:
@@ -0,0 +1,117 @@
+"""
+Response helpers for user media (/uploads/...).
+Content-addressed files never change, so they are sent with a strong ETag derived
+from their hash and `Cache-Control: immutable`; a revalidation is answered with a
+304 before the filesystem is touched. Everything goes through a single stat, Range
+requests (video scrubbing) are handled by werkzeug, and when the app runs behind
+nginx or Apache the file body can be handed off with X-Accel-Redirect / X-Sendfile.
+"""
+
+import mimetypes
+import os
+from typing import BinaryIO, Optional
+
+from flask import Response, current_app, request, send_file
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Types missing from some platforms' mime tables
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('video/mp4', '.mp4')
+mimetypes.add_type('video/webm', '.webm')
+
+
+def guess_mime_type(filename: str) -> str:
+    """MIME type of a media file by extension"""
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+def not_modified(etag: str) -> Optional[Response]:
+    """
+    Answer a revalidation without touching the file.
+
+    Returns:
+        A 304 response if the client already has this ETag, otherwise None
+    """
+    if etag not in request.if_none_match:
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def send_media(path: str, mimetype: Optional[str] = None, etag: Optional[str] = None,
+               immutable: bool = False) -> Response:
+    """
+    Send a media file with caching headers, conditional GET and Range support.
+
+    Args:
+        path: Absolute file path
+        mimetype: Content type (default: guessed from the extension)
+        etag: Strong ETag to use (content-addressed files pass their hash); default is
+            werkzeug's mtime/size based tag
+        immutable: Whether the file at this URL can never change
+
+    Returns:
+        Response (404 if the file does not exist)
+    """
+    from flask import abort
+
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+    mimetype = mimetype or guess_mime_type(path)
+
+    accel_prefix = current_app.config.get('MEDIA_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        response = _accel_redirect(path, accel_prefix, mimetype, stat)
+        if etag:
+            response.set_etag(etag)
+    else:
+        # USE_X_SENDFILE (Flask config) makes send_file emit X-Sendfile instead of the body
+        response = send_file(path, mimetype=mimetype, conditional=True, etag=etag or True,
+                             last_modified=stat.st_mtime, max_age=None)
+
+    if immutable:
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = f"public, max-age={current_app.config.get('MEDIA_MAX_AGE', 3600)}"
+    return response
+
+
+def send_media_stream(stream: BinaryIO, filename: str, etag: Optional[str] = None) -> Response:
+    """
+    Stream an immutable object from a remote media store (no Range support).
+
+    Args:
+        stream: Readable binary stream (closed when the response finishes)
+        filename: Name used to pick the content type
+        etag: Strong ETag of the object
+    """
+    def generate():
+        with stream:
+            while True:
+                chunk = stream.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+    response = Response(generate(), mimetype=guess_mime_type(filename), direct_passthrough=True)
+    if etag:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def _accel_redirect(path: str, prefix: str, mimetype: str, stat: os.stat_result) -> Response:
+    """Let nginx send the body (and handle Range / If-None-Match) from an internal location"""
+    root = os.path.abspath(current_app.config['UPLOAD_FOLDER'])
+    relative = os.path.relpath(os.path.abspath(path), root).replace(os.sep, '/')
+    response = Response(mimetype=mimetype)
+    response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + relative
+    response.last_modified = stat.st_mtime
+    return response
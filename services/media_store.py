@@ -0,0 +1,295 @@
+"""
+Pluggable object storage for media files.
+MediaStore is the small put/open/delete interface the blob store and the batch
+generation scripts write through. LocalMediaStore keeps objects in a directory
+(the default, and the stand-in used for development and tests); GCSMediaStore
+keeps them in a Google Cloud Storage bucket using one shared client, resumable
+chunked uploads streamed from disk, and a thread pool for multi-file uploads.
+Switching backends is a configuration change (MEDIA_STORE_BACKEND).
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+
+COPY_CHUNK_SIZE = 1024 * 1024
+GCS_CHUNK_SIZE = 8 * 1024 * 1024  # Resumable upload chunk size (must be a multiple of 256 KB)
+DEFAULT_UPLOAD_WORKERS = 8
+
+# Source for put_many: a file path or in-memory bytes
+UploadSource = Union[str, bytes]
+
+
+class MediaStore(ABC):
+    """Interface for media object storage. Keys are '/'-separated relative names."""
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        """Store an in-memory object and return its URI"""
+
+    @abstractmethod
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None, move: bool = False) -> str:
+        """
+        Store a local file and return its URI.
+
+        Args:
+            key: Object key
+            path: Local file to upload
+            content_type: MIME type
+            move: The caller no longer needs the file (lets local storage rename instead of copy)
+        """
+
+    @abstractmethod
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> str:
+        """Store a readable binary stream without loading it into memory and return its URI"""
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """Open an object for reading"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object is stored under key"""
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """Delete an object; returns False if it did not exist"""
+
+    @abstractmethod
+    def rename(self, key: str, new_key: str) -> bool:
+        """Move an object to another key (replacing it); returns False if it did not exist"""
+
+    @abstractmethod
+    def uri_for(self, key: str) -> str:
+        """Canonical URI of an object (file path or gs:// URL)"""
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Filesystem path of an object, or None if the backend is not on local disk"""
+        return None
+
+    def put_many(self, items: List[Tuple[str, UploadSource, Optional[str]]],
+                 max_workers: int = DEFAULT_UPLOAD_WORKERS) -> List[Union[str, Exception]]:
+        """
+        Upload several objects concurrently.
+
+        Args:
+            items: (key, file path or bytes, content type) tuples
+            max_workers: Parallel uploads
+
+        Returns:
+            URI, or the exception raised, for each item in input order
+        """
+        def upload(item):
+            key, source, content_type = item
+            try:
+                if isinstance(source, (bytes, bytearray)):
+                    return self.put_bytes(key, bytes(source), content_type)
+                return self.put_file(key, source, content_type)
+            except Exception as e:
+                return e
+
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='media-upload') as pool:
+            return list(pool.map(upload, items))
+
+
+class LocalMediaStore(MediaStore):
+    """Objects stored as files under a root directory (writes are atomic renames)"""
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Directory holding the objects (created if missing)
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def local_path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split('/')))
+        if path != self.root and not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid media key: {key}")
+        return path
+
+    def uri_for(self, key: str) -> str:
+        return self.local_path(key)
+
+    def _write_atomic(self, key: str, write: Callable[[BinaryIO], None]) -> str:
+        path = self.local_path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.incoming_')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return path
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        return self._write_atomic(key, lambda f: f.write(data))
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> str:
+        return self._write_atomic(key, lambda f: shutil.copyfileobj(stream, f, COPY_CHUNK_SIZE))
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None, move: bool = False) -> str:
+        if move:
+            target = self.local_path(key)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            try:
+                os.replace(path, target)
+                return target
+            except OSError:
+                pass  # Different filesystem; fall back to copying
+        with open(path, 'rb') as f:
+            target = self.put_stream(key, f, content_type)
+        if move:
+            os.remove(path)
+        return target
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self.local_path(key), 'rb')
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.remove(self.local_path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def rename(self, key: str, new_key: str) -> bool:
+        target = self.local_path(new_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.replace(self.local_path(key), target)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+_storage_clients: Dict[Tuple[str, str], object] = {}
+_storage_clients_lock = threading.Lock()
+
+
+def get_storage_client(creds: Optional[dict] = None, project: Optional[str] = None):
+    """
+    Process-wide google.cloud.storage.Client (thread-safe, keeps its HTTP connection pool warm).
+
+    Args:
+        creds: Service-account info (default: creds.get_gcp_creds())
+        project: GCP project (default: from the credentials)
+    """
+    if creds is None:
+        from creds import get_gcp_creds
+        creds = get_gcp_creds()
+    project = project or creds.get('project_id')
+    key = (creds.get('client_email', ''), project or '')
+    with _storage_clients_lock:
+        client = _storage_clients.get(key)
+        if client is None:
+            from google.cloud import storage
+            from services.gcp_auth import get_token_manager
+            credentials = get_token_manager(creds).credentials
+            client = storage.Client(credentials=credentials, project=project)
+            _storage_clients[key] = client
+        return client
+
+
+class GCSMediaStore(MediaStore):
+    """Objects stored in a Google Cloud Storage bucket"""
+
+    def __init__(self, bucket_name: str, prefix: str = '', creds: Optional[dict] = None,
+                 project: Optional[str] = None, chunk_size: int = GCS_CHUNK_SIZE, client=None):
+        """
+        Args:
+            bucket_name: GCS bucket
+            prefix: Key prefix inside the bucket (e.g. 'media/')
+            creds: Service-account info (default: creds.get_gcp_creds())
+            project: GCP project (default: from the credentials)
+            chunk_size: Resumable upload chunk size in bytes (multiple of 256 KB)
+            client: Existing storage.Client to use instead of the shared one
+        """
+        self.bucket_name = bucket_name
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.chunk_size = chunk_size
+        self.client = client or get_storage_client(creds, project)
+        self.bucket = self.client.bucket(bucket_name)
+
+    def _blob(self, key: str):
+        # chunk_size switches the upload to a resumable session sent chunk by chunk
+        return self.bucket.blob(self.prefix + key, chunk_size=self.chunk_size)
+
+    def uri_for(self, key: str) -> str:
+        return f"gs://{self.bucket_name}/{self.prefix}{key}"
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> str:
+        # Small objects go in a single request; the resumable protocol only pays off for large ones
+        blob = self.bucket.blob(self.prefix + key) if len(data) <= self.chunk_size else self._blob(key)
+        blob.upload_from_string(data, content_type=content_type)
+        return self.uri_for(key)
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: Optional[str] = None) -> str:
+        self._blob(key).upload_from_file(stream, content_type=content_type, rewind=False)
+        return self.uri_for(key)
+
+    def put_file(self, key: str, path: str, content_type: Optional[str] = None, move: bool = False) -> str:
+        self._blob(key).upload_from_filename(path, content_type=content_type)
+        if move:
+            os.remove(path)
+        return self.uri_for(key)
+
+    def open(self, key: str) -> BinaryIO:
+        return self._blob(key).open('rb')
+
+    def exists(self, key: str) -> bool:
+        return self.bucket.blob(self.prefix + key).exists()
+
+    def delete(self, key: str) -> bool:
+        from google.api_core.exceptions import NotFound
+        try:
+            self.bucket.blob(self.prefix + key).delete()
+            return True
+        except NotFound:
+            return False
+
+    def rename(self, key: str, new_key: str) -> bool:
+        from google.api_core.exceptions import NotFound
+        try:
+            # Server-side copy followed by a delete (GCS has no atomic rename)
+            self.bucket.rename_blob(self.bucket.blob(self.prefix + key), self.prefix + new_key)
+            return True
+        except NotFound:
+            return False
+
+
+def create_media_store(config) -> MediaStore:
+    """
+    Build the media store selected by configuration.
+
+    Args:
+        config: Mapping with MEDIA_STORE_BACKEND ('local' or 'gcs'), BLOB_FOLDER / UPLOAD_FOLDER
+            for the local backend and MEDIA_GCS_BUCKET / MEDIA_GCS_PREFIX for GCS
+
+    Returns:
+        MediaStore instance
+    """
+    backend = (config.get('MEDIA_STORE_BACKEND') or 'local').lower()
+    if backend == 'gcs':
+        bucket = config.get('MEDIA_GCS_BUCKET')
+        if not bucket:
+            raise ValueError("MEDIA_GCS_BUCKET must be set when MEDIA_STORE_BACKEND is 'gcs'")
+        return GCSMediaStore(bucket, prefix=config.get('MEDIA_GCS_PREFIX') or '')
+    if backend != 'local':
+        raise ValueError(f"Unknown MEDIA_STORE_BACKEND: {backend}")
+    root = config.get('BLOB_FOLDER') or os.path.join(config['UPLOAD_FOLDER'], 'blobs')
+    return LocalMediaStore(root)
@@ -0,0 +1,87 @@
+"""
+Provider interfaces and factories for the AI backends.
+Code that needs an LLM or an image generator asks a factory instead of constructing
+the Vertex AI client directly, so the backend is a configuration choice:
+LLM_PROVIDER selects 'gemini' (default) or 'fake', and IMAGE_PROVIDER /
+DEFAULT_IMAGE_PROVIDER selects an image provider, where 'fake' is the offline
+stand-in from services.fake_providers used for load testing.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+FAKE_PROVIDER = 'fake'
+
+
+class LLMProvider(ABC):
+    """Text generation backend (GeminiLLMClient, FakeLLMClient)"""
+
+    @property
+    def available(self) -> bool:
+        """Whether the backend is ready to serve requests"""
+        return True
+
+    def initialize_client(self):
+        pass
+
+    @abstractmethod
+    def generate(self, prompt: str, system_prompt: Optional[str] = None, temperature: float = 0.7,
+                 max_tokens: Optional[int] = None, top_p: float = 0.8, top_k: int = 40,
+                 model_id: Optional[str] = None) -> Optional[str]:
+        """Generated text, or None on error"""
+
+    def generate_simple(self, prompt: str, temperature: float = 0.7,
+                        max_tokens: Optional[int] = None) -> Optional[str]:
+        return self.generate(prompt=prompt, temperature=temperature)
+
+
+class ImageProvider(ABC):
+    """Image generation backend (ImageGenerator, FakeImageGenerator)"""
+
+    @abstractmethod
+    def generate_image(self, prompt: str, story_context: Optional[Dict[str, Any]] = None,
+                       **kwargs) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict with "success", "image_bytes" (on success: bytes or a readable binary stream, stored
+            as-is by the caller), "error" (on failure) and "extra_info"
+        """
+
+
+def provider_setting(name: str, default: Any = None) -> Any:
+    """A setting from the current app's config, or from Config outside an app (scripts)"""
+    from flask import current_app, has_app_context
+    if has_app_context():
+        return current_app.config.get(name, default)
+    from config import Config
+    return getattr(Config, name, default)
+
+
+def create_llm_client(model_id: Optional[str] = None) -> LLMProvider:
+    """
+    LLM client selected by LLM_PROVIDER.
+
+    Args:
+        model_id: Model to use (default: the backend's default model)
+    """
+    if (provider_setting('LLM_PROVIDER') or 'gemini').lower() == FAKE_PROVIDER:
+        from services.fake_providers import FakeLLMClient
+        return FakeLLMClient.from_settings(model_id=model_id)
+    from services.llm_client import GeminiLLMClient
+    return GeminiLLMClient(model_id=model_id) if model_id else GeminiLLMClient()
+
+
+def create_image_generator(provider: Optional[str] = None, canon_directory: Optional[str] = None) -> ImageProvider:
+    """
+    Image generator for a provider name.
+
+    Args:
+        provider: Provider name (default: DEFAULT_IMAGE_PROVIDER); 'fake' selects the offline stand-in
+        canon_directory: PromoCanon directory used to enrich prompts
+    """
+    provider = provider or provider_setting('DEFAULT_IMAGE_PROVIDER', 'nanobanana')
+    if provider == FAKE_PROVIDER:
+        from services.fake_providers import FakeImageGenerator
+        return FakeImageGenerator.from_settings()
+    from services.image_generator import ImageGenerator
+    return ImageGenerator(provider=provider, canon_directory=canon_directory)
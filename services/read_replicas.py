@@ -0,0 +1,157 @@
+"""
+Read-replica routing.
+DATABASE_REPLICA_URLS adds one SQLAlchemy bind per replica (replica_1, replica_2, ...).
+Views decorated with @read_replica run their queries on a replica picked at random
+per request; everything else, and any flush, DML statement or SELECT ... FOR UPDATE,
+goes to the primary. Once a session has written it stays on the primary.
+
+Read-your-writes: a request that writes marks the client's session cookie, and for
+REPLICA_STICKY_SECONDS afterwards (longer than the replicas' lag) that client's
+reads go to the primary too, so a user always sees their own new post or vote.
+The feed cache uses the same mark to never serve these clients a stale feed.
+
+Replication itself is the database's job. For local testing with SQLite files,
+`flask sync-replicas` copies the primary into every SQLite replica.
+"""
+
+import random
+import time
+from functools import wraps
+from typing import List, Optional
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+from services.instrumentation import registry
+
+REPLICA_BIND_PREFIX = 'replica_'
+STICKY_SESSION_KEY = 'db_primary_until'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+DB_ROUTED_READS = registry.counter(
+    'pocketverse_db_routed_reads_total', 'Requests to @read_replica views by database target', ('target',))
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session sending reads of replica-routed requests to a replica bind"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or not has_request_context():
+            return engine
+
+        writing = (self._flushing or getattr(clause, 'is_dml', False)
+                   or getattr(clause, '_for_update_arg', None) is not None)
+        if writing:
+            self.info['db_wrote'] = True
+            g.db_wrote = True
+            return engine
+
+        replica = g.get('db_replica')
+        if replica is None or self.info.get('db_wrote') or engine is not self._db.engines.get(None):
+            return engine
+        return self._db.engines[replica]
+
+
+def replica_bind_keys(app=None) -> List[str]:
+    """Bind keys of the configured replicas (empty when there are none)"""
+    from flask import current_app
+    return (app or current_app).extensions.get('read_replicas', [])
+
+
+def choose_replica() -> Optional[str]:
+    """
+    Replica bind for the current request, or None to stay on the primary
+    (no replicas, a write method, or a client inside its read-your-writes window).
+    """
+    replicas = replica_bind_keys()
+    if not replicas or request.method not in READ_METHODS:
+        return None
+    if wrote_recently():
+        DB_ROUTED_READS.inc(target='primary_sticky')
+        return None
+    DB_ROUTED_READS.inc(target='replica')
+    return random.choice(replicas)
+
+
+def wrote_recently() -> bool:
+    """Whether the current client wrote within the last REPLICA_STICKY_SECONDS"""
+    return session.get(STICKY_SESSION_KEY, 0) > time.time()
+
+
+def read_replica(view):
+    """Decorator for read-only views whose queries may be served by a read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_replica = choose_replica()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def _mark_sticky(response):
+    if g.get('db_wrote'):
+        from flask import current_app
+        session[STICKY_SESSION_KEY] = time.time() + current_app.config.get('REPLICA_STICKY_SECONDS', 10)
+    return response
+
+
+def sync_sqlite_replicas(app) -> List[str]:
+    """
+    Copy the primary SQLite database into every SQLite replica (SQLite backup API).
+
+    Returns:
+        Bind keys that were synced
+    """
+    from extensions import db
+
+    synced = []
+    with app.app_context():
+        primary = db.engines[None]
+        if primary.dialect.name != 'sqlite':
+            return synced
+        for key in replica_bind_keys(app):
+            replica = db.engines[key]
+            if replica.dialect.name != 'sqlite':
+                continue
+            source, target = primary.raw_connection(), replica.raw_connection()
+            try:
+                source.driver_connection.backup(target.driver_connection)
+            finally:
+                source.close()
+                target.close()
+            synced.append(key)
+    return synced
+
+
+def init_read_replicas(app) -> List[str]:
+    """
+    Register a bind per DATABASE_REPLICA_URLS entry, the read-your-writes hook and the
+    `flask sync-replicas` command. Must run before init_database() creates the engines.
+
+    Args:
+        app: Flask application
+
+    Returns:
+        Replica bind keys (also stored in app.extensions['read_replicas'])
+    """
+    import click
+
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    keys = []
+    for index, url in enumerate(app.config.get('DATABASE_REPLICA_URLS') or [], start=1):
+        key = f"{REPLICA_BIND_PREFIX}{index}"
+        binds[key] = url
+        keys.append(key)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['read_replicas'] = keys
+    app.after_request(_mark_sticky)
+
+    @app.cli.command('sync-replicas')
+    def sync_replicas_command():
+        """Copy the primary SQLite database into the SQLite read replicas (local testing)."""
+        synced = sync_sqlite_replicas(app)
+        click.echo(f"Synced {', '.join(synced)}" if synced else "No SQLite primary / replicas to sync")
+
+    if keys:
+        print(f"[DB] ✅ Read replicas: {', '.join(keys)} (sticky {app.config.get('REPLICA_STICKY_SECONDS', 10)}s)")
+    return keys
@@ -0,0 +1,40 @@
+"""
+Tests for the mention check that lets a character comment without an LLM relevance call.
+"""
+
+from services.comment_generator import canon_character_matcher, own_character_matcher
+
+
+class StubCanonLoader:
+    canon_dir = '/stub/canon'
+
+    def load_characters(self):
+        return {
+            'Nora Smith': {'aliases': ['Nor']},
+            'Jacob Smith': {},
+        }
+
+
+def test_full_name_is_a_mention():
+    matcher = own_character_matcher('Nora Smith')
+    assert matcher.mentions_character('Did you see what Nora Smith did?', 'Nora Smith')
+
+
+def test_first_name_alone_is_not_a_mention():
+    # "Nora" is a common name: a post about someone else called Nora must not trigger a comment
+    matcher = own_character_matcher('Nora Smith')
+    assert not matcher.mentions_character('My cousin Nora loved this episode', 'Nora Smith')
+
+
+def test_own_aliases_are_mentions():
+    matcher = own_character_matcher('Nora Smith', ('The Heiress',))
+    assert matcher.mentions_character('the heiress strikes again', 'Nora Smith')
+
+
+def test_canon_matcher_uses_full_names_and_canon_aliases():
+    matcher = canon_character_matcher(StubCanonLoader())
+    assert matcher.mentions_character('Jacob Smith lied', 'Jacob Smith')
+    assert matcher.mentions_character('Nor is back', 'Nora Smith')
+    assert not matcher.mentions_character('Jacob lied', 'Jacob Smith')
+    assert matcher.resolve('Nora') is None
+    assert canon_character_matcher(StubCanonLoader()) is matcher
@@ -0,0 +1,177 @@
+"""
+Tests for the local media store and the blob store on top of it.
+LocalMediaStore is the filesystem stand-in for GCS, so these run without credentials.
+"""
+
+import hashlib
+import os
+
+import pytest
+from flask import Flask
+
+from extensions import db
+from models import MediaBlob
+from services.blob_store import BlobStore
+from services.media_store import LocalMediaStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalMediaStore(str(tmp_path / 'media'))
+
+
+@pytest.fixture
+def blob_store(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield BlobStore(LocalMediaStore(str(tmp_path / 'blobs')))
+        db.session.remove()
+
+
+# ==================== LocalMediaStore ====================
+
+def test_put_bytes_is_atomic(store):
+    path = store.put_bytes('a/b/image.png', b'first')
+    assert path == os.path.join(store.root, 'a', 'b', 'image.png')
+    assert store.put_bytes('a/b/image.png', b'second') == path
+
+    with store.open('a/b/image.png') as f:
+        assert f.read() == b'second'
+    # The temporary file was renamed into place, nothing is left behind
+    assert os.listdir(os.path.dirname(path)) == ['image.png']
+
+
+def test_failed_write_leaves_no_partial_object(store):
+    class BrokenStream:
+        def read(self, size=-1):
+            raise IOError('connection reset')
+
+    with pytest.raises(IOError):
+        store.put_stream('broken.png', BrokenStream())
+    assert not store.exists('broken.png')
+    assert os.listdir(store.root) == []
+
+
+def test_put_file_move(store, tmp_path):
+    source = tmp_path / 'upload.png'
+    source.write_bytes(b'data')
+    path = store.put_file('moved.png', str(source), move=True)
+    assert not source.exists()
+    with open(path, 'rb') as f:
+        assert f.read() == b'data'
+
+
+@pytest.mark.parametrize('key', ['../escape.png', 'a/../../escape.png', '../../etc/passwd'])
+def test_rejects_path_traversal_keys(store, key):
+    with pytest.raises(ValueError):
+        store.put_bytes(key, b'data')
+    assert not os.path.exists(os.path.join(os.path.dirname(store.root), 'escape.png'))
+
+
+def test_delete(store):
+    store.put_bytes('gone.png', b'data')
+    assert store.delete('gone.png') is True
+    assert not store.exists('gone.png')
+    assert store.delete('gone.png') is False
+
+
+def test_put_many(store, tmp_path):
+    source = tmp_path / 'from_disk.png'
+    source.write_bytes(b'disk')
+    results = store.put_many([
+        ('one.png', b'one', 'image/png'),
+        ('two.png', str(source), 'image/png'),
+        ('../bad.png', b'bad', None),
+        ('three.png', b'three', None),
+    ], max_workers=2)
+
+    assert results[0] == store.local_path('one.png')
+    assert results[1] == store.local_path('two.png')
+    assert isinstance(results[2], ValueError)
+    assert results[3] == store.local_path('three.png')
+    with store.open('two.png') as f:
+        assert f.read() == b'disk'
+
+
+def test_incomplete_backend_fails_at_construction():
+    from services.media_store import MediaStore
+
+    class WriteOnlyStore(MediaStore):
+        def put_bytes(self, key, data, content_type=None):
+            return key
+
+    with pytest.raises(TypeError):
+        WriteOnlyStore()
+
+
+# ==================== BlobStore ====================
+
+def test_blob_put_deduplicates(blob_store):
+    first = blob_store.put_bytes(b'same bytes', 'PNG')
+    second = blob_store.put_bytes(b'same bytes', 'png')
+
+    sha256 = hashlib.sha256(b'same bytes').hexdigest()
+    assert first.sha256 == second.sha256 == sha256
+    assert first.extension == 'png'
+    assert MediaBlob.query.count() == 1
+    path = blob_store.path_for(sha256, 'png')
+    assert path.endswith(os.path.join(sha256[:2], sha256[2:4], f'{sha256}.png'))
+    assert blob_store.exists(first)
+
+
+def test_blob_put_stream_matches_put_bytes(blob_store, tmp_path):
+    source = tmp_path / 'stream.png'
+    source.write_bytes(b'x' * 3000)
+    with open(source, 'rb') as f:
+        streamed = blob_store.put_stream(f, 'png')
+
+    assert streamed.sha256 == blob_store.put_bytes(b'x' * 3000, 'png').sha256
+    assert streamed.size_bytes == 3000
+    assert not [name for name in os.listdir(blob_store.staging_dir) if name.startswith('.incoming_')]
+
+
+def test_blob_delete_only_when_unreferenced(blob_store):
+    blob = blob_store.put_bytes(b'referenced', 'png')
+    sha256 = blob.sha256
+    assert blob_store.add_ref(sha256)
+    db.session.commit()
+
+    assert blob_store.delete_unreferenced(sha256) == 0
+    assert blob_store.exists(blob)
+
+    assert blob_store.release(sha256)
+    db.session.commit()
+    assert blob_store.delete_unreferenced(sha256) == len(b'referenced')
+    assert db.session.get(MediaBlob, sha256) is None
+    assert not os.path.exists(blob_store.path_for(sha256, 'png'))
+
+
+
+def test_blob_delete_skips_recently_used(blob_store):
+    from datetime import datetime, timedelta
+
+    blob = blob_store.put_bytes(b'fresh', 'png')
+    assert blob_store.delete_unreferenced(blob.sha256, older_than=datetime.utcnow() - timedelta(hours=1)) == 0
+    assert blob_store.exists(blob)
+
+
+def test_blob_delete_racing_put_keeps_object(blob_store, monkeypatch):
+    blob = blob_store.put_bytes(b'racing', 'png')
+    sha256 = blob.sha256
+    rename = blob_store.media.rename
+
+    def rename_then_put(key, new_key):
+        moved = rename(key, new_key)
+        if new_key.endswith('.deleting'):
+            # The same bytes are stored while the object is moved aside
+            blob_store.put_bytes(b'racing', 'png')
+        return moved
+
+    monkeypatch.setattr(blob_store.media, 'rename', rename_then_put)
+    assert blob_store.delete_unreferenced(sha256) == 0
+    assert db.session.get(MediaBlob, sha256) is not None
+    assert blob_store.exists(blob)
+    assert not os.path.exists(blob_store.path_for(sha256, 'png') + '.deleting')